@@ -6,65 +6,185 @@ dos novos colaboradores da The100s.
 """
 
 import logging
-from typing import Any, Dict, List, Optional, Text
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Text, Tuple
 
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
-from rasa_sdk.events import SlotSet
+from rasa_sdk.events import ActionExecuted, SessionStarted, SlotSet
+
+from actions.baixa_confianca import RegistoBaixaConfianca, intents_provaveis
+from actions.conteudo_base import (
+    CONTEUDO_BASE,
+    DOCUMENTOS_BASE,
+    FAQ_BASE,
+    FILA_PADRAO,
+    FILAS_BASE,
+    QUIZ_PERGUNTAS,
+    REGRAS_BASE,
+)
+from actions.db import configuracao_db, reiniciar_pools
+from actions.documentos import (
+    CatalogoDocumentos,
+    ResolvedorLigacoes,
+    carregar_documentos_postgres,
+    formatar_documentos,
+)
+from actions.empresas import CachePacotes, PacoteConteudo, carregador_yaml
+from actions.encaminhamento import (
+    Fila,
+    TabelaEncaminhamento,
+    carregar_encaminhamento_postgres,
+)
+from actions.etapas import CalendarioOnboarding, carregar_colaboradores_postgres
+from actions.faq import LIMIAR_RELACIONADAS, LIMIAR_RESPOSTA, IndiceFaq, carregar_faq_postgres
+from actions.feedback import RegistoFeedback, criar_fila_feedback
+from actions.graph import (
+    agendar_no_primeiro_horario_livre,
+    obter_cliente_graph,
+    reiniciar_cliente_graph,
+)
+from actions.metricas import METRICAS, iniciar_servidor_metricas_se_configurado, instrumentar
+from actions.perfis import DiretorioColaboradores, carregar_perfil_postgres
+from actions.quiz import (
+    BANCO_GERAL,
+    PROGRESSO_INICIAL,
+    IndiceQuiz,
+    carregar_perguntas_postgres,
+    cursor_progresso,
+    pontuacao_progresso,
+    quiz_concluido,
+    registar_resposta,
+)
+from actions.respostas import corrigir
+from actions.templates import TEMPLATES
 
 logger = logging.getLogger(__name__)
 
-# ---------------------------------------------------------------------------
-# Dados do Quiz (MVP — hardcoded; substituir por base de dados no futuro)
-# ---------------------------------------------------------------------------
-
-QUIZ_PERGUNTAS = [
-    {
-        "id": 1,
-        "pergunta": (
-            "❓ **Pergunta 1/3:** Qual é a missão da The100s?\n\n"
-            "A) Ser a maior empresa do mundo\n"
-            "B) Proporcionar soluções de qualidade superior, mantendo um ambiente positivo e inclusivo\n"
-            "C) Maximizar o lucro a qualquer custo\n"
-            "D) Reduzir custos operacionais"
-        ),
-        "resposta_correta": "b",
-        "explicacao": (
-            "✅ A missão da The100s é proporcionar soluções de qualidade superior "
-            "aos nossos clientes, mantendo um ambiente de trabalho positivo e inclusivo."
-        ),
-    },
-    {
-        "id": 2,
-        "pergunta": (
-            "❓ **Pergunta 2/3:** Qual dos seguintes NÃO é um valor da The100s?\n\n"
-            "A) Integridade\n"
-            "B) Competição interna\n"
-            "C) Inovação\n"
-            "D) Trabalho em Equipa"
-        ),
-        "resposta_correta": "b",
-        "explicacao": (
-            "✅ Os valores da The100s são: Integridade, Inovação, Excelência, "
-            "Trabalho em Equipa e Respeito. A 'Competição interna' não faz parte dos nossos valores."
-        ),
-    },
-    {
-        "id": 3,
-        "pergunta": (
-            "❓ **Pergunta 3/3:** Quantos dias úteis de férias tem um colaborador da The100s por ano?\n\n"
-            "A) 20 dias\n"
-            "B) 25 dias\n"
-            "C) 22 dias\n"
-            "D) 30 dias"
-        ),
-        "resposta_correta": "c",
-        "explicacao": (
-            "✅ Os colaboradores da The100s têm direito a 22 dias úteis de férias "
-            "por ano, conforme a legislação laboral portuguesa."
-        ),
-    },
-]
+# Temas sugeridos quando o bot não percebe uma mensagem, pela intent mais provável
+SUGESTOES_FALLBACK = {
+    "pedir_info_empresa": "🏢 Informações sobre a empresa",
+    "pedir_info_beneficios": "🎁 Benefícios",
+    "pedir_documentos": "📄 Documentos de onboarding",
+    "pedir_video_boas_vindas": "🎬 Vídeo de boas-vindas",
+    "iniciar_quiz": "📝 Quiz de conhecimento",
+    "agendar_reuniao": "📅 Agendamento de reuniões",
+    "pedir_ajuda_ti": "🖥️ Suporte TI",
+    "pedir_apresentacao_equipa": "👥 Apresentação da equipa",
+    "pedir_faq": "❓ Perguntas frequentes",
+    "dar_feedback": "💬 Dar feedback",
+}
+MAXIMO_SUGESTOES = 2
+LIMIAR_SUGESTAO = 0.1
+# Ao fim deste número de fallbacks seguidos, a conversa é encaminhada para uma pessoa
+FALLBACKS_ATE_ENCAMINHAR = 2
+# Intents do histórico consideradas no encaminhamento
+HISTORICO_ENCAMINHAMENTO = 5
+
+
+DIAS_SEMANA = (
+    "segunda-feira",
+    "terça-feira",
+    "quarta-feira",
+    "quinta-feira",
+    "sexta-feira",
+    "sábado",
+    "domingo",
+)
+
+# Índice em memória dos bancos do quiz, carregado no arranque do action server
+INDICE_QUIZ = IndiceQuiz(
+    bancos_base={BANCO_GERAL: QUIZ_PERGUNTAS},
+    carregador=carregar_perguntas_postgres if configuracao_db() else None,
+)
+INDICE_QUIZ.aquecer()
+
+# Calendário das etapas de onboarding por colaborador, lido da tabela ``colaboradores``
+CALENDARIO_ONBOARDING = CalendarioOnboarding(
+    carregador=carregar_colaboradores_postgres if configuracao_db() else None,
+)
+CALENDARIO_ONBOARDING.aquecer()
+
+# Perguntas frequentes (matriz NumPy, atualizada sem novo treino do modelo)
+INDICE_FAQ = IndiceFaq(
+    FAQ_BASE,
+    carregador=carregar_faq_postgres if configuracao_db() else None,
+)
+INDICE_FAQ.aquecer()
+
+# Documentos por departamento/cargo, com as ligações resolvidas pela Graph API
+CATALOGO_DOCUMENTOS = CatalogoDocumentos(
+    DOCUMENTOS_BASE,
+    carregador=carregar_documentos_postgres if configuracao_db() else None,
+)
+CATALOGO_DOCUMENTOS.aquecer()
+RESOLVEDOR_LIGACOES = ResolvedorLigacoes()
+
+# Diretório dos colaboradores (cache LRU à frente da tabela ``colaboradores``)
+DIRETORIO_COLABORADORES = DiretorioColaboradores(
+    carregador=carregar_perfil_postgres if configuracao_db() else None,
+)
+
+# Filas de atendimento humano por departamento e intent (ver actions/encaminhamento.py)
+TABELA_ENCAMINHAMENTO = TabelaEncaminhamento(
+    FILAS_BASE,
+    REGRAS_BASE,
+    FILA_PADRAO,
+    carregador=carregar_encaminhamento_postgres if configuracao_db() else None,
+)
+TABELA_ENCAMINHAMENTO.aquecer()
+
+# Conteúdos de cada empresa do grupo: o pacote por omissão é o da The100s,
+# os restantes são lidos de actions/conteudos no primeiro pedido de cada empresa
+PACOTES = CachePacotes(
+    PacoteConteudo(
+        "the100s", "The100s", TEMPLATES, INDICE_QUIZ, CATALOGO_DOCUMENTOS, TABELA_ENCAMINHAMENTO, INDICE_FAQ
+    ),
+    carregador=carregador_yaml(CONTEUDO_BASE),
+)
+
+# Mensagens que acabaram num fallback, para rever e acrescentar ao treino
+REGISTO_BAIXA_CONFIANCA = RegistoBaixaConfianca(os.getenv("BAIXA_CONFIANCA_FICHEIRO"))
+
+# Fila de feedback gravada em lotes no PostgreSQL por uma thread de escrita
+FILA_FEEDBACK = criar_fila_feedback(com_base_de_dados=configuracao_db() is not None)
+
+# Endpoint Prometheus com as métricas das actions (ver actions/metricas.py)
+iniciar_servidor_metricas_se_configurado(os.getenv("METRICS_PORT"))
+
+
+def _reiniciar_apos_fork() -> None:
+    """Estado por processo nos workers criados por ``actions.servidor``.
+
+    Os índices e caches carregados no processo pai ficam partilhados
+    (copy-on-write); apenas locks, threads, ligações e sessões HTTP são
+    recriados em cada worker.
+    """
+    INDICE_QUIZ.reiniciar_apos_fork()
+    CALENDARIO_ONBOARDING.reiniciar_apos_fork()
+    INDICE_FAQ.reiniciar_apos_fork()
+    CATALOGO_DOCUMENTOS.reiniciar_apos_fork()
+    RESOLVEDOR_LIGACOES.reiniciar_apos_fork()
+    DIRETORIO_COLABORADORES.reiniciar_apos_fork()
+    PACOTES.reiniciar_apos_fork()
+    TABELA_ENCAMINHAMENTO.reiniciar_apos_fork()
+    REGISTO_BAIXA_CONFIANCA.reiniciar_apos_fork()
+    FILA_FEEDBACK.reiniciar_apos_fork()
+    METRICAS.reiniciar_apos_fork()
+    reiniciar_cliente_graph()
+    reiniciar_pools()
+
+
+os.register_at_fork(after_in_child=_reiniciar_apos_fork)
+
+# Template de cada valor do slot categórico ``etapa_onboarding`` (ver domain.yml)
+TEMPLATES_ETAPAS = {
+    "pre_onboarding": "etapa_pre_onboarding",
+    "primeiro_dia": "etapa_primeiro_dia",
+    "primeira_semana": "etapa_primeira_semana",
+    "onboarding_concluido": "etapa_onboarding_concluido",
+}
 
 
 def _obter_nome_formatado(tracker: Tracker) -> str:
@@ -73,17 +193,153 @@ def _obter_nome_formatado(tracker: Tracker) -> str:
     return f", {nome}" if nome else ""
 
 
+def _obter_pacote(tracker: Tracker) -> PacoteConteudo:
+    """Obtém os conteúdos da empresa do colaborador (slot ``empresa``)."""
+    return PACOTES.obter(tracker.get_slot("empresa"))
+
+
+def _obter_banco_quiz(tracker: Tracker, pacote: PacoteConteudo) -> Text:
+    """Obtém o banco do quiz em curso ou, se não houver, o do cargo/departamento."""
+    return tracker.get_slot("quiz_banco") or pacote.quiz.resolver_banco(
+        tracker.get_slot("cargo"), tracker.get_slot("departamento")
+    )
+
+
+def _mensagem_reuniao_agendada(
+    pacote: PacoteConteudo, nome: str, gestor_info: str, inicio: datetime, evento: Dict[Text, Any]
+) -> str:
+    """Constrói a confirmação de uma reunião criada via Graph API."""
+    url_teams = (evento.get("onlineMeeting") or {}).get("joinUrl")
+    return pacote.templates.renderizar(
+        "reuniao_agendada",
+        nome,
+        gestor_info=gestor_info,
+        data=f"{DIAS_SEMANA[inicio.weekday()]}, {inicio:%d/%m}",
+        hora=f"{inicio:%H:%M}",
+        ligacao_teams=(
+            f"👉 [Entrar na reunião Teams]({url_teams})\n\n" if url_teams else "\n"
+        ),
+    )
+
+
+def _fallbacks_seguidos(tracker: Tracker) -> int:
+    """Número de turnos seguidos, até ao atual inclusive, que acabaram no fallback."""
+    seguidos = 0
+    no_turno_atual = True
+    com_fallback = False
+    for evento in reversed(tracker.events):
+        tipo = evento.get("event")
+        if tipo == "action" and evento.get("name") == ActionFallbackAdaptativo.NOME:
+            com_fallback = True
+        elif tipo == "user":
+            if not (no_turno_atual or com_fallback):
+                break
+            seguidos += 1
+            no_turno_atual = com_fallback = False
+        elif tipo == "session_started":
+            break
+    return max(seguidos, 1)
+
+
+def _intents_recentes(tracker: Tracker) -> List[Text]:
+    """Últimas intents da conversa, da mais para a menos recente, sem repetidas nem fallbacks."""
+    intents: List[Text] = []
+    for evento in reversed(tracker.events):
+        if evento.get("event") == "session_started":
+            break
+        if evento.get("event") != "user":
+            continue
+        intent = ((evento.get("parse_data") or {}).get("intent") or {}).get("name")
+        if intent and intent != "nlu_fallback" and intent not in intents:
+            intents.append(intent)
+            if len(intents) == HISTORICO_ENCAMINHAMENTO:
+                break
+    return intents
+
+
+def _mensagem_encaminhamento(tracker: Tracker, chave: Text) -> Tuple[Text, Fila]:
+    """Escolhe a fila de atendimento do colaborador e constrói a mensagem ``chave``.
+
+    As filas são as da empresa do colaborador (ver ``PacoteConteudo.encaminhamento``).
+    """
+    pacote = _obter_pacote(tracker)
+    fila = pacote.encaminhamento.fila(tracker.get_slot("departamento"), _intents_recentes(tracker))
+    mensagem = pacote.templates.renderizar(
+        chave,
+        _obter_nome_formatado(tracker),
+        fila=fila.nome,
+        contacto=fila.contacto,
+        prazo=fila.prazo,
+    )
+    return mensagem, fila
+
+
+def _resumo_quiz(progresso: int, total: int, empresa: Text) -> str:
+    """Constrói o resumo final do quiz a partir do progresso empacotado."""
+    pontuacao = pontuacao_progresso(progresso)
+    percentagem = (pontuacao / total) * 100
+    resumo = (
+        f"🏆 **Quiz concluído!**\n\n"
+        f"Pontuação final: **{pontuacao}/{total}** ({percentagem:.0f}%)\n\n"
+    )
+    if percentagem >= 80:
+        resumo += f"🌟 Excelente! Tem um ótimo conhecimento sobre a {empresa}!"
+    elif percentagem >= 60:
+        resumo += "👍 Bom trabalho! Continue a aprender sobre a empresa."
+    else:
+        resumo += (
+            "📚 Recomendamos que leia o Manual do Colaborador para aprofundar "
+            f"o seu conhecimento sobre a {empresa}."
+        )
+    return resumo
+
+
 # ---------------------------------------------------------------------------
 # Actions
 # ---------------------------------------------------------------------------
 
 
+class ActionSessionStart(Action):
+    """Inicia a sessão e preenche os slots com o perfil do colaborador no diretório."""
+
+    def name(self) -> Text:
+        return "action_session_start"
+
+    @instrumentar
+    async def run(
+        self,
+        dispatcher: CollectingDispatcher,
+        tracker: Tracker,
+        domain: Dict[Text, Any],
+    ) -> List[Dict[Text, Any]]:
+        eventos: List[Dict[Text, Any]] = [SessionStarted()]
+
+        if (domain.get("session_config") or {}).get("carry_over_slots_to_new_session", True):
+            eventos.extend(
+                SlotSet(slot, valor)
+                for slot, valor in tracker.current_slot_values().items()
+                if valor is not None
+            )
+
+        perfil = await DIRETORIO_COLABORADORES.obter(tracker.sender_id)
+        if perfil is not None:
+            slots = perfil.slots()
+            etapa = CALENDARIO_ONBOARDING.etapa(perfil.email, slots.get("data_inicio"))
+            if etapa is not None:
+                slots["etapa_onboarding"] = etapa
+            eventos.extend(SlotSet(slot, valor) for slot, valor in slots.items())
+
+        eventos.append(ActionExecuted("action_listen"))
+        return eventos
+
+
 class ActionBoasVindasPersonalizada(Action):
     """Saúda o colaborador pelo nome e apresenta as etapas do onboarding."""
 
     def name(self) -> Text:
         return "action_boas_vindas_personalizada"
 
+    @instrumentar
     def run(
         self,
         dispatcher: CollectingDispatcher,
@@ -92,166 +348,193 @@ class ActionBoasVindasPersonalizada(Action):
     ) -> List[Dict[Text, Any]]:
         nome = _obter_nome_formatado(tracker)
 
-        mensagem = (
-            f"👋 Olá{nome}! Bem-vindo(a) à **The100s**!\n\n"
-            "Sou o seu assistente virtual de onboarding e estou aqui para o/a ajudar "
-            "a integrar-se na nossa equipa. 🎉\n\n"
-            "**As etapas do seu onboarding são:**\n\n"
-            "1. 📋 **Pré-onboarding** — Leitura de documentos e preparação\n"
-            "2. 🏢 **Primeiro dia** — Apresentações e configuração do posto de trabalho\n"
-            "3. 📅 **Primeira semana** — Reuniões com a equipa e formações iniciais\n\n"
-            "Posso ajudá-lo/a com:\n"
-            "• 🏢 Informações sobre a empresa\n"
-            "• 🎁 Benefícios\n"
-            "• 📄 Documentos de onboarding\n"
-            "• 🎬 Vídeo de boas-vindas\n"
-            "• 📝 Quiz de conhecimento\n"
-            "• 📅 Agendamento de reuniões\n"
-            "• 🖥️ Suporte TI\n"
-            "• ❓ Perguntas frequentes\n\n"
-            "Como posso ajudá-lo/a hoje?"
-        )
+        mensagem = _obter_pacote(tracker).templates.renderizar("boas_vindas", nome)
 
         dispatcher.utter_message(text=mensagem)
         return []
 
 
 class ActionEnviarDocumentos(Action):
-    """Envia links para os documentos importantes de onboarding."""
+    """Envia as ligações para os documentos de onboarding do departamento e cargo do colaborador.
+
+    As ligações que não estão em cache são resolvidas em paralelo na Graph
+    API; sem credenciais Azure são usadas as ligações do catálogo.
+    """
 
     def name(self) -> Text:
         return "action_enviar_documentos"
 
-    def run(
+    @instrumentar
+    async def run(
         self,
         dispatcher: CollectingDispatcher,
         tracker: Tracker,
         domain: Dict[Text, Any],
     ) -> List[Dict[Text, Any]]:
         nome = _obter_nome_formatado(tracker)
-
-        mensagem = (
-            f"📄 Claro{nome}! Aqui estão os documentos essenciais para o seu onboarding:\n\n"
-            "1. 📋 **Manual do Colaborador**\n"
-            "   👉 [Aceder ao Manual](https://the100s.sharepoint.com/manual-colaborador)\n\n"
-            "2. ⚖️ **Código de Conduta**\n"
-            "   👉 [Aceder ao Código de Conduta](https://the100s.sharepoint.com/codigo-conduta)\n\n"
-            "3. 📝 **Contrato de Trabalho**\n"
-            "   📧 Enviado para o seu email pessoal — verifique a sua caixa de entrada\n\n"
-            "4. 🔒 **Política de Privacidade e RGPD**\n"
-            "   👉 [Aceder à Política](https://the100s.sharepoint.com/politica-privacidade)\n\n"
-            "5. 🖥️ **Política de Uso de TI**\n"
-            "   👉 [Aceder à Política TI](https://the100s.sharepoint.com/politica-ti)\n\n"
-            "⚠️ Por favor, leia todos os documentos com atenção e assine os que requerem assinatura.\n"
-            "Se tiver dúvidas sobre algum documento, não hesite em perguntar ou contactar os RH."
+        pacote = _obter_pacote(tracker)
+        documentos = pacote.documentos.documentos(
+            tracker.get_slot("departamento"), tracker.get_slot("cargo")
         )
+        ligacoes = await RESOLVEDOR_LIGACOES.resolver(documentos)
+
+        mensagem = pacote.templates.renderizar("documentos", nome, lista=formatar_documentos(ligacoes))
 
         dispatcher.utter_message(text=mensagem)
         return []
 
 
 class ActionIniciarQuiz(Action):
-    """Inicia o quiz de conhecimento sobre a empresa."""
+    """Inicia (ou retoma) o quiz de conhecimento sobre a empresa."""
 
     def name(self) -> Text:
         return "action_iniciar_quiz"
 
+    @instrumentar
     def run(
         self,
         dispatcher: CollectingDispatcher,
         tracker: Tracker,
         domain: Dict[Text, Any],
     ) -> List[Dict[Text, Any]]:
-        pontuacao_atual = tracker.get_slot("quiz_pontuacao") or 0.0
+        progresso = tracker.get_slot("quiz_progresso")
+        banco = tracker.get_slot("quiz_banco")
+        pacote = _obter_pacote(tracker)
+
+        # Retoma o quiz em curso, sem alterar slots
+        if progresso is not None and banco:
+            perguntas = pacote.quiz.perguntas(banco)
+            if not quiz_concluido(int(progresso), len(perguntas)):
+                pergunta = perguntas[cursor_progresso(int(progresso))]
+                dispatcher.utter_message(text=pergunta["pergunta"])
+                return []
+
+        # Novo quiz
         nome = _obter_nome_formatado(tracker)
+        banco = pacote.quiz.resolver_banco(
+            tracker.get_slot("cargo"), tracker.get_slot("departamento")
+        )
+        perguntas = pacote.quiz.perguntas(banco)
+        introducao = pacote.templates.renderizar("quiz_introducao", nome, total=len(perguntas))
 
-        # Determina qual pergunta apresentar com base na pontuação atual
-        pergunta_idx = int(pontuacao_atual) % len(QUIZ_PERGUNTAS)
-
-        if int(pontuacao_atual) == 0:
-            introducao = (
-                f"📝 Ótimo{nome}! Vamos começar o **Quiz de Conhecimento da The100s**!\n\n"
-                f"Este quiz tem **{len(QUIZ_PERGUNTAS)} perguntas** sobre a empresa.\n"
-                "Tente responder com a letra da opção correta (A, B, C ou D).\n\n"
-            )
-        else:
-            introducao = ""
-
-        pergunta = QUIZ_PERGUNTAS[pergunta_idx]
-        dispatcher.utter_message(text=introducao + pergunta["pergunta"])
+        dispatcher.utter_message(text=introducao + perguntas[0]["pergunta"])
 
-        return [SlotSet("quiz_pontuacao", pontuacao_atual)]
+        return [
+            SlotSet("quiz_progresso", PROGRESSO_INICIAL),
+            SlotSet("quiz_pontuacao", 0.0),
+            SlotSet("quiz_banco", banco),
+            SlotSet("quiz_concluido", False),
+        ]
 
 
 class ActionVerificarRespostaQuiz(Action):
-    """Verifica a resposta do utilizador ao quiz e atualiza a pontuação."""
+    """Verifica a resposta do utilizador ao quiz, atualiza a pontuação e avança."""
 
     def name(self) -> Text:
         return "action_verificar_resposta_quiz"
 
+    @instrumentar
     def run(
         self,
         dispatcher: CollectingDispatcher,
         tracker: Tracker,
         domain: Dict[Text, Any],
     ) -> List[Dict[Text, Any]]:
-        pontuacao_atual = tracker.get_slot("quiz_pontuacao") or 0.0
-        pergunta_idx = int(pontuacao_atual) % len(QUIZ_PERGUNTAS)
-        pergunta = QUIZ_PERGUNTAS[pergunta_idx]
+        progresso = int(tracker.get_slot("quiz_progresso") or PROGRESSO_INICIAL)
+        pacote = _obter_pacote(tracker)
+        perguntas = pacote.quiz.perguntas(_obter_banco_quiz(tracker, pacote))
+        total = len(perguntas)
+
+        if quiz_concluido(progresso, total):
+            dispatcher.utter_message(
+                text=_resumo_quiz(progresso, total, pacote.nome)
+                + "\n\nPara repetir o quiz, peça para **iniciar o quiz** novamente."
+            )
+            return []
 
-        # Extrair a resposta do utilizador a partir da última mensagem
-        ultima_mensagem = (tracker.latest_message.get("text") or "").lower().strip()
-        resposta_correta = pergunta["resposta_correta"].lower()
+        pergunta = perguntas[cursor_progresso(progresso)]
 
-        acertou = resposta_correta in ultima_mensagem
+        # Extrair a opção escolhida a partir da última mensagem (ver actions/respostas.py)
+        correcao = corrigir(pergunta, tracker.latest_message.get("text"))
+        resposta_correta = pergunta["resposta_correta"].lower()
+        acertou = correcao.correta
+        logger.debug(
+            "Resposta ao quiz: opção %s (%s), correta: %s", correcao.letra, correcao.metodo, acertou
+        )
 
         if acertou:
-            nova_pontuacao = pontuacao_atual + 1
             feedback = f"✅ **Correto!** Muito bem!\n\n{pergunta['explicacao']}\n\n"
         else:
-            nova_pontuacao = pontuacao_atual
             feedback = (
                 f"❌ **Incorreto.** A resposta correta era a opção **{resposta_correta.upper()}**.\n\n"
                 f"{pergunta['explicacao']}\n\n"
             )
 
-        proxima_pergunta_idx = int(nova_pontuacao) % len(QUIZ_PERGUNTAS)
-        perguntas_respondidas = pergunta_idx + 1
+        # Cada resposta, certa ou errada, avança o quiz
+        progresso = registar_resposta(progresso, acertou)
+        eventos = [
+            SlotSet("quiz_progresso", progresso),
+            SlotSet("quiz_pontuacao", float(pontuacao_progresso(progresso))),
+        ]
 
-        if perguntas_respondidas >= len(QUIZ_PERGUNTAS):
-            # Quiz concluído
-            percentagem = (nova_pontuacao / len(QUIZ_PERGUNTAS)) * 100
-            resumo = (
-                f"🏆 **Quiz concluído!**\n\n"
-                f"Pontuação final: **{int(nova_pontuacao)}/{len(QUIZ_PERGUNTAS)}** ({percentagem:.0f}%)\n\n"
-            )
-            if percentagem >= 80:
-                resumo += "🌟 Excelente! Tem um ótimo conhecimento sobre a The100s!"
-            elif percentagem >= 60:
-                resumo += "👍 Bom trabalho! Continue a aprender sobre a empresa."
-            else:
-                resumo += (
-                    "📚 Recomendamos que leia o Manual do Colaborador para aprofundar "
-                    "o seu conhecimento sobre a The100s."
-                )
-
-            dispatcher.utter_message(text=feedback + resumo)
-            return [SlotSet("quiz_pontuacao", nova_pontuacao)]
+        if quiz_concluido(progresso, total):
+            dispatcher.utter_message(text=feedback + _resumo_quiz(progresso, total, pacote.nome))
+            # Marca a conclusão para a análise das conversas (ver analytics/funil.py)
+            return eventos + [SlotSet("quiz_concluido", True)]
 
         # Há mais perguntas
-        proxima = QUIZ_PERGUNTAS[proxima_pergunta_idx]
+        proxima = perguntas[cursor_progresso(progresso)]
         dispatcher.utter_message(text=feedback + proxima["pergunta"])
 
-        return [SlotSet("quiz_pontuacao", nova_pontuacao)]
+        return eventos
+
+
+class ActionResponderFaq(Action):
+    """Responde a uma pergunta frequente com a entrada mais parecida da FAQ da empresa.
+
+    Sem nenhuma entrada suficientemente parecida, mostra a FAQ geral (template
+    ``faq`` do pacote).
+    """
+
+    def name(self) -> Text:
+        return "action_responder_faq"
+
+    @instrumentar
+    def run(
+        self,
+        dispatcher: CollectingDispatcher,
+        tracker: Tracker,
+        domain: Dict[Text, Any],
+    ) -> List[Dict[Text, Any]]:
+        pacote = _obter_pacote(tracker)
+        resultados = pacote.faq.procurar(tracker.latest_message.get("text") or "")
+        if not resultados or resultados[0].semelhanca < LIMIAR_RESPOSTA:
+            dispatcher.utter_message(text=pacote.templates.renderizar("faq"))
+            return []
+
+        melhor = resultados[0].entrada
+        mensagem = f"❓ **{melhor.pergunta}**\n\n{melhor.resposta}"
+        relacionadas = [r.entrada.pergunta for r in resultados[1:] if r.semelhanca >= LIMIAR_RELACIONADAS]
+        if relacionadas:
+            mensagem += "\n\n**Perguntas relacionadas:**\n" + "\n".join(f"• {p}" for p in relacionadas)
+
+        dispatcher.utter_message(text=mensagem)
+        return []
 
 
 class ActionAgendarReuniao(Action):
-    """Placeholder para agendamento de reuniões via Microsoft Graph API."""
+    """Agenda a reunião de apresentação com o gestor via Microsoft Graph API.
+
+    A action é assíncrona: enquanto espera pela Graph API, o action server
+    continua a servir outras conversas. Sem credenciais Azure ou sem os emails
+    do colaborador e do gestor, apresenta as instruções para agendar manualmente.
+    """
 
     def name(self) -> Text:
         return "action_agendar_reuniao"
 
-    def run(
+    @instrumentar
+    async def run(
         self,
         dispatcher: CollectingDispatcher,
         tracker: Tracker,
@@ -260,19 +543,38 @@ class ActionAgendarReuniao(Action):
         nome = _obter_nome_formatado(tracker)
         gestor = tracker.get_slot("gestor")
         gestor_info = f" com **{gestor}**" if gestor else " com o seu gestor"
-
-        mensagem = (
-            f"📅 Claro{nome}! Vou ajudá-lo/a a agendar uma reunião{gestor_info}.\n\n"
-            "**Passos para agendar a reunião:**\n\n"
-            "1. 📧 Verifique o convite de calendário que será enviado para o seu email\n"
-            "2. 🗓️ Aceda ao **Outlook Calendar** para confirmar a disponibilidade\n"
-            "3. ✅ Aceite o convite quando recebê-lo\n\n"
-            "**Alternativamente, pode agendar diretamente:**\n"
-            "• **Microsoft Teams:** Clique em 'Calendário' → 'Nova reunião'\n"
-            "• **Outlook:** Clique em 'Nova reunião' e adicione os participantes\n\n"
-            "⏰ A reunião de apresentação será normalmente agendada para os **primeiros 3 dias**.\n\n"
-            "🔔 **Nota:** A integração automática com o Microsoft Calendar estará disponível em breve. "
-            "Por agora, contacte diretamente o seu gestor ou os RH para agendar."
+        pacote = _obter_pacote(tracker)
+
+        cliente = obter_cliente_graph()
+        email_gestor = tracker.get_slot("email_gestor")
+        email_colaborador = tracker.get_slot("email_colaborador")
+
+        if cliente is not None and email_gestor and email_colaborador:
+            try:
+                resultado = await agendar_no_primeiro_horario_livre(
+                    cliente,
+                    organizador=email_gestor,
+                    participante=email_colaborador,
+                    assunto=f"Reunião de apresentação — Onboarding {pacote.nome}",
+                    descricao="Reunião de acolhimento agendada pelo assistente de onboarding.",
+                )
+            except Exception:
+                # Erros da Graph API, de rede ou da credencial do azure-identity
+                # (ClientAuthenticationError): recorre às instruções manuais
+                logger.warning("Falha ao agendar a reunião via Graph API.", exc_info=True)
+            else:
+                if resultado is None:
+                    mensagem = pacote.templates.renderizar(
+                        "reuniao_sem_horario", nome, gestor_info=gestor_info
+                    )
+                else:
+                    mensagem = _mensagem_reuniao_agendada(pacote, nome, gestor_info, *resultado)
+                dispatcher.utter_message(text=mensagem)
+                return []
+
+        # Sem integração (ou com falha): instruções para agendar manualmente
+        mensagem = pacote.templates.renderizar(
+            "agendar_reuniao", nome, gestor_info=gestor_info
         )
 
         dispatcher.utter_message(text=mensagem)
@@ -285,6 +587,7 @@ class ActionRegistarFeedback(Action):
     def name(self) -> Text:
         return "action_registar_feedback"
 
+    @instrumentar
     def run(
         self,
         dispatcher: CollectingDispatcher,
@@ -292,21 +595,20 @@ class ActionRegistarFeedback(Action):
         domain: Dict[Text, Any],
     ) -> List[Dict[Text, Any]]:
         nome = _obter_nome_formatado(tracker)
-        ultima_mensagem = tracker.latest_message.get("text", "")
-
-        # Regista o feedback nos logs (em produção, guardar em base de dados)
-        logger.info(
-            "Feedback recebido de colaborador%s: %s",
-            nome,
-            ultima_mensagem,
+        # ``text`` pode existir com o valor None (mensagens sem texto)
+        ultima_mensagem = tracker.latest_message.get("text") or ""
+
+        # Gravado em segundo plano: a resposta não espera pela base de dados
+        FILA_FEEDBACK.registar(
+            RegistoFeedback(
+                sender_id=tracker.sender_id,
+                nome=tracker.get_slot("nome_colaborador"),
+                texto=ultima_mensagem,
+                recebido_em=datetime.now(timezone.utc),
+            )
         )
 
-        mensagem = (
-            f"🙏 Obrigado pelo seu feedback{nome}!\n\n"
-            "O seu comentário foi registado e será analisado pela equipa de RH "
-            "para melhorar continuamente o processo de onboarding.\n\n"
-            "✍️ Se tiver mais comentários ou sugestões, não hesite em partilhar!"
-        )
+        mensagem = _obter_pacote(tracker).templates.renderizar("feedback", nome)
 
         dispatcher.utter_message(text=mensagem)
         return []
@@ -318,53 +620,99 @@ class ActionVerificarEtapaOnboarding(Action):
     def name(self) -> Text:
         return "action_verificar_etapa_onboarding"
 
+    @instrumentar
     def run(
         self,
         dispatcher: CollectingDispatcher,
         tracker: Tracker,
         domain: Dict[Text, Any],
     ) -> List[Dict[Text, Any]]:
-        etapa = tracker.get_slot("etapa_onboarding")
+        etapa_atual = tracker.get_slot("etapa_onboarding")
+        etapa = (
+            CALENDARIO_ONBOARDING.etapa(
+                tracker.get_slot("email_colaborador"), tracker.get_slot("data_inicio")
+            )
+            or etapa_atual
+        )
         nome = _obter_nome_formatado(tracker)
 
-        etapas_info: Dict[Optional[str], str] = {
-            "pre_onboarding": (
-                f"📋 Olá{nome}! Encontra-se na fase de **Pré-onboarding**.\n\n"
-                "**O que deve fazer agora:**\n"
-                "• 📄 Ler os documentos enviados (manual, código de conduta, etc.)\n"
-                "• ✍️ Assinar os documentos que requerem assinatura\n"
-                "• 📧 Confirmar os detalhes do primeiro dia com os RH\n"
-                "• 🖥️ Preparar o equipamento necessário"
-            ),
-            "primeiro_dia": (
-                f"🏢 Olá{nome}! É o seu **Primeiro Dia** na The100s!\n\n"
-                "**Agenda de hoje:**\n"
-                "• 👋 Apresentações com a equipa\n"
-                "• 🖥️ Configuração do posto de trabalho\n"
-                "• 🔑 Receção das credenciais de acesso\n"
-                "• 🍽️ Almoço com o gestor/equipa\n"
-                "• 📋 Briefing inicial com o seu gestor"
-            ),
-            "primeira_semana": (
-                f"📅 Olá{nome}! Está na sua **Primeira Semana** na The100s!\n\n"
-                "**Objetivos desta semana:**\n"
-                "• 🤝 Reuniões de apresentação com as equipas chave\n"
-                "• 📚 Formações iniciais obrigatórias\n"
-                "• 🎯 Definição de objetivos com o seu gestor\n"
-                "• 🔧 Conclusão da configuração de todas as ferramentas\n"
-                "• 📝 Realização do quiz de conhecimento"
-            ),
-        }
-
-        mensagem = etapas_info.get(
-            etapa,
-            (
-                f"👋 Olá{nome}! Bem-vindo(a) ao processo de onboarding da The100s!\n\n"
-                "Não consegui determinar a sua etapa atual. "
-                "Por favor, contacte os RH para verificar o seu estado de onboarding.\n\n"
-                "📧 **RH:** rh@the100s.com"
-            ),
-        )
+        chave = TEMPLATES_ETAPAS.get(etapa, "etapa_desconhecida")
+        mensagem = _obter_pacote(tracker).templates.renderizar(chave, nome)
+
+        dispatcher.utter_message(text=mensagem)
+        if etapa != etapa_atual:
+            return [SlotSet("etapa_onboarding", etapa)]
+        return []
+
+
+class ActionEncaminharHumano(Action):
+    """Põe o colaborador em contacto com a equipa de RH ou de TI certa para a conversa."""
+
+    def name(self) -> Text:
+        return "action_encaminhar_humano"
+
+    @instrumentar
+    def run(
+        self,
+        dispatcher: CollectingDispatcher,
+        tracker: Tracker,
+        domain: Dict[Text, Any],
+    ) -> List[Dict[Text, Any]]:
+        mensagem, _ = _mensagem_encaminhamento(tracker, "encaminhamento")
 
         dispatcher.utter_message(text=mensagem)
         return []
+
+
+class ActionFallbackAdaptativo(Action):
+    """Responde a uma mensagem que o bot não percebeu (fallback do NLU ou das políticas).
+
+    No primeiro fallback sugere os temas mais prováveis; ao fim de
+    ``FALLBACKS_ATE_ENCAMINHAR`` fallbacks seguidos encaminha a conversa para
+    uma pessoa, em vez de pedir outra vez para reformular. A contagem vem dos
+    eventos da conversa, sem slots. Cada mensagem fica no registo de baixa
+    confiança (ver actions/baixa_confianca.py).
+    """
+
+    NOME = "action_fallback_adaptativo"
+
+    def name(self) -> Text:
+        return self.NOME
+
+    @instrumentar
+    def run(
+        self,
+        dispatcher: CollectingDispatcher,
+        tracker: Tracker,
+        domain: Dict[Text, Any],
+    ) -> List[Dict[Text, Any]]:
+        seguidos = _fallbacks_seguidos(tracker)
+        fila = None
+
+        if seguidos < FALLBACKS_ATE_ENCAMINHAR:
+            botoes = [
+                {"title": SUGESTOES_FALLBACK[intent], "payload": f"/{intent}"}
+                for intent, confianca in intents_provaveis(tracker.latest_message)
+                if intent in SUGESTOES_FALLBACK and confianca >= LIMIAR_SUGESTAO
+            ][:MAXIMO_SUGESTOES]
+            botoes.append({"title": "👤 Falar com alguém da equipa", "payload": "/falar_com_humano"})
+            mensagem = _obter_pacote(tracker).templates.renderizar(
+                "fallback_sugestoes", _obter_nome_formatado(tracker)
+            )
+            dispatcher.utter_message(text=mensagem, buttons=botoes)
+        else:
+            # Depois do encaminhamento, os fallbacks seguintes só o relembram
+            chave = (
+                "encaminhamento_fallback"
+                if seguidos == FALLBACKS_ATE_ENCAMINHAR
+                else "encaminhamento_pendente"
+            )
+            mensagem, fila = _mensagem_encaminhamento(tracker, chave)
+            dispatcher.utter_message(text=mensagem)
+
+        REGISTO_BAIXA_CONFIANCA.registar(
+            tracker.latest_message,
+            departamento=tracker.get_slot("departamento"),
+            fila=fila.id if fila else None,
+        )
+        return []
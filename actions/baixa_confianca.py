@@ -0,0 +1,182 @@
+"""
+Registo das mensagens que o bot não percebeu, para aprendizagem ativa.
+
+Cada fallback, do NLU (abaixo do limiar do ``FallbackClassifier``) ou das
+políticas (``core_fallback_threshold``), acrescenta uma linha JSON ao
+ficheiro indicado em ``BAIXA_CONFIANCA_FICHEIRO``, com o texto, as intents
+mais prováveis e a fila para onde a conversa foi encaminhada. O ficheiro só
+cresce: o action server nunca o reescreve, e cada linha é gravada com uma
+única chamada ``write`` num descritor aberto com ``O_APPEND``, pelo que os
+workers de ``actions.servidor`` partilham o mesmo ficheiro sem misturar
+linhas.
+
+Periodicamente, os textos registados são revistos e passam a exemplos de
+treino::
+
+    python -m actions.baixa_confianca baixa_confianca.jsonl --saida revisao.yml
+
+O ficheiro de revisão agrupa os textos (sem repetidos, dos mais para os menos
+frequentes) pela intent mais provável, no formato de ``data/nlu.yml``; depois
+de corrigidos, os exemplos são copiados para os dados de treino.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Text, Tuple
+
+logger = logging.getLogger(__name__)
+
+INTENT_FALLBACK_NLU = "nlu_fallback"
+# Intents mais prováveis guardadas por mensagem
+LIMITE_RANKING = 3
+
+
+def intents_provaveis(mensagem: Dict[Text, Any], limite: int = LIMITE_RANKING) -> List[Tuple[Text, float]]:
+    """Intents mais prováveis de uma mensagem (``latest_message``), sem o ``nlu_fallback``."""
+    ranking = mensagem.get("intent_ranking") or [mensagem.get("intent") or {}]
+    return [
+        (intent["name"], round(float(intent.get("confidence") or 0.0), 4))
+        for intent in ranking
+        if intent.get("name") and intent["name"] != INTENT_FALLBACK_NLU
+    ][:limite]
+
+
+class RegistoBaixaConfianca:
+    """Ficheiro JSON Lines, só de acréscimo, com as mensagens que acabaram num fallback.
+
+    Sem ``caminho``, o registo está desativado.
+    """
+
+    def __init__(self, caminho: Optional[Text]) -> None:
+        self.caminho = caminho
+        self._descritor: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _abrir(self) -> int:
+        if self._descritor is None:
+            pasta = os.path.dirname(self.caminho)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            self._descritor = os.open(self.caminho, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+        return self._descritor
+
+    def registar(
+        self,
+        mensagem: Dict[Text, Any],
+        departamento: Optional[Text] = None,
+        fila: Optional[Text] = None,
+        recebido_em: Optional[datetime] = None,
+    ) -> bool:
+        """Acrescenta a mensagem ao ficheiro; devolve ``False`` se o registo estiver desativado ou falhar."""
+        if not self.caminho:
+            return False
+        ranking = intents_provaveis(mensagem)
+        intent = (mensagem.get("intent") or {}).get("name")
+        linha = {
+            "recebido_em": (recebido_em or datetime.now(timezone.utc)).isoformat(),
+            "texto": mensagem.get("text") or "",
+            "origem": "nlu" if intent == INTENT_FALLBACK_NLU else "politicas",
+            "intent": ranking[0][0] if ranking else None,
+            "confianca": ranking[0][1] if ranking else None,
+            "ranking": [{"intent": nome, "confianca": confianca} for nome, confianca in ranking],
+            "departamento": departamento,
+            "fila": fila,
+        }
+        dados = (json.dumps(linha, ensure_ascii=False) + "\n").encode("utf-8")
+        try:
+            with self._lock:
+                os.write(self._abrir(), dados)
+        except OSError:
+            logger.warning("Não foi possível registar a mensagem em %s.", self.caminho, exc_info=True)
+            return False
+        return True
+
+    def fechar(self) -> None:
+        with self._lock:
+            if self._descritor is not None:
+                os.close(self._descritor)
+                self._descritor = None
+
+    def reiniciar_apos_fork(self) -> None:
+        """Cada worker abre o seu próprio descritor (a cópia herdada é fechada)."""
+        self._lock = threading.Lock()
+        self.fechar()
+
+
+# ---------------------------------------------------------------------------
+# Revisão
+# ---------------------------------------------------------------------------
+
+
+def ler_registos(caminhos: Iterable[Text]) -> Iterable[Dict[Text, Any]]:
+    """Lê as linhas dos ficheiros, ignorando as que estiverem incompletas."""
+    for caminho in caminhos:
+        with open(caminho, encoding="utf-8") as ficheiro:
+            for numero, linha in enumerate(ficheiro, start=1):
+                try:
+                    yield json.loads(linha)
+                except ValueError:
+                    logger.warning("Linha %d de %s ignorada.", numero, caminho)
+
+
+def agrupar_por_intent(registos: Iterable[Dict[Text, Any]]) -> Dict[Text, List[Tuple[Text, int]]]:
+    """Textos distintos de cada intent provável, dos mais para os menos frequentes."""
+    contagens: Dict[Text, Counter] = {}
+    originais: Dict[Text, Text] = {}
+    for registo in registos:
+        texto = " ".join((registo.get("texto") or "").split())
+        if not texto or texto.startswith("/"):
+            continue
+        chave = texto.lower()
+        originais.setdefault(chave, texto)
+        contagens.setdefault(registo.get("intent") or INTENT_FALLBACK_NLU, Counter())[chave] += 1
+    grupos = sorted(contagens.items(), key=lambda par: -sum(par[1].values()))
+    return {
+        intent: [(originais[chave], n) for chave, n in sorted(contagem.items(), key=_mais_frequentes)]
+        for intent, contagem in grupos
+    }
+
+
+def _mais_frequentes(par: Tuple[Text, int]) -> Tuple[int, Text]:
+    return -par[1], par[0]
+
+
+def formatar_revisao(grupos: Dict[Text, List[Tuple[Text, int]]]) -> Text:
+    """Ficheiro de revisão no formato dos dados de treino NLU."""
+    linhas = [
+        "# Mensagens que acabaram num fallback, agrupadas pela intent mais provável.",
+        "# Corrija a intent de cada exemplo antes de o copiar para data/nlu.yml.",
+        'version: "3.1"',
+        "nlu:",
+    ]
+    for intent, textos in grupos.items():
+        linhas.append(f"# {sum(n for _, n in textos)} mensagens, {len(textos)} textos distintos")
+        linhas.append(f"- intent: {intent}")
+        linhas.append("  examples: |")
+        linhas.extend(f"    - {texto}" for texto, _ in textos)
+    return "\n".join(linhas) + "\n"
+
+
+def main(argumentos: Optional[Sequence[Text]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("ficheiros", nargs="+", help="ficheiros JSON Lines do registo")
+    parser.add_argument("--saida", help="ficheiro de revisão (por omissão, a saída padrão)")
+    args = parser.parse_args(argumentos)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+
+    revisao = formatar_revisao(agrupar_por_intent(ler_registos(args.ficheiros)))
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as ficheiro:
+            ficheiro.write(revisao)
+    else:
+        sys.stdout.write(revisao)
+
+
+if __name__ == "__main__":
+    main()
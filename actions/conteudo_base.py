@@ -0,0 +1,179 @@
+"""
+Conteúdo base do Bot de Onboarding: o da empresa principal, a The100s.
+
+É o conteúdo usado sem base de dados e aquele de que parte o pacote de cada
+outra empresa do grupo (ver ``actions/empresas.py``). Está num módulo à parte
+para que o serviço de lembretes possa construir os pacotes sem carregar as
+custom actions.
+"""
+
+from actions.documentos import Documento
+from actions.empresas import ConteudoBase
+from actions.encaminhamento import Fila, RegraEncaminhamento
+from actions.faq import RegistoFaq
+from actions.quiz import BANCO_GERAL
+from actions.templates import TEMPLATES_PADRAO
+
+# ---------------------------------------------------------------------------
+# Dados do Quiz — banco base, usado quando a base de dados não tem o banco
+# pedido ou não está disponível (os restantes bancos vêm da tabela
+# ``quiz_perguntas``, ver actions/quiz.py)
+# ---------------------------------------------------------------------------
+
+QUIZ_PERGUNTAS = [
+    {
+        "id": 1,
+        "pergunta": (
+            "❓ **Pergunta 1/3:** Qual é a missão da The100s?\n\n"
+            "A) Ser a maior empresa do mundo\n"
+            "B) Proporcionar soluções de qualidade superior, mantendo um ambiente positivo e inclusivo\n"
+            "C) Maximizar o lucro a qualquer custo\n"
+            "D) Reduzir custos operacionais"
+        ),
+        "opcoes": {
+            "a": "Ser a maior empresa do mundo",
+            "b": "Proporcionar soluções de qualidade superior, mantendo um ambiente positivo e inclusivo",
+            "c": "Maximizar o lucro a qualquer custo",
+            "d": "Reduzir custos operacionais",
+        },
+        "resposta_correta": "b",
+        "explicacao": (
+            "✅ A missão da The100s é proporcionar soluções de qualidade superior "
+            "aos nossos clientes, mantendo um ambiente de trabalho positivo e inclusivo."
+        ),
+    },
+    {
+        "id": 2,
+        "pergunta": (
+            "❓ **Pergunta 2/3:** Qual dos seguintes NÃO é um valor da The100s?\n\n"
+            "A) Integridade\n"
+            "B) Competição interna\n"
+            "C) Inovação\n"
+            "D) Trabalho em Equipa"
+        ),
+        "opcoes": {
+            "a": "Integridade",
+            "b": "Competição interna",
+            "c": "Inovação",
+            "d": "Trabalho em Equipa",
+        },
+        "resposta_correta": "b",
+        "explicacao": (
+            "✅ Os valores da The100s são: Integridade, Inovação, Excelência, "
+            "Trabalho em Equipa e Respeito. A 'Competição interna' não faz parte dos nossos valores."
+        ),
+    },
+    {
+        "id": 3,
+        "pergunta": (
+            "❓ **Pergunta 3/3:** Quantos dias úteis de férias tem um colaborador da The100s por ano?\n\n"
+            "A) 20 dias\n"
+            "B) 25 dias\n"
+            "C) 22 dias\n"
+            "D) 30 dias"
+        ),
+        "opcoes": {"a": "20 dias", "b": "25 dias", "c": "22 dias", "d": "30 dias"},
+        "resposta_correta": "c",
+        "explicacao": (
+            "✅ Os colaboradores da The100s têm direito a 22 dias úteis de férias "
+            "por ano, conforme a legislação laboral portuguesa."
+        ),
+    },
+]
+
+# ---------------------------------------------------------------------------
+# Documentos de onboarding — catálogo base, comum a todos os colaboradores,
+# usado quando a base de dados não está disponível (o catálogo completo, por
+# departamento e cargo, vem da tabela ``documentos``, ver actions/documentos.py)
+# ---------------------------------------------------------------------------
+
+DOCUMENTOS_BASE = [
+    Documento(
+        1, "Manual do Colaborador", "https://the100s.sharepoint.com/manual-colaborador", icone="📋", ordem=1
+    ),
+    Documento(
+        2, "Código de Conduta", "https://the100s.sharepoint.com/codigo-conduta", icone="⚖️", ordem=2
+    ),
+    Documento(
+        3,
+        "Contrato de Trabalho",
+        nota="📧 Enviado para o seu email pessoal — verifique a sua caixa de entrada",
+        icone="📝",
+        ordem=3,
+    ),
+    Documento(
+        4,
+        "Política de Privacidade e RGPD",
+        "https://the100s.sharepoint.com/politica-privacidade",
+        icone="🔒",
+        ordem=4,
+    ),
+    Documento(
+        5, "Política de Uso de TI", "https://the100s.sharepoint.com/politica-ti", icone="🖥️", ordem=5
+    ),
+]
+
+# ---------------------------------------------------------------------------
+# Perguntas frequentes — entradas base, usadas quando a base de dados não está
+# disponível (as restantes vêm da tabela ``faq``, ver actions/faq.py)
+# ---------------------------------------------------------------------------
+
+FAQ_BASE = [
+    RegistoFaq(
+        1,
+        "Qual é o horário de trabalho?",
+        "O horário padrão é das 9h às 18h, com flexibilidade conforme acordado com o seu gestor.",
+        ("a que horas começo a trabalhar?", "a que horas saio?", "tenho horário flexível?"),
+    ),
+    RegistoFaq(
+        2,
+        "Onde fica o meu posto de trabalho?",
+        "O seu posto de trabalho está identificado. Consulte o seu gestor ou RH para confirmação.",
+        ("onde me sento?", "qual é a minha secretária?", "onde fico no escritório?"),
+    ),
+    RegistoFaq(
+        3,
+        "Como funciona o registo de ponto?",
+        "Através do sistema de RH (SIRH). Receberá as credenciais por email.",
+        ("como marco o ponto?", "onde registo as horas?", "credenciais do SIRH"),
+    ),
+    RegistoFaq(
+        4,
+        "Quando recebo o primeiro salário?",
+        "O pagamento é processado no último dia útil de cada mês.",
+        ("quando é o pagamento do ordenado?", "em que dia pagam?", "quando recebo o vencimento?"),
+    ),
+    RegistoFaq(
+        5,
+        "Tenho dúvidas sobre benefícios, a quem contacto?",
+        "Contacte o departamento de RH: rh@the100s.com",
+        ("quem trata dos benefícios?", "seguro de saúde", "subsídio de refeição"),
+    ),
+]
+
+# ---------------------------------------------------------------------------
+# Filas de atendimento humano — tabela base, usada sem base de dados (as
+# regras por departamento vêm da tabela ``regras_encaminhamento``, ver
+# actions/encaminhamento.py)
+# ---------------------------------------------------------------------------
+
+FILA_PADRAO = "rh"
+
+FILAS_BASE = [
+    Fila("rh", "Equipa de RH", "rh@the100s.com", "1 hora útil"),
+    Fila("ti", "Equipa de Suporte TI", "helpdesk@the100s.com (extensão 1234)", "4 horas úteis"),
+]
+
+REGRAS_BASE = [
+    RegraEncaminhamento("ti", intent="pedir_ajuda_ti"),
+]
+
+CONTEUDO_BASE = ConteudoBase(
+    TEMPLATES_PADRAO,
+    {BANCO_GERAL: QUIZ_PERGUNTAS},
+    DOCUMENTOS_BASE,
+    FILAS_BASE,
+    REGRAS_BASE,
+    FILA_PADRAO,
+    FAQ_BASE,
+)
@@ -0,0 +1,197 @@
+"""
+Acesso à base de dados PostgreSQL do Bot de Onboarding da The100s.
+
+O módulo é partilhado pelo action server e pelo Rasa Server (a imagem do
+Rasa copia-o, para a compactação de ``addons/compactacao.py`` e o registo
+das conversas do Teams). A configuração vem das variáveis de
+ambiente:
+
+* ``DB_HOST``, ``DB_PORT``, ``DB_NAME``, ``DB_USER``, ``DB_PASSWORD``: a
+  instância principal, usada para todas as escritas;
+* ``DB_REPLICA_HOST`` (e, se forem diferentes, ``DB_REPLICA_PORT``,
+  ``DB_REPLICA_NAME``, ``DB_REPLICA_USER``, ``DB_REPLICA_PASSWORD``): uma
+  réplica de leitura opcional. Recebe as leituras que toleram alguns
+  segundos de atraso: o recarregamento dos índices e o calendário dos
+  lembretes. Sem réplica,
+  estas leituras vão para a instância principal;
+* ``DB_POOL_MIN``, ``DB_POOL_MAX``: ligações de cada pool assíncrono, por
+  processo. Cada worker de ``actions.servidor`` tem os seus pools, pelo que
+  o action server abre até ``ACTION_SERVER_WORKERS × DB_POOL_MAX`` ligações;
+* ``DB_POOL_ESPERA``: segundos à espera de uma ligação livre antes de falhar;
+* ``DB_STATEMENT_CACHE``: consultas preparadas guardadas por ligação (0
+  desativa a cache, necessário atrás de um PgBouncer em modo ``transaction``).
+
+Há duas formas de acesso. ``ligar`` abre uma ligação psycopg2, para as
+threads de carregamento e as linhas de comandos. ``adquirir`` empresta uma
+ligação do pool asyncpg do processo (``obter_pool``, criado no primeiro
+uso), para as consultas feitas no event loop. O asyncpg prepara cada
+consulta na primeira execução numa ligação e reutiliza o plano nas
+seguintes, pelo que as consultas de cada turno só são analisadas pelo
+PostgreSQL uma vez por ligação.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, NamedTuple, Optional, Text, Tuple
+
+import psycopg2
+
+if TYPE_CHECKING:
+    import asyncpg
+
+
+class ConfiguracaoPool(NamedTuple):
+    """Dimensão e limites de um pool assíncrono."""
+
+    minimo: int = 1
+    maximo: int = 10
+    espera: float = 5.0  # segundos à espera de uma ligação livre
+    cache_consultas: int = 100  # consultas preparadas por ligação
+    inativa: float = 300.0  # segundos até fechar uma ligação sem uso
+
+
+def configuracao_db(replica: bool = False) -> Optional[Dict[Text, Any]]:
+    """Lê a configuração da base de dados a partir das variáveis de ambiente.
+
+    Devolve ``None`` quando ``DB_HOST`` não está definido (por exemplo, nos
+    testes ou em desenvolvimento sem base de dados). Com ``replica``, devolve
+    a configuração da réplica de leitura, ou a da instância principal se
+    ``DB_REPLICA_HOST`` não estiver definido.
+    """
+    host = os.getenv("DB_HOST")
+    if not host:
+        return None
+
+    config = {
+        "host": host,
+        "port": int(os.getenv("DB_PORT", "5432")),
+        "dbname": os.getenv("DB_NAME", "onboarding_bot"),
+        "user": os.getenv("DB_USER", "postgres"),
+        "password": os.getenv("DB_PASSWORD", "postgres"),
+        "connect_timeout": 5,
+    }
+    if replica and os.getenv("DB_REPLICA_HOST"):
+        config.update(
+            host=os.environ["DB_REPLICA_HOST"],
+            port=int(os.getenv("DB_REPLICA_PORT", str(config["port"]))),
+            dbname=os.getenv("DB_REPLICA_NAME", config["dbname"]),
+            user=os.getenv("DB_REPLICA_USER", config["user"]),
+            password=os.getenv("DB_REPLICA_PASSWORD", config["password"]),
+        )
+    return config
+
+
+def configuracao_pool() -> ConfiguracaoPool:
+    """Lê a dimensão dos pools (``DB_POOL_*`` e ``DB_STATEMENT_CACHE``)."""
+    padrao = ConfiguracaoPool()
+    return ConfiguracaoPool(
+        minimo=int(os.getenv("DB_POOL_MIN", str(padrao.minimo))),
+        maximo=int(os.getenv("DB_POOL_MAX", str(padrao.maximo))),
+        espera=float(os.getenv("DB_POOL_ESPERA", str(padrao.espera))),
+        cache_consultas=int(os.getenv("DB_STATEMENT_CACHE", str(padrao.cache_consultas))),
+        inativa=padrao.inativa,
+    )
+
+
+def ligar(replica: bool = False) -> "psycopg2.extensions.connection":
+    """Abre uma nova ligação à base de dados (à réplica de leitura, com ``replica``)."""
+    config = configuracao_db(replica)
+    if config is None:
+        raise RuntimeError("A variável de ambiente DB_HOST não está definida.")
+    return psycopg2.connect(**config)
+
+
+# ---------------------------------------------------------------------------
+# Pools assíncronos (asyncpg)
+# ---------------------------------------------------------------------------
+
+
+async def criar_pool(
+    config: Dict[Text, Any], dimensao: Optional[ConfiguracaoPool] = None, **opcoes: Any
+) -> "asyncpg.Pool":
+    """Cria um pool asyncpg com a configuração de ``configuracao_db``.
+
+    As ``opcoes`` seguem para ``asyncpg.create_pool`` (por exemplo,
+    ``server_settings``). As ligações voltam ao pool sem a consulta de
+    ``Connection.reset`` (``RESET ALL``, ``UNLISTEN *``, ...), que custaria
+    uma ida à base de dados por empréstimo: nenhum módulo do projeto altera o
+    estado da sessão. Uma transação aberta é sempre desfeita pelo asyncpg.
+    """
+    import asyncpg
+
+    dimensao = dimensao or configuracao_pool()
+    return await asyncpg.create_pool(
+        host=config["host"],
+        port=config["port"],
+        database=config["dbname"],
+        user=config["user"],
+        password=config["password"],
+        timeout=config["connect_timeout"],
+        min_size=min(dimensao.minimo, dimensao.maximo),
+        max_size=dimensao.maximo,
+        statement_cache_size=dimensao.cache_consultas,
+        max_inactive_connection_lifetime=dimensao.inativa,
+        reset=_sem_reset,
+        **opcoes,
+    )
+
+
+async def _sem_reset(ligacao: "asyncpg.Connection") -> None:
+    pass
+
+
+# chave (host, porta, base de dados) → (event loop, pool) do processo atual
+_pools: Dict[Tuple[Text, int, Text], Tuple[asyncio.AbstractEventLoop, "asyncpg.Pool"]] = {}
+
+
+async def obter_pool(replica: bool = False) -> "asyncpg.Pool":
+    """Devolve o pool partilhado da instância principal (ou da réplica de leitura).
+
+    O pool é criado na primeira chamada em cada event loop. Sem réplica
+    configurada, ``obter_pool(replica=True)`` devolve o pool da instância
+    principal, sem abrir ligações extra.
+    """
+    config = configuracao_db(replica)
+    if config is None:
+        raise RuntimeError("A variável de ambiente DB_HOST não está definida.")
+    chave = (config["host"], config["port"], config["dbname"])
+    loop = asyncio.get_running_loop()
+    entrada = _pools.get(chave)
+    if entrada is not None and entrada[0] is loop:
+        return entrada[1]
+
+    pool = await criar_pool(config)
+    entrada = _pools.get(chave)
+    if entrada is not None and entrada[0] is loop:
+        # Outra tarefa criou o pool durante a espera: fica o primeiro
+        await pool.close()
+        return entrada[1]
+    _pools[chave] = (loop, pool)
+    return pool
+
+
+@asynccontextmanager
+async def adquirir(replica: bool = False) -> AsyncIterator["asyncpg.Connection"]:
+    """Ligação do pool partilhado, devolvida ao pool no fim do bloco.
+
+    Com todas as ligações ocupadas, espera até ``DB_POOL_ESPERA`` segundos e
+    depois falha com ``asyncio.TimeoutError``, em vez de abrir mais ligações.
+    """
+    pool = await obter_pool(replica)
+    async with pool.acquire(timeout=configuracao_pool().espera) as ligacao:
+        yield ligacao
+
+
+async def fechar_pools() -> None:
+    """Fecha os pools criados no event loop atual (no fim do processo)."""
+    loop = asyncio.get_running_loop()
+    for chave, (dono, pool) in list(_pools.items()):
+        if dono is loop:
+            del _pools[chave]
+            await pool.close()
+
+
+def reiniciar_pools() -> None:
+    """Esquece os pools partilhados: as ligações herdadas pertencem ao processo pai."""
+    _pools.clear()
@@ -0,0 +1,292 @@
+"""
+Documentos de onboarding de cada colaborador, por departamento e cargo.
+
+O catálogo vive na tabela ``documentos`` do PostgreSQL (ver
+``db/init/06_documentos.sql``): cada documento é geral ou destina-se a um
+departamento e/ou cargo. Sempre que o catálogo é carregado, o
+``CatalogoDocumentos`` pré-calcula a lista de documentos de cada combinação
+conhecida de departamento e cargo, pelo que escolher os documentos de um
+colaborador é uma consulta a um dicionário. Tal como o índice do quiz, o
+catálogo é recarregado numa thread quando o TTL expira.
+
+As ligações do catálogo são ligações de partilha do SharePoint. O
+``ResolvedorLigacoes`` obtém da Microsoft Graph API o nome e o endereço
+atuais de cada ficheiro e guarda-os numa cache com TTL. As ligações que não
+estão em cache são resolvidas em paralelo, com no máximo ``concorrencia``
+pedidos em simultâneo no processo, e pedidos concorrentes da mesma ligação
+partilham a mesma chamada. Sem Graph API, ou quando a chamada falha, são
+usados o título e a ligação do catálogo.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Text, Tuple
+
+from actions.db import ligar
+from actions.graph import ClienteGraph, obter_cliente_graph
+from actions.recarga import RecargaPorTtl
+
+logger = logging.getLogger(__name__)
+
+TTL_CATALOGO_SEGUNDOS = 300.0
+
+# Cache das ligações resolvidas pela Graph API
+TTL_LIGACAO_SEGUNDOS = 3600.0
+TTL_FALHA_SEGUNDOS = 60.0
+TAMANHO_CACHE_LIGACOES = 2000
+
+# Pedidos simultâneos à Graph API para resolver ligações (por processo)
+CONCORRENCIA_GRAPH = 8
+
+_CONSULTA_DOCUMENTOS = """
+    SELECT id, titulo, url, nota, icone, departamento, cargo, ordem
+    FROM documentos
+    WHERE ativo
+    ORDER BY ordem, id
+"""
+
+
+class Documento(NamedTuple):
+    """Entrada do catálogo de documentos."""
+
+    id: int
+    titulo: Text
+    url: Optional[Text] = None  # ligação de partilha do SharePoint
+    nota: Optional[Text] = None  # mostrada quando o documento não tem ligação
+    icone: Text = "📄"
+    departamento: Optional[Text] = None  # None: todos os departamentos
+    cargo: Optional[Text] = None  # None: todos os cargos
+    ordem: int = 0
+
+
+class LigacaoDocumento(NamedTuple):
+    """Documento com o título e a ligação a apresentar ao colaborador."""
+
+    documento: Documento
+    titulo: Text
+    url: Optional[Text]
+
+
+CarregadorDocumentos = Callable[[], Iterable[Documento]]
+
+
+def _chave(valor: Optional[Text]) -> Optional[Text]:
+    """Normaliza um departamento ou cargo (``"Recursos Humanos"`` → ``"recursos_humanos"``)."""
+    if not valor:
+        return None
+    return "_".join(valor.lower().split())
+
+
+def carregar_documentos_postgres() -> List[Documento]:
+    """Lê todos os documentos ativos da tabela ``documentos``."""
+    with closing(ligar(replica=True)) as ligacao, ligacao.cursor() as cursor:
+        cursor.execute(_CONSULTA_DOCUMENTOS)
+        linhas = cursor.fetchall()
+    return [
+        Documento(id_doc, titulo, url, nota, icone or "📄", departamento, cargo, ordem)
+        for id_doc, titulo, url, nota, icone, departamento, cargo, ordem in linhas
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Catálogo
+# ---------------------------------------------------------------------------
+
+
+class _Estado(NamedTuple):
+    departamentos: Set[Text]
+    cargos: Set[Text]
+    conjuntos: Dict[Tuple[Optional[Text], Optional[Text]], Tuple[Documento, ...]]
+
+
+class CatalogoDocumentos(RecargaPorTtl):
+    """Catálogo em memória, com os documentos de cada (departamento, cargo) pré-calculados.
+
+    Recarregado por TTL numa thread, sem bloquear as leituras (ver ``RecargaPorTtl``).
+    """
+
+    nome_thread = "catalogo-documentos"
+    aviso_falha = "Não foi possível carregar o catálogo de documentos; a usar o catálogo base."
+
+    def __init__(
+        self,
+        documentos_base: Sequence[Documento],
+        carregador: Optional[CarregadorDocumentos] = None,
+        ttl: float = TTL_CATALOGO_SEGUNDOS,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(carregador, ttl, relogio)
+        self._documentos_base = tuple(documentos_base)
+        self._estado = self._construir(self._documentos_base)
+
+    # -- Construção -----------------------------------------------------------
+
+    @staticmethod
+    def _construir(documentos: Sequence[Documento]) -> _Estado:
+        chaves = [
+            (_chave(documento.departamento), _chave(documento.cargo), documento)
+            for documento in sorted(documentos, key=lambda documento: (documento.ordem, documento.id))
+        ]
+        departamentos = {departamento for departamento, _, _ in chaves if departamento}
+        cargos = {cargo for _, cargo, _ in chaves if cargo}
+
+        # Um departamento ou cargo sem documentos próprios usa a chave None
+        conjuntos = {}
+        for departamento in (None, *departamentos):
+            for cargo in (None, *cargos):
+                conjuntos[(departamento, cargo)] = tuple(
+                    documento
+                    for dep_documento, cargo_documento, documento in chaves
+                    if dep_documento in (None, departamento) and cargo_documento in (None, cargo)
+                )
+        return _Estado(departamentos, cargos, conjuntos)
+
+    def _carregar(self, completa: bool) -> None:
+        documentos = list(self._carregador())
+        # Os documentos da base de dados substituem o catálogo base
+        self._estado = self._construir(documentos or self._documentos_base)
+        logger.info("Catálogo de documentos carregado: %d documentos.", len(documentos))
+
+    # -- Leitura --------------------------------------------------------------
+
+    def documentos(
+        self, departamento: Optional[Text] = None, cargo: Optional[Text] = None
+    ) -> Tuple[Documento, ...]:
+        """Documentos do colaborador: os gerais e os do seu departamento e cargo."""
+        estado = self._estado
+        self._verificar_ttl()
+        departamento, cargo = _chave(departamento), _chave(cargo)
+        return estado.conjuntos[
+            (
+                departamento if departamento in estado.departamentos else None,
+                cargo if cargo in estado.cargos else None,
+            )
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Ligações resolvidas pela Graph API
+# ---------------------------------------------------------------------------
+
+
+def _titulo_item(item: Dict) -> Optional[Text]:
+    """Nome do ficheiro sem a extensão (``"Manual do Colaborador.pdf"`` → ``"Manual do Colaborador"``)."""
+    nome = item.get("name")
+    return os.path.splitext(nome)[0] if nome else None
+
+
+class ResolvedorLigacoes:
+    """Cache com TTL do título e do endereço atual de cada ligação de partilha.
+
+    As falhas também ficam em cache, por ``ttl_falha`` segundos, para que um
+    ficheiro apagado ou uma Graph API indisponível não atrasem todas as
+    conversas.
+    """
+
+    def __init__(
+        self,
+        cliente: Callable[[], Optional[ClienteGraph]] = obter_cliente_graph,
+        ttl: float = TTL_LIGACAO_SEGUNDOS,
+        ttl_falha: float = TTL_FALHA_SEGUNDOS,
+        concorrencia: int = CONCORRENCIA_GRAPH,
+        tamanho_maximo: int = TAMANHO_CACHE_LIGACOES,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._cliente = cliente
+        self._ttl = ttl
+        self._ttl_falha = ttl_falha
+        self._concorrencia = concorrencia
+        self._tamanho_maximo = tamanho_maximo
+        self._relogio = relogio
+        # url de partilha → ((título, url atual) ou None, expira_em)
+        self._cache: "OrderedDict[Text, Tuple[Optional[Tuple[Optional[Text], Text]], float]]" = (
+            OrderedDict()
+        )
+        self._em_curso: Dict[Text, "asyncio.Future"] = {}
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self.acertos = 0
+        self.pedidos = 0
+
+    async def resolver(self, documentos: Sequence[Documento]) -> List[LigacaoDocumento]:
+        """Título e ligação de cada documento, pela mesma ordem."""
+        return list(await asyncio.gather(*(self._resolver_documento(d) for d in documentos)))
+
+    async def _resolver_documento(self, documento: Documento) -> LigacaoDocumento:
+        resolvida = await self._resolver(documento.url) if documento.url else None
+        if resolvida is None:
+            return LigacaoDocumento(documento, documento.titulo, documento.url)
+        titulo, url = resolvida
+        return LigacaoDocumento(documento, titulo or documento.titulo, url)
+
+    async def _resolver(self, url: Text) -> Optional[Tuple[Optional[Text], Text]]:
+        entrada = self._cache.get(url)
+        if entrada is not None and entrada[1] > self._relogio():
+            self._cache.move_to_end(url)
+            self.acertos += 1
+            return entrada[0]
+
+        cliente = self._cliente()
+        if cliente is None:
+            return None
+
+        pedido = self._em_curso.get(url)
+        if pedido is None:
+            pedido = self._em_curso[url] = asyncio.ensure_future(self._pedir(cliente, url))
+            pedido.add_done_callback(lambda _: self._em_curso.pop(url, None))
+        # Uma conversa cancelada não cancela o pedido partilhado com as outras
+        return await asyncio.shield(pedido)
+
+    async def _pedir(self, cliente: ClienteGraph, url: Text) -> Optional[Tuple[Optional[Text], Text]]:
+        if self._semaforo is None:
+            # Criado já dentro do event loop do action server
+            self._semaforo = asyncio.Semaphore(self._concorrencia)
+        async with self._semaforo:
+            self.pedidos += 1
+            try:
+                item = await cliente.obter_item_partilhado(url)
+            except Exception:
+                # Também as falhas da credencial do azure-identity: sem isto, chegariam
+                # a todas as conversas à espera do mesmo pedido
+                logger.warning("Não foi possível resolver a ligação %s.", url, exc_info=True)
+                self._guardar(url, None, self._ttl_falha)
+                return None
+
+        resolvida = (_titulo_item(item), item.get("webUrl") or url)
+        self._guardar(url, resolvida, self._ttl)
+        return resolvida
+
+    def _guardar(self, url: Text, resolvida: Optional[Tuple[Optional[Text], Text]], ttl: float) -> None:
+        self._cache[url] = (resolvida, self._relogio() + ttl)
+        self._cache.move_to_end(url)
+        while len(self._cache) > self._tamanho_maximo:
+            self._cache.popitem(last=False)
+
+    def invalidar(self) -> None:
+        """Esvazia a cache de ligações."""
+        self._cache.clear()
+
+    def reiniciar_apos_fork(self) -> None:
+        """Descarta o semáforo e os pedidos em curso, que pertencem ao event loop do processo pai."""
+        self._semaforo = None
+        self._em_curso = {}
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+def formatar_documentos(ligacoes: Sequence[LigacaoDocumento]) -> Text:
+    """Lista numerada dos documentos, no formato da mensagem ``documentos``."""
+    partes = []
+    for numero, ligacao in enumerate(ligacoes, 1):
+        partes.append(f"{numero}. {ligacao.documento.icone} **{ligacao.titulo}**\n")
+        if ligacao.url:
+            partes.append(f"   👉 [Abrir documento]({ligacao.url})\n\n")
+        elif ligacao.documento.nota:
+            partes.append(f"   {ligacao.documento.nota}\n\n")
+        else:
+            partes.append("\n")
+    return "".join(partes)
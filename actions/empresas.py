@@ -0,0 +1,312 @@
+"""
+Pacotes de conteúdos por empresa, para servir várias empresas do grupo com o mesmo action server.
+
+Os textos, os documentos e o quiz da empresa principal continuam no código
+(``actions/templates.py`` e ``actions/conteudo_base.py``) e na base de dados, e
+formam o pacote por omissão, carregado no arranque como até aqui. Cada outra
+empresa tem um ficheiro ``actions/conteudos/<empresa>.yml`` que só precisa
+de indicar o que muda:
+
+* ``substituir`` — textos a trocar em todo o conteúdo base (o nome da
+  empresa, o email dos RH, o domínio do SharePoint);
+* ``templates`` — mensagens das actions que substituem as do pacote base;
+* ``etapas`` — os itens da lista de cada etapa do onboarding;
+* ``quiz`` — os bancos de perguntas (sem ``quiz``, o banco base com as
+  substituições);
+* ``documentos`` — o catálogo de documentos (sem ``documentos``, o catálogo
+  base com as substituições);
+* ``filas`` e ``encaminhamento`` — as filas de atendimento humano e as
+  regras que as escolhem (sem ``filas``, as filas base com as substituições,
+  para que os contactos sejam os da empresa; sem ``encaminhamento``, as
+  regras base);
+* ``faq`` — as perguntas frequentes (sem ``faq``, as entradas base com as
+  substituições). A tabela ``faq`` da base de dados é só da empresa
+  principal.
+
+A empresa de cada conversa vem do slot ``empresa``, preenchido no início da
+sessão a partir do diretório de colaboradores. Um pacote só é lido do disco
+no primeiro pedido de uma conversa dessa empresa e fica numa cache LRU
+limitada em número de pacotes e em memória; os menos usados são descartados
+e voltam a ser lidos quando forem precisos. O arranque não lê nenhum pacote,
+pelo que acrescentar empresas não o torna mais lento nem aumenta a memória
+de cada worker enquanto essas empresas não tiverem conversas.
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Text, Tuple
+
+import yaml
+
+from actions.documentos import CatalogoDocumentos, Documento
+from actions.encaminhamento import Fila, RegraEncaminhamento, TabelaEncaminhamento
+from actions.faq import DIMENSAO, IndiceFaq, RegistoFaq
+from actions.quiz import IndiceQuiz, Pergunta
+from actions.templates import RegistoTemplates
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_CONTEUDOS = Path(os.getenv("CONTEUDOS_DIR", Path(__file__).parent / "conteudos"))
+TAMANHO_MAXIMO_PACOTES = int(os.getenv("CONTEUDOS_MAXIMO_PACOTES", "32"))
+MEMORIA_MAXIMA_PACOTES = int(os.getenv("CONTEUDOS_MEMORIA_MB", "64")) * 1024 * 1024
+# Empresas sem pacote também ficam em cache, para não procurar o ficheiro em cada mensagem
+TTL_DESCONHECIDA_SEGUNDOS = 300.0
+# Cada pacote tem a sua cache de mensagens renderizadas, mais pequena do que a do pacote base
+TAMANHO_CACHE_TEMPLATES_PACOTE = 256
+
+_EMPRESA_VALIDA = re.compile(r"[a-z0-9][a-z0-9_-]*")
+
+
+class PacoteConteudo:
+    """Conteúdos de uma empresa: mensagens, quiz, documentos, filas de atendimento e FAQ."""
+
+    __slots__ = ("empresa", "nome", "templates", "quiz", "documentos", "encaminhamento", "faq", "tamanho")
+
+    def __init__(
+        self,
+        empresa: Text,
+        nome: Text,
+        templates: RegistoTemplates,
+        quiz: IndiceQuiz,
+        documentos: CatalogoDocumentos,
+        encaminhamento: TabelaEncaminhamento,
+        faq: IndiceFaq,
+        tamanho: int = 0,
+    ) -> None:
+        self.empresa = empresa
+        self.nome = nome
+        self.templates = templates
+        self.quiz = quiz
+        self.documentos = documentos
+        self.encaminhamento = encaminhamento
+        self.faq = faq
+        # Memória aproximada dos conteúdos (bytes), usada no limite da cache
+        self.tamanho = tamanho
+
+
+class ConteudoBase(NamedTuple):
+    """Conteúdo da empresa principal, do qual cada pacote parte."""
+
+    templates: Dict[Text, Text]
+    bancos: Dict[Text, Sequence[Pergunta]]
+    documentos: Sequence[Documento]
+    filas: Sequence[Fila]
+    regras: Sequence[RegraEncaminhamento]
+    fila_padrao: Text
+    faq: Sequence[RegistoFaq] = ()
+
+
+CarregadorPacote = Callable[[Text], Optional[PacoteConteudo]]
+
+
+def _substituir(valor: Any, substituicoes: Sequence[Tuple[Text, Text]]) -> Any:
+    if isinstance(valor, str):
+        for antigo, novo in substituicoes:
+            valor = valor.replace(antigo, novo)
+        return valor
+    if isinstance(valor, dict):
+        return {chave: _substituir(item, substituicoes) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_substituir(item, substituicoes) for item in valor]
+    return valor
+
+
+def _tamanho_aproximado(valor: Any) -> int:
+    tamanho = sys.getsizeof(valor)
+    if isinstance(valor, dict):
+        tamanho += sum(_tamanho_aproximado(k) + _tamanho_aproximado(v) for k, v in valor.items())
+    elif isinstance(valor, (list, tuple)):
+        tamanho += sum(_tamanho_aproximado(item) for item in valor)
+    return tamanho
+
+
+def substituir_lista(texto: Text, itens: Sequence[Text]) -> Text:
+    """Troca a primeira lista de ``•`` de ``texto`` pelos ``itens`` (acrescentados se não houver lista)."""
+    linhas = texto.split("\n")
+    lista = [f"• {item}" for item in itens]
+    indices = [i for i, linha in enumerate(linhas) if linha.startswith("• ")]
+    if not indices:
+        return "\n".join(linhas + [""] + lista)
+    inicio = fim = indices[0]
+    while fim + 1 < len(linhas) and linhas[fim + 1].startswith("• "):
+        fim += 1
+    return "\n".join(linhas[:inicio] + lista + linhas[fim + 1 :])
+
+
+def construir_pacote(empresa: Text, dados: Dict[Text, Any], base: ConteudoBase) -> PacoteConteudo:
+    """Constrói o pacote de ``empresa`` a partir do conteúdo base e dos dados do seu ficheiro."""
+    substituicoes = [(str(antigo), str(novo)) for antigo, novo in (dados.get("substituir") or {}).items()]
+
+    templates = _substituir(base.templates, substituicoes)
+    for etapa, itens in (dados.get("etapas") or {}).items():
+        chave = f"etapa_{etapa}"
+        if chave not in templates:
+            raise ValueError(f"etapa desconhecida no pacote '{empresa}': {etapa}")
+        templates[chave] = substituir_lista(templates[chave], [str(item) for item in itens])
+    templates.update(dados.get("templates") or {})
+
+    bancos = dados.get("quiz") or _substituir(base.bancos, substituicoes)
+    if "documentos" in dados:
+        documentos = [Documento(**documento) for documento in dados["documentos"]]
+    else:
+        documentos = [Documento(*_substituir(documento, substituicoes)) for documento in base.documentos]
+
+    if "filas" in dados:
+        filas = [Fila(**fila) for fila in dados["filas"]]
+    else:
+        filas = [Fila(*_substituir(fila, substituicoes)) for fila in base.filas]
+    if "encaminhamento" in dados:
+        regras = [RegraEncaminhamento(**regra) for regra in dados["encaminhamento"] or []]
+    else:
+        regras = list(base.regras)
+
+    if "faq" in dados:
+        faq = [RegistoFaq(**entrada) for entrada in dados["faq"] or []]
+    else:
+        faq = [RegistoFaq(*_substituir(entrada, substituicoes)) for entrada in base.faq]
+    # Cada pergunta e variante tem um vetor de DIMENSAO float32 no índice
+    memoria_faq = sum(len(entrada.textos) for entrada in faq) * DIMENSAO * 4
+
+    return PacoteConteudo(
+        empresa,
+        str(dados.get("nome") or empresa),
+        RegistoTemplates(templates, tamanho_cache=TAMANHO_CACHE_TEMPLATES_PACOTE),
+        IndiceQuiz(bancos_base=bancos),
+        CatalogoDocumentos(documentos),
+        TabelaEncaminhamento(filas, regras, str(dados.get("fila_padrao") or base.fila_padrao)),
+        IndiceFaq(faq),
+        tamanho=_tamanho_aproximado((templates, bancos, documentos, filas, faq)) + memoria_faq,
+    )
+
+
+def carregar_pacote_yaml(
+    empresa: Text, base: ConteudoBase, diretorio: Path = DIRETORIO_CONTEUDOS
+) -> Optional[PacoteConteudo]:
+    """Lê ``<diretorio>/<empresa>.yml``; devolve ``None`` se a empresa não tiver pacote."""
+    caminho = Path(diretorio) / f"{empresa}.yml"
+    try:
+        with open(caminho, encoding="utf-8") as ficheiro:
+            dados = yaml.safe_load(ficheiro) or {}
+    except FileNotFoundError:
+        return None
+    return construir_pacote(empresa, dados, base)
+
+
+def carregador_yaml(base: ConteudoBase, diretorio: Path = DIRETORIO_CONTEUDOS) -> CarregadorPacote:
+    """Carregador dos pacotes em ``diretorio``, a partir do conteúdo ``base``."""
+    return partial(carregar_pacote_yaml, base=base, diretorio=diretorio)
+
+
+class CachePacotes:
+    """Cache LRU dos pacotes de conteúdos, limitada em número de pacotes e em memória.
+
+    O pacote por omissão não conta para os limites e nunca é descartado. As
+    empresas sem pacote (ou cujo pacote não pôde ser lido) recebem o pacote
+    por omissão, guardado em cache durante ``ttl_desconhecida`` segundos.
+    """
+
+    def __init__(
+        self,
+        padrao: PacoteConteudo,
+        carregador: Optional[CarregadorPacote] = None,
+        tamanho_maximo: int = TAMANHO_MAXIMO_PACOTES,
+        memoria_maxima: int = MEMORIA_MAXIMA_PACOTES,
+        ttl_desconhecida: float = TTL_DESCONHECIDA_SEGUNDOS,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.padrao = padrao
+        self._carregador = carregador
+        self._tamanho_maximo = tamanho_maximo
+        self._memoria_maxima = memoria_maxima
+        self._ttl_desconhecida = ttl_desconhecida
+        self._relogio = relogio
+        # empresa → (pacote, expira_em), do pacote menos para o mais recente
+        self._cache: "OrderedDict[Text, Tuple[PacoteConteudo, float]]" = OrderedDict()
+        self._memoria = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.descartados = 0
+
+    def obter(self, empresa: Optional[Text]) -> PacoteConteudo:
+        """Devolve o pacote da empresa, lendo-o no primeiro pedido; o por omissão se não houver."""
+        empresa = (empresa or "").strip().lower()
+        if not empresa or empresa == self.padrao.empresa or self._carregador is None:
+            return self.padrao
+        with self._lock:
+            entrada = self._cache.get(empresa)
+            if entrada is not None and entrada[1] > self._relogio():
+                self._cache.move_to_end(empresa)
+                self.acertos += 1
+                return entrada[0]
+            self.falhas += 1
+            # A leitura fica dentro do lock: pedidos simultâneos da mesma empresa leem o ficheiro uma vez
+            pacote = self._carregar(empresa)
+            self._guardar(empresa, pacote)
+            return pacote
+
+    def _carregar(self, empresa: Text) -> PacoteConteudo:
+        if not _EMPRESA_VALIDA.fullmatch(empresa):
+            logger.warning("Empresa inválida '%s'; a usar o pacote por omissão.", empresa)
+            return self.padrao
+        try:
+            pacote = self._carregador(empresa)
+        except Exception:
+            logger.warning("Não foi possível ler o pacote da empresa '%s'.", empresa, exc_info=True)
+            return self.padrao
+        if pacote is None:
+            logger.info("A empresa '%s' não tem pacote; a usar o pacote por omissão.", empresa)
+            return self.padrao
+        logger.info("Pacote da empresa '%s' carregado (~%d KiB).", empresa, pacote.tamanho // 1024)
+        return pacote
+
+    def _guardar(self, empresa: Text, pacote: PacoteConteudo) -> None:
+        self._remover(empresa)
+        conhecida = pacote is not self.padrao
+        expira_em = float("inf") if conhecida else self._relogio() + self._ttl_desconhecida
+        self._cache[empresa] = (pacote, expira_em)
+        if conhecida:
+            self._memoria += pacote.tamanho
+        # O pacote acabado de ler fica sempre, mesmo que sozinho exceda o limite de memória
+        while len(self._cache) > 1 and (
+            len(self._cache) > self._tamanho_maximo or self._memoria > self._memoria_maxima
+        ):
+            self._remover(next(iter(self._cache)))
+            self.descartados += 1
+
+    def _remover(self, empresa: Text) -> None:
+        entrada = self._cache.pop(empresa, None)
+        if entrada is not None and entrada[0] is not self.padrao:
+            self._memoria -= entrada[0].tamanho
+
+    def invalidar(self, empresa: Optional[Text] = None) -> None:
+        """Descarta um pacote (para ser lido de novo), ou todos se ``empresa`` for ``None``."""
+        with self._lock:
+            if empresa is None:
+                self._cache.clear()
+                self._memoria = 0
+            else:
+                self._remover(empresa.strip().lower())
+
+    def empresas(self) -> List[Text]:
+        """Empresas em cache, da menos para a mais recentemente usada."""
+        return list(self._cache)
+
+    @property
+    def memoria(self) -> int:
+        """Memória aproximada (bytes) dos pacotes em cache."""
+        return self._memoria
+
+    def reiniciar_apos_fork(self) -> None:
+        """Cria um lock novo; os pacotes já lidos continuam partilhados com o processo pai."""
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cache)
@@ -0,0 +1,135 @@
+"""
+Encaminhamento das conversas para a equipa humana certa (RH ou TI).
+
+Quando o colaborador pede para falar com alguém, ou quando o bot falha
+várias vezes seguidas, a conversa é encaminhada para uma fila de
+atendimento. A fila é escolhida pelas regras da tabela
+``regras_encaminhamento`` (ver ``db/init/09_encaminhamento.sql``), a partir
+do departamento do colaborador e das últimas intents da conversa: quem
+acabou de pedir ajuda de TI vai para o helpdesk, mesmo que seja de
+Marketing, e quem tem um parceiro de RH no seu departamento vai para ele.
+
+As regras são pré-calculadas num dicionário indexado por (departamento,
+intent); escolher a fila é no máximo uma consulta por intent do histórico.
+Tal como o catálogo de documentos, a tabela é recarregada numa thread
+quando o TTL expira.
+"""
+
+import logging
+import time
+from contextlib import closing
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Sequence, Text, Tuple
+
+from actions.db import ligar
+from actions.recarga import RecargaPorTtl
+
+logger = logging.getLogger(__name__)
+
+TTL_ENCAMINHAMENTO_SEGUNDOS = 300.0
+
+_CONSULTA_FILAS = "SELECT id, nome, contacto, prazo FROM filas_atendimento"
+_CONSULTA_REGRAS = "SELECT fila, departamento, intent FROM regras_encaminhamento"
+
+
+class Fila(NamedTuple):
+    """Fila de atendimento de uma equipa humana."""
+
+    id: Text
+    nome: Text
+    contacto: Text
+    prazo: Text  # tempo de resposta indicado ao colaborador
+
+
+class RegraEncaminhamento(NamedTuple):
+    """Encaminha para ``fila`` as conversas do departamento e/ou com a intent indicados."""
+
+    fila: Text
+    departamento: Optional[Text] = None  # None: todos os departamentos
+    intent: Optional[Text] = None  # None: qualquer intent
+
+
+CarregadorEncaminhamento = Callable[[], Tuple[Iterable[Fila], Iterable[RegraEncaminhamento]]]
+
+
+def _chave(valor: Optional[Text]) -> Optional[Text]:
+    """Normaliza um departamento (``"Recursos Humanos"`` → ``"recursos_humanos"``)."""
+    if not valor:
+        return None
+    return "_".join(valor.lower().split())
+
+
+def carregar_encaminhamento_postgres() -> Tuple[Iterable[Fila], Iterable[RegraEncaminhamento]]:
+    """Lê as filas e as regras de encaminhamento."""
+    with closing(ligar(replica=True)) as ligacao, ligacao.cursor() as cursor:
+        cursor.execute(_CONSULTA_FILAS)
+        filas = [Fila(*linha) for linha in cursor.fetchall()]
+        cursor.execute(_CONSULTA_REGRAS)
+        regras = [RegraEncaminhamento(*linha) for linha in cursor.fetchall()]
+    return filas, regras
+
+
+class _Estado(NamedTuple):
+    regras: Dict[Tuple[Optional[Text], Optional[Text]], Fila]
+    padrao: Fila
+
+
+class TabelaEncaminhamento(RecargaPorTtl):
+    """Tabela de encaminhamento em memória, recarregada por TTL numa thread (ver ``RecargaPorTtl``)."""
+
+    nome_thread = "tabela-encaminhamento"
+    aviso_falha = "Não foi possível carregar a tabela de encaminhamento; a usar a tabela base."
+
+    def __init__(
+        self,
+        filas_base: Sequence[Fila],
+        regras_base: Sequence[RegraEncaminhamento],
+        fila_padrao: Text,
+        carregador: Optional[CarregadorEncaminhamento] = None,
+        ttl: float = TTL_ENCAMINHAMENTO_SEGUNDOS,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(carregador, ttl, relogio)
+        self._fila_padrao = fila_padrao
+        self._estado = self._construir(filas_base, regras_base)
+
+    # -- Construção -----------------------------------------------------------
+
+    def _construir(self, filas: Iterable[Fila], regras: Iterable[RegraEncaminhamento]) -> _Estado:
+        por_id = {fila.id: fila for fila in filas}
+        if self._fila_padrao not in por_id:
+            raise ValueError(f"a fila por omissão '{self._fila_padrao}' não existe")
+        indice = {}
+        for regra in regras:
+            fila = por_id.get(regra.fila)
+            if fila is None:
+                logger.warning("Regra de encaminhamento para uma fila inexistente: %s", regra)
+                continue
+            indice[(_chave(regra.departamento), regra.intent or None)] = fila
+        return _Estado(indice, por_id[self._fila_padrao])
+
+    def _carregar(self, completa: bool) -> None:
+        filas, regras = self._carregador()
+        filas, regras = list(filas), list(regras)
+        # Sem filas na base de dados, mantém as filas e regras base
+        if filas:
+            self._estado = self._construir(filas, regras)
+        logger.info("Tabela de encaminhamento carregada: %d filas, %d regras.", len(filas), len(regras))
+
+    # -- Leitura --------------------------------------------------------------
+
+    def fila(self, departamento: Optional[Text] = None, intents: Sequence[Text] = ()) -> Fila:
+        """Escolhe a fila para um colaborador do ``departamento`` com as ``intents`` indicadas.
+
+        As intents vão da mais para a menos recente; a primeira com uma regra
+        (do departamento ou geral) decide. Sem nenhuma, vale a regra do
+        departamento e, por fim, a fila por omissão.
+        """
+        estado = self._estado
+        self._verificar_ttl()
+        departamento = _chave(departamento)
+        regras = estado.regras
+        for intent in intents:
+            fila = regras.get((departamento, intent)) or regras.get((None, intent))
+            if fila is not None:
+                return fila
+        return regras.get((departamento, None)) or regras.get((None, None)) or estado.padrao
@@ -0,0 +1,199 @@
+"""
+Etapa do onboarding de cada colaborador, calculada a partir da data de início.
+
+Os RH registam a data de início de cada colaborador na tabela
+``colaboradores`` (ver ``db/init/03_colaboradores.sql``). O action server
+mantém em memória um calendário pré-calculado por colaborador, indexado pelo
+email, com as fronteiras de cada etapa já convertidas em ordinais de data:
+determinar a etapa num turno é uma consulta ao dicionário e duas comparações
+de inteiros, sem acesso à base de dados.
+
+O calendário é recarregado de forma incremental numa thread quando o TTL
+expira: apenas as linhas alteradas desde a última leitura (``atualizado_em``)
+são lidas, e periodicamente é feita uma leitura completa para apanhar linhas
+apagadas.
+"""
+
+import logging
+import time
+from contextlib import closing
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Text
+
+from actions.db import ligar
+from actions.fuso_horario import agora_local
+from actions.recarga import RecargaPorTtl
+
+logger = logging.getLogger(__name__)
+
+# Valores do slot categórico ``etapa_onboarding`` (ver domain.yml)
+PRE_ONBOARDING = "pre_onboarding"
+PRIMEIRO_DIA = "primeiro_dia"
+PRIMEIRA_SEMANA = "primeira_semana"
+ONBOARDING_CONCLUIDO = "onboarding_concluido"
+
+# A primeira semana conta a partir do primeiro dia, inclusive
+DIAS_PRIMEIRA_SEMANA = 7
+
+TTL_CALENDARIO_SEGUNDOS = 300.0
+INTERVALO_RECARGA_COMPLETA_SEGUNDOS = 3600.0
+
+_FORMATOS_DATA = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y")
+
+_CONSULTA_COLABORADORES = """
+    SELECT email, data_inicio, ativo, atualizado_em
+    FROM colaboradores
+"""
+
+
+class RegistoColaborador(NamedTuple):
+    """Linha da tabela ``colaboradores`` relevante para o calendário."""
+
+    email: Text
+    data_inicio: Optional[date]
+    ativo: bool
+    atualizado_em: datetime
+
+
+CarregadorColaboradores = Callable[[Optional[datetime]], Iterable[RegistoColaborador]]
+
+
+class CalendarioColaborador:
+    """Fronteiras das etapas de um colaborador, em ordinais de data."""
+
+    __slots__ = ("inicio", "fim_primeira_semana")
+
+    def __init__(self, data_inicio: date) -> None:
+        self.inicio = data_inicio.toordinal()
+        self.fim_primeira_semana = self.inicio + DIAS_PRIMEIRA_SEMANA - 1
+
+    def etapa(self, hoje: int) -> Text:
+        """Etapa no dia ``hoje`` (ordinal de data)."""
+        if hoje < self.inicio:
+            return PRE_ONBOARDING
+        if hoje == self.inicio:
+            return PRIMEIRO_DIA
+        if hoje <= self.fim_primeira_semana:
+            return PRIMEIRA_SEMANA
+        return ONBOARDING_CONCLUIDO
+
+
+@lru_cache(maxsize=1024)
+def interpretar_data_inicio(valor: Text) -> Optional[date]:
+    """Converte o valor do slot ``data_inicio`` (ISO ou dd/mm/aaaa) numa data."""
+    valor = valor.strip()
+    for formato in _FORMATOS_DATA:
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _calendario_da_data(data_inicio: date) -> CalendarioColaborador:
+    return CalendarioColaborador(data_inicio)
+
+
+def hoje_local() -> int:
+    """Ordinal da data atual no fuso horário da empresa."""
+    return agora_local().date().toordinal()
+
+
+def carregar_colaboradores_postgres(desde: Optional[datetime]) -> List[RegistoColaborador]:
+    """Lê os colaboradores alterados desde ``desde`` (todos, se ``None``)."""
+    consulta = _CONSULTA_COLABORADORES
+    parametros: tuple = ()
+    if desde is not None:
+        # ``>=`` para não perder linhas gravadas no mesmo instante da última leitura
+        consulta += " WHERE atualizado_em >= %s"
+        parametros = (desde,)
+    consulta += " ORDER BY atualizado_em"
+
+    with closing(ligar(replica=True)) as ligacao, ligacao.cursor() as cursor:
+        cursor.execute(consulta, parametros)
+        return [RegistoColaborador(*linha) for linha in cursor.fetchall()]
+
+
+class CalendarioOnboarding(RecargaPorTtl):
+    """Tabela em memória email → calendário, com recarregamento incremental por TTL.
+
+    As leituras nunca acedem à base de dados: quando o TTL expira, a leitura
+    usa a tabela atual e a atualização corre numa thread (ver ``RecargaPorTtl``).
+    """
+
+    nome_thread = "calendario-onboarding"
+    aviso_falha = "Não foi possível ler o calendário de onboarding."
+
+    def __init__(
+        self,
+        carregador: Optional[CarregadorColaboradores] = None,
+        ttl: float = TTL_CALENDARIO_SEGUNDOS,
+        intervalo_recarga_completa: float = INTERVALO_RECARGA_COMPLETA_SEGUNDOS,
+        relogio: Callable[[], float] = time.monotonic,
+        hoje: Callable[[], int] = hoje_local,
+    ) -> None:
+        super().__init__(carregador, ttl, relogio, intervalo_recarga_completa)
+        self._hoje = hoje
+        self._por_email: Dict[Text, CalendarioColaborador] = {}
+        self._marca: Optional[datetime] = None
+
+    # -- Carregamento ---------------------------------------------------------
+
+    def _carregar(self, completa: bool) -> None:
+        registos = list(self._carregador(None if completa else self._marca))
+
+        if completa:
+            # Constrói uma tabela nova e publica-a com uma única atribuição
+            por_email: Dict[Text, CalendarioColaborador] = {}
+            self._aplicar(por_email, registos)
+            self._por_email = por_email
+        else:
+            # Cada atribuição a uma chave é atómica: as leituras concorrentes
+            # veem o calendário antigo ou o novo de cada colaborador
+            self._aplicar(self._por_email, registos)
+
+        if registos:
+            self._marca = max(registo.atualizado_em for registo in registos)
+        logger.debug(
+            "Calendário de onboarding %s: %d alterações.",
+            "recarregado" if completa else "atualizado",
+            len(registos),
+        )
+
+    @staticmethod
+    def _aplicar(
+        por_email: Dict[Text, CalendarioColaborador], registos: Iterable[RegistoColaborador]
+    ) -> None:
+        for registo in registos:
+            email = registo.email.lower()
+            if registo.ativo and registo.data_inicio is not None:
+                por_email[email] = _calendario_da_data(registo.data_inicio)
+            else:
+                por_email.pop(email, None)
+
+    # -- Leitura --------------------------------------------------------------
+
+    def etapa(
+        self,
+        email: Optional[Text] = None,
+        data_inicio: Optional[Text] = None,
+        hoje: Optional[int] = None,
+    ) -> Optional[Text]:
+        """Etapa atual do colaborador, ou ``None`` se a data de início for desconhecida.
+
+        A data registada pelos RH tem prioridade sobre o slot ``data_inicio``.
+        """
+        self._verificar_ttl()
+        calendario = self._por_email.get(email.lower()) if email else None
+        if calendario is None and data_inicio:
+            data = interpretar_data_inicio(data_inicio)
+            if data is not None:
+                calendario = _calendario_da_data(data)
+        if calendario is None:
+            return None
+        return calendario.etapa(self._hoje() if hoje is None else hoje)
+
+    def __len__(self) -> int:
+        return len(self._por_email)
@@ -0,0 +1,330 @@
+"""
+Perguntas frequentes (FAQ) dos RH, respondidas por semelhança com a mensagem.
+
+As perguntas e respostas vivem na tabela ``faq`` do PostgreSQL (ver
+``db/init/05_faq.sql``), mantida pelos RH. A action
+``action_responder_faq`` responde à intent ``pedir_faq`` com a entrada mais
+parecida com a mensagem: acrescentar uma pergunta não obriga a treinar de
+novo o modelo Rasa.
+
+Cada pergunta, e cada variante da pergunta, é convertida num vetor de
+``DIMENSAO`` floats. As palavras e os trigramas de caracteres da pergunta
+normalizada (minúsculas, sem acentos) são distribuídos pelas dimensões com
+uma função de dispersão ("feature hashing"), e o vetor é normalizado. Não há
+vocabulário ajustado ao conjunto, pelo que o vetor de uma pergunta não
+depende das outras: acrescentar ou alterar uma entrada só obriga a calcular
+os vetores dessa entrada. Os trigramas toleram erros de escrita e flexões.
+
+Os vetores ficam numa única matriz NumPy (``float32``, uma linha por
+pergunta ou variante). A pesquisa é um produto matriz × vetor (semelhança do
+cosseno) seguido de ``argpartition`` para os k melhores: poucos milissegundos
+com milhares de entradas (``python -m benchmarks.bench_faq``).
+
+A tabela é relida como o calendário de onboarding (``actions/etapas.py``):
+de forma incremental quando o TTL expira, apenas as linhas alteradas desde a
+última leitura, e periodicamente por inteiro para apanhar linhas apagadas.
+Uma atualização acrescenta as linhas novas ao fim da matriz e marca como
+livres as das entradas alteradas ou retiradas; o estado novo é publicado com
+uma única atribuição e as leituras nunca bloqueiam.
+"""
+
+import json
+import logging
+import threading
+import time
+import zlib
+from contextlib import closing
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Text, Tuple
+
+import numpy as np
+
+from actions.db import ligar
+from actions.recarga import RecargaPorTtl
+from actions.respostas import tokenizar
+
+logger = logging.getLogger(__name__)
+
+# Dimensão dos vetores: 1024 float32 = 4 KiB por pergunta ou variante
+DIMENSAO = 1024
+
+# Peso de uma palavra face a um trigrama de caracteres
+PESO_PALAVRA = 2.0
+
+# Semelhança mínima para responder com uma entrada e para a sugerir como relacionada
+LIMIAR_RESPOSTA = 0.4
+LIMIAR_RELACIONADAS = 0.25
+
+TTL_FAQ_SEGUNDOS = 300.0
+INTERVALO_RECARGA_COMPLETA_SEGUNDOS = 3600.0
+
+# Palavras que aparecem em quase todas as perguntas e não as distinguem
+_PALAVRAS_VAZIAS = frozenset(
+    {
+        "a", "o", "as", "os", "um", "uma", "de", "do", "da", "dos", "das", "em", "no", "na",
+        "nos", "nas", "e", "que", "se", "me", "eu", "ao", "para", "por", "com", "sobre",
+        "tenho", "duvida", "duvidas", "pergunta", "qual", "quais",
+    }
+)  # fmt: skip
+
+_CONSULTA_FAQ = """
+    SELECT id, pergunta, resposta, variantes, ativa, atualizada_em
+    FROM faq
+"""
+
+
+class RegistoFaq(NamedTuple):
+    """Linha da tabela ``faq``."""
+
+    id: int
+    pergunta: Text
+    resposta: Text
+    variantes: Tuple[Text, ...] = ()
+    ativa: bool = True
+    atualizada_em: Optional[datetime] = None
+
+    @property
+    def textos(self) -> Tuple[Text, ...]:
+        """Textos indexados: a pergunta e as suas variantes."""
+        return (self.pergunta,) + tuple(self.variantes)
+
+
+class ResultadoFaq(NamedTuple):
+    entrada: RegistoFaq
+    semelhanca: float
+
+
+CarregadorFaq = Callable[[Optional[datetime]], Iterable[RegistoFaq]]
+
+
+def carregar_faq_postgres(desde: Optional[datetime]) -> List[RegistoFaq]:
+    """Lê as entradas alteradas desde ``desde`` (todas, se ``None``)."""
+    consulta = _CONSULTA_FAQ
+    parametros: tuple = ()
+    if desde is not None:
+        # ``>=`` para não perder linhas gravadas no mesmo instante da última leitura
+        consulta += " WHERE atualizada_em >= %s"
+        parametros = (desde,)
+    consulta += " ORDER BY atualizada_em"
+
+    with closing(ligar(replica=True)) as ligacao, ligacao.cursor() as cursor:
+        cursor.execute(consulta, parametros)
+        linhas = cursor.fetchall()
+
+    registos = []
+    for id_entrada, pergunta, resposta, variantes, ativa, atualizada_em in linhas:
+        if isinstance(variantes, str):
+            variantes = json.loads(variantes)
+        registos.append(RegistoFaq(id_entrada, pergunta, resposta, tuple(variantes or ()), ativa, atualizada_em))
+    return registos
+
+
+# ---------------------------------------------------------------------------
+# Vetores
+# ---------------------------------------------------------------------------
+
+
+@lru_cache(maxsize=65536)
+def _dimensao(caracteristica: Text) -> Tuple[int, float]:
+    # crc32 é estável entre processos (ao contrário de ``hash``); o bit mais
+    # alto dá o sinal, para as colisões se anularem em média
+    valor = zlib.crc32(caracteristica.encode("utf-8"))
+    return valor % DIMENSAO, 1.0 if valor & 0x80000000 else -1.0
+
+
+def _caracteristicas(texto: Text) -> Iterable[Tuple[Text, float]]:
+    for palavra in tokenizar(texto):
+        if palavra in _PALAVRAS_VAZIAS:
+            continue
+        yield "p:" + palavra, PESO_PALAVRA
+        marcada = f"#{palavra}#"
+        for inicio in range(len(marcada) - 2):
+            yield "c:" + marcada[inicio : inicio + 3], 1.0
+
+
+def vetorizar(textos: Sequence[Text]) -> np.ndarray:
+    """Matriz (len(textos) × ``DIMENSAO``) de vetores normalizados; linhas a zero para textos vazios."""
+    matriz = np.zeros((len(textos), DIMENSAO), dtype=np.float32)
+    linhas: List[int] = []
+    colunas: List[int] = []
+    valores: List[float] = []
+    for linha, texto in enumerate(textos):
+        for caracteristica, peso in _caracteristicas(texto):
+            posicao, sinal = _dimensao(caracteristica)
+            linhas.append(linha)
+            colunas.append(posicao)
+            valores.append(sinal * peso)
+    np.add.at(matriz, (linhas, colunas), valores)
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    np.divide(matriz, normas, out=matriz, where=normas > 0)
+    return matriz
+
+
+# ---------------------------------------------------------------------------
+# Índice
+# ---------------------------------------------------------------------------
+
+
+class _Estado(NamedTuple):
+    entradas: Dict[int, RegistoFaq]
+    matriz: np.ndarray  # uma linha por pergunta ou variante
+    donos: np.ndarray  # id da entrada de cada linha (-1: linha livre)
+    livres: int
+
+
+class IndiceFaq(RecargaPorTtl):
+    """Matriz em memória das perguntas frequentes, com atualização incremental por TTL.
+
+    As ``entradas_base`` valem enquanto a base de dados não tiver uma linha
+    com o mesmo id, ou quando não há base de dados. Uma linha inativa retira
+    a entrada, mesmo que seja uma entrada base.
+    """
+
+    nome_thread = "faq-indice"
+    aviso_falha = "Não foi possível ler as perguntas frequentes."
+
+    def __init__(
+        self,
+        entradas_base: Iterable[RegistoFaq] = (),
+        carregador: Optional[CarregadorFaq] = None,
+        ttl: float = TTL_FAQ_SEGUNDOS,
+        intervalo_recarga_completa: float = INTERVALO_RECARGA_COMPLETA_SEGUNDOS,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(carregador, ttl, relogio, intervalo_recarga_completa)
+        self._entradas_base = {entrada.id: entrada for entrada in entradas_base}
+        self._marca: Optional[datetime] = None
+        self._lock_escrita = threading.Lock()
+        self._buffer = np.empty((0, DIMENSAO), dtype=np.float32)
+        self._estado = _Estado({}, self._buffer, np.zeros(0, dtype=np.int64), 0)
+        self.atualizar(self._entradas_base.values())
+
+    # -- Escrita --------------------------------------------------------------
+
+    def atualizar(self, registos: Iterable[RegistoFaq], completa: bool = False) -> int:
+        """Aplica entradas novas, alteradas ou inativas; devolve o número de vetores calculados.
+
+        Com ``completa``, os ``registos`` são a tabela inteira: as entradas que
+        não estão lá voltam às entradas base, ou desaparecem. Em qualquer caso,
+        só as perguntas com texto novo ou alterado são vetorizadas.
+        """
+        with self._lock_escrita:
+            antigo = self._estado
+            entradas = dict(self._entradas_base) if completa else dict(antigo.entradas)
+            for registo in registos:
+                if registo.ativa:
+                    entradas[registo.id] = registo
+                else:
+                    entradas.pop(registo.id, None)
+
+            # Entradas retiradas ou com textos alterados: as suas linhas ficam
+            # marcadas como livres (dono -1) até à próxima compactação
+            obsoletas = [
+                id_entrada
+                for id_entrada, entrada in antigo.entradas.items()
+                if id_entrada not in entradas or entradas[id_entrada].textos != entrada.textos
+            ]
+            donos = antigo.donos.copy()
+            if obsoletas:
+                donos[np.isin(donos, obsoletas)] = -1
+
+            novos_textos: List[Text] = []
+            novos_donos: List[int] = []
+            for id_entrada, entrada in entradas.items():
+                if id_entrada not in antigo.entradas or id_entrada in obsoletas:
+                    novos_textos.extend(entrada.textos)
+                    novos_donos.extend([id_entrada] * len(entrada.textos))
+
+            matriz, donos = self._acrescentar(
+                donos, vetorizar(novos_textos), np.asarray(novos_donos, dtype=np.int64)
+            )
+            self._estado = _Estado(entradas, matriz, donos, int(np.count_nonzero(donos < 0)))
+            return len(novos_textos)
+
+    def _acrescentar(
+        self, donos: np.ndarray, linhas: np.ndarray, novos_donos: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # As linhas novas são escritas a seguir às do estado publicado, que as
+        # leituras em curso não veem; o buffer só é copiado quando cresce ou é
+        # compactado, e nesse caso para um buffer novo
+        usadas = len(donos)
+        livres = int(np.count_nonzero(donos < 0))
+        if livres and livres * 2 >= usadas:
+            manter = donos >= 0
+            donos = np.concatenate([donos[manter], novos_donos])
+            buffer = np.empty((max(len(donos) * 2, 64), DIMENSAO), dtype=np.float32)
+            ocupadas = int(np.count_nonzero(manter))
+            buffer[:ocupadas] = self._buffer[:usadas][manter]
+            buffer[ocupadas : len(donos)] = linhas
+            self._buffer = buffer
+            return buffer[: len(donos)], donos
+
+        total = usadas + len(linhas)
+        if total > len(self._buffer):
+            buffer = np.empty((max(total * 2, 64), DIMENSAO), dtype=np.float32)
+            buffer[:usadas] = self._buffer[:usadas]
+            self._buffer = buffer
+        self._buffer[usadas:total] = linhas
+        return self._buffer[:total], np.concatenate([donos, novos_donos])
+
+    # -- Carregamento ---------------------------------------------------------
+
+    def _carregar(self, completa: bool) -> None:
+        registos = list(self._carregador(None if completa else self._marca))
+        vetorizados = self.atualizar(registos, completa=completa)
+        marcas = [registo.atualizada_em for registo in registos if registo.atualizada_em is not None]
+        if marcas:
+            self._marca = max(marcas)
+        logger.info(
+            "FAQ %s: %d alterações, %d perguntas vetorizadas, %d entradas.",
+            "recarregada" if completa else "atualizada",
+            len(registos),
+            vetorizados,
+            len(self),
+        )
+
+    def reiniciar_apos_fork(self) -> None:
+        """Descarta os locks e a thread de atualização herdados do processo pai."""
+        super().reiniciar_apos_fork()
+        self._lock_escrita = threading.Lock()
+
+    # -- Leitura --------------------------------------------------------------
+
+    def procurar(self, texto: Text, k: int = 3) -> List[ResultadoFaq]:
+        """As ``k`` entradas mais parecidas com o texto, da mais para a menos parecida."""
+        self._verificar_ttl()
+        estado = self._estado
+        consulta = vetorizar([texto])[0]
+        if not len(estado.donos) or not consulta.any():
+            return []
+
+        semelhancas = estado.matriz @ consulta
+        if estado.livres:
+            semelhancas[estado.donos < 0] = -np.inf
+        # Várias linhas podem ser da mesma entrada: começa por 4k candidatas
+        # e só ordena tudo se não chegarem para k entradas distintas
+        candidatas = min(len(semelhancas), 4 * k)
+        while True:
+            linhas = np.argpartition(semelhancas, -candidatas)[-candidatas:]
+            linhas = linhas[np.argsort(semelhancas[linhas])[::-1]]
+            resultados: List[ResultadoFaq] = []
+            vistas = set()
+            for linha in linhas:
+                id_entrada = int(estado.donos[linha])
+                if id_entrada < 0:
+                    break  # só restam linhas livres
+                if id_entrada not in vistas:
+                    vistas.add(id_entrada)
+                    resultados.append(ResultadoFaq(estado.entradas[id_entrada], float(semelhancas[linha])))
+                    if len(resultados) == k:
+                        return resultados
+            if candidatas == len(semelhancas):
+                return resultados
+            candidatas = len(semelhancas)
+
+    def entrada(self, id_entrada: int) -> Optional[RegistoFaq]:
+        return self._estado.entradas.get(id_entrada)
+
+    def __len__(self) -> int:
+        return len(self._estado.entradas)
@@ -0,0 +1,250 @@
+"""
+Persistência do feedback dos colaboradores em segundo plano (write-behind).
+
+``ActionRegistarFeedback`` apenas coloca o feedback numa fila em memória; uma
+thread dedicada junta os registos em lotes e grava-os no PostgreSQL com um
+único INSERT multi-linha, quando o lote enche ou quando passa o intervalo
+máximo de espera. A resposta ao colaborador nunca espera pela base de dados.
+No encerramento do action server, o que estiver na fila é gravado antes de sair.
+
+Quando um lote falha, os seus registos são gravados um a um. Se a primeira
+gravação isolada também falhar, a base de dados está indisponível e o lote
+fica para depois de uma pausa; os registos que falham isoladamente enquanto os outros são
+gravados (ou que a base de dados recusa) são descartados e ficam no log,
+para não bloquearem o feedback seguinte.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional, Text
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from actions.db import ligar
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 100
+INTERVALO_MAXIMO_SEGUNDOS = 2.0
+CAPACIDADE_FILA = 10_000
+# Pausa máxima entre tentativas enquanto a base de dados estiver indisponível
+PAUSA_MAXIMA_SEGUNDOS = 60.0
+
+
+class RegistoFeedback(NamedTuple):
+    """Um feedback recebido de um colaborador."""
+
+    sender_id: Text
+    nome: Optional[Text]
+    texto: Text
+    recebido_em: datetime
+
+
+EscritorFeedback = Callable[[List[RegistoFeedback]], None]
+
+
+class RegistoRejeitado(Exception):
+    """A base de dados recusou os registos (dados inválidos): repetir não adianta."""
+
+
+# Marca de fim enviada pela fila à thread de escrita
+_FIM = object()
+
+
+class FilaFeedback:
+    """Fila limitada de feedback, gravada em lotes por uma thread de escrita.
+
+    A thread de escrita só arranca no primeiro registo.
+    """
+
+    def __init__(
+        self,
+        escritor: EscritorFeedback,
+        tamanho_lote: int = TAMANHO_LOTE,
+        intervalo_maximo: float = INTERVALO_MAXIMO_SEGUNDOS,
+        capacidade: int = CAPACIDADE_FILA,
+    ) -> None:
+        self._escritor = escritor
+        self._tamanho_lote = tamanho_lote
+        self._intervalo_maximo = intervalo_maximo
+        self._capacidade = capacidade
+        self._fila: "queue.Queue" = queue.Queue(maxsize=capacidade)
+        self._pendentes: List[RegistoFeedback] = []
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._fechada = False
+
+    def registar(self, registo: RegistoFeedback) -> bool:
+        """Coloca o feedback na fila sem bloquear; devolve ``False`` se for descartado."""
+        if self._fechada:
+            return False
+        self._arrancar()
+        try:
+            self._fila.put_nowait(registo)
+        except queue.Full:
+            logger.error("Fila de feedback cheia; feedback de %s descartado.", registo.sender_id)
+            return False
+        return True
+
+    def _arrancar(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._ciclo, name="feedback-escrita", daemon=True
+                )
+                self._thread.start()
+
+    def _ciclo(self) -> None:
+        terminar = False
+        # Espera depois de uma escrita falhada; duplica a cada nova falha
+        pausa = 0.0
+        while not terminar:
+            prazo = time.monotonic() + (pausa or self._intervalo_maximo)
+            # Durante a pausa, a fila continua a ser lida mesmo com lotes completos
+            while pausa or len(self._pendentes) < self._tamanho_lote:
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    item = self._fila.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if item is _FIM:
+                    terminar = True
+                    break
+                if len(self._pendentes) >= self._capacidade:
+                    logger.error("Feedback pendente em excesso; feedback de %s descartado.", item.sender_id)
+                    continue
+                self._pendentes.append(item)
+            if self._gravar():
+                pausa = 0.0
+            else:
+                pausa = min(max(2 * pausa, self._intervalo_maximo), PAUSA_MAXIMA_SEGUNDOS)
+
+        # Esvazia o que ainda estiver na fila
+        while True:
+            try:
+                item = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _FIM:
+                self._pendentes.append(item)
+        self._gravar()
+
+    def _gravar(self) -> bool:
+        """Grava os pendentes em lotes; devolve ``False`` se uma escrita falhar."""
+        while self._pendentes:
+            lote = self._pendentes[: self._tamanho_lote]
+            try:
+                self._escritor(lote)
+            except Exception:
+                logger.warning("Falha ao gravar %d feedbacks; a gravar um a um.", len(lote), exc_info=True)
+                if not self._gravar_um_a_um(lote):
+                    logger.error(
+                        "Base de dados indisponível; %d feedbacks pendentes, nova tentativa depois de uma pausa.",
+                        len(self._pendentes),
+                    )
+                    # Mantém os registos para a próxima tentativa, sem exceder a capacidade
+                    del self._pendentes[: max(0, len(self._pendentes) - self._capacidade)]
+                    return False
+                continue
+            del self._pendentes[: len(lote)]
+        return True
+
+    def _gravar_um_a_um(self, lote: List[RegistoFeedback]) -> bool:
+        """Grava o lote (o início de ``_pendentes``) registo a registo e retira-o dos pendentes.
+
+        Devolve ``False``, deixando nos pendentes os registos por gravar, se
+        a primeira falha que não seja uma recusa acontecer antes de algum
+        registo ser gravado.
+        """
+        gravados = 0
+        for posicao, registo in enumerate(lote):
+            try:
+                self._escritor([registo])
+            except RegistoRejeitado:
+                logger.error("Feedback recusado pela base de dados; descartado: %r", registo, exc_info=True)
+            except Exception:
+                if not gravados:
+                    del self._pendentes[:posicao]
+                    return False
+                logger.error("Feedback não gravado; descartado: %r", registo, exc_info=True)
+            else:
+                gravados += 1
+        del self._pendentes[: len(lote)]
+        return True
+
+    def reiniciar_apos_fork(self) -> None:
+        """Prepara a fila para um processo filho: fila, lock e thread de escrita próprios."""
+        self._fila = queue.Queue(maxsize=self._capacidade)
+        self._pendentes = []
+        self._thread = None
+        self._lock = threading.Lock()
+        reiniciar = getattr(self._escritor, "reiniciar_apos_fork", None)
+        if reiniciar is not None:
+            reiniciar()
+
+    def fechar(self, timeout: Optional[float] = 10.0) -> None:
+        """Grava o que estiver pendente e termina a thread de escrita."""
+        self._fechada = True
+        if self._thread is None:
+            return
+        self._fila.put(_FIM)
+        self._thread.join(timeout)
+
+
+# ---------------------------------------------------------------------------
+# Escritores
+# ---------------------------------------------------------------------------
+
+_INSERIR_FEEDBACK = (
+    "INSERT INTO feedback_onboarding (sender_id, nome, texto, recebido_em) VALUES %s"
+)
+
+
+class EscritorPostgres:
+    """Grava lotes de feedback na tabela ``feedback_onboarding`` com um INSERT multi-linha."""
+
+    def __init__(self) -> None:
+        self._ligacao = None
+
+    def reiniciar_apos_fork(self) -> None:
+        # A ligação herdada pertence ao processo pai: não é usada nem fechada aqui
+        self._ligacao = None
+
+    def __call__(self, lote: List[RegistoFeedback]) -> None:
+        if self._ligacao is None or self._ligacao.closed:
+            self._ligacao = ligar()
+        try:
+            with self._ligacao, self._ligacao.cursor() as cursor:
+                execute_values(cursor, _INSERIR_FEEDBACK, lote, page_size=len(lote))
+        except (psycopg2.DataError, psycopg2.IntegrityError) as erro:
+            # A transação foi desfeita e a ligação continua utilizável
+            raise RegistoRejeitado(str(erro)) from erro
+        except Exception:
+            self._ligacao.close()
+            raise
+
+
+def escrever_no_log(lote: List[RegistoFeedback]) -> None:
+    """Escritor usado sem base de dados configurada: regista o feedback nos logs."""
+    for registo in lote:
+        logger.info(
+            "Feedback recebido de colaborador%s: %s",
+            f", {registo.nome}" if registo.nome else "",
+            registo.texto,
+        )
+
+
+def criar_fila_feedback(com_base_de_dados: bool) -> FilaFeedback:
+    """Cria a fila do action server e garante que é esvaziada no encerramento."""
+    fila = FilaFeedback(EscritorPostgres() if com_base_de_dados else escrever_no_log)
+    atexit.register(fila.fechar)
+    return fila
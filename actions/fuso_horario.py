@@ -0,0 +1,13 @@
+"""
+Fuso horário da empresa, partilhado pelo calendário de onboarding, pelos lembretes e pela Graph API.
+"""
+
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+FUSO_HORARIO = "Europe/Lisbon"
+
+
+def agora_local() -> datetime:
+    """Hora atual no fuso horário da empresa, sem informação de fuso (formato da Graph API)."""
+    return datetime.now(ZoneInfo(FUSO_HORARIO)).replace(tzinfo=None)
@@ -0,0 +1,329 @@
+"""
+Cliente assíncrono da Microsoft Graph API (calendário, eventos e documentos).
+
+Todas as chamadas partilham uma única ``aiohttp.ClientSession`` com pool de
+ligações, e o token de acesso obtido com ``azure-identity`` é guardado em
+cache até perto de expirar. Assim, uma chamada lenta à Graph API apenas
+suspende a conversa que a fez — o event loop do action server continua a
+servir os restantes colaboradores.
+"""
+
+import asyncio
+import base64
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Sequence, Text, Tuple
+
+import aiohttp
+
+from actions.fuso_horario import FUSO_HORARIO, agora_local
+
+logger = logging.getLogger(__name__)
+
+URL_GRAPH_PADRAO = "https://graph.microsoft.com/v1.0"
+ESCOPO_GRAPH = "https://graph.microsoft.com/.default"
+
+# Renova o token alguns minutos antes de expirar
+MARGEM_RENOVACAO_TOKEN_SEGUNDOS = 300
+
+# Limites do pool de ligações partilhado
+LIGACOES_MAXIMAS = 100
+LIGACOES_MAXIMAS_POR_HOST = 20
+TIMEOUT_PEDIDO_SEGUNDOS = 10.0
+
+# Disponibilidade na Graph API: 0 = livre, 1 = provisório, 2 = ocupado, ...
+_LIVRE = "0"
+
+
+class ErroGraph(Exception):
+    """Erro devolvido pela Microsoft Graph API."""
+
+    def __init__(self, estado: int, mensagem: Text) -> None:
+        super().__init__(f"Graph API respondeu {estado}: {mensagem}")
+        self.estado = estado
+
+
+class CacheTokens:
+    """Cache do token de acesso de uma credencial ``azure-identity`` assíncrona.
+
+    Pedidos concorrentes com o token expirado aguardam pela mesma renovação.
+    """
+
+    def __init__(
+        self,
+        credencial: Any,
+        escopo: Text = ESCOPO_GRAPH,
+        margem: float = MARGEM_RENOVACAO_TOKEN_SEGUNDOS,
+    ) -> None:
+        self._credencial = credencial
+        self._escopo = escopo
+        self._margem = margem
+        self._token: Optional[Text] = None
+        self._expira_em = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def obter(self) -> Text:
+        """Devolve um token válido, renovando-o apenas quando necessário."""
+        if self._token is not None and time.time() < self._expira_em - self._margem:
+            return self._token
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._token is None or time.time() >= self._expira_em - self._margem:
+                acesso = await self._credencial.get_token(self._escopo)
+                self._token = acesso.token
+                self._expira_em = float(acesso.expires_on)
+        return self._token
+
+    async def fechar(self) -> None:
+        fechar = getattr(self._credencial, "close", None)
+        if fechar is not None:
+            await fechar()
+
+
+class ClienteGraph:
+    """Cliente da Graph API com sessão HTTP partilhada e pool de ligações."""
+
+    def __init__(
+        self,
+        tokens: CacheTokens,
+        url_base: Text = URL_GRAPH_PADRAO,
+        timeout: float = TIMEOUT_PEDIDO_SEGUNDOS,
+    ) -> None:
+        self._tokens = tokens
+        self._url_base = url_base.rstrip("/")
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._sessao: Optional[aiohttp.ClientSession] = None
+
+    def _obter_sessao(self) -> aiohttp.ClientSession:
+        # Criada no primeiro pedido, já dentro do event loop do action server
+        if self._sessao is None or self._sessao.closed:
+            conector = aiohttp.TCPConnector(
+                limit=LIGACOES_MAXIMAS,
+                limit_per_host=LIGACOES_MAXIMAS_POR_HOST,
+                ttl_dns_cache=300,
+            )
+            self._sessao = aiohttp.ClientSession(connector=conector, timeout=self._timeout)
+        return self._sessao
+
+    async def pedido(
+        self, metodo: Text, caminho: Text, json: Optional[Dict[Text, Any]] = None
+    ) -> Dict[Text, Any]:
+        """Executa um pedido autenticado e devolve o corpo JSON da resposta."""
+        token = await self._tokens.obter()
+        cabecalhos = {
+            "Authorization": f"Bearer {token}",
+            "Prefer": f'outlook.timezone="{FUSO_HORARIO}"',
+        }
+        async with self._obter_sessao().request(
+            metodo, f"{self._url_base}{caminho}", json=json, headers=cabecalhos
+        ) as resposta:
+            if resposta.status >= 400:
+                raise ErroGraph(resposta.status, await resposta.text())
+            if resposta.status == 204:
+                return {}
+            return await resposta.json()
+
+    async def obter_disponibilidade(
+        self,
+        utilizador: Text,
+        emails: Sequence[Text],
+        inicio: datetime,
+        fim: datetime,
+        intervalo_minutos: int = 30,
+    ) -> Dict[Text, Text]:
+        """Devolve a ``availabilityView`` de cada email no intervalo indicado."""
+        corpo = {
+            "schedules": list(emails),
+            "startTime": {"dateTime": inicio.isoformat(), "timeZone": FUSO_HORARIO},
+            "endTime": {"dateTime": fim.isoformat(), "timeZone": FUSO_HORARIO},
+            "availabilityViewInterval": intervalo_minutos,
+        }
+        resposta = await self.pedido(
+            "POST", f"/users/{utilizador}/calendar/getSchedule", json=corpo
+        )
+        return {
+            agenda["scheduleId"]: agenda.get("availabilityView", "")
+            for agenda in resposta.get("value", [])
+        }
+
+    async def criar_reuniao(
+        self,
+        organizador: Text,
+        assunto: Text,
+        inicio: datetime,
+        fim: datetime,
+        participantes: Sequence[Text],
+        descricao: Text = "",
+    ) -> Dict[Text, Any]:
+        """Cria uma reunião Teams no calendário do organizador e convida os participantes."""
+        corpo = {
+            "subject": assunto,
+            "body": {"contentType": "text", "content": descricao},
+            "start": {"dateTime": inicio.isoformat(), "timeZone": FUSO_HORARIO},
+            "end": {"dateTime": fim.isoformat(), "timeZone": FUSO_HORARIO},
+            "attendees": [
+                {"emailAddress": {"address": email}, "type": "required"}
+                for email in participantes
+            ],
+            "isOnlineMeeting": True,
+            "onlineMeetingProvider": "teamsForBusiness",
+        }
+        return await self.pedido("POST", f"/users/{organizador}/events", json=corpo)
+
+    async def obter_item_partilhado(self, url_partilha: Text) -> Dict[Text, Any]:
+        """Devolve o nome e o endereço atual do ficheiro SharePoint/OneDrive de uma ligação de partilha."""
+        return await self.pedido(
+            "GET", f"/shares/{codificar_partilha(url_partilha)}/driveItem?$select=name,webUrl"
+        )
+
+    async def fechar(self) -> None:
+        """Fecha a sessão HTTP e a credencial."""
+        if self._sessao is not None and not self._sessao.closed:
+            await self._sessao.close()
+        await self._tokens.fechar()
+
+
+def codificar_partilha(url_partilha: Text) -> Text:
+    """Identificador de uma ligação de partilha no endpoint ``/shares`` da Graph API."""
+    codificado = base64.urlsafe_b64encode(url_partilha.encode("utf-8")).decode("ascii")
+    return "u!" + codificado.rstrip("=")
+
+
+# ---------------------------------------------------------------------------
+# Procura de horário
+# ---------------------------------------------------------------------------
+
+
+def primeiro_horario_livre(
+    vistas: Sequence[Text],
+    inicio: datetime,
+    intervalo_minutos: int = 30,
+    blocos_necessarios: int = 1,
+    horario: Tuple[int, int] = (9, 18),
+) -> Optional[datetime]:
+    """Procura o primeiro horário em que todos os participantes estão livres.
+
+    ``vistas`` são as ``availabilityView`` devolvidas pela Graph API, todas
+    começadas em ``inicio``. Só são considerados dias úteis dentro do horário
+    de trabalho.
+    """
+    if not vistas:
+        return None
+
+    passo = timedelta(minutes=intervalo_minutos)
+    hora_inicio, hora_fim = horario
+    comprimento = min(len(vista) for vista in vistas)
+    consecutivos = 0
+
+    for indice in range(comprimento):
+        bloco = inicio + passo * indice
+        fim_bloco = bloco + passo
+        dentro_horario = (
+            bloco.weekday() < 5
+            and bloco.hour >= hora_inicio
+            and (fim_bloco.hour, fim_bloco.minute) <= (hora_fim, 0)
+            and fim_bloco.date() == bloco.date()
+        )
+        if dentro_horario and all(vista[indice] == _LIVRE for vista in vistas):
+            consecutivos += 1
+            if consecutivos == blocos_necessarios:
+                return inicio + passo * (indice - blocos_necessarios + 1)
+        else:
+            consecutivos = 0
+    return None
+
+
+def inicio_janela(agora: datetime, intervalo_minutos: int = 30) -> datetime:
+    """Arredonda ``agora`` para o início do próximo bloco de agenda."""
+    agora = agora.replace(second=0, microsecond=0)
+    resto = agora.minute % intervalo_minutos
+    if resto:
+        agora += timedelta(minutes=intervalo_minutos - resto)
+    return agora
+
+
+def somar_dias_uteis(inicio: datetime, dias: int) -> datetime:
+    """Avança ``dias`` dias úteis a partir de ``inicio``, saltando os fins de semana."""
+    fim = inicio
+    while dias > 0:
+        fim += timedelta(days=1)
+        if fim.weekday() < 5:
+            dias -= 1
+    return fim
+
+
+async def agendar_no_primeiro_horario_livre(
+    cliente: ClienteGraph,
+    organizador: Text,
+    participante: Text,
+    assunto: Text,
+    descricao: Text = "",
+    agora: Optional[datetime] = None,
+    dias: int = 3,
+    duracao_minutos: int = 30,
+    intervalo_minutos: int = 30,
+) -> Optional[Tuple[datetime, Dict[Text, Any]]]:
+    """Consulta a disponibilidade de ambos e cria a reunião no primeiro horário livre.
+
+    Devolve ``(início, evento)`` ou ``None`` se não houver horário comum nos
+    próximos ``dias`` dias úteis.
+    """
+    inicio = inicio_janela(agora or agora_local(), intervalo_minutos)
+    fim = somar_dias_uteis(inicio, dias)
+
+    disponibilidade = await cliente.obter_disponibilidade(
+        organizador, [organizador, participante], inicio, fim, intervalo_minutos
+    )
+    vistas = [disponibilidade.get(organizador, ""), disponibilidade.get(participante, "")]
+    blocos = -(-duracao_minutos // intervalo_minutos)
+    horario = primeiro_horario_livre(vistas, inicio, intervalo_minutos, blocos)
+    if horario is None:
+        return None
+
+    evento = await cliente.criar_reuniao(
+        organizador,
+        assunto,
+        horario,
+        horario + timedelta(minutes=duracao_minutos),
+        [participante],
+        descricao,
+    )
+    return horario, evento
+
+
+# ---------------------------------------------------------------------------
+# Cliente partilhado do action server
+# ---------------------------------------------------------------------------
+
+_cliente_partilhado: Optional[ClienteGraph] = None
+
+
+def obter_cliente_graph() -> Optional[ClienteGraph]:
+    """Devolve o cliente partilhado, ou ``None`` se as credenciais Azure não estiverem definidas."""
+    global _cliente_partilhado
+
+    if _cliente_partilhado is None:
+        tenant = os.getenv("AZURE_TENANT_ID")
+        cliente = os.getenv("AZURE_CLIENT_ID")
+        segredo = os.getenv("AZURE_CLIENT_SECRET")
+        if not (tenant and cliente and segredo):
+            return None
+
+        from azure.identity.aio import ClientSecretCredential
+
+        credencial = ClientSecretCredential(tenant, cliente, segredo)
+        _cliente_partilhado = ClienteGraph(
+            CacheTokens(credencial),
+            url_base=os.getenv("GRAPH_BASE_URL", URL_GRAPH_PADRAO),
+        )
+    return _cliente_partilhado
+
+
+def reiniciar_cliente_graph() -> None:
+    """Esquece o cliente partilhado: a sessão HTTP herdada pertence ao event loop do processo pai."""
+    global _cliente_partilhado
+    _cliente_partilhado = None
@@ -0,0 +1,633 @@
+"""
+Lembretes proativos do onboarding: antes do início, no primeiro dia e na primeira semana.
+
+O serviço de lembretes corre ao lado do action server, com a mesma imagem
+(``python -m actions.lembretes``, serviço ``lembretes`` do
+``docker-compose.yml``). A partir da ``data_inicio`` de cada colaborador
+(tabela ``colaboradores``) calcula um lembrete por etapa do onboarding e
+envia-o pelo Bot Connector, na conversa pessoal do Teams que o canal do Rasa
+Server guardou em ``conversas_teams`` (ver ``addons/conversas.py``).
+
+* ``AgendaLembretes`` guarda os lembretes num heap ordenado pela hora de
+  envio: obter os lembretes vencidos custa O(log n) por lembrete, com dezenas
+  de milhares pendentes. Uma data de início alterada não procura a entrada
+  antiga no heap; a entrada deixa de corresponder à hora agendada e é
+  ignorada quando chega ao topo (o heap é compactado quando as entradas
+  obsoletas passam a ser a maioria).
+* Um lembrete só é enviado enquanto o colaborador está na etapa a que se
+  refere (``CalendarioColaborador``, o mesmo cálculo de
+  ``action_verificar_etapa_onboarding``): depois de uma paragem do serviço,
+  o lembrete da véspera não é enviado no primeiro dia.
+* Os lembretes vencidos são enviados em lotes, com um limite de pedidos por
+  segundo para toda a aplicação e pausas pedidas pelo Bot Connector
+  (respostas 429 com ``Retry-After``), que valem para todos os envios.
+* Cada lote enviado fica registado em ``lembretes_enviados``; no arranque, o
+  serviço lê essa tabela e não volta a agendar esses lembretes. Se o processo
+  parar entre o envio de um lote e o registo, esse lote pode ser repetido.
+
+A tabela de colaboradores é relida de forma incremental (``atualizado_em``),
+com uma leitura completa periódica para apanhar linhas apagadas, tal como o
+calendário do action server.
+
+Cada lembrete é escrito com o pacote de conteúdos da empresa do colaborador
+(coluna ``empresa``, ver ``actions/empresas.py``), com o nome e os contactos
+dessa empresa.
+
+Uso:
+    python -m actions.lembretes [--lote 200] [--mensagens-por-segundo 20] [--simular]
+"""
+
+import argparse
+import asyncio
+import heapq
+import logging
+import os
+import signal
+import time
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from datetime import time as hora
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Text, Tuple
+from urllib.parse import quote
+from zoneinfo import ZoneInfo
+
+import aiohttp
+
+from actions.conteudo_base import CONTEUDO_BASE
+from actions.db import configuracao_db, ligar
+from actions.empresas import CachePacotes, carregador_yaml, construir_pacote
+from actions.etapas import (
+    INTERVALO_RECARGA_COMPLETA_SEGUNDOS,
+    PRE_ONBOARDING,
+    PRIMEIRA_SEMANA,
+    PRIMEIRO_DIA,
+    CalendarioColaborador,
+)
+from actions.fuso_horario import FUSO_HORARIO
+from actions.graph import CacheTokens
+
+logger = logging.getLogger(__name__)
+
+ESCOPO_BOT_FRAMEWORK = "https://api.botframework.com/.default"
+# Bots multi-tenant obtêm o token no tenant ``botframework.com``
+TENANT_BOT_FRAMEWORK = "botframework.com"
+
+# Hora local dos lembretes
+HORA_ENVIO = hora(9, 0)
+
+# Limites do envio (o Teams aceita cerca de 50 pedidos por segundo por aplicação)
+TAMANHO_LOTE = 200
+MENSAGENS_POR_SEGUNDO = 20.0
+CONCORRENCIA_ENVIO = 10
+TENTATIVAS_ENVIO = 3
+TIMEOUT_ENVIO_SEGUNDOS = 15.0
+
+# Espera antes de voltar a tentar um lembrete não entregue
+ESPERA_SEM_CONVERSA_SEGUNDOS = 3600.0
+ESPERA_FALHA_SEGUNDOS = 300.0
+
+INTERVALO_RECARGA_SEGUNDOS = 300.0
+ESPERA_MAXIMA_SEGUNDOS = 60.0
+
+# Resultados de um envio
+ENVIADO = "enviado"
+REJEITADO = "rejeitado"  # o Teams recusou (bot removido, conversa inexistente): não repetir
+FALHOU = "falhou"  # erro temporário: tentar mais tarde
+SEM_CONVERSA = "sem_conversa"
+
+
+class Marco(NamedTuple):
+    """Lembrete de uma etapa, ``dias`` depois (ou antes) da data de início."""
+
+    etapa: Text
+    dias: int
+    template: Text
+
+
+MARCOS = (
+    Marco(PRE_ONBOARDING, -2, "lembrete_pre_onboarding"),
+    Marco(PRIMEIRO_DIA, 0, "lembrete_primeiro_dia"),
+    Marco(PRIMEIRA_SEMANA, 3, "lembrete_primeira_semana"),
+)
+_MARCO_DA_ETAPA = {marco.etapa: marco for marco in MARCOS}
+
+_FUSO = ZoneInfo(FUSO_HORARIO)
+
+_CONSULTA_COLABORADORES = """
+    SELECT email, nome, id_teams, data_inicio, ativo, atualizado_em, empresa
+    FROM colaboradores
+"""
+_CONSULTA_ENVIADOS = "SELECT email, etapa FROM lembretes_enviados"
+_REGISTAR_ENVIADO = """
+    INSERT INTO lembretes_enviados (email, etapa, estado)
+    VALUES (%s, %s, %s)
+    ON CONFLICT (email, etapa) DO NOTHING
+"""
+_CONSULTA_CONVERSAS = """
+    SELECT id_teams, service_url, id_conversa
+    FROM conversas_teams
+    WHERE id_teams = ANY(%s)
+"""
+
+
+class ColaboradorLembretes(NamedTuple):
+    """Linha da tabela ``colaboradores`` relevante para os lembretes."""
+
+    email: Text
+    nome: Text
+    id_teams: Optional[Text]
+    data_inicio: Optional[date]
+    ativo: bool
+    atualizado_em: datetime
+    empresa: Optional[Text] = None  # None: a empresa principal
+
+
+class Destinatario(NamedTuple):
+    nome: Text
+    id_teams: Optional[Text]
+    calendario: CalendarioColaborador
+    empresa: Optional[Text] = None
+
+
+class Lembrete(NamedTuple):
+    """Entrada do heap: hora de envio (segundos desde a época), email e etapa."""
+
+    quando: int
+    email: Text
+    etapa: Text
+
+
+class ConversaTeams(NamedTuple):
+    service_url: Text
+    id_conversa: Text
+
+
+@lru_cache(maxsize=4096)
+def hora_envio(data_inicio: date, dias: int) -> int:
+    """Instante (segundos desde a época) da ``HORA_ENVIO`` local, ``dias`` depois da data de início."""
+    dia = data_inicio + timedelta(days=dias)
+    return int(datetime.combine(dia, HORA_ENVIO, tzinfo=_FUSO).timestamp())
+
+
+# Muitos colaboradores começam no mesmo dia: partilham o mesmo calendário
+_calendario = lru_cache(maxsize=4096)(CalendarioColaborador)
+
+
+def dia_local(instante: float) -> int:
+    """Ordinal da data local de um instante."""
+    return datetime.fromtimestamp(instante, _FUSO).date().toordinal()
+
+
+# ---------------------------------------------------------------------------
+# Agenda
+# ---------------------------------------------------------------------------
+
+
+class AgendaLembretes:
+    """Lembretes pendentes num heap ordenado pela hora de envio."""
+
+    def __init__(self, enviados: Iterable[Tuple[Text, Text]] = ()) -> None:
+        self._heap: List[Lembrete] = []
+        # (email, etapa) → hora agendada; as entradas do heap com outra hora estão obsoletas
+        self._agendados: Dict[Tuple[Text, Text], int] = {}
+        self._destinatarios: Dict[Text, Destinatario] = {}
+        self._enviados: Set[Tuple[Text, Text]] = {(email.lower(), etapa) for email, etapa in enviados}
+        self.descartados = 0
+
+    def atualizar(self, colaboradores: Iterable[ColaboradorLembretes], completa: bool = False) -> None:
+        """Agenda os lembretes dos colaboradores indicados.
+
+        Numa leitura completa, os colaboradores ausentes deixam de ter lembretes.
+        """
+        vistos = set()
+        novos: List[Lembrete] = []
+        for colaborador in colaboradores:
+            email = colaborador.email.lower()
+            vistos.add(email)
+            if not colaborador.ativo or colaborador.data_inicio is None:
+                self._remover(email)
+                continue
+
+            self._destinatarios[email] = Destinatario(
+                colaborador.nome,
+                colaborador.id_teams,
+                _calendario(colaborador.data_inicio),
+                colaborador.empresa,
+            )
+            for marco in MARCOS:
+                chave = (email, marco.etapa)
+                quando = hora_envio(colaborador.data_inicio, marco.dias)
+                if chave in self._enviados or self._agendados.get(chave) == quando:
+                    continue
+                self._agendados[chave] = quando
+                novos.append(Lembrete(quando, email, marco.etapa))
+
+        # Na carga inicial, um heapify (O(n)) em vez de n inserções
+        if len(novos) > len(self._heap):
+            self._heap.extend(novos)
+            heapq.heapify(self._heap)
+        else:
+            for lembrete in novos:
+                heapq.heappush(self._heap, lembrete)
+
+        if completa:
+            for email in [email for email in self._destinatarios if email not in vistos]:
+                self._remover(email)
+        if len(self._heap) > 2 * len(self._agendados) + 1024:
+            self._compactar()
+
+    def _remover(self, email: Text) -> None:
+        self._destinatarios.pop(email, None)
+        for marco in MARCOS:
+            self._agendados.pop((email, marco.etapa), None)
+
+    def _compactar(self) -> None:
+        self._heap = [Lembrete(quando, email, etapa) for (email, etapa), quando in self._agendados.items()]
+        heapq.heapify(self._heap)
+
+    def vencidos(self, agora: float, limite: int = TAMANHO_LOTE) -> List[Lembrete]:
+        """Retira do heap até ``limite`` lembretes com hora de envio até ``agora``.
+
+        Os lembretes de uma etapa que o colaborador já passou são descartados.
+        """
+        hoje = dia_local(agora)
+        lembretes: List[Lembrete] = []
+        while self._heap and self._heap[0].quando <= agora and len(lembretes) < limite:
+            lembrete = heapq.heappop(self._heap)
+            chave = (lembrete.email, lembrete.etapa)
+            if self._agendados.get(chave) != lembrete.quando:
+                continue  # obsoleto
+            del self._agendados[chave]
+            if self._destinatarios[lembrete.email].calendario.etapa(hoje) != lembrete.etapa:
+                self.descartados += 1
+                continue
+            lembretes.append(lembrete)
+        return lembretes
+
+    def adiar(self, lembrete: Lembrete, quando: float) -> None:
+        """Volta a agendar um lembrete não entregue (se o colaborador não tiver sido entretanto alterado)."""
+        chave = (lembrete.email, lembrete.etapa)
+        if lembrete.email not in self._destinatarios or chave in self._agendados or chave in self._enviados:
+            return
+        self._agendados[chave] = int(quando)
+        heapq.heappush(self._heap, Lembrete(int(quando), lembrete.email, lembrete.etapa))
+
+    def marcar_enviados(self, lembretes: Iterable[Lembrete]) -> None:
+        for lembrete in lembretes:
+            self._enviados.add((lembrete.email, lembrete.etapa))
+
+    def destinatario(self, email: Text) -> Optional[Destinatario]:
+        return self._destinatarios.get(email)
+
+    def proximo(self) -> Optional[int]:
+        """Hora do próximo lembrete pendente (pode ser uma entrada obsoleta)."""
+        return self._heap[0].quando if self._heap else None
+
+    def __len__(self) -> int:
+        return len(self._agendados)
+
+
+# ---------------------------------------------------------------------------
+# Envio pelo Bot Connector
+# ---------------------------------------------------------------------------
+
+
+class LimitadorEnvio:
+    """Espaça os pedidos a ``por_segundo``; uma pausa adia todos os pedidos seguintes."""
+
+    def __init__(
+        self,
+        por_segundo: float = MENSAGENS_POR_SEGUNDO,
+        relogio: Callable[[], float] = time.monotonic,
+        dormir: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self._intervalo = 1.0 / por_segundo
+        self._relogio = relogio
+        self._dormir = dormir
+        self._livre_em = 0.0
+
+    async def aguardar(self) -> None:
+        agora = self._relogio()
+        vez = max(agora, self._livre_em)
+        self._livre_em = vez + self._intervalo
+        if vez > agora:
+            await self._dormir(vez - agora)
+
+    def pausar(self, segundos: float) -> None:
+        self._livre_em = max(self._livre_em, self._relogio() + segundos)
+
+
+def _retry_after(valor: Optional[Text], padrao: float) -> float:
+    try:
+        return max(0.0, float(valor)) if valor is not None else padrao
+    except ValueError:
+        return padrao
+
+
+class EnviadorBotFramework:
+    """Envia mensagens proativas pelo Bot Connector, com limite de ritmo e novas tentativas."""
+
+    def __init__(
+        self,
+        tokens: CacheTokens,
+        limitador: Optional[LimitadorEnvio] = None,
+        concorrencia: int = CONCORRENCIA_ENVIO,
+        tentativas: int = TENTATIVAS_ENVIO,
+        timeout: float = TIMEOUT_ENVIO_SEGUNDOS,
+    ) -> None:
+        self._tokens = tokens
+        self._limitador = limitador if limitador is not None else LimitadorEnvio()
+        self._concorrencia = concorrencia
+        self._tentativas = tentativas
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._sessao: Optional[aiohttp.ClientSession] = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+
+    def _obter_sessao(self) -> aiohttp.ClientSession:
+        if self._sessao is None or self._sessao.closed:
+            conector = aiohttp.TCPConnector(limit=self._concorrencia, ttl_dns_cache=300)
+            self._sessao = aiohttp.ClientSession(connector=conector, timeout=self._timeout)
+        return self._sessao
+
+    async def enviar(self, conversa: ConversaTeams, texto: Text) -> Text:
+        """Publica ``texto`` na conversa; devolve ``ENVIADO``, ``REJEITADO`` ou ``FALHOU``."""
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self._concorrencia)
+        url = (
+            f"{conversa.service_url.rstrip('/')}/v3/conversations/"
+            f"{quote(conversa.id_conversa, safe='')}/activities"
+        )
+        atividade = {"type": "message", "text": texto, "textFormat": "markdown"}
+
+        async with self._semaforo:
+            for tentativa in range(self._tentativas):
+                await self._limitador.aguardar()
+                try:
+                    token = await self._tokens.obter()
+                except Exception:
+                    # Credencial recusada ou serviço de tokens em baixo: o lembrete é adiado
+                    logger.warning("Não foi possível obter o token do Bot Framework.", exc_info=True)
+                    return FALHOU
+                try:
+                    async with self._obter_sessao().post(
+                        url, json=atividade, headers={"Authorization": f"Bearer {token}"}
+                    ) as resposta:
+                        if resposta.status < 300:
+                            return ENVIADO
+                        if resposta.status == 429 or resposta.status >= 500:
+                            espera = _retry_after(resposta.headers.get("Retry-After"), 2.0**tentativa)
+                            logger.info("Bot Connector respondeu %d; pausa de %.1f s.", resposta.status, espera)
+                            self._limitador.pausar(espera)
+                            continue
+                        logger.warning(
+                            "Lembrete recusado (%d) na conversa %s: %s",
+                            resposta.status,
+                            conversa.id_conversa,
+                            await resposta.text(),
+                        )
+                        return REJEITADO
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    logger.warning("Falha ao enviar o lembrete.", exc_info=True)
+                    self._limitador.pausar(2.0**tentativa)
+        return FALHOU
+
+    async def fechar(self) -> None:
+        if self._sessao is not None and not self._sessao.closed:
+            await self._sessao.close()
+        await self._tokens.fechar()
+
+
+class EnviadorSimulado:
+    """Regista os lembretes no log em vez de os enviar (``--simular``), com a interface do ``EnviadorBotFramework``."""
+
+    def __init__(self) -> None:
+        self.enviados: List[Tuple[ConversaTeams, Text]] = []
+
+    async def enviar(self, conversa: ConversaTeams, texto: Text) -> Text:
+        self.enviados.append((conversa, texto))
+        logger.info("[simulação] %s: %s", conversa.id_conversa, texto.splitlines()[0])
+        return ENVIADO
+
+    async def fechar(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Base de dados
+# ---------------------------------------------------------------------------
+
+
+def carregar_colaboradores_postgres(desde: Optional[datetime]) -> List[ColaboradorLembretes]:
+    """Lê os colaboradores alterados desde ``desde`` (todos, se ``None``)."""
+    consulta, parametros = _CONSULTA_COLABORADORES, ()
+    if desde is not None:
+        consulta += " WHERE atualizado_em >= %s"
+        parametros = (desde,)
+    with closing(ligar(replica=True)) as ligacao, ligacao.cursor() as cursor:
+        cursor.execute(consulta + " ORDER BY atualizado_em", parametros)
+        return [ColaboradorLembretes(*linha) for linha in cursor.fetchall()]
+
+
+def carregar_enviados_postgres() -> List[Tuple[Text, Text]]:
+    with closing(ligar()) as ligacao, ligacao.cursor() as cursor:
+        cursor.execute(_CONSULTA_ENVIADOS)
+        return cursor.fetchall()
+
+
+def registar_enviados_postgres(registos: Sequence[Tuple[Text, Text, Text]]) -> None:
+    """Grava ``(email, etapa, estado)`` dos lembretes tratados, numa única transação."""
+    with closing(ligar()) as ligacao:
+        with ligacao, ligacao.cursor() as cursor:
+            cursor.executemany(_REGISTAR_ENVIADO, registos)
+
+
+def carregar_conversas_postgres(ids_teams: Sequence[Text]) -> Dict[Text, ConversaTeams]:
+    with closing(ligar()) as ligacao, ligacao.cursor() as cursor:
+        cursor.execute(_CONSULTA_CONVERSAS, (list(ids_teams),))
+        return {id_teams: ConversaTeams(url, conversa) for id_teams, url, conversa in cursor.fetchall()}
+
+
+# ---------------------------------------------------------------------------
+# Serviço
+# ---------------------------------------------------------------------------
+
+
+def criar_pacotes() -> CachePacotes:
+    """Pacotes de conteúdos das empresas, com o conteúdo base como pacote por omissão."""
+    return CachePacotes(
+        construir_pacote("the100s", {"nome": "The100s"}, CONTEUDO_BASE),
+        carregador=carregador_yaml(CONTEUDO_BASE),
+    )
+
+
+class ServicoLembretes:
+    """Lê os colaboradores, retira da agenda os lembretes vencidos e envia-os em lotes."""
+
+    def __init__(
+        self,
+        agenda: AgendaLembretes,
+        enviador: EnviadorBotFramework,
+        carregar_colaboradores: Callable[
+            [Optional[datetime]], Iterable[ColaboradorLembretes]
+        ] = carregar_colaboradores_postgres,
+        carregar_conversas: Callable[[Sequence[Text]], Dict[Text, ConversaTeams]] = carregar_conversas_postgres,
+        registar_enviados: Callable[[Sequence[Tuple[Text, Text, Text]]], None] = registar_enviados_postgres,
+        pacotes: Optional[CachePacotes] = None,
+        tamanho_lote: int = TAMANHO_LOTE,
+        intervalo_recarga: float = INTERVALO_RECARGA_SEGUNDOS,
+        intervalo_recarga_completa: float = INTERVALO_RECARGA_COMPLETA_SEGUNDOS,
+        relogio: Callable[[], float] = time.time,
+    ) -> None:
+        self.agenda = agenda
+        self._enviador = enviador
+        self._carregar_colaboradores = carregar_colaboradores
+        self._carregar_conversas = carregar_conversas
+        self._registar_enviados = registar_enviados
+        self._pacotes = pacotes or criar_pacotes()
+        self._tamanho_lote = tamanho_lote
+        self._intervalo_recarga = intervalo_recarga
+        self._intervalo_recarga_completa = intervalo_recarga_completa
+        self._relogio = relogio
+        self._marca: Optional[datetime] = None
+        self._recarga_em = float("-inf")
+        self._recarga_completa_em = float("-inf")
+        self.contagens: Dict[Text, int] = {ENVIADO: 0, REJEITADO: 0, FALHOU: 0, SEM_CONVERSA: 0}
+
+    async def _executar(self, funcao: Callable, *argumentos):
+        return await asyncio.get_running_loop().run_in_executor(None, funcao, *argumentos)
+
+    async def recarregar(self) -> None:
+        """Lê os colaboradores alterados (ou todos, na recarga completa periódica)."""
+        agora = self._relogio()
+        completa = agora - self._recarga_completa_em >= self._intervalo_recarga_completa
+        try:
+            registos = list(await self._executar(self._carregar_colaboradores, None if completa else self._marca))
+        except Exception:
+            logger.warning("Não foi possível ler os colaboradores.", exc_info=True)
+        else:
+            self.agenda.atualizar(registos, completa=completa)
+            if registos:
+                self._marca = max(registo.atualizado_em for registo in registos)
+            if completa:
+                self._recarga_completa_em = agora
+            logger.info("%d colaboradores lidos; %d lembretes pendentes.", len(registos), len(self.agenda))
+        self._recarga_em = agora
+
+    async def enviar_vencidos(self) -> int:
+        """Envia um lote de lembretes vencidos; devolve o número de lembretes retirados da agenda."""
+        agora = self._relogio()
+        lembretes = self.agenda.vencidos(agora, self._tamanho_lote)
+        if not lembretes:
+            return 0
+
+        destinatarios = [self.agenda.destinatario(lembrete.email) for lembrete in lembretes]
+        ids_teams = sorted({d.id_teams for d in destinatarios if d.id_teams})
+        try:
+            conversas = await self._executar(self._carregar_conversas, ids_teams) if ids_teams else {}
+        except Exception:
+            logger.warning("Não foi possível ler as conversas do Teams.", exc_info=True)
+            for lembrete in lembretes:
+                self.agenda.adiar(lembrete, agora + ESPERA_FALHA_SEGUNDOS)
+            return len(lembretes)
+
+        async def enviar(lembrete: Lembrete, destinatario: Destinatario) -> Text:
+            conversa = conversas.get(destinatario.id_teams) if destinatario.id_teams else None
+            if conversa is None:
+                return SEM_CONVERSA
+            primeiro_nome = destinatario.nome.split()[0] if destinatario.nome else ""
+            pacote = self._pacotes.obter(destinatario.empresa)
+            texto = pacote.templates.renderizar(
+                _MARCO_DA_ETAPA[lembrete.etapa].template, f", {primeiro_nome}" if primeiro_nome else ""
+            )
+            return await self._enviador.enviar(conversa, texto)
+
+        resultados = await asyncio.gather(*map(enviar, lembretes, destinatarios))
+
+        tratados = []
+        for lembrete, resultado in zip(lembretes, resultados):
+            self.contagens[resultado] += 1
+            if resultado in (ENVIADO, REJEITADO):
+                tratados.append(lembrete)
+            else:
+                espera = ESPERA_SEM_CONVERSA_SEGUNDOS if resultado == SEM_CONVERSA else ESPERA_FALHA_SEGUNDOS
+                self.agenda.adiar(lembrete, agora + espera)
+
+        if tratados:
+            self.agenda.marcar_enviados(tratados)
+            estados = dict(zip(lembretes, resultados))
+            try:
+                await self._executar(
+                    self._registar_enviados,
+                    [(lembrete.email, lembrete.etapa, estados[lembrete]) for lembrete in tratados],
+                )
+            except Exception:
+                # Este processo não os repete; após um reinício, estes podem ser enviados de novo
+                logger.error("Não foi possível registar %d lembretes enviados.", len(tratados), exc_info=True)
+        logger.info(
+            "Lote de %d lembretes: %s",
+            len(lembretes),
+            ", ".join(f"{resultado}={resultados.count(resultado)}" for resultado in sorted(set(resultados))),
+        )
+        return len(lembretes)
+
+    async def executar(self, parar: asyncio.Event) -> None:
+        """Ciclo principal, até ``parar`` ser ativado."""
+        while not parar.is_set():
+            if self._relogio() - self._recarga_em >= self._intervalo_recarga:
+                await self.recarregar()
+            if await self.enviar_vencidos() >= self._tamanho_lote:
+                continue  # há mais lembretes vencidos
+
+            agora = self._relogio()
+            espera = min(ESPERA_MAXIMA_SEGUNDOS, self._recarga_em + self._intervalo_recarga - agora)
+            proximo = self.agenda.proximo()
+            if proximo is not None:
+                espera = min(espera, proximo - agora)
+            try:
+                await asyncio.wait_for(parar.wait(), timeout=max(0.0, espera))
+            except asyncio.TimeoutError:
+                pass
+        await self._enviador.fechar()
+
+
+def criar_enviador(por_segundo: float) -> EnviadorBotFramework:
+    """Enviador com a aplicação do bot (``MICROSOFT_APP_ID``/``MICROSOFT_APP_PASSWORD``)."""
+    from azure.identity.aio import ClientSecretCredential
+
+    app_id = os.getenv("MICROSOFT_APP_ID")
+    segredo = os.getenv("MICROSOFT_APP_PASSWORD")
+    if not (app_id and segredo):
+        raise SystemExit("Defina MICROSOFT_APP_ID e MICROSOFT_APP_PASSWORD (ou use --simular).")
+    tenant = os.getenv("MICROSOFT_APP_TENANT_ID") or TENANT_BOT_FRAMEWORK
+    credencial = ClientSecretCredential(tenant, app_id, segredo)
+    return EnviadorBotFramework(CacheTokens(credencial, escopo=ESCOPO_BOT_FRAMEWORK), LimitadorEnvio(por_segundo))
+
+
+def main(argumentos: Optional[Sequence[Text]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="lembretes por lote")
+    parser.add_argument("--mensagens-por-segundo", type=float, default=MENSAGENS_POR_SEGUNDO)
+    parser.add_argument("--simular", action="store_true", help="regista os lembretes no log sem os enviar")
+    args = parser.parse_args(argumentos)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if configuracao_db() is None:
+        raise SystemExit("O serviço de lembretes precisa da base de dados (DB_HOST).")
+    enviador = EnviadorSimulado() if args.simular else criar_enviador(args.mensagens_por_segundo)
+    agenda = AgendaLembretes(carregar_enviados_postgres())
+    servico = ServicoLembretes(agenda, enviador, tamanho_lote=args.lote)
+
+    async def correr() -> None:
+        parar = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sinal in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sinal, parar.set)
+        await servico.executar(parar)
+
+    asyncio.run(correr())
+    logger.info("Lembretes: %s", servico.contagens)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Instrumentação das custom actions (latência, leituras de slots e tamanho das mensagens).
+
+O decorador ``instrumentar`` mede cada chamada a ``run()`` e acumula os
+valores em histogramas de buckets fixos, por action. O custo por chamada é
+de poucos microssegundos (um ``perf_counter`` antes e depois, um contador de
+leituras de slots e uma pesquisa binária por histograma), pelo que pode ficar
+ligado em produção.
+
+As métricas são expostas no formato de texto do Prometheus por um pequeno
+servidor HTTP (``iniciar_servidor_metricas``), ao lado do webhook do action
+server na porta 5055.
+"""
+
+import functools
+import inspect
+import logging
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Text, Tuple
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_LATENCIA_SEGUNDOS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+BUCKETS_LEITURAS_SLOTS = (0, 1, 2, 4, 8, 16, 32)
+BUCKETS_BYTES_MENSAGENS = (0, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+class Histograma:
+    """Histograma cumulativo de buckets fixos, no modelo do Prometheus.
+
+    Não tem lock próprio: é atualizado sob o lock de ``MetricasAction``.
+    """
+
+    __slots__ = ("limites", "contagens", "soma", "total")
+
+    def __init__(self, limites: Sequence[float]) -> None:
+        self.limites: Tuple[float, ...] = tuple(limites)
+        # Um contador por bucket, mais o bucket +Inf
+        self.contagens: List[int] = [0] * (len(self.limites) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def cumulativas(self) -> List[Tuple[Text, int]]:
+        """Devolve os pares (limite ``le``, contagem cumulativa), incluindo ``+Inf``."""
+        acumulado = 0
+        resultado = []
+        for limite, contagem in zip(self.limites + (float("inf"),), self.contagens):
+            acumulado += contagem
+            resultado.append(("+Inf" if limite == float("inf") else repr(limite), acumulado))
+        return resultado
+
+
+class MetricasAction:
+    """Métricas acumuladas de uma action."""
+
+    __slots__ = ("latencia", "leituras_slots", "bytes_mensagens", "erros", "lock")
+
+    def __init__(self) -> None:
+        self.latencia = Histograma(BUCKETS_LATENCIA_SEGUNDOS)
+        self.leituras_slots = Histograma(BUCKETS_LEITURAS_SLOTS)
+        self.bytes_mensagens = Histograma(BUCKETS_BYTES_MENSAGENS)
+        self.erros = 0
+        self.lock = threading.Lock()
+
+    def observar(self, duracao: float, leituras_slots: int, bytes_mensagens: int) -> None:
+        with self.lock:
+            self.latencia.observar(duracao)
+            self.leituras_slots.observar(leituras_slots)
+            self.bytes_mensagens.observar(bytes_mensagens)
+
+    def contar_erro(self) -> None:
+        with self.lock:
+            self.erros += 1
+
+
+class RegistoMetricas:
+    """Métricas de todas as actions do processo."""
+
+    def __init__(self) -> None:
+        self._por_action: Dict[Text, MetricasAction] = {}
+        self._lock = threading.Lock()
+
+    def action(self, nome: Text) -> MetricasAction:
+        metricas = self._por_action.get(nome)
+        if metricas is None:
+            with self._lock:
+                metricas = self._por_action.setdefault(nome, MetricasAction())
+        return metricas
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._por_action = {}
+
+    def reiniciar_apos_fork(self) -> None:
+        """Cada processo filho acumula e expõe as suas próprias métricas."""
+        self._lock = threading.Lock()
+        self._por_action = {}
+
+    def formato_prometheus(self) -> Text:
+        """Exporta as métricas no formato de texto do Prometheus."""
+        por_action = sorted(self._por_action.items())
+        linhas: List[Text] = []
+
+        for nome, ajuda, atributo in (
+            ("onboarding_action_duracao_segundos", "Duração de run() por action.", "latencia"),
+            ("onboarding_action_leituras_slots", "Slots lidos do tracker por chamada.", "leituras_slots"),
+            ("onboarding_action_bytes_mensagens", "Bytes de texto enviados por chamada.", "bytes_mensagens"),
+        ):
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} histogram")
+            for action, metricas in por_action:
+                histograma: Histograma = getattr(metricas, atributo)
+                with metricas.lock:
+                    cumulativas = histograma.cumulativas()
+                    soma, total = histograma.soma, histograma.total
+                for limite, contagem in cumulativas:
+                    linhas.append(f'{nome}_bucket{{action="{action}",le="{limite}"}} {contagem}')
+                linhas.append(f'{nome}_sum{{action="{action}"}} {soma}')
+                linhas.append(f'{nome}_count{{action="{action}"}} {total}')
+
+        linhas.append("# HELP onboarding_action_erros_total Exceções lançadas por run().")
+        linhas.append("# TYPE onboarding_action_erros_total counter")
+        for action, metricas in por_action:
+            linhas.append(f'onboarding_action_erros_total{{action="{action}"}} {metricas.erros}')
+
+        return "\n".join(linhas) + "\n"
+
+
+# Registo partilhado pelas actions do processo
+METRICAS = RegistoMetricas()
+
+
+# ---------------------------------------------------------------------------
+# Instrumentação de run()
+# ---------------------------------------------------------------------------
+
+
+class _TrackerContado:
+    """Envolve o tracker e conta as chamadas a ``get_slot``."""
+
+    __slots__ = ("_tracker", "leituras")
+
+    def __init__(self, tracker: Any) -> None:
+        self._tracker = tracker
+        self.leituras = 0
+
+    def get_slot(self, chave: Text) -> Any:
+        self.leituras += 1
+        return self._tracker.get_slot(chave)
+
+    def __getattr__(self, atributo: Text) -> Any:
+        return getattr(self._tracker, atributo)
+
+
+def _tamanho_mensagens(dispatcher: Any, inicio: int) -> int:
+    mensagens = getattr(dispatcher, "messages", None)
+    if not isinstance(mensagens, list):
+        return 0
+    tamanho = 0
+    for mensagem in mensagens[inicio:]:
+        texto = mensagem.get("text")
+        if texto:
+            tamanho += len(texto.encode())
+    return tamanho
+
+
+def _numero_mensagens(dispatcher: Any) -> int:
+    mensagens = getattr(dispatcher, "messages", None)
+    return len(mensagens) if isinstance(mensagens, list) else 0
+
+
+def _observar(
+    nome: Text, inicio: float, tracker: _TrackerContado, dispatcher: Any, n_mensagens: int
+) -> None:
+    duracao = time.perf_counter() - inicio
+    METRICAS.action(nome).observar(
+        duracao, tracker.leituras, _tamanho_mensagens(dispatcher, n_mensagens)
+    )
+
+
+def instrumentar(run: Callable) -> Callable:
+    """Decorador de ``Action.run`` (síncrono ou assíncrono) que regista as métricas."""
+
+    if inspect.iscoroutinefunction(run):
+
+        @functools.wraps(run)
+        async def run_assincrono(self, dispatcher, tracker, domain):
+            nome = self.name()
+            contado = _TrackerContado(tracker)
+            n_mensagens = _numero_mensagens(dispatcher)
+            inicio = time.perf_counter()
+            try:
+                return await run(self, dispatcher, contado, domain)
+            except Exception:
+                METRICAS.action(nome).contar_erro()
+                raise
+            finally:
+                _observar(nome, inicio, contado, dispatcher, n_mensagens)
+
+        return run_assincrono
+
+    @functools.wraps(run)
+    def run_sincrono(self, dispatcher, tracker, domain):
+        nome = self.name()
+        contado = _TrackerContado(tracker)
+        n_mensagens = _numero_mensagens(dispatcher)
+        inicio = time.perf_counter()
+        try:
+            return run(self, dispatcher, contado, domain)
+        except Exception:
+            METRICAS.action(nome).erros += 1
+            raise
+        finally:
+            _observar(nome, inicio, contado, dispatcher, n_mensagens)
+
+    return run_sincrono
+
+
+# ---------------------------------------------------------------------------
+# Endpoint Prometheus
+# ---------------------------------------------------------------------------
+
+
+class _PedidoMetricas(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802 (nome imposto por BaseHTTPRequestHandler)
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        corpo = METRICAS.formato_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato: str, *args: Any) -> None:
+        # Os scrapes periódicos não devem encher os logs do action server
+        pass
+
+
+def iniciar_servidor_metricas(porta: int, endereco: Text = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve ``GET /metrics`` numa thread, sem interferir com o event loop das actions."""
+    servidor = ThreadingHTTPServer((endereco, porta), _PedidoMetricas)
+    threading.Thread(
+        target=servidor.serve_forever, name="metricas-http", daemon=True
+    ).start()
+    logger.info("Métricas Prometheus disponíveis em http://%s:%d/metrics", endereco, porta)
+    return servidor
+
+
+def iniciar_servidor_metricas_se_configurado(porta: Optional[Text]) -> Optional[ThreadingHTTPServer]:
+    """Arranca o endpoint se ``porta`` (normalmente ``METRICS_PORT``) estiver definida."""
+    if not porta:
+        return None
+    try:
+        return iniciar_servidor_metricas(int(porta))
+    except OSError:
+        logger.warning("Não foi possível abrir a porta de métricas %s.", porta, exc_info=True)
+        return None
@@ -0,0 +1,196 @@
+"""
+Diretório dos colaboradores, usado para preencher os slots no início da sessão.
+
+O Bot Framework identifica cada utilizador do Teams pelo ``sender_id`` da
+conversa. No início de cada sessão, ``action_session_start`` procura esse
+identificador no diretório e preenche de uma só vez o nome, cargo,
+departamento, gestor, emails e empresa do colaborador, sem turnos extra nem extração
+de entidades.
+
+O diretório é uma cache LRU em memória à frente da tabela ``colaboradores``
+do PostgreSQL. Cada perfil ocupa um objeto com ``__slots__`` e os valores
+repetidos entre colaboradores (cargo, departamento, gestor) são partilhados
+com ``sys.intern``. Os identificadores sem colaborador associado também ficam
+em cache, por um período mais curto, para que utilizadores desconhecidos não
+provoquem uma consulta em cada sessão. As falhas são lidas com uma consulta
+preparada numa ligação do pool assíncrono (``actions.db.adquirir``), sem
+abrir uma ligação nova por perfil.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Optional, Text, Tuple, Union
+
+from actions.db import adquirir
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_CACHE_PERFIS = 10_000
+TTL_PERFIL_SEGUNDOS = 900.0
+TTL_DESCONHECIDO_SEGUNDOS = 60.0
+
+_CONSULTA_PERFIL = """
+    SELECT id_teams, nome, cargo, departamento, gestor, email_gestor, email, data_inicio, empresa
+    FROM colaboradores
+    WHERE id_teams = $1 AND ativo
+"""
+
+
+def _partilhar(valor: Optional[Text]) -> Optional[Text]:
+    return sys.intern(valor) if valor else None
+
+
+class PerfilColaborador:
+    """Perfil de um colaborador, tal como é copiado para os slots da conversa."""
+
+    __slots__ = (
+        "id_teams",
+        "nome",
+        "cargo",
+        "departamento",
+        "gestor",
+        "email_gestor",
+        "email",
+        "data_inicio",
+        "empresa",
+    )
+
+    def __init__(
+        self,
+        id_teams: Text,
+        nome: Text,
+        cargo: Optional[Text] = None,
+        departamento: Optional[Text] = None,
+        gestor: Optional[Text] = None,
+        email_gestor: Optional[Text] = None,
+        email: Optional[Text] = None,
+        data_inicio: Optional[date] = None,
+        empresa: Optional[Text] = None,
+    ) -> None:
+        self.id_teams = id_teams
+        self.nome = nome
+        self.cargo = _partilhar(cargo)
+        self.departamento = _partilhar(departamento)
+        self.gestor = _partilhar(gestor)
+        self.email_gestor = _partilhar(email_gestor)
+        self.email = email
+        self.data_inicio = data_inicio
+        self.empresa = _partilhar(empresa)
+
+    def slots(self) -> Dict[Text, Any]:
+        """Valores dos slots do domínio preenchidos por este perfil (sem os vazios)."""
+        valores = {
+            "nome_colaborador": self.nome,
+            "cargo": self.cargo,
+            "departamento": self.departamento,
+            "gestor": self.gestor,
+            "email_gestor": self.email_gestor,
+            "email_colaborador": self.email,
+            "data_inicio": self.data_inicio.isoformat() if self.data_inicio else None,
+            "empresa": self.empresa,
+        }
+        return {slot: valor for slot, valor in valores.items() if valor}
+
+
+CarregadorPerfil = Callable[
+    [Text], Union[Optional[PerfilColaborador], Awaitable[Optional[PerfilColaborador]]]
+]
+
+
+async def carregar_perfil_postgres(id_teams: Text) -> Optional[PerfilColaborador]:
+    """Lê o perfil ativo com o identificador Teams indicado."""
+    async with adquirir() as ligacao:
+        linha = await ligacao.fetchrow(_CONSULTA_PERFIL, id_teams)
+    return PerfilColaborador(*linha) if linha else None
+
+
+class DiretorioColaboradores:
+    """Cache LRU de perfis, indexada pelo identificador Teams.
+
+    Os acertos são servidos da memória. As falhas são lidas com o carregador:
+    um carregador assíncrono corre no event loop, um síncrono numa thread do
+    executor, para não bloquear o event loop do action server.
+    """
+
+    def __init__(
+        self,
+        carregador: Optional[CarregadorPerfil] = None,
+        tamanho_maximo: int = TAMANHO_CACHE_PERFIS,
+        ttl: float = TTL_PERFIL_SEGUNDOS,
+        ttl_desconhecido: float = TTL_DESCONHECIDO_SEGUNDOS,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._carregador = carregador
+        self._tamanho_maximo = tamanho_maximo
+        self._ttl = ttl
+        self._ttl_desconhecido = ttl_desconhecido
+        self._relogio = relogio
+        # id_teams → (perfil ou None, expira_em), da entrada menos para a mais recente
+        self._cache: "OrderedDict[Text, Tuple[Optional[PerfilColaborador], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def _em_cache(self, id_teams: Text) -> Tuple[bool, Optional[PerfilColaborador]]:
+        with self._lock:
+            entrada = self._cache.get(id_teams)
+            if entrada is None or entrada[1] <= self._relogio():
+                self.falhas += 1
+                return False, None
+            self._cache.move_to_end(id_teams)
+            self.acertos += 1
+            return True, entrada[0]
+
+    def _guardar(self, id_teams: Text, perfil: Optional[PerfilColaborador]) -> None:
+        ttl = self._ttl if perfil is not None else self._ttl_desconhecido
+        with self._lock:
+            self._cache[id_teams] = (perfil, self._relogio() + ttl)
+            self._cache.move_to_end(id_teams)
+            while len(self._cache) > self._tamanho_maximo:
+                self._cache.popitem(last=False)
+
+    async def _carregar(self, id_teams: Text) -> Optional[PerfilColaborador]:
+        try:
+            if asyncio.iscoroutinefunction(self._carregador):
+                perfil = await self._carregador(id_teams)
+            else:
+                perfil = await asyncio.get_running_loop().run_in_executor(None, self._carregador, id_teams)
+        except Exception:
+            # Sem guardar em cache: a próxima sessão volta a tentar
+            logger.warning("Não foi possível ler o perfil de %s.", id_teams, exc_info=True)
+            return None
+        self._guardar(id_teams, perfil)
+        return perfil
+
+    async def obter(self, id_teams: Optional[Text]) -> Optional[PerfilColaborador]:
+        """Devolve o perfil do colaborador, ou ``None`` se não estiver no diretório."""
+        if not id_teams:
+            return None
+        encontrado, perfil = self._em_cache(id_teams)
+        if encontrado or self._carregador is None:
+            return perfil
+        return await self._carregar(id_teams)
+
+    def adicionar(self, perfil: PerfilColaborador) -> None:
+        """Coloca um perfil na cache (por exemplo, para pré-aquecer o diretório)."""
+        self._guardar(perfil.id_teams, perfil)
+
+    def invalidar(self, id_teams: Optional[Text] = None) -> None:
+        """Remove um perfil da cache, ou todos se ``id_teams`` for ``None``."""
+        with self._lock:
+            if id_teams is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(id_teams, None)
+
+    def reiniciar_apos_fork(self) -> None:
+        """Cria um lock novo; os perfis em cache continuam partilhados com o processo pai."""
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cache)
@@ -0,0 +1,193 @@
+"""
+Bancos de perguntas do quiz de conhecimento.
+
+As perguntas vivem na tabela ``quiz_perguntas`` do PostgreSQL, agrupadas em
+bancos por departamento/cargo (ver ``db/init/01_quiz.sql``). O action server
+mantém um índice em memória, indexado por (banco, id da pergunta), que é
+carregado no arranque e recarregado em segundo plano quando o TTL expira:
+as actions do quiz nunca consultam a base de dados durante uma conversa.
+"""
+
+import json
+import logging
+import time
+from contextlib import closing
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Text, Tuple
+
+from actions.db import ligar
+from actions.recarga import RecargaPorTtl
+
+logger = logging.getLogger(__name__)
+
+# Banco usado quando o departamento/cargo do colaborador não tem banco próprio
+BANCO_GERAL = "geral"
+
+# Tempo de vida (segundos) do índice antes de ser recarregado da base de dados
+TTL_INDICE_SEGUNDOS = 300.0
+
+Pergunta = Dict[Text, Any]
+CarregadorPerguntas = Callable[[], Iterable[Pergunta]]
+
+_CONSULTA_PERGUNTAS = """
+    SELECT banco, id, pergunta, opcoes, resposta_correta, explicacao
+    FROM quiz_perguntas
+    WHERE ativa
+    ORDER BY banco, ordem, id
+"""
+
+
+def normalizar_banco(valor: Optional[Text]) -> Optional[Text]:
+    """Normaliza o nome de um banco (``"Recursos Humanos"`` → ``"recursos_humanos"``)."""
+    if not valor:
+        return None
+    return "_".join(valor.lower().split())
+
+
+def carregar_perguntas_postgres() -> List[Pergunta]:
+    """Lê todas as perguntas ativas da tabela ``quiz_perguntas``."""
+    with closing(ligar(replica=True)) as ligacao, ligacao.cursor() as cursor:
+        cursor.execute(_CONSULTA_PERGUNTAS)
+        linhas = cursor.fetchall()
+
+    perguntas = []
+    for banco, id_pergunta, pergunta, opcoes, resposta_correta, explicacao in linhas:
+        if isinstance(opcoes, str):
+            opcoes = json.loads(opcoes)
+        perguntas.append(
+            {
+                "banco": banco,
+                "id": id_pergunta,
+                "pergunta": pergunta,
+                "opcoes": opcoes or {},
+                "resposta_correta": resposta_correta.lower(),
+                "explicacao": explicacao,
+            }
+        )
+    return perguntas
+
+
+class IndiceQuiz(RecargaPorTtl):
+    """Índice em memória dos bancos de perguntas, com recarregamento por TTL (ver ``RecargaPorTtl``)."""
+
+    nome_thread = "quiz-indice"
+    aviso_falha = "Não foi possível carregar os bancos do quiz; a usar o banco base."
+
+    def __init__(
+        self,
+        bancos_base: Dict[Text, Sequence[Pergunta]],
+        carregador: Optional[CarregadorPerguntas] = None,
+        ttl: float = TTL_INDICE_SEGUNDOS,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(carregador, ttl, relogio)
+        self._bancos_base = bancos_base
+        self._estado = self._construir(())
+
+    # -- Construção -----------------------------------------------------------
+
+    def _construir(
+        self, perguntas: Iterable[Pergunta]
+    ) -> Tuple[Dict[Tuple[Text, int], Pergunta], Dict[Text, Tuple[Pergunta, ...]]]:
+        por_id: Dict[Tuple[Text, int], Pergunta] = {}
+        ordem: Dict[Text, List[Pergunta]] = {}
+
+        for banco, lista in self._bancos_base.items():
+            for pergunta in lista:
+                por_id[(banco, pergunta["id"])] = pergunta
+                ordem.setdefault(banco, []).append(pergunta)
+
+        # Os bancos vindos da base de dados substituem os bancos base homónimos
+        substituidos = set()
+        for pergunta in perguntas:
+            banco = pergunta["banco"]
+            if banco not in substituidos:
+                substituidos.add(banco)
+                for antiga in ordem.pop(banco, ()):
+                    por_id.pop((banco, antiga["id"]), None)
+            por_id[(banco, pergunta["id"])] = pergunta
+            ordem.setdefault(banco, []).append(pergunta)
+
+        return por_id, {banco: tuple(lista) for banco, lista in ordem.items()}
+
+    def _carregar(self, completa: bool) -> None:
+        perguntas = list(self._carregador())
+        self._estado = self._construir(perguntas)
+        logger.info("Índice do quiz carregado: %d perguntas.", len(perguntas))
+
+    # -- Leitura --------------------------------------------------------------
+
+    def resolver_banco(self, *candidatos: Optional[Text]) -> Text:
+        """Devolve o primeiro banco existente entre os candidatos, ou o banco geral."""
+        _, ordem = self._estado
+        for candidato in candidatos:
+            banco = normalizar_banco(candidato)
+            if banco in ordem:
+                return banco
+        return BANCO_GERAL
+
+    def perguntas(self, banco: Text) -> Tuple[Pergunta, ...]:
+        """Devolve as perguntas do banco, pela ordem de apresentação."""
+        _, ordem = self._estado
+        self._verificar_ttl()
+        return ordem.get(banco) or ordem.get(BANCO_GERAL, ())
+
+    def pergunta(self, banco: Text, id_pergunta: int) -> Optional[Pergunta]:
+        """Devolve uma pergunta pelo par (banco, id)."""
+        por_id, _ = self._estado
+        self._verificar_ttl()
+        return por_id.get((banco, id_pergunta))
+
+    def bancos(self) -> List[Text]:
+        """Lista os bancos disponíveis."""
+        return sorted(self._estado[1])
+
+
+# ---------------------------------------------------------------------------
+# Progresso do quiz
+# ---------------------------------------------------------------------------
+#
+# O progresso de um quiz cabe num único inteiro guardado no slot
+# ``quiz_progresso``: os 16 bits menos significativos são o cursor (índice da
+# próxima pergunta) e os bits seguintes a máscara das respostas certas (bit i
+# ligado ⇔ pergunta i acertada). Cada resposta avança o cursor, certa ou
+# errada, pelo que um quiz de N perguntas termina sempre em N respostas.
+
+_BITS_CURSOR = 16
+_MASCARA_CURSOR = (1 << _BITS_CURSOR) - 1
+
+# Estado de um quiz acabado de iniciar
+PROGRESSO_INICIAL = 0
+
+
+def codificar_progresso(cursor: int, acertos: int = 0) -> int:
+    """Empacota o cursor e a máscara de acertos num único inteiro."""
+    return (acertos << _BITS_CURSOR) | cursor
+
+
+def cursor_progresso(progresso: int) -> int:
+    """Índice da próxima pergunta a responder."""
+    return progresso & _MASCARA_CURSOR
+
+
+def mascara_acertos(progresso: int) -> int:
+    """Máscara de bits das perguntas respondidas corretamente."""
+    return progresso >> _BITS_CURSOR
+
+
+def registar_resposta(progresso: int, acertou: bool) -> int:
+    """Regista a resposta à pergunta atual e avança o cursor."""
+    cursor = progresso & _MASCARA_CURSOR
+    if acertou:
+        progresso |= 1 << (_BITS_CURSOR + cursor)
+    return progresso + 1
+
+
+def pontuacao_progresso(progresso: int) -> int:
+    """Número de respostas certas."""
+    # ``bin().count`` em vez de ``int.bit_count``, que só existe a partir do Python 3.10
+    return bin(progresso >> _BITS_CURSOR).count("1")
+
+
+def quiz_concluido(progresso: int, total_perguntas: int) -> bool:
+    """Indica se todas as perguntas do quiz já foram respondidas."""
+    return (progresso & _MASCARA_CURSOR) >= total_perguntas
@@ -0,0 +1,108 @@
+"""
+Recarregamento em segundo plano dos índices em memória do action server.
+
+O quiz, as perguntas frequentes, os documentos, o calendário de onboarding
+e a tabela de encaminhamento são lidos da base de dados no arranque e
+guardados em memória, para que as actions nunca consultem a base de dados
+durante uma conversa. ``RecargaPorTtl`` tem o que é comum a todos: o TTL, a
+thread de atualização, a recarga completa periódica dos índices
+incrementais e a reposição depois de um ``fork``. Cada índice implementa
+apenas ``_carregar``, que lê os dados com o seu carregador e publica o novo
+estado.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RecargaPorTtl:
+    """Base dos índices em memória recarregados numa thread quando o TTL expira.
+
+    As leituras nunca bloqueiam: quando o TTL expira, a leitura usa os dados
+    atuais e agenda o recarregamento numa thread. Cada subclasse publica os
+    dados novos com uma única atribuição, pelo que não são precisos locks no
+    caminho de leitura.
+
+    Com ``intervalo_recarga_completa``, os recarregamentos são incrementais
+    (``_carregar(completa=False)``) e só a cada intervalo é lida a tabela
+    completa; sem ele, são todos completos.
+    """
+
+    # Nome da thread de atualização e aviso registado quando a leitura falha
+    nome_thread = "recarga"
+    aviso_falha = "Não foi possível recarregar o índice; a manter o atual."
+
+    def __init__(
+        self,
+        carregador: Optional[Callable[..., Any]] = None,
+        ttl: float = 300.0,
+        relogio: Callable[[], float] = time.monotonic,
+        intervalo_recarga_completa: Optional[float] = None,
+    ) -> None:
+        self._carregador = carregador
+        self._ttl = ttl
+        self._relogio = relogio
+        self._intervalo_recarga_completa = intervalo_recarga_completa
+        self._carregado_em = relogio()
+        self._recarga_completa_em = relogio()
+        self._lock_atualizacao = threading.Lock()
+        self._atualizacao: Optional[threading.Thread] = None
+
+    # -- A implementar por cada índice ----------------------------------------
+
+    def _carregar(self, completa: bool) -> None:
+        """Lê os dados com ``self._carregador`` e publica o novo estado.
+
+        Sem ``completa``, lê apenas as alterações desde a última leitura (nos
+        índices incrementais). As exceções são tratadas por ``_recarregar``.
+        """
+        raise NotImplementedError
+
+    # -- Carregamento ---------------------------------------------------------
+
+    def aquecer(self) -> bool:
+        """Carrega os dados de forma síncrona (usado no arranque do action server)."""
+        return self._recarregar(completa=True)
+
+    def _recarregar(self, completa: bool) -> bool:
+        if self._carregador is None:
+            return False
+        try:
+            self._carregar(completa)
+        except Exception:
+            logger.warning(self.aviso_falha, exc_info=True)
+            # Evita repetir a tentativa em todas as leituras até ao próximo TTL
+            self._carregado_em = self._relogio()
+            return False
+        if completa:
+            self._recarga_completa_em = self._relogio()
+        self._carregado_em = self._relogio()
+        return True
+
+    def _verificar_ttl(self) -> None:
+        if self._carregador is None or self._relogio() - self._carregado_em < self._ttl:
+            return
+        with self._lock_atualizacao:
+            if self._atualizacao is not None and self._atualizacao.is_alive():
+                return
+            intervalo = self._intervalo_recarga_completa
+            completa = intervalo is None or self._relogio() - self._recarga_completa_em >= intervalo
+            self._atualizacao = threading.Thread(
+                target=self._recarregar, args=(completa,), name=self.nome_thread, daemon=True
+            )
+            self._atualizacao.start()
+
+    def reiniciar_apos_fork(self) -> None:
+        """Descarta o lock e a thread de atualização herdados do processo pai."""
+        self._lock_atualizacao = threading.Lock()
+        self._atualizacao = None
+
+    def aguardar_atualizacao(self, timeout: Optional[float] = None) -> None:
+        """Espera pelo fim de uma atualização em curso (útil em testes)."""
+        atualizacao = self._atualizacao
+        if atualizacao is not None:
+            atualizacao.join(timeout)
@@ -0,0 +1,235 @@
+"""
+Extração da opção escolhida numa resposta ao quiz.
+
+Uma resposta pode indicar a opção pela letra (``"b"``, ``"opção C"``,
+``"acho que é a c"``), pelo texto da opção (``"Competição interna"``,
+``"22"``) ou por um texto aproximado (``"integridde"``). Procurar a letra
+como substring da mensagem não serve: qualquer mensagem com um "b" contaria
+como a opção B.
+
+Para cada pergunta é pré-calculada uma ``TabelaRespostas`` com as letras
+válidas, os textos normalizados das opções (indexados pelo primeiro token) e
+as palavras que só aparecem numa opção. A mensagem é normalizada e dividida
+em tokens uma vez, e percorrida uma única vez contra a tabela; a comparação
+aproximada (``difflib``) só corre quando nada mais corresponde.
+
+Uma resposta que indique opções diferentes ao mesmo nível ("não é a b, é a
+c") ou nenhuma opção ("não sei") não é reconhecida (``letra=None``).
+
+``corrigir_lote`` aplica a mesma extração a respostas arquivadas, para
+corrigir conversas antigas fora do action server.
+"""
+
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Text, Tuple
+
+# Como a letra foi encontrada, por ordem de prioridade
+METODO_LETRA_MARCADA = "letra_marcada"  # "opção c", "letra c", "alínea c"
+METODO_LETRA = "letra"  # "c", "acho que é a c"
+METODO_TEXTO = "texto"  # o texto completo de uma opção
+METODO_PALAVRA = "palavra"  # uma palavra que só aparece numa opção
+METODO_APROXIMADO = "aproximado"  # texto parecido com o de uma opção
+METODO_NENHUM = "nenhum"
+
+# Semelhança mínima (0–1) para aceitar uma correspondência aproximada e a
+# vantagem mínima sobre a segunda opção mais parecida
+SEMELHANCA_MINIMA = 0.8
+MARGEM_SEMELHANCA = 0.1
+
+# Palavras que antecedem a letra da opção
+_MARCADORES_LETRA = frozenset({"opcao", "opcoes", "letra", "alinea", "resposta"})
+# Letras que também são palavras em português ("é a c"): só contam como
+# resposta quando são o último token ou vêm depois de um marcador
+_LETRAS_AMBIGUAS = frozenset({"a", "e", "o"})
+# Palavras frequentes que não distinguem uma opção das outras
+_PALAVRAS_VAZIAS = frozenset(
+    {
+        "com", "das", "dos", "era", "mais", "mas", "nao", "num", "numa", "para",
+        "pela", "pelo", "por", "que", "sem", "ser", "sua", "seu", "uma", "umas", "uns",
+    }
+)
+
+_PONTUACAO = re.compile(r"[^\w\s]")
+# Opções escritas no enunciado, uma por linha: "A) Integridade"
+_OPCAO_ENUNCIADO = re.compile(r"^\s*([A-Za-z])\)\s*(.+?)\s*$", re.MULTILINE)
+
+Pergunta = Dict[Text, Any]
+
+
+def tokenizar(texto: Text) -> List[Text]:
+    """Tokens normalizados (minúsculas, sem acentos nem pontuação) de uma mensagem."""
+    texto = texto.casefold()
+    if not texto.isascii():
+        texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return _PONTUACAO.sub(" ", texto).split()
+
+
+class Extracao(NamedTuple):
+    """Opção extraída de uma mensagem e o método que a encontrou."""
+
+    letra: Optional[Text]
+    metodo: Text
+
+
+_NENHUMA = Extracao(None, METODO_NENHUM)
+
+
+class TabelaRespostas:
+    """Tabela pré-calculada das opções de uma pergunta."""
+
+    __slots__ = ("letras", "_frases", "_palavras", "_textos")
+
+    def __init__(self, opcoes: Iterable[Tuple[Text, Text]]) -> None:
+        letras = []
+        frases: Dict[Text, List[Tuple[Tuple[Text, ...], Text]]] = {}
+        contagem: Dict[Text, set] = {}
+        textos: List[Tuple[Text, Text]] = []
+
+        for letra, texto in opcoes:
+            letra = letra.lower()
+            letras.append(letra)
+            tokens = tuple(tokenizar(texto or ""))
+            if not tokens:
+                continue
+            frases.setdefault(tokens[0], []).append((tokens, letra))
+            textos.append((" ".join(tokens), letra))
+            for token in tokens:
+                contagem.setdefault(token, set()).add(letra)
+
+        self.letras: FrozenSet[Text] = frozenset(letras)
+        # Frases mais longas primeiro, para "trabalho em equipa" ganhar a "trabalho"
+        self._frases = {
+            inicio: sorted(lista, key=lambda item: -len(item[0])) for inicio, lista in frases.items()
+        }
+        self._palavras: Dict[Text, Text] = {
+            token: next(iter(letras_token))
+            for token, letras_token in contagem.items()
+            if len(letras_token) == 1 and _distintiva(token)
+        }
+        self._textos = tuple(textos)
+
+    def extrair(self, texto: Optional[Text]) -> Extracao:
+        """Opção indicada na mensagem, numa única passagem pelos tokens."""
+        if not texto:
+            return _NENHUMA
+        tokens = tokenizar(texto)
+        ultimo = len(tokens) - 1
+
+        # Letras distintas encontradas por cada método (por ordem de prioridade)
+        marcadas, soltas, frases, palavras = set(), set(), set(), set()
+        for i, token in enumerate(tokens):
+            if token in self.letras:
+                if i > 0 and tokens[i - 1] in _MARCADORES_LETRA:
+                    marcadas.add(token)
+                elif token not in _LETRAS_AMBIGUAS or i == ultimo:
+                    soltas.add(token)
+
+            for frase, letra in self._frases.get(token, ()):
+                if tuple(tokens[i : i + len(frase)]) == frase:
+                    frases.add(letra)
+                    break
+
+            letra = self._palavras.get(token)
+            if letra is not None:
+                palavras.add(letra)
+
+        for encontradas, metodo in (
+            (marcadas, METODO_LETRA_MARCADA),
+            (soltas, METODO_LETRA),
+            (frases, METODO_TEXTO),
+            (palavras, METODO_PALAVRA),
+        ):
+            if encontradas:
+                if len(encontradas) == 1:
+                    return Extracao(next(iter(encontradas)), metodo)
+                return _NENHUMA
+
+        return self._aproximado(tokens)
+
+    def _aproximado(self, tokens: List[Text]) -> Extracao:
+        """Opção com o texto mais parecido com a mensagem (ou com um troço dela)."""
+        if not tokens or not self._textos:
+            return _NENHUMA
+        semelhancas = []
+        for texto_opcao, letra in self._textos:
+            tamanho = texto_opcao.count(" ") + 1
+            melhor = 0.0
+            # Janelas da mensagem com o mesmo número de tokens que a opção
+            for inicio in range(max(1, len(tokens) - tamanho + 1)):
+                janela = " ".join(tokens[inicio : inicio + tamanho])
+                matcher = SequenceMatcher(None, janela, texto_opcao)
+                if matcher.real_quick_ratio() >= SEMELHANCA_MINIMA and matcher.quick_ratio() >= SEMELHANCA_MINIMA:
+                    melhor = max(melhor, matcher.ratio())
+            semelhancas.append((melhor, letra))
+
+        semelhancas.sort(reverse=True)
+        melhor, letra = semelhancas[0]
+        segunda = semelhancas[1][0] if len(semelhancas) > 1 else 0.0
+        if melhor >= SEMELHANCA_MINIMA and melhor - segunda >= MARGEM_SEMELHANCA:
+            return Extracao(letra, METODO_APROXIMADO)
+        return _NENHUMA
+
+
+def _distintiva(token: Text) -> bool:
+    return token.isdigit() or (len(token) >= 3 and token not in _PALAVRAS_VAZIAS)
+
+
+def opcoes_da_pergunta(pergunta: Pergunta) -> Dict[Text, Text]:
+    """Opções da pergunta (``letra → texto``); sem ``opcoes``, lidas do enunciado."""
+    opcoes = pergunta.get("opcoes")
+    if opcoes:
+        return opcoes
+    return {letra.lower(): texto for letra, texto in _OPCAO_ENUNCIADO.findall(pergunta.get("pergunta", ""))}
+
+
+@lru_cache(maxsize=1024)
+def _tabela(opcoes: Tuple[Tuple[Text, Text], ...]) -> TabelaRespostas:
+    return TabelaRespostas(opcoes)
+
+
+def tabela_respostas(pergunta: Pergunta) -> TabelaRespostas:
+    """Tabela da pergunta, construída uma vez por conjunto de opções."""
+    return _tabela(tuple(sorted(opcoes_da_pergunta(pergunta).items())))
+
+
+def extrair_resposta(pergunta: Pergunta, texto: Optional[Text]) -> Extracao:
+    """Opção da pergunta indicada na mensagem ``texto``."""
+    return tabela_respostas(pergunta).extrair(texto)
+
+
+class Correcao(NamedTuple):
+    """Resultado da correção de uma resposta."""
+
+    id_pergunta: Any
+    letra: Optional[Text]
+    metodo: Text
+    correta: bool
+
+
+def corrigir(pergunta: Pergunta, texto: Optional[Text]) -> Correcao:
+    """Corrige uma resposta; uma resposta não reconhecida conta como errada."""
+    return _corrigir(pergunta, tabela_respostas(pergunta), texto)
+
+
+def _corrigir(pergunta: Pergunta, tabela: TabelaRespostas, texto: Optional[Text]) -> Correcao:
+    letra, metodo = tabela.extrair(texto)
+    correta = letra is not None and letra == pergunta["resposta_correta"].lower()
+    return Correcao(pergunta.get("id"), letra, metodo, correta)
+
+
+def corrigir_lote(respostas: Iterable[Tuple[Pergunta, Optional[Text]]]) -> List[Correcao]:
+    """Corrige um lote de pares (pergunta, mensagem), p. ex. de conversas arquivadas.
+
+    As tabelas são partilhadas entre todas as respostas à mesma pergunta.
+    """
+    tabelas: Dict[int, Tuple[Pergunta, TabelaRespostas]] = {}
+    correcoes = []
+    for pergunta, texto in respostas:
+        entrada = tabelas.get(id(pergunta))
+        if entrada is None or entrada[0] is not pergunta:
+            entrada = tabelas[id(pergunta)] = (pergunta, tabela_respostas(pergunta))
+        correcoes.append(_corrigir(pergunta, entrada[1], texto))
+    return correcoes
@@ -0,0 +1,267 @@
+"""
+Arranque do action server com vários processos (pre-fork).
+
+O processo principal importa o pacote das actions — o que carrega os bancos
+do quiz, o calendário de onboarding e os templates —, abre o socket de
+escuta e só depois cria os workers com ``os.fork``. Os workers herdam esse
+estado já construído e partilham-no com o pai em copy-on-write; para que as
+páginas continuem partilhadas, os objetos carregados são congelados com
+``gc.freeze()`` antes do fork e o coletor de ciclos nunca lhes toca.
+
+Cada worker aceita ligações do mesmo socket e tem o seu próprio event loop,
+ligações à base de dados, sessão HTTP da Graph API e métricas (ver
+``_reiniciar_apos_fork`` em ``actions/actions.py``). Com ``METRICS_PORT``
+definido, o worker ``i`` expõe as métricas na porta ``METRICS_PORT + i``.
+
+O processo principal apenas supervisiona os workers:
+
+- ``SIGTERM``/``SIGINT`` terminam todos os workers de forma ordenada;
+- ``SIGTTIN``/``SIGTTOU`` acrescentam ou retiram um worker;
+- um worker que termine inesperadamente é substituído.
+
+Uso:
+    python -m actions.servidor --actions actions --port 5055 --workers 4
+"""
+
+import argparse
+import gc
+import inspect
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional, Sequence, Set, Text
+
+logger = logging.getLogger(__name__)
+
+PORTA_PADRAO = 5055
+TIMEOUT_ENCERRAMENTO_SEGUNDOS = 30.0
+INTERVALO_SUPERVISAO_SEGUNDOS = 0.5
+# Um worker que morra logo após arrancar só é substituído depois desta pausa
+ESPERA_ANTES_DE_SUBSTITUIR_SEGUNDOS = 1.0
+
+
+def workers_por_omissao() -> int:
+    """Número de workers: ``ACTION_SERVER_WORKERS`` ou o número de CPUs."""
+    valor = os.getenv("ACTION_SERVER_WORKERS")
+    if valor:
+        return max(1, int(valor))
+    return os.cpu_count() or 1
+
+
+def abrir_socket(endereco: Text, porta: int, backlog: int = 1024) -> socket.socket:
+    """Socket de escuta partilhado por todos os workers."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((endereco, porta))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _servir(executor, sock: socket.socket) -> None:
+    """Corre a aplicação Sanic do ``rasa_sdk`` neste processo, no socket herdado."""
+    from rasa_sdk.endpoint import create_app
+
+    app = create_app(executor)
+    opcoes = {"sock": sock, "access_log": False}
+    parametros = inspect.signature(app.run).parameters
+    # Nas versões recentes do Sanic, sem ``single_process`` o app.run criaria os seus próprios processos
+    if "single_process" in parametros:
+        opcoes["single_process"] = True
+    if "motd" in parametros:
+        opcoes["motd"] = False
+    app.run(**opcoes)
+
+
+class Supervisor:
+    """Cria, substitui e termina os workers do action server."""
+
+    def __init__(
+        self,
+        executor,
+        sock: socket.socket,
+        workers: int,
+        porta_metricas: Optional[int] = None,
+        timeout_encerramento: float = TIMEOUT_ENCERRAMENTO_SEGUNDOS,
+    ) -> None:
+        self._executor = executor
+        self._sock = sock
+        self._pretendidos = workers
+        self._porta_metricas = porta_metricas
+        self._timeout_encerramento = timeout_encerramento
+        self._filhos: Dict[int, int] = {}  # pid → índice do worker
+        self._a_retirar: Set[int] = set()
+        self._terminar = False
+        self._pid_principal = os.getpid()
+
+    # -- Workers --------------------------------------------------------------
+
+    def _indice_livre(self) -> int:
+        ocupados = set(self._filhos.values())
+        indice = 0
+        while indice in ocupados:
+            indice += 1
+        return indice
+
+    def _lancar(self, indice: int) -> None:
+        pid = os.fork()
+        if pid:
+            self._filhos[pid] = indice
+            logger.info("Worker %d iniciado (pid %d).", indice, pid)
+            return
+
+        # Processo filho
+        for sinal in (signal.SIGTERM, signal.SIGINT, signal.SIGTTIN, signal.SIGTTOU, signal.SIGCHLD):
+            signal.signal(sinal, signal.SIG_DFL)
+        gc.enable()
+        codigo = 0
+        try:
+            if self._porta_metricas is not None:
+                from actions.metricas import iniciar_servidor_metricas
+
+                iniciar_servidor_metricas(self._porta_metricas + indice)
+            _servir(self._executor, self._sock)
+        except Exception:
+            logger.exception("Worker %d terminou com erro.", indice)
+            codigo = 1
+        # ``sys.exit`` (e não ``os._exit``) para correr os handlers atexit do worker,
+        # que gravam o feedback ainda em fila
+        sys.exit(codigo)
+
+    def _terminar_worker(self, pid: int, sinal: int = signal.SIGTERM) -> None:
+        try:
+            os.kill(pid, sinal)
+        except ProcessLookupError:
+            pass
+
+    def _recolher(self) -> None:
+        while self._filhos:
+            try:
+                pid, estado = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self._filhos.clear()
+                return
+            if pid == 0:
+                return
+            indice = self._filhos.pop(pid, None)
+            if pid in self._a_retirar:
+                self._a_retirar.discard(pid)
+            elif indice is not None and not self._terminar:
+                logger.warning(
+                    "Worker %d (pid %d) terminou com estado %d.",
+                    indice,
+                    pid,
+                    os.waitstatus_to_exitcode(estado),
+                )
+
+    def _ajustar(self) -> None:
+        while len(self._filhos) - len(self._a_retirar) < self._pretendidos:
+            self._lancar(self._indice_livre())
+        ativos = sorted(
+            (item for item in self._filhos.items() if item[0] not in self._a_retirar),
+            key=lambda item: item[1],
+        )
+        for pid, indice in ativos[self._pretendidos:]:
+            logger.info("A retirar o worker %d (pid %d).", indice, pid)
+            self._a_retirar.add(pid)
+            self._terminar_worker(pid)
+
+    # -- Sinais ---------------------------------------------------------------
+
+    def _ao_terminar(self, sinal, _frame) -> None:
+        self._terminar = True
+
+    def _ao_acrescentar(self, sinal, _frame) -> None:
+        self._pretendidos += 1
+
+    def _ao_retirar(self, sinal, _frame) -> None:
+        self._pretendidos = max(1, self._pretendidos - 1)
+
+    # -- Ciclo principal ------------------------------------------------------
+
+    def executar(self) -> None:
+        signal.signal(signal.SIGTERM, self._ao_terminar)
+        signal.signal(signal.SIGINT, self._ao_terminar)
+        signal.signal(signal.SIGTTIN, self._ao_acrescentar)
+        signal.signal(signal.SIGTTOU, self._ao_retirar)
+
+        self._ajustar()
+        while not self._terminar:
+            time.sleep(INTERVALO_SUPERVISAO_SEGUNDOS)
+            if self._terminar:
+                break
+            antes = len(self._filhos)
+            self._recolher()
+            if len(self._filhos) < antes and len(self._filhos) < self._pretendidos:
+                time.sleep(ESPERA_ANTES_DE_SUBSTITUIR_SEGUNDOS)
+            if not self._terminar:
+                self._ajustar()
+
+        self.encerrar()
+
+    def encerrar(self) -> None:
+        """Pede a todos os workers que terminem e espera por eles (SIGKILL após o timeout)."""
+        if os.getpid() != self._pid_principal:
+            return
+        self._terminar = True
+        for pid in list(self._filhos):
+            self._terminar_worker(pid)
+
+        prazo = time.monotonic() + self._timeout_encerramento
+        while self._filhos and time.monotonic() < prazo:
+            self._recolher()
+            time.sleep(0.05)
+        for pid in list(self._filhos):
+            logger.warning("Worker pid %d não terminou a tempo; a forçar.", pid)
+            self._terminar_worker(pid, signal.SIGKILL)
+        while self._filhos:
+            try:
+                pid, _ = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            self._filhos.pop(pid, None)
+        self._sock.close()
+        logger.info("Action server terminado.")
+
+
+def main(argumentos: Optional[Sequence[Text]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Action server com vários processos (pre-fork).")
+    parser.add_argument("--actions", default="actions", help="pacote das custom actions")
+    parser.add_argument("--host", default=os.getenv("SANIC_HOST", "0.0.0.0"))
+    parser.add_argument("-p", "--port", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--workers", type=int, default=workers_por_omissao())
+    args = parser.parse_args(argumentos)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(levelname)s %(name)s: %(message)s")
+
+    # As métricas são por worker: o pai não abre o endpoint ao importar as actions
+    porta_metricas = os.environ.pop("METRICS_PORT", None)
+
+    # Sem coleta de ciclos até ao fork, para não tocar nas páginas a partilhar
+    gc.disable()
+
+    from rasa_sdk.executor import ActionExecutor
+
+    executor = ActionExecutor()
+    executor.register_package(args.actions)
+    sock = abrir_socket(args.host, args.port)
+
+    gc.collect()
+    gc.freeze()
+
+    logger.info(
+        "Action server em http://%s:%d com %d workers.", args.host, args.port, args.workers
+    )
+    Supervisor(
+        executor,
+        sock,
+        max(1, args.workers),
+        int(porta_metricas) if porta_metricas else None,
+    ).executar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Registo de templates das mensagens das custom actions.
+
+Os textos são pré-compilados uma única vez, quando o action server importa o
+pacote ``actions``, em fragmentos estáticos intercalados com os campos a
+preencher (na maioria dos casos apenas o ``nome``). As mensagens já
+renderizadas ficam numa cache LRU limitada, indexada por (template, nome),
+pelo que uma vaga de novos colaboradores com o mesmo nome — ou sem nome — não
+volta a construir a mesma string.
+"""
+
+from functools import lru_cache
+from string import Formatter
+from typing import Any, Dict, Tuple, Text
+
+# Número máximo de mensagens renderizadas mantidas em memória
+TAMANHO_CACHE_TEMPLATES = 4096
+
+# ---------------------------------------------------------------------------
+# Textos das mensagens
+# ---------------------------------------------------------------------------
+
+TEMPLATES_PADRAO: Dict[Text, Text] = {
+    "boas_vindas": (
+        "👋 Olá{nome}! Bem-vindo(a) à **The100s**!\n\n"
+        "Sou o seu assistente virtual de onboarding e estou aqui para o/a ajudar "
+        "a integrar-se na nossa equipa. 🎉\n\n"
+        "**As etapas do seu onboarding são:**\n\n"
+        "1. 📋 **Pré-onboarding** — Leitura de documentos e preparação\n"
+        "2. 🏢 **Primeiro dia** — Apresentações e configuração do posto de trabalho\n"
+        "3. 📅 **Primeira semana** — Reuniões com a equipa e formações iniciais\n\n"
+        "Posso ajudá-lo/a com:\n"
+        "• 🏢 Informações sobre a empresa\n"
+        "• 🎁 Benefícios\n"
+        "• 📄 Documentos de onboarding\n"
+        "• 🎬 Vídeo de boas-vindas\n"
+        "• 📝 Quiz de conhecimento\n"
+        "• 📅 Agendamento de reuniões\n"
+        "• 🖥️ Suporte TI\n"
+        "• ❓ Perguntas frequentes\n\n"
+        "Como posso ajudá-lo/a hoje?"
+    ),
+    "documentos": (
+        "📄 Claro{nome}! Aqui estão os documentos essenciais para o seu onboarding:\n\n"
+        "{lista}"
+        "⚠️ Por favor, leia todos os documentos com atenção e assine os que requerem assinatura.\n"
+        "Se tiver dúvidas sobre algum documento, não hesite em perguntar ou contactar os RH."
+    ),
+    "quiz_introducao": (
+        "📝 Ótimo{nome}! Vamos começar o **Quiz de Conhecimento da The100s**!\n\n"
+        "Este quiz tem **{total} perguntas** sobre a empresa.\n"
+        "Tente responder com a letra da opção correta (A, B, C ou D).\n\n"
+    ),
+    "agendar_reuniao": (
+        "📅 Lamento{nome}, não foi possível agendar automaticamente a reunião de "
+        "apresentação{gestor_info}.\n\n"
+        "**Pode agendá-la diretamente:**\n"
+        "• **Microsoft Teams:** Clique em 'Calendário' → 'Nova reunião'\n"
+        "• **Outlook:** Clique em 'Nova reunião' e adicione os participantes\n\n"
+        "⏰ A reunião de apresentação é normalmente agendada para os **primeiros 3 dias**.\n\n"
+        "Se precisar de ajuda, contacte o seu gestor ou os RH.\n\n"
+        "📧 **RH:** rh@the100s.com"
+    ),
+    "reuniao_agendada": (
+        "📅 Feito{nome}! Agendei a sua reunião de apresentação{gestor_info} "
+        "para **{data}** às **{hora}**.\n\n"
+        "📧 O convite foi enviado para o seu email e já está no seu **Outlook Calendar**.\n"
+        "{ligacao_teams}"
+        "✅ Não se esqueça de aceitar o convite!"
+    ),
+    "reuniao_sem_horario": (
+        "📅 Lamento{nome}, não encontrei um horário livre comum{gestor_info} "
+        "nos próximos **3 dias úteis**.\n\n"
+        "Sugiro que contacte diretamente o seu gestor ou os RH para combinarem um horário.\n\n"
+        "📧 **RH:** rh@the100s.com"
+    ),
+    "feedback": (
+        "🙏 Obrigado pelo seu feedback{nome}!\n\n"
+        "O seu comentário foi registado e será analisado pela equipa de RH "
+        "para melhorar continuamente o processo de onboarding.\n\n"
+        "✍️ Se tiver mais comentários ou sugestões, não hesite em partilhar!"
+    ),
+    "etapa_pre_onboarding": (
+        "📋 Olá{nome}! Encontra-se na fase de **Pré-onboarding**.\n\n"
+        "**O que deve fazer agora:**\n"
+        "• 📄 Ler os documentos enviados (manual, código de conduta, etc.)\n"
+        "• ✍️ Assinar os documentos que requerem assinatura\n"
+        "• 📧 Confirmar os detalhes do primeiro dia com os RH\n"
+        "• 🖥️ Preparar o equipamento necessário"
+    ),
+    "etapa_primeiro_dia": (
+        "🏢 Olá{nome}! É o seu **Primeiro Dia** na The100s!\n\n"
+        "**Agenda de hoje:**\n"
+        "• 👋 Apresentações com a equipa\n"
+        "• 🖥️ Configuração do posto de trabalho\n"
+        "• 🔑 Receção das credenciais de acesso\n"
+        "• 🍽️ Almoço com o gestor/equipa\n"
+        "• 📋 Briefing inicial com o seu gestor"
+    ),
+    "etapa_primeira_semana": (
+        "📅 Olá{nome}! Está na sua **Primeira Semana** na The100s!\n\n"
+        "**Objetivos desta semana:**\n"
+        "• 🤝 Reuniões de apresentação com as equipas chave\n"
+        "• 📚 Formações iniciais obrigatórias\n"
+        "• 🎯 Definição de objetivos com o seu gestor\n"
+        "• 🔧 Conclusão da configuração de todas as ferramentas\n"
+        "• 📝 Realização do quiz de conhecimento"
+    ),
+    "etapa_onboarding_concluido": (
+        "🎉 Olá{nome}! Já concluiu a primeira semana na The100s!\n\n"
+        "**Próximos passos:**\n"
+        "• 🎯 Acompanhar os objetivos definidos com o seu gestor\n"
+        "• 📚 Concluir as formações que ainda estejam pendentes\n"
+        "• 📝 Partilhar o seu feedback sobre o processo de onboarding\n\n"
+        "Continuo disponível para qualquer dúvida."
+    ),
+    "lembrete_pre_onboarding": (
+        "👋 Olá{nome}! Faltam poucos dias para começar na **The100s**.\n\n"
+        "Antes do primeiro dia, leia e assine os documentos de onboarding e confirme "
+        "os detalhes da chegada com os RH. Escreva **documentos** para receber as ligações."
+    ),
+    "lembrete_primeiro_dia": (
+        "🏢 Bom dia{nome}! Hoje é o seu **Primeiro Dia** na The100s. Boa sorte!\n\n"
+        "Escreva **etapa** para ver a agenda de hoje, ou pergunte-me o que precisar."
+    ),
+    "lembrete_primeira_semana": (
+        "📅 Olá{nome}! Como está a correr a sua **Primeira Semana**?\n\n"
+        "Ainda vai a tempo de agendar a reunião com o seu gestor e de fazer o "
+        "**quiz de conhecimento** sobre a empresa."
+    ),
+    "faq": (
+        "❓ **Perguntas Frequentes (FAQ)**\n\n"
+        "**Horário de trabalho:**\n"
+        "O horário padrão é das 9h às 18h, com flexibilidade conforme acordado com o seu gestor.\n\n"
+        "**Onde fico?**\n"
+        "O seu posto de trabalho está identificado. Consulte o seu gestor ou RH para confirmação.\n\n"
+        "**Como funciona o registo de ponto?**\n"
+        "Através do sistema de RH (SIRH). Receberá as credenciais por email.\n\n"
+        "**Quando recebo o primeiro salário?**\n"
+        "O pagamento é processado no último dia útil de cada mês.\n\n"
+        "**Tenho dúvidas sobre benefícios, a quem contacto?**\n"
+        "Contacte o departamento de RH: rh@the100s.com\n\n"
+        "Para mais perguntas, fale com o seu gestor ou com os RH!"
+    ),
+    "fallback_sugestoes": (
+        "🤔 Desculpe{nome}, não percebi bem o que quis dizer.\n\n"
+        "É sobre algum destes temas? Escolha uma opção ou escreva a pergunta por outras palavras."
+    ),
+    "encaminhamento": (
+        "👤 Claro{nome}! Vou pô-lo/a em contacto com a **{fila}**.\n\n"
+        "📧 **Contacto:** {contacto}\n"
+        "⏰ Um membro da equipa irá responder-lhe dentro de **{prazo}**."
+    ),
+    "encaminhamento_fallback": (
+        "👤 Lamento{nome}, não estou a conseguir ajudar com esta questão. "
+        "Vou pô-lo/a em contacto com a **{fila}**.\n\n"
+        "📧 **Contacto:** {contacto}\n"
+        "⏰ Um membro da equipa irá responder-lhe dentro de **{prazo}**."
+    ),
+    "encaminhamento_pendente": (
+        "👤 A sua questão já foi encaminhada para a **{fila}** ({contacto}).\n\n"
+        "Entretanto, posso ajudá-lo/a com documentos, benefícios, o quiz ou as perguntas frequentes."
+    ),
+    "etapa_desconhecida": (
+        "👋 Olá{nome}! Bem-vindo(a) ao processo de onboarding da The100s!\n\n"
+        "Não consegui determinar a sua etapa atual. "
+        "Por favor, contacte os RH para verificar o seu estado de onboarding.\n\n"
+        "📧 **RH:** rh@the100s.com"
+    ),
+}
+
+
+# ---------------------------------------------------------------------------
+# Pré-compilação e renderização
+# ---------------------------------------------------------------------------
+
+
+class Template:
+    """Template pré-compilado em fragmentos estáticos e nomes de campos.
+
+    Um texto com um único campo (``"Olá{nome}!"``) fica reduzido a um prefixo
+    e um sufixo, e renderizá-lo é uma simples concatenação.
+    """
+
+    __slots__ = ("chave", "literais", "campos")
+
+    def __init__(self, chave: Text, texto: Text) -> None:
+        literais = []
+        campos = []
+        for literal, campo, _, _ in Formatter().parse(texto):
+            literais.append(literal)
+            if campo is not None:
+                campos.append(campo)
+        # Garante len(literais) == len(campos) + 1 (o sufixo pode ser vazio)
+        if len(literais) == len(campos):
+            literais.append("")
+
+        self.chave = chave
+        self.literais: Tuple[Text, ...] = tuple(literais)
+        self.campos: Tuple[Text, ...] = tuple(campos)
+
+    def renderizar(self, valores: Dict[Text, Any]) -> Text:
+        """Preenche os campos do template com os valores indicados."""
+        if not self.campos:
+            return self.literais[0]
+        if len(self.campos) == 1:
+            return self.literais[0] + str(valores[self.campos[0]]) + self.literais[1]
+
+        partes = [self.literais[0]]
+        for campo, literal in zip(self.campos, self.literais[1:]):
+            partes.append(str(valores[campo]))
+            partes.append(literal)
+        return "".join(partes)
+
+
+class RegistoTemplates:
+    """Conjunto de templates pré-compilados com cache LRU das mensagens renderizadas."""
+
+    def __init__(
+        self,
+        templates: Dict[Text, Text],
+        tamanho_cache: int = TAMANHO_CACHE_TEMPLATES,
+    ) -> None:
+        self._templates: Dict[Text, Template] = {
+            chave: Template(chave, texto) for chave, texto in templates.items()
+        }
+        self._renderizar_em_cache = lru_cache(maxsize=tamanho_cache)(
+            self._renderizar_sem_cache
+        )
+
+    def __contains__(self, chave: Text) -> bool:
+        return chave in self._templates
+
+    def obter(self, chave: Text) -> Template:
+        """Devolve o template pré-compilado (``KeyError`` se não existir)."""
+        return self._templates[chave]
+
+    def renderizar(self, chave: Text, nome: Text = "", **extras: Any) -> Text:
+        """Renderiza o template ``chave``, reutilizando a mensagem se já estiver em cache.
+
+        A chave da cache é (template, nome); os campos extra, quando existem,
+        são acrescentados à chave.
+        """
+        if extras:
+            return self._renderizar_em_cache(chave, nome, tuple(extras.items()))
+        return self._renderizar_em_cache(chave, nome)
+
+    def _renderizar_sem_cache(
+        self,
+        chave: Text,
+        nome: Text,
+        extras: Tuple[Tuple[Text, Any], ...] = (),
+    ) -> Text:
+        valores = dict(extras)
+        valores["nome"] = nome
+        return self._templates[chave].renderizar(valores)
+
+    def estatisticas_cache(self) -> Dict[Text, int]:
+        """Devolve as estatísticas da cache LRU (acertos, falhas, tamanho)."""
+        info = self._renderizar_em_cache.cache_info()
+        return {
+            "acertos": info.hits,
+            "falhas": info.misses,
+            "tamanho": info.currsize,
+            "tamanho_maximo": info.maxsize,
+        }
+
+    def limpar_cache(self) -> None:
+        """Esvazia a cache de mensagens renderizadas."""
+        self._renderizar_em_cache.cache_clear()
+
+
+# Registo partilhado, carregado no arranque do action server
+TEMPLATES = RegistoTemplates(TEMPLATES_PADRAO)
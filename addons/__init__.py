@@ -0,0 +1,8 @@
+"""
+Extensões do Rasa Server do Bot de Onboarding da The100s (canais, NLU e
+tracker store).
+
+Ao contrário do pacote ``actions``, que corre no action server, estes
+módulos são carregados pelo próprio Rasa Server (ver ``credentials.yml`` e
+``endpoints.yml``).
+"""
@@ -0,0 +1,252 @@
+"""
+Arranque rápido do Rasa Server.
+
+Num reinício, o ``rasa run`` carrega o modelo e o ``pt_core_news_md`` e
+começa logo a aceitar mensagens. As primeiras mensagens pagam ainda a
+compilação dos grafos do TensorFlow (DIET, ResponseSelector, TED) e a
+leitura dos vetores do spaCy, e chegam a demorar vários segundos. Este
+módulo reduz as duas partes:
+
+* ``carregar_spacy``: carrega o modelo spaCy sem os componentes de que o
+  pipeline do Rasa não precisa (``excluir``, p. ex. ``parser`` e ``ner``) e
+  com os vetores estáticos mapeados em memória (``vetores_mmap``). Os vetores
+  deixam de ser copiados para a memória do processo: o sistema operativo lê
+  as páginas à medida que são usadas e partilha-as entre processos e
+  reinícios do contentor. É usado pelo ``addons.nlp_com_cache.SpacyNLP``.
+* ``aquecer``: antes de se declarar pronto, o servidor processa frases
+  sintéticas tiradas de ``data/nlu.yml``, pelo NLU e pela previsão da
+  próxima action, num tracker em memória. Nada é gravado no tracker store
+  nem publicado no event broker.
+* ``FICHEIRO_PRONTO``: criado no fim do aquecimento e apagado no arranque.
+  É o healthcheck do ``rasa-server`` no ``docker-compose.yml``: o
+  orquestrador só deve encaminhar mensagens do Teams para réplicas prontas.
+
+Uso (os argumentos são os do ``rasa``; só o ``run`` é alterado):
+    python -m addons.arranque run --enable-api --credentials credentials.yml --endpoints endpoints.yml
+    python -m addons.arranque run --frases-por-intent 3 ...   # mais aquecimento
+    python -m addons.arranque train                           # igual a ``rasa train``
+"""
+
+import argparse
+import asyncio
+import inspect
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Text, Union
+
+import yaml
+
+from addons.atalho_nlu import CAMINHO_NLU_PADRAO, exemplos_nlu, remover_anotacoes
+
+logger = logging.getLogger(__name__)
+
+FICHEIRO_PRONTO = Path(os.getenv("RASA_FICHEIRO_PRONTO", "/tmp/rasa_pronto"))
+
+# Frases de aquecimento por intent
+FRASES_POR_INTENT = 2
+
+# Conversa usada no aquecimento (só existe em memória)
+SENDER_AQUECIMENTO = "aquecimento"
+
+
+# ---------------------------------------------------------------------------
+# Modelo spaCy
+# ---------------------------------------------------------------------------
+
+
+def mapear_vetores(vetores: Any, pasta_vocab: Path) -> bool:
+    """Substitui a tabela de ``vetores`` pelo ficheiro ``vocab/vectors`` mapeado em memória.
+
+    Devolve ``False`` se o modelo não tiver vetores estáticos.
+    """
+    import numpy
+
+    ficheiro = pasta_vocab / "vectors"
+    if not ficheiro.exists():
+        return False
+    # Índices, chaves e modo dos vetores; a tabela em si fica no disco
+    vetores.from_disk(pasta_vocab, exclude=("strings", "vectors"))
+    vetores.data = numpy.load(ficheiro, mmap_mode="r")
+    return True
+
+
+def carregar_spacy(nome: Text, excluir: Sequence[Text] = (), vetores_mmap: bool = False) -> Any:
+    """Carrega o modelo spaCy sem os componentes em ``excluir`` e, opcionalmente, com os vetores mapeados."""
+    import spacy
+
+    inicio = time.perf_counter()
+    excluidos = list(excluir) + (["vectors"] if vetores_mmap else [])
+    nlp = spacy.load(nome, exclude=excluidos)
+    if vetores_mmap:
+        # Pasta de onde o spaCy carregou o modelo (pacote instalado ou caminho)
+        pasta = getattr(nlp, "_path", None) or Path(nome)
+        if not mapear_vetores(nlp.vocab.vectors, Path(pasta) / "vocab"):
+            logger.warning("O modelo spaCy '%s' não tem vetores para mapear em %s.", nome, pasta)
+    logger.info(
+        "Modelo spaCy '%s' carregado em %.2f s (componentes: %s; vetores mapeados: %s).",
+        nome,
+        time.perf_counter() - inicio,
+        ", ".join(nlp.pipe_names),
+        "sim" if vetores_mmap else "não",
+    )
+    return nlp
+
+
+# ---------------------------------------------------------------------------
+# Aquecimento
+# ---------------------------------------------------------------------------
+
+
+class Aquecimento(NamedTuple):
+    mensagens: int
+    segundos: float
+    primeira_ms: float
+    ultima_ms: float
+
+
+def frases_aquecimento(
+    caminho: Union[Text, Path] = CAMINHO_NLU_PADRAO, por_intent: int = FRASES_POR_INTENT
+) -> List[Text]:
+    """As primeiras ``por_intent`` frases de cada intent de ``data/nlu.yml``, sem anotações."""
+    with open(caminho, encoding="utf-8") as ficheiro:
+        dados = yaml.safe_load(ficheiro) or {}
+    contagem: Dict[Text, int] = {}
+    frases = []
+    for intent, exemplo in exemplos_nlu(dados):
+        if contagem.get(intent, 0) >= por_intent:
+            continue
+        frase = remover_anotacoes(exemplo)
+        if frase:
+            contagem[intent] = contagem.get(intent, 0) + 1
+            frases.append(frase)
+    return frases
+
+
+async def _prever_proxima_action(agente: Any, frase: Text, analise: Dict[Text, Any]) -> None:
+    from rasa.shared.core.constants import ACTION_LISTEN_NAME
+    from rasa.shared.core.events import ActionExecuted, UserUttered
+    from rasa.shared.core.trackers import DialogueStateTracker
+
+    tracker = DialogueStateTracker.from_events(
+        SENDER_AQUECIMENTO,
+        [
+            ActionExecuted(ACTION_LISTEN_NAME),
+            UserUttered(frase, analise.get("intent"), analise.get("entities"), analise),
+        ],
+        slots=agente.domain.slots,
+    )
+    previsao = agente.processor.predict_next_with_tracker(tracker)
+    if inspect.isawaitable(previsao):
+        await previsao
+
+
+async def aquecer(
+    agente: Any, frases: Sequence[Text], relogio: Callable[[], float] = time.perf_counter
+) -> Aquecimento:
+    """Passa as frases pelo NLU e pelas políticas do agente, sem gravar conversas."""
+    inicio = relogio()
+    duracoes = []
+    for frase in frases:
+        antes = relogio()
+        analise = await agente.parse_message(frase)
+        if getattr(agente, "processor", None) is not None:
+            await _prever_proxima_action(agente, frase, analise)
+        duracoes.append((relogio() - antes) * 1000)
+        # Deixa o servidor atender pedidos que cheguem entretanto
+        await asyncio.sleep(0)
+    return Aquecimento(
+        len(duracoes),
+        relogio() - inicio,
+        duracoes[0] if duracoes else 0.0,
+        duracoes[-1] if duracoes else 0.0,
+    )
+
+
+def marcar_pronto(caminho: Path = FICHEIRO_PRONTO) -> None:
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_text(f"{time.time():.3f}\n", encoding="utf-8")
+
+
+def desmarcar_pronto(caminho: Path = FICHEIRO_PRONTO) -> None:
+    try:
+        caminho.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def ouvinte_aquecimento(
+    frases: Sequence[Text], ficheiro_pronto: Path = FICHEIRO_PRONTO
+) -> Callable[[Any, Any], Awaitable[None]]:
+    """Ouvinte ``after_server_start`` do Sanic: aquece o agente e marca o servidor como pronto."""
+
+    async def aquecer_servidor(app: Any, _loop: Any) -> None:
+        agente = getattr(app.ctx, "agent", None)
+        if agente is None or not agente.is_ready():
+            logger.warning("Sem modelo carregado: o servidor não fica marcado como pronto.")
+            return
+        try:
+            resultado = await aquecer(agente, frases)
+        except Exception:
+            # Um aquecimento falhado não impede o servidor de atender
+            logger.exception("Falha no aquecimento do modelo.")
+        else:
+            logger.info(
+                "Aquecimento: %d mensagens em %.2f s (primeira %.0f ms, última %.0f ms).",
+                resultado.mensagens,
+                resultado.segundos,
+                resultado.primeira_ms,
+                resultado.ultima_ms,
+            )
+        marcar_pronto(ficheiro_pronto)
+        logger.info("Rasa Server pronto (%s).", ficheiro_pronto)
+
+    return aquecer_servidor
+
+
+# ---------------------------------------------------------------------------
+# Linha de comandos
+# ---------------------------------------------------------------------------
+
+
+def _rasa(argumentos: Sequence[Text]) -> None:
+    from rasa.__main__ import main as main_rasa
+
+    sys.argv = ["rasa", *argumentos]
+    main_rasa()
+
+
+def main(argumentos: Optional[Sequence[Text]] = None) -> None:
+    argumentos = list(sys.argv[1:] if argumentos is None else argumentos)
+    if not argumentos or argumentos[0] != "run":
+        _rasa(argumentos)
+        return
+
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--nlu-aquecimento", type=Path, default=CAMINHO_NLU_PADRAO)
+    parser.add_argument("--frases-por-intent", type=int, default=FRASES_POR_INTENT)
+    parser.add_argument("--ficheiro-pronto", type=Path, default=FICHEIRO_PRONTO)
+    opcoes, resto = parser.parse_known_args(argumentos[1:])
+
+    from rasa.__main__ import create_argument_parser
+    from rasa.core.run import serve_application
+    from rasa.utils.common import configure_logging_and_warnings
+
+    desmarcar_pronto(opcoes.ficheiro_pronto)
+    if "server_listeners" not in inspect.signature(serve_application).parameters:
+        logger.warning("Esta versão do Rasa não aceita ouvintes do servidor: arranque sem aquecimento.")
+        _rasa(["run", *resto])
+        return
+
+    args = create_argument_parser().parse_args(["run", *resto])
+    configure_logging_and_warnings(args.loglevel, warn_only_once=True, filter_repeated_logs=True)
+    frases = frases_aquecimento(opcoes.nlu_aquecimento, opcoes.frases_por_intent)
+    # ``rasa.api.run`` passa ao ``serve_application`` os atributos que ele aceita
+    args.server_listeners = [(ouvinte_aquecimento(frases, opcoes.ficheiro_pronto), "after_server_start")]
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
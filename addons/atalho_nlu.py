@@ -0,0 +1,137 @@
+"""
+Atalho de NLU para mensagens triviais, antes do pipeline spaCy/DIET.
+
+Grande parte das mensagens recebidas é uma cópia quase exata de um exemplo
+de treino: respostas do quiz ("a", "b"), saudações ("olá", "bom dia"),
+confirmações ("sim", "ok"). Para estas, correr o ``SpacyNLP`` com o modelo
+``pt_core_news_md``, os featurizers e o ``DIETClassifier`` não acrescenta
+informação.
+
+``IndiceAtalhos`` é um dicionário pré-calculado a partir de ``data/nlu.yml``:
+texto normalizado (minúsculas, sem acentos, sem pontuação e com espaços
+simples) → intent. Um texto só entra no índice se pertencer a uma única
+intent e não tiver entidades anotadas. Uma mensagem que não esteja no índice
+segue, sem alterações, para o pipeline completo.
+"""
+
+import logging
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Text, Tuple, Union
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_NLU_PADRAO = Path(os.getenv("NLU_DADOS", "data/nlu.yml"))
+
+# Confiança atribuída às mensagens classificadas pelo atalho
+CONFIANCA_ATALHO = 1.0
+
+# Nome registado nos metadados da mensagem, para distinguir o atalho do pipeline
+ORIGEM_ATALHO = "atalho_nlu"
+
+_PONTUACAO = re.compile(r"[^\w\s]")
+_ESPACOS = re.compile(r"\s+")
+# Anotações de entidades nos exemplos: [texto](entidade) ou [texto]{"entity": ...}
+_ANOTACAO_ENTIDADE = re.compile(r"\[([^\]]+)\](?:\([^)]*\)|\{[^}]*\})")
+
+
+def normalizar(texto: Text) -> Text:
+    """Forma canónica de uma mensagem: ``"Olá, Bom-Dia!"`` → ``"ola bom dia"``."""
+    texto = texto.casefold()
+    if not texto.isascii():
+        # Decompõe as letras acentuadas e descarta os acentos (e o resto do não-ASCII)
+        texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    texto = _PONTUACAO.sub(" ", texto)
+    return _ESPACOS.sub(" ", texto).strip()
+
+
+def exemplos_nlu(dados_nlu: Dict[Text, Any]) -> Iterable[Tuple[Text, Text]]:
+    """Pares (intent, exemplo) de um ficheiro NLU já lido, pela ordem do ficheiro."""
+    for bloco in dados_nlu.get("nlu") or ():
+        intent = bloco.get("intent")
+        exemplos = bloco.get("examples")
+        if not intent or not isinstance(exemplos, str):
+            continue
+        for linha in exemplos.splitlines():
+            linha = linha.strip()
+            if linha.startswith("- "):
+                yield intent, linha[2:].strip()
+
+
+def remover_anotacoes(exemplo: Text) -> Text:
+    """Texto de um exemplo sem as anotações de entidades (``[Ana](nome)`` → ``Ana``)."""
+    return _ANOTACAO_ENTIDADE.sub(r"\1", exemplo).strip()
+
+
+class IndiceAtalhos:
+    """Índice texto normalizado → intent, construído a partir dos exemplos de treino."""
+
+    def __init__(self, exemplos: Iterable[Tuple[Text, Text]]) -> None:
+        por_texto: Dict[Text, Optional[Text]] = {}
+        for intent, exemplo in exemplos:
+            # Os exemplos com entidades precisam do modelo para as extrair
+            if remover_anotacoes(exemplo) != exemplo.strip():
+                continue
+            chave = normalizar(exemplo)
+            if not chave:
+                continue
+            anterior = por_texto.get(chave, intent)
+            # Textos usados em mais de uma intent ficam de fora (``None``)
+            por_texto[chave] = intent if anterior == intent else None
+
+        self._por_texto: Dict[Text, Text] = {
+            chave: intent for chave, intent in por_texto.items() if intent is not None
+        }
+        self.ambiguos = sum(1 for intent in por_texto.values() if intent is None)
+        self.acertos = 0
+        self.falhas = 0
+
+    @classmethod
+    def de_ficheiro(cls, caminho: Union[Text, Path] = CAMINHO_NLU_PADRAO) -> "IndiceAtalhos":
+        """Constrói o índice a partir de um ficheiro NLU no formato YAML do Rasa."""
+        with open(caminho, encoding="utf-8") as ficheiro:
+            dados = yaml.safe_load(ficheiro) or {}
+        indice = cls(exemplos_nlu(dados))
+        logger.info(
+            "Atalho de NLU: %d textos indexados a partir de %s (%d ambíguos excluídos).",
+            len(indice),
+            caminho,
+            indice.ambiguos,
+        )
+        return indice
+
+    def intent(self, texto: Optional[Text]) -> Optional[Text]:
+        """Intent da mensagem, ou ``None`` se tiver de passar pelo pipeline completo."""
+        # Mensagens "/intent{...}" são interpretadas pelo próprio Rasa
+        if not texto or texto.startswith("/"):
+            return None
+        intent = self._por_texto.get(normalizar(texto))
+        if intent is None:
+            self.falhas += 1
+        else:
+            self.acertos += 1
+        return intent
+
+    def classificar(self, texto: Optional[Text]) -> Optional[Dict[Text, Any]]:
+        """Resultado no formato de ``parse_data`` do Rasa, ou ``None`` se não houver atalho."""
+        intent = self.intent(texto)
+        if intent is None:
+            return None
+        resultado = {"name": intent, "confidence": CONFIANCA_ATALHO}
+        return {
+            "text": texto,
+            "intent": resultado,
+            "intent_ranking": [resultado],
+            "entities": [],
+            "metadata": {"origem_nlu": ORIGEM_ATALHO},
+        }
+
+    def __len__(self) -> int:
+        return len(self._por_texto)
+
+    def __contains__(self, texto: Text) -> bool:
+        return normalizar(texto) in self._por_texto
@@ -0,0 +1,143 @@
+"""
+Cache em disco, endereçada pelo conteúdo, dos ``Doc`` do spaCy dos exemplos de treino.
+
+Em cada ``rasa train``, o ``SpacyNLP`` analisa com o ``pt_core_news_md``
+todos os exemplos de ``data/nlu.yml``, mesmo que só um tenha mudado: a cache
+de treino do Rasa é por componente, e qualquer alteração aos dados invalida
+a análise de todo o conjunto. ``LinguagemComCache`` envolve o modelo spaCy e
+serve ``pipe`` a partir de um ``ArmazemConteudo``. Cada ``Doc`` é guardado
+num ficheiro cujo nome é o SHA-256 do texto e da identificação do modelo
+(versão do spaCy, nome e versão do modelo, componentes). Só os textos novos
+ou alterados passam pelo spaCy.
+
+Os vetores estáticos do ``SpacyFeaturizer`` vêm do vocabulário do modelo e
+não do ``Doc``; por isso um ``Doc`` recuperado da cache produz as mesmas
+features. O componente do Rasa que usa esta cache está em
+``addons/nlp_com_cache.py``.
+"""
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Text, Union
+
+logger = logging.getLogger(__name__)
+
+# Variável de ambiente com a pasta da cache (usada pelo ``addons/treino.py``)
+VARIAVEL_DIRETORIO_CACHE = "CACHE_FEATURIZACAO"
+
+
+class ArmazemConteudo:
+    """Armazém de blobs endereçados por chave (SHA-256), um ficheiro por blob.
+
+    Os ficheiros são publicados com ``os.replace``, pelo que vários processos
+    de treino podem partilhar a mesma pasta.
+    """
+
+    def __init__(self, diretorio: Union[Text, Path]) -> None:
+        self.diretorio = Path(diretorio)
+        self.acertos = 0
+        self.falhas = 0
+
+    def _caminho(self, chave: Text) -> Path:
+        return self.diretorio / chave[:2] / chave
+
+    def obter(self, chave: Text) -> Optional[bytes]:
+        try:
+            conteudo = self._caminho(chave).read_bytes()
+        except FileNotFoundError:
+            self.falhas += 1
+            return None
+        self.acertos += 1
+        return conteudo
+
+    def guardar(self, chave: Text, conteudo: bytes) -> None:
+        caminho = self._caminho(chave)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_name(f".{chave}.{os.getpid()}.tmp")
+        temporario.write_bytes(conteudo)
+        os.replace(temporario, caminho)
+
+
+def identificacao_modelo(nlp: Any) -> Text:
+    """Identifica o modelo spaCy: qualquer mudança invalida as entradas da cache."""
+    import spacy
+
+    meta = getattr(nlp, "meta", {}) or {}
+    return "|".join(
+        (
+            spacy.__version__,
+            f"{meta.get('lang')}_{meta.get('name')}",
+            str(meta.get("version")),
+            ",".join(getattr(nlp, "pipe_names", ())),
+        )
+    )
+
+
+class LinguagemComCache:
+    """Modelo spaCy cujo ``pipe`` consulta primeiro a cache.
+
+    Os restantes atributos e métodos (``__call__``, ``vocab``, ``meta``...)
+    são os do modelo original.
+    """
+
+    def __init__(
+        self,
+        nlp: Any,
+        armazem: ArmazemConteudo,
+        identificacao: Optional[Text] = None,
+        serializar: Optional[Callable[[Any], bytes]] = None,
+        desserializar: Optional[Callable[[bytes], Any]] = None,
+    ) -> None:
+        self._nlp = nlp
+        self._armazem = armazem
+        self._identificacao = identificacao if identificacao is not None else identificacao_modelo(nlp)
+        self._serializar = serializar or (lambda doc: doc.to_bytes())
+        self._desserializar = desserializar or self._doc_de_bytes
+
+    def _doc_de_bytes(self, conteudo: bytes) -> Any:
+        from spacy.tokens import Doc
+
+        return Doc(self._nlp.vocab).from_bytes(conteudo)
+
+    def __getattr__(self, nome: Text) -> Any:
+        # Só é chamado para atributos que não existem aqui; os privados nunca
+        # são delegados (evita recursão antes de ``__init__``, p. ex. com pickle)
+        if nome.startswith("_"):
+            raise AttributeError(nome)
+        return getattr(self._nlp, nome)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._nlp(*args, **kwargs)
+
+    def chave(self, texto: Text) -> Text:
+        return hashlib.sha256(f"{self._identificacao}\0{texto}".encode("utf-8")).hexdigest()
+
+    def pipe(self, textos: Iterable[Text], **kwargs: Any) -> Iterator[Any]:
+        textos = list(textos)
+        if kwargs.get("as_tuples"):
+            # Forma pouco usada (texto, contexto): sem cache
+            yield from self._nlp.pipe(textos, **kwargs)
+            return
+
+        chaves = [self.chave(texto) for texto in textos]
+        docs: List[Any] = [None] * len(textos)
+        em_falta = []
+        for posicao, chave in enumerate(chaves):
+            conteudo = self._armazem.obter(chave)
+            if conteudo is None:
+                em_falta.append(posicao)
+            else:
+                docs[posicao] = self._desserializar(conteudo)
+
+        if em_falta:
+            novos = self._nlp.pipe([textos[posicao] for posicao in em_falta], **kwargs)
+            for posicao, doc in zip(em_falta, novos):
+                docs[posicao] = doc
+                self._armazem.guardar(chaves[posicao], self._serializar(doc))
+
+        logger.info(
+            "Cache de featurização: %d de %d textos reutilizados.", len(textos) - len(em_falta), len(textos)
+        )
+        yield from docs
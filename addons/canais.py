@@ -0,0 +1,230 @@
+"""
+Canais do Rasa com filtro de entrada e atalho de NLU.
+
+Os canais abaixo são os conectores do Rasa com duas diferenças, aplicadas
+antes de a mensagem chegar ao Rasa:
+
+* o filtro de entrada (``addons/entrada.py``) descarta as atividades
+  repetidas (o mesmo id de atividade do Bot Framework) e as mensagens de um
+  utilizador acima do seu limite de ritmo, antes do NLU e sem eventos no
+  tracker store;
+* no canal Bot Framework, a referência da conversa pessoal de cada
+  utilizador é gravada para as mensagens proativas (``addons/conversas.py``);
+* ainda no canal Bot Framework, o indicador de escrita é publicado logo que
+  a mensagem chega e as respostas longas seguem em várias atividades, sem
+  bloquear o servidor (``addons/saida_teams.py``);
+* o atalho de NLU (``addons/atalho_nlu.py``) procura a mensagem no índice
+  de atalhos e, quando a encontra, preenche ``UserMessage.parse_data``. O
+  ``MessageProcessor`` do Rasa usa esse resultado em vez de correr o
+  pipeline de NLU; as restantes mensagens seguem o caminho normal.
+
+Configuração em ``credentials.yml`` (os quatro últimos parâmetros são
+opcionais)::
+
+    addons.canais.BotFrameworkInputAtalho:
+      app_id: ${MICROSOFT_APP_ID}
+      app_password: ${MICROSOFT_APP_PASSWORD}
+      duplicados_segundos: 600
+      rajada: 5
+      mensagens_por_minuto: 20
+      tamanho_parte: 2000
+
+Os canais mantêm o nome e o URL do conector original
+(``/webhooks/botframework/webhook``, ``/webhooks/rest/webhook``).
+"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Text
+
+from rasa.core.channels.botframework import BotFramework, BotFrameworkInput
+from rasa.core.channels.channel import InputChannel, UserMessage
+from rasa.core.channels.rest import RestInput
+from sanic import Blueprint
+from sanic.request import Request
+
+from addons.atalho_nlu import IndiceAtalhos
+from addons.conversas import (
+    REFERENCIA_CONVERSA,
+    RegistoConversas,
+    referencia_da_atividade,
+    registo_conversas_configurado,
+)
+from addons.entrada import ID_ATIVIDADE, FiltroEntrada
+from addons.saida_teams import TAMANHO_PARTE, ClienteBotConnector, TurnoTeams, dividir_em_partes
+
+logger = logging.getLogger(__name__)
+
+_indice_partilhado: Optional[IndiceAtalhos] = None
+
+
+def obter_indice_atalhos() -> IndiceAtalhos:
+    """Índice partilhado pelos canais, construído uma única vez a partir de ``data/nlu.yml``."""
+    global _indice_partilhado
+    if _indice_partilhado is None:
+        _indice_partilhado = IndiceAtalhos.de_ficheiro()
+    return _indice_partilhado
+
+
+def com_atalho(
+    on_new_message: Callable[[UserMessage], Awaitable[Any]],
+    indice: IndiceAtalhos,
+) -> Callable[[UserMessage], Awaitable[Any]]:
+    """Envolve o ``on_new_message`` do Rasa para classificar pelo atalho quando possível."""
+
+    async def ao_receber(mensagem: UserMessage) -> Any:
+        if mensagem.parse_data is None:
+            mensagem.parse_data = indice.classificar(mensagem.text)
+            if mensagem.parse_data is not None:
+                logger.debug(
+                    "Atalho de NLU: '%s' → %s", mensagem.text, mensagem.parse_data["intent"]["name"]
+                )
+        return await on_new_message(mensagem)
+
+    return ao_receber
+
+
+def com_filtro(
+    on_new_message: Callable[[UserMessage], Awaitable[Any]],
+    filtro: FiltroEntrada,
+) -> Callable[[UserMessage], Awaitable[Any]]:
+    """Envolve o ``on_new_message`` do Rasa para descartar repetições e excessos de ritmo."""
+
+    async def ao_receber(mensagem: UserMessage) -> Any:
+        # Só serve para detetar repetições: não segue para o tracker
+        id_atividade = (mensagem.metadata or {}).pop(ID_ATIVIDADE, None)
+        motivo = filtro.rejeitar(mensagem.sender_id, id_atividade)
+        if motivo is not None:
+            logger.info(
+                "Mensagem descartada (%s): remetente %s, atividade %s.", motivo, mensagem.sender_id, id_atividade
+            )
+            return None
+        return await on_new_message(mensagem)
+
+    return ao_receber
+
+
+def com_registo(
+    on_new_message: Callable[[UserMessage], Awaitable[Any]],
+    registo: Optional[RegistoConversas],
+) -> Callable[[UserMessage], Awaitable[Any]]:
+    """Envolve o ``on_new_message`` do Rasa para gravar a referência da conversa, sem a passar ao Rasa."""
+
+    async def ao_receber(mensagem: UserMessage) -> Any:
+        referencia = (mensagem.metadata or {}).pop(REFERENCIA_CONVERSA, None)
+        if referencia is not None and registo is not None:
+            registo.registar_em_segundo_plano(referencia)
+        return await on_new_message(mensagem)
+
+    return ao_receber
+
+
+class BotFrameworkEmPartes(BotFramework):
+    """Saída Bot Framework assíncrona que publica as respostas longas em várias atividades.
+
+    Substitui a saída criada pelo conector do Rasa para cada mensagem: os
+    pedidos passam pelo ``TurnoTeams`` (aiohttp, depois do indicador de
+    escrita) em vez de ``requests``.
+    """
+
+    def __init__(self, original: BotFramework, turno: TurnoTeams, tamanho_parte: int = TAMANHO_PARTE) -> None:
+        super().__init__(
+            original.app_id,
+            original.app_password,
+            original.conversation,
+            original.bot,
+            original.global_uri[: -len("v3/")],
+        )
+        self.turno = turno
+        self.tamanho_parte = tamanho_parte
+
+    async def send(self, message_data: Dict[Text, Any]) -> None:
+        await self.turno.enviar(message_data)
+
+    async def send_text_message(self, recipient_id: Text, text: Text, **kwargs: Any) -> None:
+        for parte in dividir_em_partes(text, self.tamanho_parte):
+            await self.send(self.prepare_message(recipient_id, {"text": parte}))
+
+
+def com_escrita(
+    on_new_message: Callable[[UserMessage], Awaitable[Any]],
+    cliente: ClienteBotConnector,
+    tamanho_parte: int = TAMANHO_PARTE,
+) -> Callable[[UserMessage], Awaitable[Any]]:
+    """Envolve o ``on_new_message`` do Rasa para mostrar o indicador de escrita durante o turno."""
+
+    async def ao_receber(mensagem: UserMessage) -> Any:
+        original = mensagem.output_channel
+        if not isinstance(original, BotFramework):
+            return await on_new_message(mensagem)
+        turno = TurnoTeams(
+            cliente, original.global_uri, original.conversation["id"], original.bot, mensagem.sender_id
+        )
+        mensagem.output_channel = BotFrameworkEmPartes(original, turno, tamanho_parte)
+        turno.iniciar()
+        try:
+            return await on_new_message(mensagem)
+        finally:
+            await turno.terminar()
+
+    return ao_receber
+
+
+class BotFrameworkInputAtalho(BotFrameworkInput):
+    """Conector Bot Framework (Microsoft Teams) com filtro de entrada e atalho de NLU."""
+
+    def __init__(
+        self,
+        app_id: Text,
+        app_password: Text,
+        filtro: Optional[FiltroEntrada] = None,
+        registo: Optional[RegistoConversas] = None,
+        tamanho_parte: int = TAMANHO_PARTE,
+    ) -> None:
+        super().__init__(app_id, app_password)
+        self.filtro = filtro if filtro is not None else FiltroEntrada()
+        self.registo = registo
+        self.tamanho_parte = tamanho_parte
+        self.cliente = ClienteBotConnector(app_id, app_password)
+
+    @classmethod
+    def from_credentials(cls, credentials: Optional[Dict[Text, Any]]) -> InputChannel:
+        if not credentials:
+            cls.raise_missing_credentials_exception()
+        return cls(
+            credentials.get("app_id"),
+            credentials.get("app_password"),
+            FiltroEntrada.de_configuracao(credentials),
+            registo_conversas_configurado(),
+            int(credentials.get("tamanho_parte", TAMANHO_PARTE)),
+        )
+
+    def get_metadata(self, request: Request) -> Optional[Dict[Text, Any]]:
+        atividade = request.json or {}
+        metadados = {}
+        # O id da atividade repete-se quando o Bot Framework volta a enviar a mesma mensagem
+        if atividade.get("id"):
+            metadados[ID_ATIVIDADE] = atividade["id"]
+        referencia = referencia_da_atividade(atividade)
+        if referencia is not None:
+            metadados[REFERENCIA_CONVERSA] = referencia
+        return metadados or None
+
+    def blueprint(self, on_new_message: Callable[[UserMessage], Awaitable[Any]]) -> Blueprint:
+        ao_receber = com_registo(com_atalho(on_new_message, obter_indice_atalhos()), self.registo)
+        ao_receber = com_escrita(ao_receber, self.cliente, self.tamanho_parte)
+        return super().blueprint(com_filtro(ao_receber, self.filtro))
+
+
+class RestInputAtalho(RestInput):
+    """Conector REST (testes locais) com limite de ritmo e atalho de NLU."""
+
+    def __init__(self, filtro: Optional[FiltroEntrada] = None) -> None:
+        super().__init__()
+        self.filtro = filtro if filtro is not None else FiltroEntrada()
+
+    @classmethod
+    def from_credentials(cls, credentials: Optional[Dict[Text, Any]]) -> InputChannel:
+        return cls(FiltroEntrada.de_configuracao(credentials))
+
+    def blueprint(self, on_new_message: Callable[[UserMessage], Awaitable[Any]]) -> Blueprint:
+        return super().blueprint(com_filtro(com_atalho(on_new_message, obter_indice_atalhos()), self.filtro))
@@ -0,0 +1,252 @@
+"""
+Compactação das conversas guardadas no tracker store.
+
+Cada conversa de onboarding acumula eventos na tabela ``events`` do tracker
+store SQL, uma linha por evento. As políticas só precisam do estado dos slots
+e das últimas jogadas: o ``TEDPolicy`` e a ``MemoizationPolicy`` usam
+``max_history: 5`` (ver ``config.yml``). A compactação substitui os eventos
+anteriores aos últimos ``turnos`` turnos do utilizador por um instantâneo
+equivalente. O instantâneo tem a forma do início de uma sessão com os slots
+transportados:
+
+    session_started, slot…, [active_loop], [pause], action_listen
+
+Os timestamps do instantâneo ficam imediatamente antes do primeiro evento
+mantido, porque o Rasa ordena os eventos por timestamp. Só é compactada a
+sessão atual (a partir do último ``session_started``, a que o Rasa carrega
+em cada turno); as sessões anteriores ficam intactas. O histórico completo
+para análise vem do event broker, não do tracker store.
+
+O tracker store ``addons.tracker_store.SQLTrackerStoreCompacto`` aplica
+esta compactação ao carregar uma conversa (ver ``endpoints.yml``). Para
+compactar as conversas já guardadas, use a linha de comandos::
+
+    python -m addons.compactacao [--turnos 10] [--limite 100] [--simular]
+
+Só são compactadas conversas sem eventos há mais de ``--inativas-ha``
+minutos. Uma conversa ativa pode ter o tracker em memória no Rasa: o Rasa
+grava apenas os eventos para além dos que já estão na base de dados, pelo
+que apagar linhas debaixo dele duplicaria eventos.
+"""
+
+import argparse
+import json
+import logging
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Text, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Turnos do utilizador mantidos na íntegra: o dobro do ``max_history: 5`` das
+# políticas, porque cada turno tem vários eventos (user, actions, slots)
+TURNOS_MANTIDOS = 10
+
+# Uma conversa só é compactada quando tem mais eventos do que este limite
+LIMITE_EVENTOS = 100
+
+# Intervalo (segundos) entre os timestamps dos eventos do instantâneo
+PASSO_TIMESTAMP = 1e-3
+
+Evento = Dict[Text, Any]
+
+
+class PlanoCompactacao(NamedTuple):
+    """Compactação de uma sessão: ``eventos[:corte]`` → ``instantaneo``.
+
+    Na base de dados, os eventos a substituir são os da conversa com
+    timestamp entre ``timestamp_inicio`` (o início da sessão) e
+    ``timestamp_corte``, exclusive.
+    """
+
+    corte: int
+    instantaneo: List[Evento]
+    timestamp_corte: float
+    timestamp_inicio: float
+
+    def aplicar(self, eventos: Sequence[Evento]) -> List[Evento]:
+        return self.instantaneo + list(eventos[self.corte :])
+
+
+def _desfazer_ate(aplicados: List[Evento], tipo: Text) -> None:
+    while aplicados:
+        if aplicados.pop().get("event") == tipo:
+            return
+
+
+def eventos_aplicados(eventos: Sequence[Evento]) -> List[Evento]:
+    """Eventos em vigor, como em ``DialogueStateTracker.applied_events`` do Rasa."""
+    aplicados: List[Evento] = []
+    for evento in eventos:
+        tipo = evento.get("event")
+        if tipo in ("restart", "session_started"):
+            aplicados = []
+        elif tipo == "undo":
+            _desfazer_ate(aplicados, "action")
+        elif tipo == "rewind":
+            _desfazer_ate(aplicados, "user")
+            _desfazer_ate(aplicados, "action")
+        else:
+            aplicados.append(evento)
+    return aplicados
+
+
+def inicio_sessao(eventos: Sequence[Evento]) -> int:
+    """Posição do último ``session_started`` (0 se a conversa não tiver sessões)."""
+    for posicao in range(len(eventos) - 1, -1, -1):
+        if eventos[posicao].get("event") == "session_started":
+            return posicao
+    return 0
+
+
+def instantaneo(eventos: Sequence[Evento], timestamp_corte: float) -> List[Evento]:
+    """Eventos que reproduzem o estado (slots, loop ativo, pausa) no fim de ``eventos``."""
+    slots: Dict[Text, Any] = {}
+    loop_ativo: Optional[Text] = None
+    pausada = False
+    for evento in eventos_aplicados(eventos):
+        tipo = evento.get("event")
+        if tipo == "slot":
+            slots[evento["name"]] = evento.get("value")
+        elif tipo == "reset_slots":
+            slots.clear()
+        elif tipo == "active_loop":
+            loop_ativo = evento.get("name")
+        elif tipo in ("pause", "resume"):
+            pausada = tipo == "pause"
+
+    resultado: List[Evento] = [{"event": "session_started"}]
+    resultado += [{"event": "slot", "name": nome, "value": valor} for nome, valor in slots.items()]
+    if loop_ativo:
+        resultado.append({"event": "active_loop", "name": loop_ativo})
+    if pausada:
+        resultado.append({"event": "pause"})
+    resultado.append({"event": "action", "name": "action_listen"})
+
+    inicio = timestamp_corte - len(resultado) * PASSO_TIMESTAMP
+    for posicao, evento in enumerate(resultado):
+        evento["timestamp"] = inicio + posicao * PASSO_TIMESTAMP
+    return resultado
+
+
+def planear_compactacao(
+    eventos: Sequence[Evento],
+    turnos: int = TURNOS_MANTIDOS,
+    limite: int = LIMITE_EVENTOS,
+) -> Optional[PlanoCompactacao]:
+    """Plano de compactação de uma sessão, ou ``None`` se não houver nada a ganhar.
+
+    ``eventos`` são os da sessão atual, como o Rasa os carrega (ver
+    ``inicio_sessao``).
+    """
+    if len(eventos) <= limite:
+        return None
+
+    # Início do ``turnos``-ésimo turno do utilizador a contar do fim
+    corte, vistos = None, 0
+    for posicao in range(len(eventos) - 1, -1, -1):
+        if eventos[posicao].get("event") == "user":
+            vistos += 1
+            if vistos == turnos:
+                corte = posicao
+                break
+    if not corte:
+        return None
+
+    # O prefixo é apagado por timestamp: nenhum evento apagado pode empatar
+    # com o primeiro evento mantido
+    timestamp_corte = eventos[corte]["timestamp"]
+    while corte > 0 and eventos[corte - 1]["timestamp"] >= timestamp_corte:
+        corte -= 1
+    if corte == 0:
+        return None
+
+    novo = instantaneo(eventos[:corte], timestamp_corte)
+    if len(novo) >= corte:
+        return None
+    return PlanoCompactacao(corte, novo, timestamp_corte, eventos[0]["timestamp"])
+
+
+def linha_evento(evento: Evento) -> Tuple[Text, float, Optional[Text], Optional[Text], Text]:
+    """Colunas (type_name, timestamp, intent_name, action_name, data) da tabela ``events``."""
+    # Eventos ``user`` sem NLU têm ``"intent": None``
+    intent = ((evento.get("parse_data") or {}).get("intent") or {}).get("name")
+    return evento["event"], evento["timestamp"], intent, evento.get("name"), json.dumps(evento)
+
+
+# ---------------------------------------------------------------------------
+# Linha de comandos: compactação das conversas guardadas (PostgreSQL)
+# ---------------------------------------------------------------------------
+
+_CONSULTA_CONVERSAS = """
+    SELECT sender_id
+    FROM events
+    GROUP BY sender_id
+    HAVING count(*) > %s AND max(timestamp) < %s
+"""
+
+_CONSULTA_EVENTOS = """
+    SELECT id, data
+    FROM events
+    WHERE sender_id = %s
+    ORDER BY timestamp, id
+"""
+
+_INSERIR_EVENTO = """
+    INSERT INTO events (sender_id, type_name, timestamp, intent_name, action_name, data)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+def compactar_conversa(ligacao: Any, sender_id: Text, turnos: int, limite: int, simular: bool = False) -> int:
+    """Compacta a sessão atual de uma conversa na tabela ``events``; devolve as linhas removidas."""
+    removidas = 0
+    with ligacao.cursor() as cursor:
+        cursor.execute(_CONSULTA_EVENTOS, (sender_id,))
+        linhas = cursor.fetchall()
+        eventos = [json.loads(data) for _, data in linhas]
+        inicio = inicio_sessao(eventos)
+        plano = planear_compactacao(eventos[inicio:], turnos, limite)
+        if plano is not None:
+            removidas = plano.corte - len(plano.instantaneo)
+        if plano is not None and not simular:
+            apagar = [id_evento for id_evento, _ in linhas[inicio : inicio + plano.corte]]
+            cursor.execute("DELETE FROM events WHERE id = ANY(%s)", (apagar,))
+            cursor.executemany(
+                _INSERIR_EVENTO, [(sender_id,) + linha_evento(evento) for evento in plano.instantaneo]
+            )
+    ligacao.commit()
+    return removidas
+
+
+def main(argumentos: Optional[Sequence[Text]] = None) -> None:
+    from actions.db import ligar
+
+    parser = argparse.ArgumentParser(description="Compacta as conversas do tracker store (tabela events).")
+    parser.add_argument("--turnos", type=int, default=TURNOS_MANTIDOS, help="turnos do utilizador mantidos")
+    parser.add_argument("--limite", type=int, default=LIMITE_EVENTOS, help="eventos a partir dos quais compactar")
+    parser.add_argument("--inativas-ha", type=float, default=60.0, help="minutos sem eventos (conversas inativas)")
+    parser.add_argument("--simular", action="store_true", help="mostra o que seria removido, sem alterar nada")
+    args = parser.parse_args(argumentos)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    ligacao = ligar()
+    try:
+        with ligacao.cursor() as cursor:
+            cursor.execute(_CONSULTA_CONVERSAS, (args.limite, time.time() - args.inativas_ha * 60))
+            conversas = [sender_id for (sender_id,) in cursor.fetchall()]
+        ligacao.commit()
+
+        total = 0
+        for sender_id in conversas:
+            removidas = compactar_conversa(ligacao, sender_id, args.turnos, args.limite, args.simular)
+            total += removidas
+            logger.info("%s: %d eventos removidos", sender_id, removidas)
+        logger.info(
+            "%d conversas, %d eventos %s.", len(conversas), total, "a remover" if args.simular else "removidos"
+        )
+    finally:
+        ligacao.close()
+
+
+if __name__ == "__main__":
+    main()
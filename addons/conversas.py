@@ -0,0 +1,128 @@
+"""
+Referências das conversas do Teams, para as mensagens proativas.
+
+O Bot Framework só entrega uma mensagem que não é resposta (um lembrete, por
+exemplo) se o bot conhecer a conversa pessoal do utilizador: o ``serviceUrl``
+da região e o id da conversa, que chegam em cada atividade recebida. O canal
+Bot Framework (``addons/canais.py``) passa essa referência a um
+``RegistoConversas``, que a grava na tabela ``conversas_teams`` (ver
+``db/init/07_lembretes.sql``), lida pelo serviço de lembretes
+(``actions/lembretes.py``).
+
+Cada processo lembra-se das últimas referências gravadas, pelo que só a
+primeira mensagem de cada conversa (ou uma mudança de ``serviceUrl``) chega à
+base de dados; a gravação corre numa thread do executor, sem atrasar a
+resposta ao utilizador. Só são gravadas as conversas pessoais (1:1), nunca as
+de grupo ou de canal.
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Set, Text, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Chave da referência nos metadados da mensagem (retirada antes de chegar ao Rasa)
+REFERENCIA_CONVERSA = "referencia_conversa"
+
+MAX_CONVERSAS_CONHECIDAS = 100_000
+
+_GRAVAR_REFERENCIA = """
+    INSERT INTO conversas_teams (id_teams, service_url, id_conversa, id_bot, id_tenant)
+    VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (id_teams) DO UPDATE
+    SET service_url = EXCLUDED.service_url,
+        id_conversa = EXCLUDED.id_conversa,
+        id_bot = EXCLUDED.id_bot,
+        id_tenant = EXCLUDED.id_tenant,
+        atualizado_em = now()
+"""
+
+
+class ReferenciaConversa(NamedTuple):
+    """O necessário para enviar uma mensagem proativa à conversa pessoal de um utilizador."""
+
+    id_teams: Text
+    service_url: Text
+    id_conversa: Text
+    id_bot: Text
+    id_tenant: Optional[Text] = None
+
+
+def referencia_da_atividade(atividade: Dict[Text, Any]) -> Optional[ReferenciaConversa]:
+    """Referência da conversa de uma atividade do Bot Framework, ou ``None`` se não for pessoal."""
+    conversa = atividade.get("conversation") or {}
+    remetente = atividade.get("from") or {}
+    bot = atividade.get("recipient") or {}
+    if conversa.get("conversationType", "personal") != "personal" or conversa.get("isGroup"):
+        return None
+    if not (atividade.get("serviceUrl") and conversa.get("id") and remetente.get("id") and bot.get("id")):
+        return None
+    tenant = ((atividade.get("channelData") or {}).get("tenant") or {}).get("id") or conversa.get("tenantId")
+    return ReferenciaConversa(remetente["id"], atividade["serviceUrl"], conversa["id"], bot["id"], tenant)
+
+
+def gravar_referencia_postgres(referencia: ReferenciaConversa) -> None:
+    """Insere ou atualiza a referência na tabela ``conversas_teams``."""
+    from actions.db import ligar
+
+    ligacao = ligar()
+    try:
+        with ligacao, ligacao.cursor() as cursor:
+            cursor.execute(_GRAVAR_REFERENCIA, tuple(referencia))
+    finally:
+        ligacao.close()
+
+
+class RegistoConversas:
+    """Grava cada referência nova ou alterada, uma vez por processo."""
+
+    def __init__(
+        self,
+        gravar: Callable[[ReferenciaConversa], None] = gravar_referencia_postgres,
+        capacidade: int = MAX_CONVERSAS_CONHECIDAS,
+    ) -> None:
+        self._gravar = gravar
+        self._capacidade = capacidade
+        # id_teams → (id_conversa, service_url) já gravados, do menos para o mais recente
+        self._conhecidas: "OrderedDict[Text, Tuple[Text, Text]]" = OrderedDict()
+        self._tarefas: Set["asyncio.Task"] = set()
+        self.gravadas = 0
+
+    def registar_em_segundo_plano(self, referencia: ReferenciaConversa) -> None:
+        """Agenda ``registar`` no event loop atual, sem esperar pela gravação."""
+        if self._conhecidas.get(referencia.id_teams) == (referencia.id_conversa, referencia.service_url):
+            return
+        tarefa = asyncio.ensure_future(self.registar(referencia))
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+
+    async def registar(self, referencia: ReferenciaConversa) -> None:
+        chave = (referencia.id_conversa, referencia.service_url)
+        if self._conhecidas.get(referencia.id_teams) == chave:
+            self._conhecidas.move_to_end(referencia.id_teams)
+            return
+
+        # Marcada antes de gravar: as mensagens seguintes não repetem a escrita
+        self._conhecidas[referencia.id_teams] = chave
+        self._conhecidas.move_to_end(referencia.id_teams)
+        while len(self._conhecidas) > self._capacidade:
+            self._conhecidas.popitem(last=False)
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._gravar, referencia)
+        except Exception:
+            # Sem a marca, a próxima mensagem volta a tentar
+            self._conhecidas.pop(referencia.id_teams, None)
+            logger.warning("Não foi possível gravar a conversa de %s.", referencia.id_teams, exc_info=True)
+        else:
+            self.gravadas += 1
+
+    def __len__(self) -> int:
+        return len(self._conhecidas)
+
+
+def registo_conversas_configurado() -> Optional[RegistoConversas]:
+    """Registo gravado no PostgreSQL, ou ``None`` se ``DB_HOST`` não estiver definido."""
+    return RegistoConversas() if os.getenv("DB_HOST") else None
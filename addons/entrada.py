@@ -0,0 +1,169 @@
+"""
+Filtro de entrada dos canais: mensagens repetidas e limite de ritmo por utilizador.
+
+O Bot Framework volta a enviar uma atividade quando o webhook demora a
+responder; sem filtro, o Rasa processa a mesma mensagem duas vezes (NLU,
+políticas e eventos no tracker store). Os canais de ``addons/canais.py``
+passam cada mensagem por um ``FiltroEntrada`` antes do atalho de NLU e do
+pipeline:
+
+* ``ConjuntoRecente``: ids de atividade vistos nos últimos ``ttl``
+  segundos, por ordem de chegada. Como o prazo é igual para todos, os ids
+  expirados estão sempre no início e são descartados sem percorrer o resto.
+* ``LimitadorPorUtilizador``: um balde de fichas por utilizador
+  (``rajada`` mensagens seguidas, repostas a ``por_minuto`` por minuto). Os
+  baldes parados há mais tempo são descartados quando há mais de
+  ``max_utilizadores``.
+
+As mensagens rejeitadas recebem a mesma resposta HTTP que as outras (o Bot
+Framework não volta a tentar), mas não chegam ao Rasa. O estado é por
+processo: com várias réplicas do Rasa Server, uma repetição entregue a outra
+réplica não é apanhada.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Text
+
+logger = logging.getLogger(__name__)
+
+# Chave do id da atividade nos metadados da mensagem (retirada pelo filtro)
+ID_ATIVIDADE = "id_atividade"
+
+# Valores por omissão (configuráveis em credentials.yml)
+TTL_DUPLICADOS_SEGUNDOS = 600.0
+MAX_IDS_RECENTES = 100_000
+RAJADA = 5
+MENSAGENS_POR_MINUTO = 20.0
+MAX_UTILIZADORES = 50_000
+
+# Motivos de rejeição
+DUPLICADA = "duplicada"
+LIMITE = "limite"
+
+
+class ConjuntoRecente:
+    """Conjunto de chaves que expiram ``ttl`` segundos depois de inseridas."""
+
+    def __init__(
+        self,
+        ttl: float = TTL_DUPLICADOS_SEGUNDOS,
+        capacidade: int = MAX_IDS_RECENTES,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.capacidade = capacidade
+        self._relogio = relogio
+        self._expira: "OrderedDict[Text, float]" = OrderedDict()
+
+    def _expirar(self, agora: float) -> None:
+        while self._expira:
+            chave, expira = next(iter(self._expira.items()))
+            if expira > agora:
+                return
+            del self._expira[chave]
+
+    def adicionar(self, chave: Text) -> bool:
+        """Regista a chave; devolve ``False`` se já tinha sido vista dentro do prazo."""
+        agora = self._relogio()
+        self._expirar(agora)
+        if chave in self._expira:
+            return False
+        self._expira[chave] = agora + self.ttl
+        if len(self._expira) > self.capacidade:
+            self._expira.popitem(last=False)
+        return True
+
+    def __contains__(self, chave: Text) -> bool:
+        expira = self._expira.get(chave)
+        return expira is not None and expira > self._relogio()
+
+    def __len__(self) -> int:
+        return len(self._expira)
+
+
+class _Balde:
+    __slots__ = ("fichas", "atualizado_em")
+
+    def __init__(self, fichas: float, agora: float) -> None:
+        self.fichas = fichas
+        self.atualizado_em = agora
+
+
+class LimitadorPorUtilizador:
+    """Balde de fichas por utilizador: ``rajada`` mensagens seguidas, depois ``por_minuto``."""
+
+    def __init__(
+        self,
+        rajada: int = RAJADA,
+        por_minuto: float = MENSAGENS_POR_MINUTO,
+        max_utilizadores: int = MAX_UTILIZADORES,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rajada = rajada
+        self.por_segundo = por_minuto / 60.0
+        self.max_utilizadores = max_utilizadores
+        self._relogio = relogio
+        self._baldes: "OrderedDict[Text, _Balde]" = OrderedDict()
+
+    def permitir(self, utilizador: Text) -> bool:
+        """Gasta uma ficha do utilizador; devolve ``False`` se o balde estiver vazio."""
+        agora = self._relogio()
+        balde = self._baldes.get(utilizador)
+        if balde is None:
+            balde = self._baldes[utilizador] = _Balde(float(self.rajada), agora)
+            if len(self._baldes) > self.max_utilizadores:
+                # O balde parado há mais tempo; um balde esquecido volta cheio
+                self._baldes.popitem(last=False)
+        else:
+            balde.fichas = min(self.rajada, balde.fichas + (agora - balde.atualizado_em) * self.por_segundo)
+            balde.atualizado_em = agora
+            self._baldes.move_to_end(utilizador)
+
+        if balde.fichas < 1.0:
+            return False
+        balde.fichas -= 1.0
+        return True
+
+    def __len__(self) -> int:
+        return len(self._baldes)
+
+
+class FiltroEntrada:
+    """Decide se uma mensagem recebida segue para o Rasa."""
+
+    def __init__(
+        self,
+        recentes: Optional[ConjuntoRecente] = None,
+        limitador: Optional[LimitadorPorUtilizador] = None,
+    ) -> None:
+        self.recentes = recentes if recentes is not None else ConjuntoRecente()
+        self.limitador = limitador if limitador is not None else LimitadorPorUtilizador()
+        self.rejeitadas: Dict[Text, int] = {DUPLICADA: 0, LIMITE: 0}
+
+    @classmethod
+    def de_configuracao(cls, configuracao: Optional[Dict[Text, Any]]) -> "FiltroEntrada":
+        """Filtro com os parâmetros do canal em ``credentials.yml`` (ou os valores por omissão)."""
+        configuracao = configuracao or {}
+        return cls(
+            ConjuntoRecente(ttl=float(configuracao.get("duplicados_segundos", TTL_DUPLICADOS_SEGUNDOS))),
+            LimitadorPorUtilizador(
+                rajada=int(configuracao.get("rajada", RAJADA)),
+                por_minuto=float(configuracao.get("mensagens_por_minuto", MENSAGENS_POR_MINUTO)),
+            ),
+        )
+
+    def rejeitar(self, remetente: Optional[Text], id_atividade: Optional[Text]) -> Optional[Text]:
+        """Motivo para rejeitar a mensagem (``DUPLICADA`` ou ``LIMITE``), ou ``None`` se segue.
+
+        Uma repetição não gasta fichas do utilizador.
+        """
+        if id_atividade and not self.recentes.adicionar(f"{remetente}:{id_atividade}"):
+            motivo = DUPLICADA
+        elif remetente and not self.limitador.permitir(remetente):
+            motivo = LIMITE
+        else:
+            return None
+        self.rejeitadas[motivo] += 1
+        return motivo
@@ -0,0 +1,449 @@
+"""
+Testes de conversa ponta a ponta a partir das histórias e regras do treino.
+
+Cada história de ``data/stories.yml`` e cada regra de ``data/rules.yml`` é
+reproduzida como uma conversa com o modelo treinado, pelo mesmo caminho de
+uma mensagem real (``Agent.handle_message``: NLU, políticas, actions e
+tracker store em memória). Os passos ``intent:`` enviam o primeiro exemplo
+da intent em ``data/nlu.yml`` (ou ``/intent`` com ``--sem-nlu``). Em cada
+turno comparam-se a intent prevista, as actions executadas até ao
+``action_listen`` e os ``slot_was_set`` da história. A história falha no
+primeiro turno diferente.
+
+As custom actions correm no próprio processo: o endpoint do action server é
+substituído por ``ActionsEmProcesso``, que entrega o pedido ao
+``ActionExecutor`` do ``rasa_sdk`` sem HTTP. Um erro numa action, que o Rasa
+apenas regista, faz falhar a história.
+
+O modelo e as actions são carregados uma única vez, no processo principal.
+As histórias são depois distribuídas, das mais longas para as mais curtas,
+por processos criados com ``fork``. Como no ``actions/servidor.py``, o
+estado carregado é congelado com ``gc.freeze()`` e fica partilhado em
+copy-on-write: os pesos do modelo, os vetores do spaCy e os dados das
+actions. O TensorFlow fica com um thread por processo, porque o paralelismo
+é o dos processos. Com ``--fragmento I/N``, cada máquina do CI corre uma
+parte das histórias, escolhida pelo nome. Acrescentar uma história não muda
+o fragmento das outras.
+
+O relatório lista as falhas, as histórias mais lentas e o tempo total. Com
+``--tempo-maximo``, a execução falha quando o tempo total o ultrapassa.
+
+Uso:
+    python -m addons.historias [--modelo models/] [--processos 4] [--fragmento 1/3]
+    python -m addons.historias --sem-nlu --relatorio historias.json --tempo-maximo 60
+"""
+
+import argparse
+import asyncio
+import gc
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Text, Tuple, Union
+
+import yaml
+
+from addons.atalho_nlu import CAMINHO_NLU_PADRAO, exemplos_nlu, remover_anotacoes
+
+logger = logging.getLogger(__name__)
+
+CAMINHOS_HISTORIAS = (Path("data/stories.yml"), Path("data/rules.yml"))
+ACTION_LISTEN = "action_listen"
+MAIS_LENTAS = 10
+
+
+class Turno(NamedTuple):
+    """Uma mensagem do utilizador e o que a história espera a seguir."""
+
+    texto: Text
+    intent: Optional[Text]
+    actions: Tuple[Text, ...]
+    # ``slot_was_set`` da história (``None``: basta o slot estar preenchido)
+    slots: Tuple[Tuple[Text, Any], ...] = ()
+    # ``False`` no último turno de uma regra com ``wait_for_user_input: false``
+    espera_utilizador: bool = True
+
+
+class Historia(NamedTuple):
+    nome: Text
+    origem: Text
+    turnos: Tuple[Turno, ...]
+    # Motivo para não reproduzir a história (passos que o executor não suporta)
+    ignorada: Optional[Text] = None
+
+
+class RespostaTurno(NamedTuple):
+    """O que o bot fez com uma mensagem: intent, actions executadas, slots e erros das actions."""
+
+    intent: Optional[Text]
+    actions: Tuple[Text, ...]
+    slots: Dict[Text, Any]
+    erros: Tuple[Text, ...] = ()
+
+
+class Resultado(NamedTuple):
+    nome: Text
+    origem: Text
+    sucesso: bool
+    segundos: float
+    falha: Optional[Text] = None
+    ignorada: Optional[Text] = None
+
+
+# ---------------------------------------------------------------------------
+# Histórias
+# ---------------------------------------------------------------------------
+
+
+def exemplo_por_intent(caminho: Union[Text, Path] = CAMINHO_NLU_PADRAO) -> Dict[Text, Text]:
+    """Primeiro exemplo de cada intent, de preferência sem entidades (senão, sem as anotações)."""
+    with open(caminho, encoding="utf-8") as ficheiro:
+        dados = yaml.safe_load(ficheiro) or {}
+    exemplos: Dict[Text, Text] = {}
+    anotados: Dict[Text, Text] = {}
+    for intent, exemplo in exemplos_nlu(dados):
+        frase = remover_anotacoes(exemplo)
+        if frase != exemplo:
+            anotados.setdefault(intent, frase)
+        elif exemplo:
+            exemplos.setdefault(intent, exemplo)
+    return {**anotados, **exemplos}
+
+
+def _texto_da_intent(
+    intent: Text, entidades: Any, exemplos: Dict[Text, Text], sem_nlu: bool
+) -> Text:
+    if entidades or sem_nlu or intent not in exemplos:
+        # Mensagem em forma de intent, que o Rasa classifica sem o NLU
+        valores: Dict[Text, Any] = {}
+        for entidade in entidades or ():
+            if isinstance(entidade, dict):
+                valores.update(entidade)
+            else:
+                valores[entidade] = entidade
+        return f"/{intent}{json.dumps(valores, ensure_ascii=False)}" if valores else f"/{intent}"
+    return exemplos[intent]
+
+
+def _slots(valores: Any) -> List[Tuple[Text, Any]]:
+    slots = []
+    for valor in valores or ():
+        if isinstance(valor, dict):
+            slots.extend(valor.items())
+        else:
+            slots.append((valor, None))
+    return slots
+
+
+def _historia(
+    bloco: Dict[Text, Any], tipo: Text, origem: Text, exemplos: Dict[Text, Text], sem_nlu: bool
+) -> Historia:
+    nome = str(bloco.get(tipo))
+    if bloco.get("condition"):
+        return Historia(nome, origem, (), "regra com condições")
+
+    turnos: List[Turno] = []
+    for passo in bloco.get("steps") or ():
+        if "intent" in passo or "user" in passo:
+            intent = passo.get("intent")
+            texto = passo.get("user") or _texto_da_intent(intent, passo.get("entities"), exemplos, sem_nlu)
+            turnos.append(Turno(texto, intent, ()))
+        elif "action" in passo:
+            if not turnos:
+                return Historia(nome, origem, (), "começa com uma action")
+            turnos[-1] = turnos[-1]._replace(actions=turnos[-1].actions + (passo["action"],))
+        elif "slot_was_set" in passo:
+            if turnos:
+                slots = turnos[-1].slots + tuple(_slots(passo["slot_was_set"]))
+                turnos[-1] = turnos[-1]._replace(slots=slots)
+        else:
+            chave = next(iter(passo), "?")
+            return Historia(nome, origem, (), f"passo '{chave}' não suportado")
+
+    if not turnos:
+        return Historia(nome, origem, (), "sem mensagens do utilizador")
+    if bloco.get("wait_for_user_input") is False:
+        turnos[-1] = turnos[-1]._replace(espera_utilizador=False)
+    return Historia(nome, origem, tuple(turnos))
+
+
+def carregar_historias(
+    caminhos: Sequence[Union[Text, Path]] = CAMINHOS_HISTORIAS,
+    nlu: Union[Text, Path] = CAMINHO_NLU_PADRAO,
+    sem_nlu: bool = False,
+) -> List[Historia]:
+    """Histórias e regras dos ficheiros, pela ordem em que aparecem."""
+    exemplos = {} if sem_nlu else exemplo_por_intent(nlu)
+    historias = []
+    for caminho in caminhos:
+        with open(caminho, encoding="utf-8") as ficheiro:
+            dados = yaml.safe_load(ficheiro) or {}
+        for secao, tipo in (("stories", "story"), ("rules", "rule")):
+            for bloco in dados.get(secao) or ():
+                historias.append(_historia(bloco, tipo, str(caminho), exemplos, sem_nlu))
+    return historias
+
+
+def fragmento(historias: Sequence[Historia], indice: int, total: int) -> List[Historia]:
+    """As histórias do fragmento ``indice`` (1..``total``), escolhidas pelo nome e pelo ficheiro."""
+    if not 1 <= indice <= total:
+        raise ValueError(f"Fragmento {indice}/{total} inválido.")
+    return [
+        historia
+        for historia in historias
+        if zlib.crc32(f"{historia.origem}:{historia.nome}".encode("utf-8")) % total == indice - 1
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Reprodução
+# ---------------------------------------------------------------------------
+
+
+def comparar_turno(numero: int, turno: Turno, resposta: RespostaTurno) -> Optional[Text]:
+    """Descrição da primeira diferença entre o turno da história e a resposta do bot, ou ``None``."""
+    prefixo = f"turno {numero} ('{turno.texto}')"
+    if resposta.erros:
+        return f"{prefixo}: erro na action {resposta.erros[0]}"
+    if turno.intent is not None and resposta.intent != turno.intent:
+        return f"{prefixo}: intent prevista '{resposta.intent}', esperada '{turno.intent}'"
+
+    esperadas = turno.actions + ((ACTION_LISTEN,) if turno.espera_utilizador else ())
+    for posicao, esperada in enumerate(esperadas):
+        prevista = resposta.actions[posicao] if posicao < len(resposta.actions) else None
+        if prevista != esperada:
+            return f"{prefixo}: action prevista '{prevista}', esperada '{esperada}'"
+
+    for slot, valor in turno.slots:
+        atual = resposta.slots.get(slot)
+        if (valor is None and atual is None) or (valor is not None and atual != valor):
+            esperado = "preenchido" if valor is None else repr(valor)
+            return f"{prefixo}: slot '{slot}' = {atual!r}, esperado {esperado}"
+    return None
+
+
+async def reproduzir(motor: Any, historia: Historia, remetente: Text) -> Optional[Text]:
+    """Envia as mensagens da história ao ``motor``; devolve a primeira falha ou ``None``."""
+    for numero, turno in enumerate(historia.turnos, start=1):
+        resposta = await motor.responder(remetente, turno.texto)
+        falha = comparar_turno(numero, turno, resposta)
+        if falha is not None:
+            return falha
+    return None
+
+
+def executar_historia(
+    motor: Any, historia: Historia, remetente: Text, relogio: Callable[[], float] = time.perf_counter
+) -> Resultado:
+    if historia.ignorada:
+        return Resultado(historia.nome, historia.origem, True, 0.0, ignorada=historia.ignorada)
+    inicio = relogio()
+    try:
+        falha = asyncio.run(reproduzir(motor, historia, remetente))
+    except Exception as erro:
+        logger.debug("Erro na história '%s'.", historia.nome, exc_info=True)
+        falha = f"erro: {erro!r}"
+    return Resultado(historia.nome, historia.origem, falha is None, relogio() - inicio, falha)
+
+
+# Motor herdado pelos processos criados com fork (partilhado em copy-on-write)
+_MOTOR: Any = None
+
+
+def _executar_no_processo(tarefa: Tuple[int, Historia]) -> Tuple[int, Resultado]:
+    indice, historia = tarefa
+    return indice, executar_historia(_MOTOR, historia, f"historia-{indice}")
+
+
+def executar(motor: Any, historias: Sequence[Historia], processos: int = 1) -> List[Resultado]:
+    """Reproduz as histórias com ``processos`` processos; os resultados vêm pela ordem de ``historias``."""
+    global _MOTOR
+    if processos <= 1 or len(historias) <= 1:
+        return [executar_historia(motor, historia, f"historia-{i}") for i, historia in enumerate(historias)]
+
+    # As mais longas primeiro: nenhum processo fica com uma história longa no fim
+    tarefas = sorted(enumerate(historias), key=lambda tarefa: -len(tarefa[1].turnos))
+    resultados: List[Optional[Resultado]] = [None] * len(historias)
+    _MOTOR = motor
+    gc.collect()
+    gc.freeze()
+    try:
+        with multiprocessing.get_context("fork").Pool(min(processos, len(historias))) as pool:
+            for indice, resultado in pool.imap_unordered(_executar_no_processo, tarefas):
+                resultados[indice] = resultado
+    finally:
+        gc.unfreeze()
+        _MOTOR = None
+    return [resultado for resultado in resultados if resultado is not None]
+
+
+# ---------------------------------------------------------------------------
+# Rasa
+# ---------------------------------------------------------------------------
+
+
+class ActionsEmProcesso:
+    """No lugar do ``EndpointConfig`` do action server: entrega os pedidos ao ``ActionExecutor``.
+
+    Os erros das actions são guardados por conversa, porque o Rasa apenas os
+    regista e continua. As respostas são devolvidas como o dicionário que o
+    action server enviaria (as versões recentes do ``rasa_sdk`` devolvem um
+    modelo pydantic).
+    """
+
+    url = "em-processo://actions"
+
+    def __init__(self, executor: Any) -> None:
+        self.executor = executor
+        self.erros: Dict[Text, List[Text]] = {}
+
+    async def request(self, method: Text = "post", subpath: Optional[Text] = None, **kwargs: Any) -> Any:
+        pedido = kwargs.get("json") or {}
+        try:
+            resposta = await self.executor.run(pedido)
+        except Exception as erro:
+            erros = self.erros.setdefault(pedido.get("sender_id"), [])
+            erros.append(f"{pedido.get('next_action')}: {erro!r}")
+            raise
+        if hasattr(resposta, "model_dump"):
+            return resposta.model_dump(by_alias=True)
+        return resposta
+
+
+class MotorRasa:
+    """Modelo treinado e custom actions no mesmo processo."""
+
+    def __init__(self, agente: Any, actions: ActionsEmProcesso) -> None:
+        self.agente = agente
+        self.actions = actions
+
+    @classmethod
+    def carregar(cls, modelo: Union[Text, Path], pacote_actions: Text = "actions") -> "MotorRasa":
+        from rasa.core.agent import Agent
+        from rasa.model import get_latest_model
+        from rasa_sdk.executor import ActionExecutor
+
+        caminho = get_latest_model(str(modelo)) if Path(modelo).is_dir() else str(modelo)
+        if not caminho:
+            raise SystemExit(f"Nenhum modelo treinado em {modelo}.")
+        executor = ActionExecutor()
+        executor.register_package(pacote_actions)
+        actions = ActionsEmProcesso(executor)
+        return cls(Agent.load(caminho, action_endpoint=actions), actions)
+
+    async def responder(self, remetente: Text, texto: Text) -> RespostaTurno:
+        from rasa.core.channels.channel import CollectingOutputChannel, UserMessage
+        from rasa.shared.core.events import ActionExecuted, UserUttered
+
+        await self.agente.handle_message(UserMessage(texto, CollectingOutputChannel(), remetente))
+        tracker = self.agente.tracker_store.retrieve(remetente)
+        if inspect.isawaitable(tracker):
+            tracker = await tracker
+
+        eventos = list(tracker.events)
+        ultima_mensagem = max(i for i, evento in enumerate(eventos) if isinstance(evento, UserUttered))
+        actions = tuple(
+            evento.action_name
+            for evento in eventos[ultima_mensagem + 1 :]
+            if isinstance(evento, ActionExecuted)
+        )
+        return RespostaTurno(
+            (tracker.latest_message.intent or {}).get("name"),
+            actions,
+            tracker.current_slot_values(),
+            tuple(self.actions.erros.pop(remetente, ())),
+        )
+
+
+# ---------------------------------------------------------------------------
+# Relatório e linha de comandos
+# ---------------------------------------------------------------------------
+
+
+def imprimir_relatorio(
+    resultados: Sequence[Resultado], segundos: float, mais_lentas: int = MAIS_LENTAS
+) -> None:
+    falhadas = [resultado for resultado in resultados if not resultado.sucesso]
+    ignoradas = [resultado for resultado in resultados if resultado.ignorada]
+    print(
+        f"{len(resultados) - len(falhadas) - len(ignoradas)} passaram, {len(falhadas)} falharam, "
+        f"{len(ignoradas)} ignoradas em {segundos:.1f} s"
+    )
+    if falhadas:
+        print("\nFalhas")
+        for resultado in falhadas:
+            print(f"  {resultado.origem} › {resultado.nome}: {resultado.falha}")
+    if ignoradas:
+        print("\nIgnoradas")
+        for resultado in ignoradas:
+            print(f"  {resultado.origem} › {resultado.nome}: {resultado.ignorada}")
+    lentas = sorted((r for r in resultados if not r.ignorada), key=lambda r: r.segundos, reverse=True)
+    if lentas and mais_lentas:
+        print("\nMais lentas")
+        for resultado in lentas[:mais_lentas]:
+            print(f"  {resultado.segundos * 1000:8.0f} ms  {resultado.nome}")
+
+
+def _fragmento(valor: Text) -> Tuple[int, int]:
+    indice, _, total = valor.partition("/")
+    try:
+        return int(indice), int(total)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Fragmento inválido: '{valor}' (esperado I/N).")
+
+
+def main(argumentos: Optional[Sequence[Text]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modelo", type=Path, default=Path("models"), help="modelo ou pasta dos modelos")
+    parser.add_argument("--historias", type=Path, nargs="+", default=list(CAMINHOS_HISTORIAS))
+    parser.add_argument("--nlu", type=Path, default=CAMINHO_NLU_PADRAO)
+    parser.add_argument("--actions", default="actions", help="pacote das custom actions")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--fragmento", type=_fragmento, default=(1, 1), help="I/N: só a parte I de N")
+    parser.add_argument("--sem-nlu", action="store_true", help="envia /intent em vez dos exemplos do NLU")
+    parser.add_argument("--relatorio", type=Path, help="grava os resultados em JSON")
+    parser.add_argument("--tempo-maximo", type=float, help="falha se a execução demorar mais segundos")
+    parser.add_argument("--mais-lentas", type=int, default=MAIS_LENTAS)
+    args = parser.parse_args(argumentos)
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    historias = fragmento(carregar_historias(args.historias, args.nlu, args.sem_nlu), *args.fragmento)
+    # Um thread do TensorFlow por processo (definido antes de o importar)
+    os.environ.setdefault("TF_NUM_INTRAOP_THREADS", "1")
+    os.environ.setdefault("TF_NUM_INTEROP_THREADS", "1")
+
+    inicio = time.perf_counter()
+    motor = MotorRasa.carregar(args.modelo, args.actions)
+    carga = time.perf_counter() - inicio
+    print(
+        f"{len(historias)} histórias (fragmento {args.fragmento[0]}/{args.fragmento[1]}), "
+        f"{args.processos} processos; modelo carregado em {carga:.1f} s"
+    )
+
+    inicio = time.perf_counter()
+    resultados = executar(motor, historias, args.processos)
+    segundos = time.perf_counter() - inicio
+    imprimir_relatorio(resultados, segundos, args.mais_lentas)
+
+    if args.relatorio:
+        relatorio = {
+            "segundos": segundos,
+            "carga_segundos": carga,
+            "resultados": [resultado._asdict() for resultado in resultados],
+        }
+        args.relatorio.write_text(json.dumps(relatorio, ensure_ascii=False, indent=2), encoding="utf-8")
+    falhou = any(not resultado.sucesso for resultado in resultados)
+    if args.tempo_maximo is not None and segundos > args.tempo_maximo:
+        print(f"\nTempo máximo ultrapassado: {segundos:.1f} s > {args.tempo_maximo:.1f} s")
+        falhou = True
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+``SpacyNLP`` do Rasa com a cache de featurização de ``addons/cache_featurizacao.py``
+e o carregamento rápido de ``addons/arranque.py``.
+
+Em ``config.yml``::
+
+    - name: addons.nlp_com_cache.SpacyNLP
+      model: "pt_core_news_md"
+      case_sensitive: false
+      excluir: ["parser", "ner"]
+      vetores_mmap: true
+
+A classe chama-se ``SpacyNLP`` de propósito: o ``SpacyTokenizer`` e o
+``SpacyFeaturizer`` procuram o fornecedor do modelo spaCy pelo nome da classe
+(``model_from="SpacyNLP"``), e ao ser registada substitui o ``SpacyNLP``
+original no registo de componentes.
+
+A cache só é usada quando há uma pasta configurada (``diretorio_cache`` ou a
+variável ``CACHE_FEATURIZACAO``, definida pelo ``addons/treino.py``). Sem
+ela, por exemplo no Rasa Server em produção, o componente é o ``SpacyNLP``
+original.
+
+``excluir`` lista componentes do modelo spaCy que não chegam a ser
+carregados, e ``vetores_mmap`` mapeia os vetores estáticos em memória em vez
+de os copiar (ver ``carregar_spacy``). Como o componente é o mesmo no treino
+e no servidor, os ``Doc`` analisados são iguais nos dois.
+"""
+
+import os
+from typing import Any, Dict, Text
+
+from rasa.engine.graph import ExecutionContext
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.nlu.utils.spacy_utils import SpacyModel
+from rasa.nlu.utils.spacy_utils import SpacyNLP as _SpacyNLP
+
+from addons.arranque import carregar_spacy
+from addons.cache_featurizacao import VARIAVEL_DIRETORIO_CACHE, ArmazemConteudo, LinguagemComCache
+
+
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.MODEL_LOADER],
+    is_trainable=False,
+    model_from="SpacyNLP",
+)
+class SpacyNLP(_SpacyNLP):
+    """``SpacyNLP`` com carregamento parcial do modelo e cache dos exemplos de treino."""
+
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {**_SpacyNLP.get_default_config(), "diretorio_cache": None, "excluir": [], "vetores_mmap": False}
+
+    @classmethod
+    def create(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+    ) -> "SpacyNLP":
+        config = {**cls.get_default_config(), **config}
+        nome = config.get("model")
+        if not nome or not (config["excluir"] or config["vetores_mmap"]):
+            return super().create(config, model_storage, resource, execution_context)
+        nlp = carregar_spacy(nome, config["excluir"], config["vetores_mmap"])
+        return cls(SpacyModel(model=nlp, model_name=nome), config)
+
+    def provide(self) -> SpacyModel:
+        modelo = super().provide()
+        diretorio = self._config.get("diretorio_cache") or os.getenv(VARIAVEL_DIRETORIO_CACHE)
+        if not diretorio:
+            return modelo
+        return SpacyModel(
+            model=LinguagemComCache(modelo.model, ArmazemConteudo(diretorio)),
+            model_name=modelo.model_name,
+        )
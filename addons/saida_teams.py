@@ -0,0 +1,221 @@
+"""
+Respostas no Microsoft Teams: indicador de escrita e mensagens em partes.
+
+O conector Bot Framework do Rasa só escreve na conversa quando a primeira
+resposta está pronta (NLU, políticas e o webhook do action server), e
+publica cada atividade com ``requests``, bloqueando o event loop do servidor
+durante cada pedido. Num turno lento, o utilizador não vê nada durante
+segundos. O canal de ``addons/canais.py`` usa em vez disso um ``TurnoTeams``
+por mensagem recebida:
+
+* publica uma atividade ``typing`` logo que a mensagem chega, e repete-a a
+  cada ``intervalo`` segundos sem respostas (o Teams esconde o indicador ao
+  fim de alguns segundos ou quando chega uma mensagem), até ao fim do turno
+  ou a um máximo de ``duracao_maxima`` segundos;
+* as respostas muito longas são divididas por ``dividir_em_partes`` em
+  várias atividades, publicadas pela ordem. A divisão não antecipa nada (o
+  Rasa entrega as respostas do turno todas juntas, depois do webhook), pelo
+  que só serve para não publicar um bloco de texto enorme numa mensagem; o
+  que encurta a espera percebida é o indicador de escrita;
+* todos os pedidos do turno passam pelo mesmo lock, pelo que um ``typing``
+  nunca chega depois da mensagem que o devia preceder.
+
+Os pedidos usam ``aiohttp`` com uma sessão por processo e o token da
+aplicação do bot (``client_credentials`` no tenant ``botframework.com``) em
+cache até perto de expirar.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Text
+from urllib.parse import quote
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+URL_TOKEN = "https://login.microsoftonline.com/botframework.com/oauth2/v2.0/token"
+ESCOPO_BOT_FRAMEWORK = "https://api.botframework.com/.default"
+# O token é renovado este número de segundos antes de expirar
+MARGEM_TOKEN_SEGUNDOS = 300.0
+TIMEOUT_PEDIDO_SEGUNDOS = 10.0
+
+# Valores por omissão (o tamanho das partes é configurável em credentials.yml).
+# Só as respostas realmente longas são divididas, bem abaixo do limite do Teams
+TAMANHO_PARTE = 2000
+INTERVALO_ESCRITA_SEGUNDOS = 3.0
+DURACAO_MAXIMA_ESCRITA_SEGUNDOS = 30.0
+
+
+def dividir_em_partes(texto: Text, tamanho: int = TAMANHO_PARTE) -> List[Text]:
+    """Divide ``texto`` em partes de até ``tamanho`` caracteres, pelos parágrafos.
+
+    Um parágrafo que termina em ``:`` (o título de uma lista, mesmo a
+    negrito) fica sempre na mesma parte que o seguinte, e um parágrafo maior
+    do que ``tamanho`` fica inteiro numa parte só.
+    """
+    blocos: List[Text] = []
+    for paragrafo in texto.strip().split("\n\n"):
+        paragrafo = paragrafo.strip()
+        if not paragrafo:
+            continue
+        if blocos and blocos[-1].rstrip("*_").endswith(":"):
+            blocos[-1] += "\n\n" + paragrafo
+        else:
+            blocos.append(paragrafo)
+
+    partes: List[Text] = []
+    for bloco in blocos:
+        if partes and len(partes[-1]) + 2 + len(bloco) <= tamanho:
+            partes[-1] += "\n\n" + bloco
+        else:
+            partes.append(bloco)
+    return partes
+
+
+class ClienteBotConnector:
+    """Publica atividades nas conversas pelo Bot Connector, com o token da aplicação em cache."""
+
+    def __init__(
+        self,
+        app_id: Optional[Text],
+        app_password: Optional[Text],
+        url_token: Text = URL_TOKEN,
+        timeout: float = TIMEOUT_PEDIDO_SEGUNDOS,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.app_id = app_id
+        self._app_password = app_password
+        self._url_token = url_token
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._relogio = relogio
+        self._sessao: Optional[aiohttp.ClientSession] = None
+        self._token: Optional[Text] = None
+        self._token_expira = 0.0
+        self._lock_token: Optional[asyncio.Lock] = None
+        self.tokens_pedidos = 0
+
+    def _obter_sessao(self) -> aiohttp.ClientSession:
+        if self._sessao is None or self._sessao.closed:
+            self._sessao = aiohttp.ClientSession(timeout=self._timeout)
+        return self._sessao
+
+    async def _obter_token(self) -> Optional[Text]:
+        if not (self.app_id and self._app_password):
+            # Emulador local, sem autenticação
+            return None
+        if self._token is not None and self._relogio() < self._token_expira:
+            return self._token
+        if self._lock_token is None:
+            self._lock_token = asyncio.Lock()
+        async with self._lock_token:
+            if self._token is None or self._relogio() >= self._token_expira:
+                dados = {
+                    "grant_type": "client_credentials",
+                    "client_id": self.app_id,
+                    "client_secret": self._app_password,
+                    "scope": ESCOPO_BOT_FRAMEWORK,
+                }
+                async with self._obter_sessao().post(self._url_token, data=dados) as resposta:
+                    resposta.raise_for_status()
+                    corpo = await resposta.json()
+                self.tokens_pedidos += 1
+                self._token = corpo["access_token"]
+                validade = float(corpo.get("expires_in", 3600))
+                self._token_expira = self._relogio() + max(validade - MARGEM_TOKEN_SEGUNDOS, validade / 2)
+        return self._token
+
+    async def publicar(self, url_base: Text, id_conversa: Text, atividade: Dict[Text, Any]) -> bool:
+        """Publica ``atividade`` na conversa; devolve ``False`` (e regista) se o pedido falhar."""
+        url = f"{url_base.rstrip('/')}/conversations/{quote(id_conversa, safe='')}/activities"
+        try:
+            token = await self._obter_token()
+            cabecalhos = {"Authorization": f"Bearer {token}"} if token else {}
+            async with self._obter_sessao().post(url, json=atividade, headers=cabecalhos) as resposta:
+                if resposta.status < 300:
+                    return True
+                logger.error(
+                    "Bot Connector respondeu %d à atividade '%s': %s",
+                    resposta.status,
+                    atividade.get("type"),
+                    await resposta.text(),
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError):
+            logger.error("Falha ao publicar a atividade '%s'.", atividade.get("type"), exc_info=True)
+        return False
+
+    async def fechar(self) -> None:
+        if self._sessao is not None and not self._sessao.closed:
+            await self._sessao.close()
+
+
+class TurnoTeams:
+    """Atividades de um turno numa conversa: o indicador de escrita e as respostas, por ordem."""
+
+    def __init__(
+        self,
+        cliente: ClienteBotConnector,
+        url_base: Text,
+        id_conversa: Text,
+        bot: Dict[Text, Any],
+        destinatario: Text,
+        intervalo: float = INTERVALO_ESCRITA_SEGUNDOS,
+        duracao_maxima: float = DURACAO_MAXIMA_ESCRITA_SEGUNDOS,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._cliente = cliente
+        self._url_base = url_base
+        self._id_conversa = id_conversa
+        self._bot = bot
+        self._destinatario = destinatario
+        self._intervalo = intervalo
+        self._duracao_maxima = duracao_maxima
+        self._relogio = relogio
+        self._lock = asyncio.Lock()
+        self._ultima_atividade = float("-inf")
+        self._tarefa: Optional["asyncio.Task"] = None
+        self.indicadores_enviados = 0
+        self.respostas_enviadas = 0
+
+    def iniciar(self) -> None:
+        """Começa a publicar o indicador de escrita, sem esperar pelo primeiro pedido."""
+        if self._tarefa is None:
+            self._tarefa = asyncio.ensure_future(self._manter_indicador())
+
+    async def enviar(self, atividade: Dict[Text, Any]) -> bool:
+        """Publica uma resposta do turno, depois de qualquer indicador já em curso."""
+        async with self._lock:
+            enviada = await self._cliente.publicar(self._url_base, self._id_conversa, atividade)
+            self._ultima_atividade = self._relogio()
+        if enviada:
+            self.respostas_enviadas += 1
+        return enviada
+
+    async def terminar(self) -> None:
+        """Pára o indicador de escrita (fim do turno)."""
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+
+    async def _manter_indicador(self) -> None:
+        fim = self._relogio() + self._duracao_maxima
+        indicador = {"type": "typing", "from": self._bot, "recipient": {"id": self._destinatario}}
+        while True:
+            agora = self._relogio()
+            if agora >= fim:
+                return
+            espera = self._ultima_atividade + self._intervalo - agora
+            if espera > 0:
+                await asyncio.sleep(min(espera, fim - agora))
+                continue
+            async with self._lock:
+                if self._ultima_atividade + self._intervalo > self._relogio():
+                    # Uma resposta acabou de ser publicada enquanto se esperava pelo lock
+                    continue
+                if await self._cliente.publicar(self._url_base, self._id_conversa, indicador):
+                    self.indicadores_enviados += 1
+                self._ultima_atividade = self._relogio()
@@ -0,0 +1,102 @@
+"""
+Tracker store SQL com compactação das conversas longas.
+
+``SQLTrackerStoreCompacto`` é o ``SQLTrackerStore`` do Rasa com uma
+diferença: quando uma conversa carregada tem mais de ``limite_eventos``
+eventos, os eventos anteriores aos últimos ``turnos_mantidos`` turnos do
+utilizador são substituídos, na base de dados e no tracker devolvido, por
+um instantâneo dos slots (ver ``addons/compactacao.py``). Assim, o tamanho
+do tracker carregado em cada turno não cresce com as semanas de conversa de
+um colaborador.
+
+A compactação acontece ao carregar o tracker, com a conversa bloqueada pelo
+lock store do Rasa, e antes de o Rasa contar os eventos já gravados para
+decidir o que gravar no fim do turno. Só mexe na sessão atual, a que o Rasa
+carrega: as sessões anteriores ficam na base de dados. É feita com o
+SQLAlchemy numa thread do executor, para não bloquear o event loop.
+
+Configuração em ``endpoints.yml``::
+
+    tracker_store:
+      type: addons.tracker_store.SQLTrackerStoreCompacto
+      dialect: "postgresql"
+      url: ${DB_HOST}
+      ...
+      turnos_mantidos: 10
+      limite_eventos: 100
+"""
+
+import asyncio
+import logging
+from typing import Any, Optional, Text
+
+from rasa.core.tracker_store import SQLTrackerStore
+from rasa.shared.core.trackers import DialogueStateTracker
+
+from addons.compactacao import LIMITE_EVENTOS, TURNOS_MANTIDOS, PlanoCompactacao, linha_evento, planear_compactacao
+
+logger = logging.getLogger(__name__)
+
+
+class SQLTrackerStoreCompacto(SQLTrackerStore):
+    """``SQLTrackerStore`` que compacta as conversas longas ao carregá-las."""
+
+    def __init__(
+        self,
+        *args: Any,
+        turnos_mantidos: int = TURNOS_MANTIDOS,
+        limite_eventos: int = LIMITE_EVENTOS,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.turnos_mantidos = int(turnos_mantidos)
+        self.limite_eventos = int(limite_eventos)
+
+    async def retrieve(self, sender_id: Text) -> Optional[DialogueStateTracker]:
+        tracker = await super().retrieve(sender_id)
+        if tracker is None or len(tracker.events) <= self.limite_eventos:
+            return tracker
+
+        eventos = [evento.as_dict() for evento in tracker.events]
+        plano = planear_compactacao(eventos, self.turnos_mantidos, self.limite_eventos)
+        if plano is None:
+            return tracker
+
+        try:
+            await self._compactar(sender_id, plano)
+        except Exception:
+            logger.warning("Não foi possível compactar a conversa '%s'.", sender_id, exc_info=True)
+            return tracker
+
+        logger.debug(
+            "Conversa '%s' compactada: %d eventos → %d.",
+            sender_id,
+            len(eventos),
+            len(eventos) - plano.corte + len(plano.instantaneo),
+        )
+        return DialogueStateTracker.from_dict(sender_id, plano.aplicar(eventos), self.domain.slots)
+
+    async def _compactar(self, sender_id: Text, plano: PlanoCompactacao) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._substituir_prefixo, sender_id, plano)
+
+    def _substituir_prefixo(self, sender_id: Text, plano: PlanoCompactacao) -> None:
+        with self.session_scope() as session:
+            session.query(self.SQLEvent).filter(
+                self.SQLEvent.sender_id == sender_id,
+                self.SQLEvent.timestamp >= plano.timestamp_inicio,
+                self.SQLEvent.timestamp < plano.timestamp_corte,
+            ).delete(synchronize_session=False)
+            for evento in plano.instantaneo:
+                type_name, timestamp, intent_name, action_name, data = linha_evento(evento)
+                session.add(
+                    self.SQLEvent(
+                        sender_id=sender_id,
+                        type_name=type_name,
+                        timestamp=timestamp,
+                        intent_name=intent_name,
+                        action_name=action_name,
+                        data=data,
+                    )
+                )
+            session.commit()
@@ -0,0 +1,227 @@
+"""
+Treino incremental do modelo Rasa.
+
+Envolve o ``rasa train`` e escolhe, em cada execução, entre um treino
+completo e a afinação (``--finetune``) do último modelo com uma fração das
+épocas:
+
+* A afinação só é possível com os mesmos rótulos e a mesma configuração.
+  Exige as mesmas intents, entidades, respostas, slots e actions (o domínio
+  e os rótulos presentes em ``data/``) e o mesmo ``config.yml``, ignorando
+  as épocas. Acrescentar exemplos ou histórias a intents existentes é o caso
+  típico.
+* Uma nova intent, uma nova resposta ou uma alteração ao pipeline obrigam a
+  um treino completo.
+* Ao fim de ``--max-afinacoes`` afinações seguidas faz-se um treino
+  completo, para o modelo não se afastar do que um treino de raiz daria.
+
+O estado (último modelo, impressões digitais, número de afinações) fica em
+``models/.treino.json``. As pastas de cache, que o CI deve preservar entre
+execuções, são duas:
+
+* ``.cache/rasa``: a cache de treino do próprio Rasa (``RASA_CACHE_DIRECTORY``).
+  Reaproveita os componentes cujas entradas não mudaram.
+* ``.cache/featurizacao``: os ``Doc`` do spaCy por exemplo (ver
+  ``addons/cache_featurizacao.py``). Só é usada com o componente
+  ``addons.nlp_com_cache.SpacyNLP`` no ``config.yml``.
+
+Uso:
+    python -m addons.treino [--fracao-epocas 0.2] [--max-afinacoes 5] [--completo] [--simular]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Text
+
+import yaml
+
+from addons.cache_featurizacao import VARIAVEL_DIRETORIO_CACHE
+
+logger = logging.getLogger(__name__)
+
+FICHEIRO_ESTADO = ".treino.json"
+
+# Fração das épocas usada na afinação e afinações seguidas até um treino completo
+FRACAO_EPOCAS = 0.2
+MAX_AFINACOES = 5
+
+DIRETORIO_CACHE_RASA = Path(".cache/rasa")
+DIRETORIO_CACHE_FEATURIZACAO = Path(".cache/featurizacao")
+
+TREINO_COMPLETO = "completo"
+AFINACAO = "afinacao"
+
+# Secções do domínio que definem os rótulos dos classificadores
+_SECCOES_ROTULOS = ("intents", "entities", "slots", "actions", "forms", "responses")
+
+
+class Decisao(NamedTuple):
+    modo: Text
+    motivo: Text
+
+
+def _impressao(dados: Any) -> Text:
+    return hashlib.sha256(json.dumps(dados, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _ler_yaml(caminho: Path) -> Dict[Text, Any]:
+    with open(caminho, encoding="utf-8") as ficheiro:
+        return yaml.safe_load(ficheiro) or {}
+
+
+def _sem_epocas(valor: Any) -> Any:
+    if isinstance(valor, dict):
+        return {chave: _sem_epocas(v) for chave, v in valor.items() if chave != "epochs"}
+    if isinstance(valor, list):
+        return [_sem_epocas(v) for v in valor]
+    return valor
+
+
+def impressao_config(config: Path) -> Text:
+    """Impressão digital do ``config.yml``, sem as épocas (a afinação altera-as)."""
+    return _impressao(_sem_epocas(_ler_yaml(config)))
+
+
+def impressao_rotulos(dominio: Path, dados: Iterable[Path]) -> Text:
+    """Impressão digital dos rótulos: secções do domínio e intents/respostas dos dados."""
+    conteudo = _ler_yaml(dominio)
+    rotulos: Dict[Text, Any] = {seccao: conteudo.get(seccao) for seccao in _SECCOES_ROTULOS}
+    # Das respostas só contam os nomes: mudar o texto não exige novo treino
+    rotulos["responses"] = sorted(conteudo.get("responses") or ())
+    intents, respostas = set(), set()
+    for caminho in dados:
+        ficheiro = _ler_yaml(caminho)
+        for bloco in ficheiro.get("nlu") or ():
+            if isinstance(bloco, dict) and bloco.get("intent"):
+                intents.add(bloco["intent"])
+        respostas.update(ficheiro.get("responses") or ())
+    rotulos["intents_dados"] = sorted(intents)
+    rotulos["respostas_dados"] = sorted(respostas)
+    return _impressao(rotulos)
+
+
+def ficheiros_dados(pasta: Path) -> List[Path]:
+    return sorted(pasta.rglob("*.yml")) + sorted(pasta.rglob("*.yaml"))
+
+
+def decidir(
+    estado: Dict[Text, Any],
+    config: Text,
+    rotulos: Text,
+    max_afinacoes: int = MAX_AFINACOES,
+    forcar_completo: bool = False,
+) -> Decisao:
+    """Escolhe entre treino completo e afinação do último modelo."""
+    if forcar_completo:
+        return Decisao(TREINO_COMPLETO, "pedido explicitamente")
+    modelo = estado.get("modelo")
+    if not modelo or not Path(modelo).exists():
+        return Decisao(TREINO_COMPLETO, "sem modelo anterior")
+    if estado.get("config") != config:
+        return Decisao(TREINO_COMPLETO, "config.yml alterado")
+    if estado.get("rotulos") != rotulos:
+        return Decisao(TREINO_COMPLETO, "intents, respostas ou domínio alterados")
+    if estado.get("afinacoes", 0) >= max_afinacoes:
+        return Decisao(TREINO_COMPLETO, f"{max_afinacoes} afinações seguidas")
+    return Decisao(AFINACAO, f"afinação de {Path(modelo).name}")
+
+
+def comando_treino(
+    decisao: Decisao,
+    estado: Dict[Text, Any],
+    config: Path,
+    dominio: Path,
+    dados: Path,
+    modelos: Path,
+    fracao_epocas: float = FRACAO_EPOCAS,
+) -> List[Text]:
+    comando = [
+        "rasa", "train",
+        "--config", str(config),
+        "--domain", str(dominio),
+        "--data", str(dados),
+        "--out", str(modelos),
+    ]  # fmt: skip
+    if decisao.modo == AFINACAO:
+        comando += ["--finetune", str(estado["modelo"]), "--epoch-fraction", str(fracao_epocas)]
+    return comando
+
+
+def ultimo_modelo(modelos: Path) -> Optional[Path]:
+    candidatos = sorted(modelos.glob("*.tar.gz"), key=lambda caminho: caminho.stat().st_mtime)
+    return candidatos[-1] if candidatos else None
+
+
+def ler_estado(modelos: Path) -> Dict[Text, Any]:
+    try:
+        return json.loads((modelos / FICHEIRO_ESTADO).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def gravar_estado(modelos: Path, estado: Dict[Text, Any]) -> None:
+    modelos.mkdir(parents=True, exist_ok=True)
+    (modelos / FICHEIRO_ESTADO).write_text(json.dumps(estado, indent=2), encoding="utf-8")
+
+
+def novo_estado(
+    estado: Dict[Text, Any], decisao: Decisao, modelo: Path, config: Text, rotulos: Text
+) -> Dict[Text, Any]:
+    afinacoes = estado.get("afinacoes", 0) + 1 if decisao.modo == AFINACAO else 0
+    return {"modelo": str(modelo), "config": config, "rotulos": rotulos, "afinacoes": afinacoes}
+
+
+def ambiente_treino(base: Optional[Dict[Text, Text]] = None) -> Dict[Text, Text]:
+    """Variáveis de ambiente do ``rasa train``, com as pastas de cache por omissão."""
+    ambiente = dict(os.environ if base is None else base)
+    ambiente.setdefault("RASA_CACHE_DIRECTORY", str(DIRETORIO_CACHE_RASA.resolve()))
+    ambiente.setdefault(VARIAVEL_DIRETORIO_CACHE, str(DIRETORIO_CACHE_FEATURIZACAO.resolve()))
+    # O componente addons.nlp_com_cache.SpacyNLP é importado a partir da raiz
+    raiz = str(Path(__file__).resolve().parent.parent)
+    caminhos = [c for c in ambiente.get("PYTHONPATH", "").split(os.pathsep) if c]
+    if raiz not in caminhos:
+        ambiente["PYTHONPATH"] = os.pathsep.join([raiz] + caminhos)
+    return ambiente
+
+
+def main(argumentos: Optional[Sequence[Text]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Treino incremental do modelo Rasa.")
+    parser.add_argument("--config", type=Path, default=Path("config.yml"))
+    parser.add_argument("--domain", type=Path, default=Path("domain.yml"))
+    parser.add_argument("--data", type=Path, default=Path("data"))
+    parser.add_argument("--out", type=Path, default=Path("models"))
+    parser.add_argument("--fracao-epocas", type=float, default=FRACAO_EPOCAS)
+    parser.add_argument("--max-afinacoes", type=int, default=MAX_AFINACOES)
+    parser.add_argument("--completo", action="store_true", help="força um treino completo")
+    parser.add_argument("--simular", action="store_true", help="mostra a decisão e o comando, sem treinar")
+    args = parser.parse_args(argumentos)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    estado = ler_estado(args.out)
+    config = impressao_config(args.config)
+    rotulos = impressao_rotulos(args.domain, ficheiros_dados(args.data))
+    decisao = decidir(estado, config, rotulos, args.max_afinacoes, args.completo)
+    comando = comando_treino(decisao, estado, args.config, args.domain, args.data, args.out, args.fracao_epocas)
+    logger.info("Treino %s (%s): %s", decisao.modo, decisao.motivo, " ".join(comando))
+    if args.simular:
+        return 0
+
+    resultado = subprocess.run(comando, env=ambiente_treino())
+    if resultado.returncode != 0:
+        return resultado.returncode
+
+    modelo = ultimo_modelo(args.out)
+    if modelo is not None:
+        gravar_estado(args.out, novo_estado(estado, decisao, modelo, config, rotulos))
+        logger.info("Modelo: %s", modelo)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
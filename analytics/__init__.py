@@ -0,0 +1,9 @@
+"""
+Análise das conversas do Bot de Onboarding da The100s.
+
+O Rasa Server publica cada evento das conversas no event broker (RabbitMQ,
+ver ``endpoints.yml``). O consumidor deste pacote grava-os em ficheiros
+colunares, só de acréscimo e particionados por dia; os relatórios (funil do
+onboarding, taxa de fallback por intent) leem esses ficheiros e nunca
+consultam o tracker store de produção.
+"""
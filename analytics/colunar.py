@@ -0,0 +1,216 @@
+"""
+Ficheiros colunares dos eventos das conversas.
+
+Cada evento do Rasa é achatado numa linha com as colunas de ``COLUNAS``. As
+linhas são gravadas em segmentos imutáveis, um por descarga e por dia (UTC):
+
+    <destino>/dia=2026-10-18/parte-<ms>-<pid>-<seq>.col
+
+Um segmento tem uma linha de cabeçalho em JSON com o número de linhas e o
+tamanho de cada coluna, seguida das colunas, cada uma uma lista JSON
+comprimida com zlib. Um relatório lê apenas as colunas de que precisa e
+salta as restantes, e só abre os dias pedidos.
+
+Os segmentos são escritos num ficheiro temporário e publicados com
+``os.replace``: um leitor nunca vê um segmento incompleto, e um segmento
+publicado nunca é alterado.
+"""
+
+import json
+import os
+import time
+import zlib
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Text, Tuple, Union
+
+COLUNAS = (
+    "sender_id",
+    "timestamp",
+    "evento",  # tipo do evento do Rasa: user, action, slot, bot, session_started, ...
+    "nome",  # nome da action, do slot ou do loop
+    "intent",  # intent da mensagem do utilizador (a real, mesmo com nlu_fallback)
+    "confianca",  # confiança da intent ou da política que previu a action
+    "fallback_nlu",  # a mensagem ficou abaixo do limiar do FallbackClassifier
+    "politica",
+    "valor",  # valor do slot, em JSON
+    "canal",
+)
+
+EXTENSAO_SEGMENTO = ".col"
+INTENT_FALLBACK_NLU = "nlu_fallback"
+
+# Tamanho do lote e intervalo máximo (segundos) entre descargas
+TAMANHO_LOTE = 5000
+INTERVALO_DESCARGA_SEGUNDOS = 60.0
+
+Evento = Dict[Text, Any]
+Caminho = Union[Text, Path]
+
+
+def _intent_real(dados: Dict[Text, Any]) -> Tuple[Optional[Text], Optional[float], bool]:
+    intent = dados.get("intent") or {}
+    nome = intent.get("name")
+    if nome != INTENT_FALLBACK_NLU:
+        return nome, intent.get("confidence"), False
+    # Com nlu_fallback, a intent prevista pelo classificador é a seguinte no ranking
+    for alternativa in dados.get("intent_ranking") or ():
+        if alternativa.get("name") != INTENT_FALLBACK_NLU:
+            return alternativa.get("name"), alternativa.get("confidence"), True
+    return None, None, True
+
+
+def linha_evento(evento: Evento) -> Tuple[Any, ...]:
+    """Linha (pela ordem de ``COLUNAS``) de um evento publicado pelo Rasa."""
+    tipo = evento.get("event")
+    intent, confianca, fallback = None, None, False
+    valor, canal = None, None
+    if tipo == "user":
+        intent, confianca, fallback = _intent_real(evento.get("parse_data") or {})
+        canal = evento.get("input_channel")
+    elif tipo == "action":
+        confianca = evento.get("confidence")
+    elif tipo == "slot":
+        valor = json.dumps(evento.get("value"), ensure_ascii=False)
+    return (
+        evento.get("sender_id"),
+        evento.get("timestamp"),
+        tipo,
+        evento.get("name"),
+        intent,
+        confianca,
+        fallback,
+        evento.get("policy") if tipo == "action" else None,
+        valor,
+        canal,
+    )
+
+
+def dia_do_timestamp(timestamp: Optional[float]) -> date:
+    return datetime.fromtimestamp(timestamp or 0.0, tz=timezone.utc).date()
+
+
+# ---------------------------------------------------------------------------
+# Segmentos
+# ---------------------------------------------------------------------------
+
+
+def escrever_segmento(caminho: Caminho, linhas: Sequence[Tuple[Any, ...]]) -> Path:
+    """Grava as linhas num segmento novo (publicado atomicamente)."""
+    caminho = Path(caminho)
+    blocos = [
+        zlib.compress(json.dumps([linha[i] for linha in linhas], ensure_ascii=False).encode("utf-8"))
+        for i in range(len(COLUNAS))
+    ]
+    cabecalho = {
+        "linhas": len(linhas),
+        "colunas": [[nome, len(bloco)] for nome, bloco in zip(COLUNAS, blocos)],
+    }
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name("." + caminho.name + ".tmp")
+    with open(temporario, "wb") as ficheiro:
+        ficheiro.write(json.dumps(cabecalho).encode("utf-8") + b"\n")
+        for bloco in blocos:
+            ficheiro.write(bloco)
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def ler_segmento(caminho: Caminho, colunas: Sequence[Text] = COLUNAS) -> Dict[Text, List[Any]]:
+    """Lê as colunas pedidas de um segmento, sem descomprimir as restantes."""
+    pedidas = set(colunas)
+    resultado: Dict[Text, List[Any]] = {}
+    with open(caminho, "rb") as ficheiro:
+        cabecalho = json.loads(ficheiro.readline())
+        for nome, tamanho in cabecalho["colunas"]:
+            if nome in pedidas:
+                resultado[nome] = json.loads(zlib.decompress(ficheiro.read(tamanho)))
+            else:
+                ficheiro.seek(tamanho, os.SEEK_CUR)
+    for nome in pedidas - resultado.keys():
+        # Colunas acrescentadas depois de o segmento ter sido escrito
+        resultado[nome] = [None] * cabecalho["linhas"]
+    return resultado
+
+
+def segmentos(destino: Caminho, desde: Optional[date] = None, ate: Optional[date] = None) -> Iterator[Path]:
+    """Segmentos dos dias entre ``desde`` e ``ate`` (inclusive), por ordem."""
+    destino = Path(destino)
+    if not destino.exists():
+        return
+    for particao in sorted(destino.glob("dia=*")):
+        try:
+            dia = date.fromisoformat(particao.name[len("dia=") :])
+        except ValueError:
+            continue
+        if (desde is not None and dia < desde) or (ate is not None and dia > ate):
+            continue
+        yield from sorted(particao.glob("*" + EXTENSAO_SEGMENTO))
+
+
+def ler_colunas(
+    destino: Caminho,
+    colunas: Sequence[Text],
+    desde: Optional[date] = None,
+    ate: Optional[date] = None,
+) -> Iterator[Tuple[Any, ...]]:
+    """Linhas (só com as colunas pedidas, por essa ordem) dos dias entre ``desde`` e ``ate``."""
+    for caminho in segmentos(destino, desde, ate):
+        dados = ler_segmento(caminho, colunas)
+        yield from zip(*(dados[nome] for nome in colunas))
+
+
+# ---------------------------------------------------------------------------
+# Escrita em lotes
+# ---------------------------------------------------------------------------
+
+
+class EscritorColunar:
+    """Acumula eventos e grava-os em segmentos por dia, em lotes.
+
+    ``deve_descarregar`` indica quando o lote atingiu ``tamanho_lote`` eventos
+    ou o evento mais antigo por gravar tem mais de ``intervalo`` segundos.
+    """
+
+    def __init__(
+        self,
+        destino: Caminho,
+        tamanho_lote: int = TAMANHO_LOTE,
+        intervalo: float = INTERVALO_DESCARGA_SEGUNDOS,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.destino = Path(destino)
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self._relogio = relogio
+        self._por_dia: Dict[date, List[Tuple[Any, ...]]] = {}
+        self._pendentes = 0
+        self._desde: Optional[float] = None
+        self._sequencia = 0
+
+    @property
+    def pendentes(self) -> int:
+        return self._pendentes
+
+    def adicionar(self, evento: Evento) -> None:
+        linha = linha_evento(evento)
+        self._por_dia.setdefault(dia_do_timestamp(linha[1]), []).append(linha)
+        self._pendentes += 1
+        if self._desde is None:
+            self._desde = self._relogio()
+
+    def deve_descarregar(self) -> bool:
+        if self._pendentes >= self.tamanho_lote:
+            return True
+        return self._desde is not None and self._relogio() - self._desde >= self.intervalo
+
+    def descarregar(self) -> List[Path]:
+        """Grava os eventos pendentes, um segmento por dia; devolve os segmentos gravados."""
+        por_dia, self._por_dia = self._por_dia, {}
+        self._pendentes, self._desde = 0, None
+        gravados = []
+        for dia, linhas in sorted(por_dia.items()):
+            self._sequencia += 1
+            nome = f"parte-{int(time.time() * 1000)}-{os.getpid()}-{self._sequencia:06d}{EXTENSAO_SEGMENTO}"
+            gravados.append(escrever_segmento(self.destino / f"dia={dia.isoformat()}" / nome, linhas))
+        return gravados
@@ -0,0 +1,149 @@
+"""
+Relatórios sobre os eventos gravados pelo consumidor (ver ``analytics/consumidor.py``).
+
+* ``funil_onboarding``: quantos colaboradores chegaram a cada passo do
+  onboarding, por ordem: saudação → documentos → quiz concluído.
+* ``taxa_fallback_por_intent``: fração das mensagens de cada intent que
+  acabaram num fallback, seja do NLU (``nlu_fallback``, abaixo do limiar do
+  ``FallbackClassifier``) seja das políticas (``core_fallback_action_name``,
+  hoje ``action_fallback_adaptativo``).
+
+Os relatórios leem apenas as colunas e os dias de que precisam.
+
+Uso:
+    python -m analytics.funil --destino dados/eventos [--desde 2026-10-01] [--ate 2026-10-31]
+"""
+
+import argparse
+import os
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Text, Tuple
+
+from analytics.colunar import Caminho, ler_colunas
+
+Linha = Tuple[Any, ...]
+
+# Passos do funil: (nome, condição sobre (evento, nome, intent, valor))
+PASSOS_FUNIL: Sequence[Tuple[Text, Callable[[Text, Text, Text, Text], bool]]] = (
+    (
+        "saudacao",
+        lambda evento, nome, intent, valor: (evento == "user" and intent == "saudar")
+        or (evento == "action" and nome == "action_boas_vindas_personalizada"),
+    ),
+    ("documentos", lambda evento, nome, intent, valor: evento == "action" and nome == "action_enviar_documentos"),
+    (
+        "quiz_concluido",
+        lambda evento, nome, intent, valor: evento == "slot" and nome == "quiz_concluido" and valor == "true",
+    ),
+)
+
+# Actions que indicam que o bot não soube responder
+ACTIONS_FALLBACK = frozenset(
+    {"action_default_fallback", "action_two_stage_fallback", "action_fallback_adaptativo", "utter_default"}
+)
+
+INTENT_DESCONHECIDA = "(desconhecida)"
+
+
+class PassoFunil(NamedTuple):
+    nome: Text
+    conversas: int
+    taxa_passo: float  # face ao passo anterior
+    taxa_total: float  # face ao primeiro passo
+
+
+class FallbackIntent(NamedTuple):
+    mensagens: int
+    fallbacks: int
+
+    @property
+    def taxa(self) -> float:
+        return self.fallbacks / self.mensagens if self.mensagens else 0.0
+
+
+def _por_conversa(linhas: Iterable[Linha]) -> List[Linha]:
+    # As duas primeiras colunas são sempre (sender_id, timestamp)
+    return sorted(linhas, key=lambda linha: (linha[0] or "", linha[1] or 0.0))
+
+
+def funil_onboarding(
+    destino: Caminho, desde: Optional[date] = None, ate: Optional[date] = None
+) -> List[PassoFunil]:
+    """Conversas que chegaram a cada passo do funil (pela ordem dos passos)."""
+    linhas = _por_conversa(
+        ler_colunas(destino, ("sender_id", "timestamp", "evento", "nome", "intent", "valor"), desde, ate)
+    )
+
+    alcancados = [0] * len(PASSOS_FUNIL)
+    conversa, passo = None, 0
+    for sender_id, _, evento, nome, intent, valor in linhas:
+        if sender_id != conversa:
+            conversa, passo = sender_id, 0
+        if passo < len(PASSOS_FUNIL) and PASSOS_FUNIL[passo][1](evento, nome, intent, valor):
+            alcancados[passo] += 1
+            passo += 1
+
+    resultado = []
+    for indice, (nome_passo, _) in enumerate(PASSOS_FUNIL):
+        anterior = alcancados[indice - 1] if indice else alcancados[0]
+        resultado.append(
+            PassoFunil(
+                nome_passo,
+                alcancados[indice],
+                alcancados[indice] / anterior if anterior else 0.0,
+                alcancados[indice] / alcancados[0] if alcancados[0] else 0.0,
+            )
+        )
+    return resultado
+
+
+def taxa_fallback_por_intent(
+    destino: Caminho, desde: Optional[date] = None, ate: Optional[date] = None
+) -> Dict[Text, FallbackIntent]:
+    """Mensagens e fallbacks por intent (a intent prevista, mesmo abaixo do limiar)."""
+    linhas = _por_conversa(
+        ler_colunas(destino, ("sender_id", "timestamp", "evento", "nome", "intent", "fallback_nlu"), desde, ate)
+    )
+
+    contagem: Dict[Text, List[int]] = {}
+    conversa = None
+    pendente: Optional[List[int]] = None  # contagem da última mensagem ainda sem resposta
+    for sender_id, _, evento, nome, intent, fallback_nlu in linhas:
+        if sender_id != conversa:
+            conversa, pendente = sender_id, None
+        if evento == "user":
+            pendente = contagem.setdefault(intent or INTENT_DESCONHECIDA, [0, 0])
+            pendente[0] += 1
+            if fallback_nlu:
+                pendente[1] += 1
+                pendente = None
+        elif evento == "action" and pendente is not None and nome != "action_listen":
+            # Só a primeira action depois da mensagem conta
+            if nome in ACTIONS_FALLBACK:
+                pendente[1] += 1
+            pendente = None
+
+    return {intent: FallbackIntent(*valores) for intent, valores in sorted(contagem.items())}
+
+
+def main(argumentos: Optional[Sequence[Text]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Funil do onboarding e taxa de fallback por intent.")
+    parser.add_argument("--destino", type=Path, default=Path(os.getenv("ANALYTICS_DESTINO", "dados/eventos")))
+    parser.add_argument("--desde", type=date.fromisoformat, help="primeiro dia (AAAA-MM-DD, UTC)")
+    parser.add_argument("--ate", type=date.fromisoformat, help="último dia (AAAA-MM-DD, UTC)")
+    args = parser.parse_args(argumentos)
+
+    print("Funil do onboarding")
+    print(f"{'passo':<18} {'conversas':>10} {'vs. anterior':>13} {'vs. início':>11}")
+    for passo in funil_onboarding(args.destino, args.desde, args.ate):
+        print(f"{passo.nome:<18} {passo.conversas:>10} {passo.taxa_passo:>13.1%} {passo.taxa_total:>11.1%}")
+
+    print("\nFallback por intent")
+    print(f"{'intent':<28} {'mensagens':>10} {'fallbacks':>10} {'taxa':>7}")
+    for intent, valores in taxa_fallback_por_intent(args.destino, args.desde, args.ate).items():
+        print(f"{intent:<28} {valores.mensagens:>10} {valores.fallbacks:>10} {valores.taxa:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Micro-benchmarks e testes de carga do Bot de Onboarding da The100s."""
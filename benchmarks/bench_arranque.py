@@ -0,0 +1,158 @@
+"""
+Benchmark do arranque do Rasa Server: tempo até à primeira resposta.
+
+Inicia o servidor como processo filho, espera que fique pronto e envia
+mensagens a ``POST /model/parse``. Compara dois modos:
+
+* ``rasa``: o ``rasa run`` habitual, pronto quando responde em ``/``;
+* ``arranque``: ``python -m addons.arranque run``, pronto quando cria o
+  ficheiro de pronto, depois do aquecimento.
+
+Para cada modo mostra o tempo desde o início do processo até estar pronto e
+até à primeira resposta, a latência dessa primeira resposta e a mediana das
+seguintes. O tempo até à primeira resposta é o que um colaborador espera
+quando escreve ao bot logo depois de um reinício.
+
+Uso (requer o Rasa instalado e um modelo treinado em models/):
+    python -m benchmarks.bench_arranque [--modos rasa arranque] [--porta 5006]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional, Sequence, Text
+
+from addons.arranque import frases_aquecimento
+
+MODOS = ("rasa", "arranque")
+
+# Mensagens enviadas depois do arranque, diferentes das do aquecimento
+MENSAGENS = (
+    "olá, começo hoje na equipa de dados",
+    "onde encontro o manual do colaborador?",
+    "quero fazer o quiz",
+    "b",
+    "obrigado, até amanhã",
+)
+
+
+class MedicaoArranque(NamedTuple):
+    modo: Text
+    pronto_s: float  # do início do processo até estar pronto
+    primeira_resposta_s: float  # do início do processo até à primeira resposta
+    latencia_primeira_ms: float
+    latencia_mediana_ms: float  # das mensagens seguintes
+
+
+def esperar(
+    condicao: Callable[[], bool],
+    limite: float,
+    intervalo: float = 0.1,
+    relogio: Callable[[], float] = time.monotonic,
+    dormir: Callable[[float], None] = time.sleep,
+) -> bool:
+    """Repete ``condicao`` até ser verdadeira ou passarem ``limite`` segundos."""
+    fim = relogio() + limite
+    while True:
+        try:
+            if condicao():
+                return True
+        except OSError:
+            pass  # servidor ainda sem a porta aberta
+        if relogio() >= fim:
+            return False
+        dormir(intervalo)
+
+
+def servidor_responde(url: Text) -> bool:
+    with urllib.request.urlopen(url + "/", timeout=2) as resposta:
+        return resposta.status == 200
+
+
+def analisar(url: Text, texto: Text, timeout: float = 60.0) -> float:
+    """Envia ``texto`` a ``/model/parse``; devolve a latência em milissegundos."""
+    pedido = urllib.request.Request(
+        url + "/model/parse",
+        data=json.dumps({"text": texto}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    inicio = time.perf_counter()
+    with urllib.request.urlopen(pedido, timeout=timeout) as resposta:
+        resposta.read()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def comando_servidor(modo: Text, porta: int, modelo: Path) -> List[Text]:
+    argumentos = ["run", "--enable-api", "--port", str(porta), "--model", str(modelo)]
+    if modo == "arranque":
+        return [sys.executable, "-m", "addons.arranque", *argumentos]
+    return ["rasa", *argumentos]
+
+
+def medir(
+    modo: Text,
+    porta: int,
+    modelo: Path,
+    mensagens: Sequence[Text] = MENSAGENS,
+    limite: float = 600.0,
+) -> MedicaoArranque:
+    url = f"http://localhost:{porta}"
+    with tempfile.TemporaryDirectory() as pasta:
+        ficheiro_pronto = Path(pasta) / "pronto"
+        ambiente = dict(os.environ, RASA_FICHEIRO_PRONTO=str(ficheiro_pronto))
+        inicio = time.monotonic()
+        processo = subprocess.Popen(
+            comando_servidor(modo, porta, modelo), env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            if modo == "arranque":
+                pronto = esperar(ficheiro_pronto.exists, limite)
+            else:
+                pronto = esperar(lambda: servidor_responde(url), limite)
+            if not pronto:
+                raise RuntimeError(f"O servidor ({modo}) não ficou pronto em {limite:.0f} s.")
+            pronto_s = time.monotonic() - inicio
+
+            primeira = analisar(url, mensagens[0])
+            primeira_resposta_s = time.monotonic() - inicio
+            seguintes = [analisar(url, texto) for texto in mensagens[1:]]
+        finally:
+            processo.terminate()
+            processo.wait(timeout=30)
+
+    return MedicaoArranque(
+        modo,
+        pronto_s,
+        primeira_resposta_s,
+        primeira,
+        statistics.median(seguintes) if seguintes else primeira,
+    )
+
+
+def main(argumentos: Optional[Sequence[Text]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modos", nargs="+", choices=MODOS, default=list(MODOS))
+    parser.add_argument("--porta", type=int, default=5006, help="porta livre para o servidor de teste")
+    parser.add_argument("--modelo", type=Path, default=Path("models"))
+    parser.add_argument("--limite", type=float, default=600.0, help="segundos até desistir do arranque")
+    args = parser.parse_args(argumentos)
+
+    print(f"{len(frases_aquecimento())} frases de aquecimento a partir de data/nlu.yml\n")
+    print(f"{'modo':<10} {'pronto (s)':>11} {'1.ª resposta (s)':>17} {'latência 1.ª (ms)':>18} {'mediana (ms)':>13}")
+    for modo in args.modos:
+        medicao = medir(modo, args.porta, args.modelo, limite=args.limite)
+        print(
+            f"{medicao.modo:<10} {medicao.pronto_s:>11.1f} {medicao.primeira_resposta_s:>17.1f}"
+            f" {medicao.latencia_primeira_ms:>18.0f} {medicao.latencia_mediana_ms:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
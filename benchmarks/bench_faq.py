@@ -0,0 +1,81 @@
+"""
+Benchmark da pesquisa nas perguntas frequentes (actions/faq.py).
+
+Constrói um ``IndiceFaq`` com N entradas sintéticas (cada uma com a pergunta
+e duas variantes) e mede a latência de ``procurar`` (p50/p99), o tempo da
+indexação completa e o de uma atualização incremental com uma única entrada
+nova.
+
+Uso:
+    python -m benchmarks.bench_faq [--entradas 5000] [--consultas 2000]
+"""
+
+import argparse
+import random
+import time
+from typing import List, Optional, Text
+
+from actions.faq import IndiceFaq, RegistoFaq
+
+_TEMAS = (
+    "férias", "salário", "horário", "ponto", "seguro de saúde", "portátil", "VPN", "email",
+    "formação", "avaliação", "estacionamento", "refeição", "teletrabalho", "despesas", "contrato",
+)  # fmt: skip
+_FORMAS = (
+    "Como funciona {tema} no {contexto}?",
+    "Quem trata de {tema} no {contexto}?",
+    "Onde peço {tema} para o {contexto}?",
+    "Quando posso tratar de {tema} no {contexto}?",
+)
+_CONTEXTOS = ("primeiro mês", "período experimental", "escritório de Lisboa", "escritório do Porto", "projeto")
+
+
+def entradas_sinteticas(quantidade: int, rng: random.Random) -> List[RegistoFaq]:
+    entradas = []
+    for id_entrada in range(1, quantidade + 1):
+        tema, contexto = rng.choice(_TEMAS), f"{rng.choice(_CONTEXTOS)} {id_entrada}"
+        formas = rng.sample(_FORMAS, 3)
+        perguntas = [forma.format(tema=tema, contexto=contexto) for forma in formas]
+        entradas.append(RegistoFaq(id_entrada, perguntas[0], f"Resposta {id_entrada}", tuple(perguntas[1:])))
+    return entradas
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def main(argv: Optional[List[Text]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entradas", type=int, default=5000)
+    parser.add_argument("--consultas", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args(argv)
+    rng = random.Random(42)
+
+    entradas = entradas_sinteticas(args.entradas, rng)
+    inicio = time.perf_counter()
+    indice = IndiceFaq(entradas)
+    indexacao = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    nova = RegistoFaq(args.entradas + 1, "Posso levar o cão para o escritório?", "Não.", ("há animais no escritório?",))
+    indice.atualizar([nova])
+    incremental = time.perf_counter() - inicio
+
+    consultas = [rng.choice(entradas).textos[rng.randrange(3)].lower() for _ in range(args.consultas)]
+    latencias = []
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        indice.procurar(consulta, k=args.k)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+    print(f"Entradas: {len(indice)}  |  linhas na matriz: {3 * args.entradas + 2}")
+    print(f"Indexação completa      : {indexacao * 1000:8.1f} ms")
+    print(f"Atualização (1 entrada) : {incremental * 1000:8.2f} ms")
+    print(f"Pesquisa top-{args.k} p50       : {_percentil(latencias, 50):8.3f} ms")
+    print(f"Pesquisa top-{args.k} p99       : {_percentil(latencias, 99):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
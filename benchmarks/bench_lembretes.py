@@ -0,0 +1,92 @@
+"""
+Benchmark da agenda de lembretes proativos (actions/lembretes.py).
+
+Agenda N colaboradores sintéticos (três lembretes cada), com datas de início
+espalhadas por 90 dias, e mede o tempo da carga inicial, o de uma
+atualização em que 10% dos colaboradores mudam de data de início, o tempo
+para retirar todos os lembretes vencidos em lotes e o pico de memória da
+carga inicial.
+
+Uso:
+    python -m benchmarks.bench_lembretes [--colaboradores 50000] [--lote 200]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Sequence, Text
+
+from actions.lembretes import AgendaLembretes, ColaboradorLembretes, hora_envio
+
+_ALTERADO = datetime(2026, 1, 1)
+
+
+def colaboradores_sinteticos(quantidade: int, inicio: date, rng: random.Random) -> List[ColaboradorLembretes]:
+    return [
+        ColaboradorLembretes(
+            f"colaborador{i}@the100s.com",
+            f"Colaborador {i}",
+            f"29:{i}",
+            inicio + timedelta(days=rng.randrange(90)),
+            True,
+            _ALTERADO,
+        )
+        for i in range(quantidade)
+    ]
+
+
+def main(argumentos: Optional[Sequence[Text]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--colaboradores", type=int, default=50_000)
+    parser.add_argument("--lote", type=int, default=200)
+    args = parser.parse_args(argumentos)
+    rng = random.Random(42)
+    inicio = date(2026, 1, 5)
+    colaboradores = colaboradores_sinteticos(args.colaboradores, inicio, rng)
+
+    tracemalloc.start()
+    AgendaLembretes().atualizar(colaboradores, completa=True)
+    memoria = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    antes = time.perf_counter()
+    agenda = AgendaLembretes()
+    agenda.atualizar(colaboradores, completa=True)
+    carga = time.perf_counter() - antes
+
+    alterados = [
+        colaborador._replace(data_inicio=colaborador.data_inicio + timedelta(days=7))
+        for colaborador in rng.sample(colaboradores, len(colaboradores) // 10)
+    ]
+    antes = time.perf_counter()
+    agenda.atualizar(alterados)
+    alteracao = time.perf_counter() - antes
+
+    # Percorre os 100 dias, de hora a hora, como o serviço faria
+    antes = time.perf_counter()
+    retirados, lotes = 0, 0
+    agora = hora_envio(inicio, -3)
+    fim = hora_envio(inicio, 100)
+    while agora <= fim:
+        while True:
+            lote = agenda.vencidos(agora, args.lote)
+            if not lote:
+                break
+            agenda.marcar_enviados(lote)
+            retirados += len(lote)
+            lotes += 1
+        agora += 3600
+    percurso = time.perf_counter() - antes
+
+    print(f"Colaboradores: {args.colaboradores}  |  lembretes agendados: {3 * args.colaboradores}")
+    print(f"Carga inicial           : {carga * 1000:8.1f} ms")
+    print(f"Memória (pico da carga) : {memoria / 2**20:8.1f} MiB")
+    print(f"Atualização (10% datas) : {alteracao * 1000:8.1f} ms")
+    print(f"Retirar os vencidos     : {percurso * 1000:8.1f} ms  ({retirados} lembretes em {lotes} lotes,"
+          f" {agenda.descartados} descartados)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark do atalho de NLU face ao pipeline completo (spaCy + DIET).
+
+Mede, por mensagem, a latência (relógio de parede) e o tempo de CPU do
+atalho de ``addons/atalho_nlu.py`` e, se for indicado um modelo treinado,
+do pipeline completo do Rasa para as mesmas mensagens. A mistura de
+mensagens imita o tráfego real: respostas do quiz, saudações e
+confirmações, ao lado de perguntas em texto livre que não estão no índice.
+
+Uso:
+    python -m benchmarks.bench_nlu [--repeticoes 20000]
+    python -m benchmarks.bench_nlu --modelo models/   # requer o Rasa instalado
+"""
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Text, Tuple
+
+from addons.atalho_nlu import CAMINHO_NLU_PADRAO, IndiceAtalhos
+
+# Mensagens típicas de uma conversa de onboarding
+MENSAGENS = (
+    "a", "B", "c", "opção d", "Olá!", "bom dia", "sim", "ok", "obrigado, adeus",
+    "quero fazer o quiz", "adeus",
+    "qual é o horário de trabalho na sexta-feira?",
+    "não consigo aceder ao email da empresa, podem ajudar?",
+    "gostava de falar com alguém dos recursos humanos sobre as férias",
+    "quando recebo o portátil?",
+)
+
+
+def _medir(funcao: Callable[[Text], object], mensagens: Sequence[Text], repeticoes: int) -> Tuple[float, float]:
+    """Latência e CPU médias por mensagem, em microssegundos."""
+    total = len(mensagens) * repeticoes
+    parede, cpu = time.perf_counter(), time.process_time()
+    for _ in range(repeticoes):
+        for mensagem in mensagens:
+            funcao(mensagem)
+    parede, cpu = time.perf_counter() - parede, time.process_time() - cpu
+    return parede / total * 1e6, cpu / total * 1e6
+
+
+def _pipeline_completo(modelo: Path) -> Callable[[Text], object]:
+    from rasa.core.agent import Agent
+
+    agente = Agent.load(str(modelo))
+    ciclo = asyncio.new_event_loop()
+    return lambda mensagem: ciclo.run_until_complete(agente.parse_message(mensagem))
+
+
+def main(argumentos: Optional[Sequence[Text]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nlu", type=Path, default=CAMINHO_NLU_PADRAO, help="dados NLU do índice")
+    parser.add_argument("--repeticoes", type=int, default=20_000)
+    parser.add_argument("--modelo", type=Path, help="modelo Rasa treinado (ficheiro ou pasta models/)")
+    parser.add_argument("--repeticoes-modelo", type=int, default=20)
+    args = parser.parse_args(argumentos)
+
+    indice = IndiceAtalhos.de_ficheiro(args.nlu)
+    atalho = [m for m in MENSAGENS if indice.intent(m) is not None]
+    restantes = [m for m in MENSAGENS if m not in atalho]
+    taxa = len(atalho) / len(MENSAGENS)
+
+    linhas: List[Tuple[Text, float, float]] = [
+        ("atalho (acerto)",) + _medir(indice.classificar, atalho, args.repeticoes),
+        ("atalho (falha, custo extra)",) + _medir(indice.classificar, restantes, args.repeticoes),
+    ]
+
+    if args.modelo is not None:
+        completo = _pipeline_completo(args.modelo)
+        pipeline = _medir(completo, MENSAGENS, args.repeticoes_modelo)
+        linhas.append(("pipeline completo",) + pipeline)
+        # Com o atalho: os acertos custam uma consulta ao índice, as falhas a consulta e o pipeline
+        acerto, falha = linhas[0], linhas[1]
+        linhas.append(
+            (
+                "atalho + pipeline",
+                taxa * acerto[1] + (1 - taxa) * (falha[1] + pipeline[0]),
+                taxa * acerto[2] + (1 - taxa) * (falha[2] + pipeline[1]),
+            )
+        )
+
+    print(f"{len(indice)} textos no índice; {taxa:.0%} das mensagens de teste resolvidas pelo atalho\n")
+    print(f"{'':<30} {'latência (µs)':>14} {'CPU (µs)':>10}")
+    for nome, latencia, cpu in linhas:
+        print(f"{nome:<30} {latencia:>14.1f} {cpu:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Micro-benchmark da renderização das mensagens das custom actions.
+
+Compara o custo por chamada da abordagem antiga (f-strings multi-linha e o
+dicionário ``etapas_info`` reconstruídos em cada ``run()``) com o registo de
+templates pré-compilados e a respetiva cache LRU.
+
+Uso:
+    python -m benchmarks.bench_templates [--chamadas 200000] [--nomes 500]
+"""
+
+import argparse
+import timeit
+from typing import Callable, List, Optional, Text
+
+from actions.actions import TEMPLATES_ETAPAS
+from actions.templates import RegistoTemplates, TEMPLATES_PADRAO
+
+
+def _etapa_antes(nome: Text, etapa: Optional[Text]) -> Text:
+    """Reproduz a construção original de ``ActionVerificarEtapaOnboarding``."""
+    etapas_info = {
+        "pre_onboarding": (
+            f"📋 Olá{nome}! Encontra-se na fase de **Pré-onboarding**.\n\n"
+            "**O que deve fazer agora:**\n"
+            "• 📄 Ler os documentos enviados (manual, código de conduta, etc.)\n"
+            "• ✍️ Assinar os documentos que requerem assinatura\n"
+            "• 📧 Confirmar os detalhes do primeiro dia com os RH\n"
+            "• 🖥️ Preparar o equipamento necessário"
+        ),
+        "primeiro_dia": (
+            f"🏢 Olá{nome}! É o seu **Primeiro Dia** na The100s!\n\n"
+            "**Agenda de hoje:**\n"
+            "• 👋 Apresentações com a equipa\n"
+            "• 🖥️ Configuração do posto de trabalho\n"
+            "• 🔑 Receção das credenciais de acesso\n"
+            "• 🍽️ Almoço com o gestor/equipa\n"
+            "• 📋 Briefing inicial com o seu gestor"
+        ),
+        "primeira_semana": (
+            f"📅 Olá{nome}! Está na sua **Primeira Semana** na The100s!\n\n"
+            "**Objetivos desta semana:**\n"
+            "• 🤝 Reuniões de apresentação com as equipas chave\n"
+            "• 📚 Formações iniciais obrigatórias\n"
+            "• 🎯 Definição de objetivos com o seu gestor\n"
+            "• 🔧 Conclusão da configuração de todas as ferramentas\n"
+            "• 📝 Realização do quiz de conhecimento"
+        ),
+    }
+    return etapas_info.get(
+        etapa,
+        (
+            f"👋 Olá{nome}! Bem-vindo(a) ao processo de onboarding da The100s!\n\n"
+            "Não consegui determinar a sua etapa atual. "
+            "Por favor, contacte os RH para verificar o seu estado de onboarding.\n\n"
+            "📧 **RH:** rh@the100s.com"
+        ),
+    )
+
+
+def _medir(funcao: Callable[[Text, Optional[Text]], Text], entradas: List) -> float:
+    """Devolve o custo médio por chamada, em nanossegundos."""
+
+    def correr() -> None:
+        for nome, etapa in entradas:
+            funcao(nome, etapa)
+
+    duracao = min(timeit.repeat(correr, number=1, repeat=5))
+    return duracao / len(entradas) * 1e9
+
+
+def main(argv: Optional[List[Text]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chamadas", type=int, default=200_000)
+    parser.add_argument("--nomes", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    # Uma vaga de contratações: N nomes distintos, a maioria repetidos ao longo do dia
+    nomes = [f", Colaborador {i}" for i in range(args.nomes)] + [""]
+    etapas = ["pre_onboarding", "primeiro_dia", "primeira_semana", None]
+    registo = RegistoTemplates(TEMPLATES_PADRAO)
+
+    entradas = [
+        (nomes[i % len(nomes)], etapas[i % len(etapas)]) for i in range(args.chamadas)
+    ]
+
+    def depois(nome: Text, etapa: Optional[Text]) -> Text:
+        return registo.renderizar(TEMPLATES_ETAPAS.get(etapa, "etapa_desconhecida"), nome)
+
+    for nome, etapa in entradas[: len(nomes) * len(etapas)]:
+        assert _etapa_antes(nome, etapa) == depois(nome, etapa)
+    registo.limpar_cache()
+
+    ns_antes = _medir(_etapa_antes, entradas)
+    ns_depois = _medir(depois, entradas)
+
+    print(f"Chamadas: {args.chamadas}  |  nomes distintos: {len(nomes)}")
+    print(f"f-strings + dict por chamada : {ns_antes:8.0f} ns/chamada")
+    print(f"templates pré-compilados     : {ns_depois:8.0f} ns/chamada")
+    print(f"Ganho                        : {ns_antes / ns_depois:8.2f}x")
+    print(f"Cache                        : {registo.estatisticas_cache()}")
+
+
+if __name__ == "__main__":
+    main()
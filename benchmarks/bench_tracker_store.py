@@ -0,0 +1,328 @@
+"""
+Benchmark do tracker store: carregamento e gravação de cada turno no PostgreSQL.
+
+Cria uma tabela ``events`` com o esquema do ``SQLTrackerStore`` do Rasa
+(num esquema próprio, ``bench_tracker``), com ``--conversas`` conversas de
+``--eventos`` eventos cada. Depois, ``--concorrencia`` clientes fazem
+``--turnos`` turnos no total. Cada turno carrega a sessão atual de uma
+conversa e grava quatro eventos novos (user, action, slot, action_listen),
+como o Rasa faz no início e no fim de cada mensagem. Cada cliente tem as
+suas conversas, como o lock store do Rasa garante. Os modos comparados são:
+
+* ``psycopg2``: uma ligação síncrona, SQL sem preparar, a bloquear o event
+  loop, como a sessão do SQLAlchemy no ``SQLTrackerStore``;
+* ``asyncpg``: o pool de ``actions.db``, sem cache de consultas preparadas
+  (``DB_STATEMENT_CACHE=0``);
+* ``asyncpg-preparado``: o mesmo pool, com as consultas preparadas uma vez
+  por ligação.
+
+As consultas reproduzem as do ``SQLTrackerStore`` do Rasa 3.6: a sessão
+atual são os eventos a partir do último ``session_started``, e a gravação
+conta os eventos da sessão já gravados e acrescenta os restantes. O tracker
+store do projeto continua a ser o do Rasa (com o SQLAlchemy): nestas medições
+o p95 do asyncpg não ficou abaixo do do psycopg2.
+
+A latência de cada turno conta desde o pedido até ao fim da gravação,
+incluindo a espera pelo event loop ou por uma ligação livre. A tabela é
+recriada antes de cada modo.
+
+Uso (PostgreSQL temporário num contentor Docker):
+    python -m benchmarks.bench_tracker_store --docker [--turnos 5000] [--concorrencia 20]
+
+Ou com a base de dados das variáveis ``DB_*`` (o esquema é apagado no fim):
+    DB_HOST=localhost python -m benchmarks.bench_tracker_store
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import subprocess
+import time
+from contextlib import closing
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Text, Tuple
+
+from actions.db import ConfiguracaoPool, configuracao_db, configuracao_pool, criar_pool
+from addons.compactacao import linha_evento
+from benchmarks.load_test import percentil
+
+ESQUEMA = "bench_tracker"
+IMAGEM_POSTGRES = "postgres:15-alpine"
+CONTENTOR = "bench-tracker-store"
+
+# Tabela ``events`` tal como o ``SQLTrackerStore`` do Rasa 3.6 a cria
+_CRIAR_TABELA = f"""
+    DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE;
+    CREATE SCHEMA {ESQUEMA};
+    CREATE TABLE {ESQUEMA}.events (
+        id SERIAL PRIMARY KEY,
+        sender_id VARCHAR(255) NOT NULL,
+        type_name VARCHAR(255) NOT NULL,
+        timestamp DOUBLE PRECISION,
+        intent_name VARCHAR(255),
+        action_name VARCHAR(255),
+        data TEXT
+    );
+    CREATE INDEX ON {ESQUEMA}.events (sender_id);
+"""
+
+_INICIO_SESSAO = """
+    COALESCE(
+        (SELECT max(timestamp) FROM events WHERE sender_id = $1 AND type_name = 'session_started'),
+        '-Infinity'
+    )
+"""
+
+CARREGAR_SESSAO = f"""
+    SELECT data FROM events
+    WHERE sender_id = $1 AND timestamp >= {_INICIO_SESSAO}
+    ORDER BY timestamp, id
+"""
+
+CONTAR_SESSAO = f"SELECT count(*) FROM events WHERE sender_id = $1 AND timestamp >= {_INICIO_SESSAO}"
+
+INSERIR = """
+    INSERT INTO events (sender_id, type_name, timestamp, intent_name, action_name, data)
+    VALUES ($1, $2, $3, $4, $5, $6)
+"""
+
+Evento = Dict[Text, Any]
+Turno = Callable[[Text, List[Evento]], Awaitable[None]]
+Fechar = Callable[[], Awaitable[None]]
+
+
+def _para_psycopg2(sql: Text) -> Text:
+    """``$1`` → ``%(p1)s``: as mesmas consultas, com os parâmetros do psycopg2."""
+    return re.sub(r"\$(\d+)", r"%(p\1)s", sql)
+
+
+def _parametros(*valores: Any) -> Dict[Text, Any]:
+    return {f"p{i}": valor for i, valor in enumerate(valores, start=1)}
+
+
+def eventos_turno(instante: float, rng: random.Random) -> List[Evento]:
+    """Eventos de um turno: a mensagem do utilizador, a resposta e um slot."""
+    intent = rng.choice(("saudar", "pedir_documentos", "responder_quiz", "pedir_faq"))
+    return [
+        {
+            "event": "user",
+            "timestamp": instante,
+            "text": "mensagem " * rng.randint(2, 12),
+            "parse_data": {
+                "intent": {"name": intent, "confidence": 0.97},
+                "entities": [],
+                "intent_ranking": [{"name": intent, "confidence": 0.97}, {"name": "saudar", "confidence": 0.02}],
+            },
+            "input_channel": "botframework",
+        },
+        {"event": "action", "timestamp": instante + 0.01, "name": f"action_{intent}", "policy": "TEDPolicy"},
+        {"event": "slot", "timestamp": instante + 0.02, "name": "quiz_pontuacao", "value": rng.randint(0, 5)},
+        {"event": "action", "timestamp": instante + 0.03, "name": "action_listen"},
+    ]
+
+
+def conversa_sintetica(eventos: int, rng: random.Random) -> List[Evento]:
+    conversa = [
+        {"event": "session_started", "timestamp": 1.0},
+        {"event": "action", "timestamp": 1.01, "name": "action_listen"},
+    ]
+    while len(conversa) < eventos:
+        conversa += eventos_turno(float(len(conversa)), rng)
+    return conversa
+
+
+def preparar_tabela(config: Dict[Text, Any], conversas: int, eventos: int) -> None:
+    import psycopg2
+    from psycopg2.extras import execute_values
+
+    rng = random.Random(42)
+    with closing(psycopg2.connect(**config)) as ligacao:
+        with ligacao, ligacao.cursor() as cursor:
+            cursor.execute(_CRIAR_TABELA)
+            for i in range(conversas):
+                linhas = [(f"29:{i}",) + linha_evento(evento) for evento in conversa_sintetica(eventos, rng)]
+                execute_values(
+                    cursor,
+                    f"INSERT INTO {ESQUEMA}.events"
+                    " (sender_id, type_name, timestamp, intent_name, action_name, data) VALUES %s",
+                    linhas,
+                )
+            cursor.execute(f"ANALYZE {ESQUEMA}.events")
+
+
+def apagar_tabela(config: Dict[Text, Any]) -> None:
+    import psycopg2
+
+    with closing(psycopg2.connect(**config)) as ligacao, ligacao, ligacao.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+
+
+# ---------------------------------------------------------------------------
+# Modos
+# ---------------------------------------------------------------------------
+
+
+async def carregar_eventos(ligacao: Any, sender_id: Text) -> List[Evento]:
+    """Eventos da sessão atual da conversa, numa ligação asyncpg."""
+    linhas = await ligacao.fetch(CARREGAR_SESSAO, sender_id)
+    return [json.loads(linha["data"]) for linha in linhas]
+
+
+async def gravar_eventos(ligacao: Any, sender_id: Text, eventos: Iterable[Evento]) -> int:
+    """Grava os eventos da sessão atual que ainda não estão na tabela; devolve quantos gravou."""
+    gravados = await ligacao.fetchval(CONTAR_SESSAO, sender_id)
+    novos = [(sender_id,) + linha_evento(evento) for evento in itertools.islice(eventos, gravados, None)]
+    if novos:
+        await ligacao.executemany(INSERIR, novos)
+    return len(novos)
+
+
+async def turno_psycopg2(config: Dict[Text, Any]) -> Tuple[Turno, Fechar]:
+    import psycopg2
+
+    ligacao = psycopg2.connect(**config, options=f"-c search_path={ESQUEMA}")
+    carregar, contar, inserir = (_para_psycopg2(sql) for sql in (CARREGAR_SESSAO, CONTAR_SESSAO, INSERIR))
+
+    async def turno(sender_id: Text, novos: List[Evento]) -> None:
+        with ligacao, ligacao.cursor() as cursor:
+            cursor.execute(carregar, _parametros(sender_id))
+            eventos = [json.loads(data) for (data,) in cursor.fetchall()] + novos
+        with ligacao, ligacao.cursor() as cursor:
+            cursor.execute(contar, _parametros(sender_id))
+            (gravados,) = cursor.fetchone()
+            cursor.executemany(inserir, [_parametros(sender_id, *linha_evento(e)) for e in eventos[gravados:]])
+
+    async def fechar() -> None:
+        ligacao.close()
+
+    return turno, fechar
+
+
+async def turno_asyncpg(config: Dict[Text, Any], dimensao: ConfiguracaoPool) -> Tuple[Turno, Fechar]:
+    pool = await criar_pool(config, dimensao, server_settings={"search_path": ESQUEMA})
+
+    async def turno(sender_id: Text, novos: List[Evento]) -> None:
+        async with pool.acquire(timeout=dimensao.espera) as ligacao:
+            eventos = await carregar_eventos(ligacao, sender_id)
+        async with pool.acquire(timeout=dimensao.espera) as ligacao:
+            await gravar_eventos(ligacao, sender_id, eventos + novos)
+
+    return turno, pool.close
+
+
+async def executar(turno: Turno, conversas: int, turnos: int, concorrencia: int) -> List[float]:
+    """Faz ``turnos`` turnos com ``concorrencia`` clientes; devolve as latências ordenadas."""
+    latencias: List[float] = []
+
+    async def cliente(indice: int) -> None:
+        rng = random.Random(indice)
+        minhas = [f"29:{i}" for i in range(indice, conversas, concorrencia)]
+        for numero in range(turnos // concorrencia):
+            sender_id = rng.choice(minhas)
+            novos = eventos_turno(1e6 + numero, rng)
+            pedido = time.perf_counter()
+            await asyncio.sleep(0)  # o pedido espera pelo event loop, como no servidor
+            await turno(sender_id, novos)
+            latencias.append(time.perf_counter() - pedido)
+
+    await asyncio.gather(*(cliente(i) for i in range(min(concorrencia, conversas))))
+    return sorted(latencias)
+
+
+# ---------------------------------------------------------------------------
+# PostgreSQL num contentor
+# ---------------------------------------------------------------------------
+
+
+def iniciar_contentor(porta: int, timeout: float = 60.0) -> Dict[Text, Any]:
+    """Inicia um PostgreSQL descartável e devolve a configuração para ``psycopg2.connect``."""
+    import psycopg2
+
+    comando = ["docker", "run", "-d", "--rm", "--name", CONTENTOR, "-p", f"{porta}:5432"]
+    comando += ["-e", "POSTGRES_PASSWORD=postgres", IMAGEM_POSTGRES]
+    subprocess.run(comando, check=True, capture_output=True)
+    config = {
+        "host": "localhost",
+        "port": porta,
+        "dbname": "postgres",
+        "user": "postgres",
+        "password": "postgres",
+        "connect_timeout": 5,
+    }
+    limite = time.monotonic() + timeout
+    while True:
+        try:
+            psycopg2.connect(**config).close()
+            return config
+        except psycopg2.OperationalError:
+            if time.monotonic() > limite:
+                parar_contentor()
+                raise
+            time.sleep(0.5)
+
+
+def parar_contentor() -> None:
+    subprocess.run(["docker", "stop", CONTENTOR], capture_output=True)
+
+
+# ---------------------------------------------------------------------------
+# Linha de comandos
+# ---------------------------------------------------------------------------
+
+
+async def _medir_modos(args: argparse.Namespace, config: Dict[Text, Any]) -> None:
+    dimensao = configuracao_pool()._replace(maximo=args.pool_max)
+    modos = [
+        ("psycopg2", lambda: turno_psycopg2(config)),
+        ("asyncpg", lambda: turno_asyncpg(config, dimensao._replace(cache_consultas=0))),
+        ("asyncpg-preparado", lambda: turno_asyncpg(config, dimensao)),
+    ]
+    print(f"Conversas: {args.conversas} × {args.eventos} eventos  |  turnos: {args.turnos}"
+          f"  |  concorrência: {args.concorrencia}  |  pool: {args.pool_max} ligações")
+    print(f"{'modo':<20}{'turnos/s':>10}{'p50 (ms)':>11}{'p95 (ms)':>11}{'p99 (ms)':>11}")
+    for nome, criar in modos:
+        preparar_tabela(config, args.conversas, args.eventos)
+        turno, fechar = await criar()
+        antes = time.perf_counter()
+        try:
+            latencias = await executar(turno, args.conversas, args.turnos, args.concorrencia)
+        finally:
+            await fechar()
+        duracao = time.perf_counter() - antes
+        print(
+            f"{nome:<20}{len(latencias) / duracao:>10.0f}{percentil(latencias, 50) * 1000:>11.2f}"
+            f"{percentil(latencias, 95) * 1000:>11.2f}{percentil(latencias, 99) * 1000:>11.2f}"
+        )
+
+
+def main(argumentos: Optional[Sequence[Text]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docker", action="store_true", help=f"usa um {IMAGEM_POSTGRES} temporário")
+    parser.add_argument("--porta", type=int, default=55432, help="porta local do contentor")
+    parser.add_argument("--conversas", type=int, default=500)
+    parser.add_argument("--eventos", type=int, default=60, help="eventos de cada conversa antes do teste")
+    parser.add_argument("--turnos", type=int, default=5000)
+    parser.add_argument("--concorrencia", type=int, default=20, help="clientes em simultâneo")
+    parser.add_argument("--pool-max", type=int, default=int(os.getenv("DB_POOL_MAX", "10")))
+    args = parser.parse_args(argumentos)
+
+    if args.docker:
+        config = iniciar_contentor(args.porta)
+    else:
+        config = configuracao_db()
+        if config is None:
+            parser.error("defina DB_HOST ou use --docker")
+    try:
+        asyncio.run(_medir_modos(args, config))
+    finally:
+        if args.docker:
+            parar_contentor()
+        else:
+            apagar_tabela(config)
+
+
+if __name__ == "__main__":
+    main()
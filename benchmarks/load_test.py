@@ -0,0 +1,335 @@
+"""
+Teste de carga do webhook do action server.
+
+Gera pedidos ``POST /webhook`` realistas, com o mesmo formato que o Rasa
+envia ao action server: tracker com slots do colaborador (``nome_colaborador``,
+``quiz_pontuacao``, ``etapa_onboarding``, ...), histórico de eventos e o
+domínio completo. Os pedidos são enviados em ciclo aberto a um ritmo fixo
+(``--rps``) durante ``--duracao`` segundos, e o relatório mostra o débito e
+os percentis p50/p95/p99 da latência por action.
+
+A latência é medida a partir do instante em que o pedido *devia* ter sido
+enviado, e não de quando foi efetivamente enviado: se o servidor não
+acompanhar o ritmo, o atraso acumulado aparece nos percentis em vez de ser
+escondido pelo próprio gerador de carga.
+
+Uso (com o action server a correr):
+    python -m benchmarks.load_test --url http://localhost:5055/webhook --rps 100 --duracao 60
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Text, Tuple
+
+import aiohttp
+import yaml
+
+URL_PADRAO = "http://localhost:5055/webhook"
+DOMINIO_PADRAO = Path(__file__).resolve().parent.parent / "domain.yml"
+
+# Peso de cada action numa conversa de onboarding típica: o quiz domina o tráfego
+MISTURA_ACOES: Tuple[Tuple[Text, int], ...] = (
+    ("action_boas_vindas_personalizada", 2),
+    ("action_verificar_etapa_onboarding", 3),
+    ("action_enviar_documentos", 2),
+    ("action_iniciar_quiz", 2),
+    ("action_verificar_resposta_quiz", 8),
+    ("action_agendar_reuniao", 1),
+    ("action_registar_feedback", 1),
+)
+
+# Intent que antecede cada action no histórico gerado
+_INTENT_DA_ACAO = {
+    "action_boas_vindas_personalizada": "saudar",
+    "action_verificar_etapa_onboarding": "pedir_info_empresa",
+    "action_enviar_documentos": "pedir_documentos",
+    "action_iniciar_quiz": "iniciar_quiz",
+    "action_verificar_resposta_quiz": "responder_quiz",
+    "action_agendar_reuniao": "agendar_reuniao",
+    "action_registar_feedback": "dar_feedback",
+}
+
+_NOMES = ("Ana", "João", "Maria", "Pedro", "Inês", "Tiago", "Beatriz", "Rui", "Sofia", "Miguel")
+_APELIDOS = ("Silva", "Santos", "Ferreira", "Pereira", "Oliveira", "Costa", "Rodrigues", "Gomes")
+_CARGOS = ("Engenheiro de Software", "Analista de Dados", "Designer", "Gestor de Produto")
+_DEPARTAMENTOS = ("Tecnologia", "Recursos Humanos", "Marketing", "Finanças")
+_ETAPAS = ("pre_onboarding", "primeiro_dia", "primeira_semana", "onboarding_concluido", None)
+_TEXTOS_FEEDBACK = (
+    "Está a correr muito bem, obrigado!",
+    "Gostava de ter recebido o portátil mais cedo.",
+    "A equipa tem sido muito acolhedora.",
+)
+
+
+# ---------------------------------------------------------------------------
+# Geração dos pedidos
+# ---------------------------------------------------------------------------
+
+
+def carregar_dominio(caminho: Path = DOMINIO_PADRAO) -> Dict[Text, Any]:
+    """Lê o ``domain.yml``, que o Rasa envia por inteiro em cada pedido ao webhook."""
+    with open(caminho, encoding="utf-8") as ficheiro:
+        return yaml.safe_load(ficheiro)
+
+
+def gerar_slots(rng: random.Random) -> Dict[Text, Any]:
+    """Slots de um colaborador fictício, a meio do onboarding."""
+    nome = f"{rng.choice(_NOMES)} {rng.choice(_APELIDOS)}"
+    respondidas = rng.randint(0, 5)
+    acertos = rng.getrandbits(respondidas)
+    return {
+        "nome_colaborador": nome,
+        "cargo": rng.choice(_CARGOS),
+        "departamento": rng.choice(_DEPARTAMENTOS),
+        "gestor": f"{rng.choice(_NOMES)} {rng.choice(_APELIDOS)}",
+        "email_gestor": None,
+        "data_inicio": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "email_colaborador": f"{nome.split()[0].lower()}@the100s.com",
+        "quiz_pontuacao": float(acertos.bit_count()),
+        "quiz_progresso": (acertos << 16) | respondidas,
+        "quiz_banco": "geral",
+        "etapa_onboarding": rng.choice(_ETAPAS),
+    }
+
+
+def _mensagem_utilizador(rng: random.Random, intent: Text, texto: Text, instante: float) -> Dict[Text, Any]:
+    return {
+        "event": "user",
+        "timestamp": instante,
+        "text": texto,
+        "parse_data": {
+            "intent": {"name": intent, "confidence": round(rng.uniform(0.7, 1.0), 4)},
+            "entities": [],
+            "text": texto,
+        },
+        "input_channel": "botframework",
+    }
+
+
+def gerar_eventos(
+    rng: random.Random, slots: Dict[Text, Any], turnos: int, instante: float
+) -> List[Dict[Text, Any]]:
+    """Histórico da conversa: início de sessão, ``turnos`` trocas e os slots definidos."""
+    eventos: List[Dict[Text, Any]] = [
+        {"event": "action", "timestamp": instante, "name": "action_session_start"},
+        {"event": "session_started", "timestamp": instante},
+        {"event": "action", "timestamp": instante, "name": "action_listen"},
+    ]
+    for chave, valor in slots.items():
+        if valor is not None:
+            eventos.append({"event": "slot", "timestamp": instante, "name": chave, "value": valor})
+
+    acoes = [acao for acao, _ in MISTURA_ACOES]
+    for _ in range(turnos):
+        acao = rng.choice(acoes)
+        intent = _INTENT_DA_ACAO[acao]
+        eventos.append(_mensagem_utilizador(rng, intent, intent.replace("_", " "), instante))
+        eventos.append({"event": "action", "timestamp": instante, "name": acao})
+        eventos.append({"event": "bot", "timestamp": instante, "text": "…", "data": {}})
+        eventos.append({"event": "action", "timestamp": instante, "name": "action_listen"})
+    return eventos
+
+
+def _ultima_mensagem(rng: random.Random, acao: Text) -> Tuple[Text, Text]:
+    intent = _INTENT_DA_ACAO[acao]
+    if acao == "action_verificar_resposta_quiz":
+        return intent, f"opção {rng.choice('abc')}"
+    if acao == "action_registar_feedback":
+        return intent, rng.choice(_TEXTOS_FEEDBACK)
+    return intent, intent.replace("_", " ")
+
+
+def gerar_payload(
+    rng: random.Random,
+    acao: Text,
+    dominio: Optional[Dict[Text, Any]] = None,
+    turnos: int = 10,
+) -> Dict[Text, Any]:
+    """Corpo de um pedido ao webhook para executar ``acao``."""
+    instante = time.time()
+    slots = gerar_slots(rng)
+    intent, texto = _ultima_mensagem(rng, acao)
+    ultima = _mensagem_utilizador(rng, intent, texto, instante)
+    eventos = gerar_eventos(rng, slots, turnos, instante)
+    eventos.append(ultima)
+    sender_id = uuid.UUID(int=rng.getrandbits(128)).hex
+
+    return {
+        "next_action": acao,
+        "sender_id": sender_id,
+        "version": "3.6.0",
+        "domain": dominio if dominio is not None else {},
+        "tracker": {
+            "sender_id": sender_id,
+            "slots": slots,
+            "latest_message": ultima["parse_data"],
+            "latest_event_time": instante,
+            "followup_action": None,
+            "paused": False,
+            "events": eventos,
+            "latest_input_channel": "botframework",
+            "active_loop": {},
+            "latest_action": {"action_name": "action_listen"},
+            "latest_action_name": "action_listen",
+        },
+    }
+
+
+def gerar_pedidos(
+    rng: random.Random,
+    dominio: Optional[Dict[Text, Any]] = None,
+    turnos: int = 10,
+    mistura: Sequence[Tuple[Text, int]] = MISTURA_ACOES,
+) -> Iterator[Tuple[Text, Dict[Text, Any]]]:
+    """Sequência infinita de ``(action, payload)`` segundo a mistura de actions."""
+    acoes = [acao for acao, _ in mistura]
+    pesos = [peso for _, peso in mistura]
+    while True:
+        acao = rng.choices(acoes, pesos)[0]
+        yield acao, gerar_payload(rng, acao, dominio, turnos)
+
+
+# ---------------------------------------------------------------------------
+# Execução e relatório
+# ---------------------------------------------------------------------------
+
+
+def percentil(ordenados: Sequence[float], p: float) -> float:
+    """Percentil pelo método do posto mais próximo; ``ordenados`` tem de estar ordenado."""
+    if not ordenados:
+        return float("nan")
+    posto = max(1, -(-len(ordenados) * p // 100))
+    return ordenados[int(posto) - 1]
+
+
+class ResultadosCarga:
+    """Latências e erros recolhidos durante o teste, por action."""
+
+    def __init__(self) -> None:
+        self.latencias: Dict[Text, List[float]] = {}
+        self.erros: Dict[Text, int] = {}
+        self.duracao = 0.0
+
+    def registar(self, acao: Text, latencia: float, sucesso: bool) -> None:
+        self.latencias.setdefault(acao, []).append(latencia)
+        if not sucesso:
+            self.erros[acao] = self.erros.get(acao, 0) + 1
+
+    def total(self) -> int:
+        return sum(len(lista) for lista in self.latencias.values())
+
+    def resumo(self) -> Dict[Text, Dict[Text, float]]:
+        """Pedidos, erros, débito e percentis (em segundos) de cada action."""
+        resumo = {}
+        for acao, latencias in sorted(self.latencias.items()):
+            ordenadas = sorted(latencias)
+            resumo[acao] = {
+                "pedidos": len(ordenadas),
+                "erros": self.erros.get(acao, 0),
+                "rps": len(ordenadas) / self.duracao if self.duracao else 0.0,
+                "p50": percentil(ordenadas, 50),
+                "p95": percentil(ordenadas, 95),
+                "p99": percentil(ordenadas, 99),
+                "max": ordenadas[-1],
+            }
+        return resumo
+
+    def relatorio(self) -> Text:
+        linhas = [
+            f"{'action':<36} {'pedidos':>8} {'erros':>6} {'rps':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        ]
+        for acao, valores in self.resumo().items():
+            linhas.append(
+                f"{acao:<36} {valores['pedidos']:>8} {valores['erros']:>6} {valores['rps']:>8.1f} "
+                f"{valores['p50'] * 1000:>8.1f} {valores['p95'] * 1000:>8.1f} "
+                f"{valores['p99'] * 1000:>8.1f} {valores['max'] * 1000:>8.1f}"
+            )
+        linhas.append(
+            f"Total: {self.total()} pedidos em {self.duracao:.1f}s "
+            f"({self.total() / self.duracao if self.duracao else 0.0:.1f} pedidos/s)"
+        )
+        return "\n".join(linhas)
+
+
+async def _enviar(
+    sessao: aiohttp.ClientSession,
+    url: Text,
+    acao: Text,
+    payload: Dict[Text, Any],
+    agendado: float,
+    limite: asyncio.Semaphore,
+    resultados: ResultadosCarga,
+) -> None:
+    async with limite:
+        try:
+            async with sessao.post(url, json=payload) as resposta:
+                await resposta.read()
+                sucesso = resposta.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            sucesso = False
+    resultados.registar(acao, time.perf_counter() - agendado, sucesso)
+
+
+async def executar_carga(
+    url: Text,
+    pedidos: Iterator[Tuple[Text, Dict[Text, Any]]],
+    rps: float,
+    duracao: float,
+    concorrencia: int = 200,
+    timeout: float = 30.0,
+) -> ResultadosCarga:
+    """Envia pedidos a ``rps`` pedidos/segundo durante ``duracao`` segundos."""
+    resultados = ResultadosCarga()
+    limite = asyncio.Semaphore(concorrencia)
+    total = max(1, int(rps * duracao))
+    intervalo = 1.0 / rps
+    conector = aiohttp.TCPConnector(limit=concorrencia)
+
+    async with aiohttp.ClientSession(
+        connector=conector, timeout=aiohttp.ClientTimeout(total=timeout)
+    ) as sessao:
+        # Os payloads são gerados antes de arrancar o relógio, para não medir o gerador
+        fila = [next(pedidos) for _ in range(total)]
+        inicio = time.perf_counter()
+        tarefas = []
+        for indice, (acao, payload) in enumerate(fila):
+            agendado = inicio + indice * intervalo
+            espera = agendado - time.perf_counter()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            tarefas.append(
+                asyncio.create_task(
+                    _enviar(sessao, url, acao, payload, agendado, limite, resultados)
+                )
+            )
+        await asyncio.gather(*tarefas)
+        resultados.duracao = time.perf_counter() - inicio
+
+    return resultados
+
+
+def main(argumentos: Optional[Sequence[Text]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=URL_PADRAO, help="URL do webhook do action server")
+    parser.add_argument("--rps", type=float, default=50.0, help="pedidos por segundo")
+    parser.add_argument("--duracao", type=float, default=30.0, help="duração em segundos")
+    parser.add_argument("--concorrencia", type=int, default=200, help="pedidos simultâneos no máximo")
+    parser.add_argument("--turnos", type=int, default=10, help="trocas no histórico de cada tracker")
+    parser.add_argument("--dominio", type=Path, default=DOMINIO_PADRAO, help="domain.yml enviado nos pedidos")
+    parser.add_argument("--semente", type=int, default=42, help="semente do gerador de pedidos")
+    args = parser.parse_args(argumentos)
+
+    pedidos = gerar_pedidos(random.Random(args.semente), carregar_dominio(args.dominio), args.turnos)
+    resultados = asyncio.run(
+        executar_carga(args.url, pedidos, args.rps, args.duracao, args.concorrencia)
+    )
+    print(resultados.relatorio())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+-- Bancos de perguntas do quiz de conhecimento (ver actions/quiz.py)
+-- Executado pelo PostgreSQL na primeira inicialização do volume de dados.
+
+CREATE TABLE IF NOT EXISTS quiz_perguntas (
+    banco            TEXT        NOT NULL,
+    id               INTEGER     NOT NULL,
+    ordem            INTEGER     NOT NULL DEFAULT 0,
+    pergunta         TEXT        NOT NULL,
+    opcoes           JSONB       NOT NULL DEFAULT '{}'::jsonb,
+    resposta_correta CHAR(1)     NOT NULL,
+    explicacao       TEXT        NOT NULL,
+    ativa            BOOLEAN     NOT NULL DEFAULT TRUE,
+    atualizada_em    TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (banco, id)
+);
+
+CREATE INDEX IF NOT EXISTS quiz_perguntas_ordem_idx
+    ON quiz_perguntas (banco, ordem) WHERE ativa;
+
+-- Banco geral (o mesmo conteúdo do banco base em actions/actions.py)
+INSERT INTO quiz_perguntas (banco, id, ordem, pergunta, opcoes, resposta_correta, explicacao)
+VALUES
+    ('geral', 1, 1,
+     E'❓ **Pergunta 1/3:** Qual é a missão da The100s?\n\nA) Ser a maior empresa do mundo\nB) Proporcionar soluções de qualidade superior, mantendo um ambiente positivo e inclusivo\nC) Maximizar o lucro a qualquer custo\nD) Reduzir custos operacionais',
+     '{"a": "Ser a maior empresa do mundo", "b": "Proporcionar soluções de qualidade superior, mantendo um ambiente positivo e inclusivo", "c": "Maximizar o lucro a qualquer custo", "d": "Reduzir custos operacionais"}',
+     'b',
+     '✅ A missão da The100s é proporcionar soluções de qualidade superior aos nossos clientes, mantendo um ambiente de trabalho positivo e inclusivo.'),
+    ('geral', 2, 2,
+     E'❓ **Pergunta 2/3:** Qual dos seguintes NÃO é um valor da The100s?\n\nA) Integridade\nB) Competição interna\nC) Inovação\nD) Trabalho em Equipa',
+     '{"a": "Integridade", "b": "Competição interna", "c": "Inovação", "d": "Trabalho em Equipa"}',
+     'b',
+     '✅ Os valores da The100s são: Integridade, Inovação, Excelência, Trabalho em Equipa e Respeito. A ''Competição interna'' não faz parte dos nossos valores.'),
+    ('geral', 3, 3,
+     E'❓ **Pergunta 3/3:** Quantos dias úteis de férias tem um colaborador da The100s por ano?\n\nA) 20 dias\nB) 25 dias\nC) 22 dias\nD) 30 dias',
+     '{"a": "20 dias", "b": "25 dias", "c": "22 dias", "d": "30 dias"}',
+     'c',
+     '✅ Os colaboradores da The100s têm direito a 22 dias úteis de férias por ano, conforme a legislação laboral portuguesa.')
+ON CONFLICT (banco, id) DO NOTHING;
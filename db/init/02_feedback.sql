@@ -0,0 +1,12 @@
+-- Feedback dos colaboradores sobre o onboarding (ver actions/feedback.py)
+
+CREATE TABLE IF NOT EXISTS feedback_onboarding (
+    id          BIGSERIAL   PRIMARY KEY,
+    sender_id   TEXT        NOT NULL,
+    nome        TEXT,
+    texto       TEXT        NOT NULL,
+    recebido_em TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS feedback_onboarding_recebido_em_idx
+    ON feedback_onboarding (recebido_em);
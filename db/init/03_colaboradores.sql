@@ -0,0 +1,29 @@
+-- Colaboradores em onboarding, mantidos pelos RH (ver actions/etapas.py)
+
+CREATE TABLE IF NOT EXISTS colaboradores (
+    email         TEXT        PRIMARY KEY,
+    nome          TEXT        NOT NULL,
+    cargo         TEXT,
+    departamento  TEXT,
+    gestor        TEXT,
+    email_gestor  TEXT,
+    data_inicio   DATE,
+    ativo         BOOLEAN     NOT NULL DEFAULT TRUE,
+    atualizado_em TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- O action server lê apenas as linhas alteradas desde a última leitura
+CREATE INDEX IF NOT EXISTS colaboradores_atualizado_em_idx
+    ON colaboradores (atualizado_em);
+
+CREATE OR REPLACE FUNCTION colaboradores_marcar_atualizacao() RETURNS trigger AS $$
+BEGIN
+    NEW.atualizado_em := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS colaboradores_atualizado_em ON colaboradores;
+CREATE TRIGGER colaboradores_atualizado_em
+    BEFORE UPDATE ON colaboradores
+    FOR EACH ROW EXECUTE FUNCTION colaboradores_marcar_atualizacao();
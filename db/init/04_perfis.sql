@@ -0,0 +1,6 @@
+-- Identificador Teams/Bot Framework de cada colaborador (ver actions/perfis.py)
+
+ALTER TABLE colaboradores ADD COLUMN IF NOT EXISTS id_teams TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS colaboradores_id_teams_idx
+    ON colaboradores (id_teams) WHERE ativo;
@@ -0,0 +1,49 @@
+-- Perguntas frequentes dos RH (ver actions/faq.py)
+-- O action server indexa as linhas novas ou alteradas sem novo treino do
+-- modelo Rasa; para retirar uma pergunta, marque-a como inativa.
+
+CREATE TABLE IF NOT EXISTS faq (
+    id            INTEGER     PRIMARY KEY,
+    pergunta      TEXT        NOT NULL,
+    resposta      TEXT        NOT NULL,
+    -- Outras formas de fazer a mesma pergunta, indexadas junto com ela
+    variantes     JSONB       NOT NULL DEFAULT '[]'::jsonb,
+    ativa         BOOLEAN     NOT NULL DEFAULT TRUE,
+    atualizada_em TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- O action server lê apenas as linhas alteradas desde a última leitura
+CREATE INDEX IF NOT EXISTS faq_atualizada_em_idx
+    ON faq (atualizada_em);
+
+CREATE OR REPLACE FUNCTION faq_marcar_atualizacao() RETURNS trigger AS $$
+BEGIN
+    NEW.atualizada_em := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS faq_atualizada_em ON faq;
+CREATE TRIGGER faq_atualizada_em
+    BEFORE UPDATE ON faq
+    FOR EACH ROW EXECUTE FUNCTION faq_marcar_atualizacao();
+
+-- Entradas iniciais (as mesmas do FAQ_BASE em actions/actions.py)
+INSERT INTO faq (id, pergunta, resposta, variantes)
+VALUES
+    (1, 'Qual é o horário de trabalho?',
+     'O horário padrão é das 9h às 18h, com flexibilidade conforme acordado com o seu gestor.',
+     '["a que horas começo a trabalhar?", "a que horas saio?", "tenho horário flexível?"]'),
+    (2, 'Onde fica o meu posto de trabalho?',
+     'O seu posto de trabalho está identificado. Consulte o seu gestor ou RH para confirmação.',
+     '["onde me sento?", "qual é a minha secretária?", "onde fico no escritório?"]'),
+    (3, 'Como funciona o registo de ponto?',
+     'Através do sistema de RH (SIRH). Receberá as credenciais por email.',
+     '["como marco o ponto?", "onde registo as horas?", "credenciais do SIRH"]'),
+    (4, 'Quando recebo o primeiro salário?',
+     'O pagamento é processado no último dia útil de cada mês.',
+     '["quando é o pagamento do ordenado?", "em que dia pagam?", "quando recebo o vencimento?"]'),
+    (5, 'Tenho dúvidas sobre benefícios, a quem contacto?',
+     'Contacte o departamento de RH: rh@the100s.com',
+     '["quem trata dos benefícios?", "seguro de saúde", "subsídio de refeição"]')
+ON CONFLICT (id) DO NOTHING;
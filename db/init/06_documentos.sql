@@ -0,0 +1,36 @@
+-- Catálogo dos documentos de onboarding (ver actions/documentos.py)
+-- Um documento sem departamento nem cargo é enviado a todos os colaboradores;
+-- com departamento e/ou cargo, apenas a quem tem esse departamento e/ou cargo.
+-- O action server relê o catálogo a cada 5 minutos.
+
+CREATE TABLE IF NOT EXISTS documentos (
+    id           INTEGER PRIMARY KEY,
+    titulo       TEXT    NOT NULL,
+    -- Ligação de partilha do SharePoint; o título e o endereço atuais do
+    -- ficheiro são obtidos pela Graph API
+    url          TEXT,
+    -- Texto mostrado em vez da ligação (por exemplo, documentos enviados por email)
+    nota         TEXT,
+    icone        TEXT    NOT NULL DEFAULT '📄',
+    departamento TEXT,
+    cargo        TEXT,
+    ordem        INTEGER NOT NULL DEFAULT 0,
+    ativo        BOOLEAN NOT NULL DEFAULT TRUE,
+    CHECK (url IS NOT NULL OR nota IS NOT NULL)
+);
+
+-- Documentos comuns (os mesmos do DOCUMENTOS_BASE em actions/actions.py) e
+-- alguns exemplos por departamento e cargo
+INSERT INTO documentos (id, titulo, url, nota, icone, departamento, cargo, ordem)
+VALUES
+    (1, 'Manual do Colaborador', 'https://the100s.sharepoint.com/manual-colaborador', NULL, '📋', NULL, NULL, 1),
+    (2, 'Código de Conduta', 'https://the100s.sharepoint.com/codigo-conduta', NULL, '⚖️', NULL, NULL, 2),
+    (3, 'Contrato de Trabalho', NULL,
+     '📧 Enviado para o seu email pessoal — verifique a sua caixa de entrada', '📝', NULL, NULL, 3),
+    (4, 'Política de Privacidade e RGPD', 'https://the100s.sharepoint.com/politica-privacidade', NULL, '🔒', NULL, NULL, 4),
+    (5, 'Política de Uso de TI', 'https://the100s.sharepoint.com/politica-ti', NULL, '🖥️', NULL, NULL, 5),
+    (10, 'Guia de Desenvolvimento', 'https://the100s.sharepoint.com/tecnologia/guia-desenvolvimento', NULL, '💻', 'Tecnologia', NULL, 10),
+    (11, 'Política de Segurança da Informação', 'https://the100s.sharepoint.com/tecnologia/seguranca', NULL, '🔐', 'Tecnologia', NULL, 11),
+    (20, 'Manual de Vendas', 'https://the100s.sharepoint.com/comercial/manual-vendas', NULL, '📈', 'Comercial', NULL, 20),
+    (30, 'Guia do Gestor de Equipa', 'https://the100s.sharepoint.com/gestao/guia-gestor', NULL, '🧭', NULL, 'Gestor de Equipa', 30)
+ON CONFLICT (id) DO NOTHING;
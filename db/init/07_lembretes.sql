@@ -0,0 +1,22 @@
+-- Lembretes proativos do onboarding (ver actions/lembretes.py)
+
+-- Conversa pessoal de cada utilizador do Teams com o bot, gravada pelo canal
+-- Bot Framework do Rasa Server (ver addons/conversas.py)
+CREATE TABLE IF NOT EXISTS conversas_teams (
+    id_teams      TEXT        PRIMARY KEY,
+    service_url   TEXT        NOT NULL,
+    id_conversa   TEXT        NOT NULL,
+    id_bot        TEXT        NOT NULL,
+    id_tenant     TEXT,
+    atualizado_em TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Lembretes já tratados: o serviço não os volta a agendar depois de um reinício
+-- (estado 'enviado', ou 'rejeitado' quando o Teams recusou a mensagem)
+CREATE TABLE IF NOT EXISTS lembretes_enviados (
+    email      TEXT        NOT NULL,
+    etapa      TEXT        NOT NULL,
+    estado     TEXT        NOT NULL DEFAULT 'enviado',
+    enviado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (email, etapa)
+);
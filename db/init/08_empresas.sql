@@ -0,0 +1,4 @@
+-- Empresa do grupo de cada colaborador, que escolhe o pacote de conteúdos (ver actions/empresas.py)
+-- NULL: a empresa principal (os conteúdos de actions/templates.py e das restantes tabelas)
+
+ALTER TABLE colaboradores ADD COLUMN IF NOT EXISTS empresa TEXT;
@@ -0,0 +1,27 @@
+-- Filas de atendimento humano e regras de encaminhamento (ver actions/encaminhamento.py)
+
+CREATE TABLE IF NOT EXISTS filas_atendimento (
+    id       TEXT PRIMARY KEY,
+    nome     TEXT NOT NULL,
+    contacto TEXT NOT NULL,
+    prazo    TEXT NOT NULL  -- tempo de resposta indicado ao colaborador
+);
+
+-- departamento/intent NULL: qualquer um. Para cada conversa vale a primeira
+-- intent recente com regra (do departamento ou geral), depois a regra do
+-- departamento e, por fim, a regra geral (NULL, NULL) ou a fila 'rh'.
+CREATE TABLE IF NOT EXISTS regras_encaminhamento (
+    fila         TEXT NOT NULL REFERENCES filas_atendimento (id),
+    departamento TEXT,
+    intent       TEXT,
+    UNIQUE NULLS NOT DISTINCT (departamento, intent)
+);
+
+INSERT INTO filas_atendimento (id, nome, contacto, prazo) VALUES
+    ('rh', 'Equipa de RH', 'rh@the100s.com', '1 hora útil'),
+    ('ti', 'Equipa de Suporte TI', 'helpdesk@the100s.com (extensão 1234)', '4 horas úteis')
+ON CONFLICT (id) DO NOTHING;
+
+INSERT INTO regras_encaminhamento (fila, departamento, intent) VALUES
+    ('ti', NULL, 'pedir_ajuda_ti')
+ON CONFLICT DO NOTHING;
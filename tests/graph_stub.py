@@ -0,0 +1,116 @@
+"""
+Servidor local que imita os endpoints da Microsoft Graph API usados pelo bot.
+
+Usado nos testes para exercitar o cliente assíncrono sem aceder à rede:
+
+    async with servidor_graph_stub() as stub:
+        cliente = ClienteGraph(CacheTokens(CredencialFalsa()), url_base=stub.url)
+"""
+
+import asyncio
+import base64
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Text
+
+from aiohttp import web
+from azure.core.credentials import AccessToken
+
+
+class CredencialFalsa:
+    """Credencial ``azure-identity`` falsa que conta os tokens emitidos."""
+
+    def __init__(self, validade: float = 3600.0) -> None:
+        self.validade = validade
+        self.tokens_emitidos = 0
+
+    async def get_token(self, *escopos: Text) -> AccessToken:
+        self.tokens_emitidos += 1
+        return AccessToken(f"token-{self.tokens_emitidos}", int(time.time() + self.validade))
+
+    async def close(self) -> None:
+        pass
+
+
+class EstadoStub:
+    """Dados servidos e pedidos recebidos pelo stub."""
+
+    def __init__(self) -> None:
+        self.url = ""
+        self.disponibilidade: Dict[Text, Text] = {}
+        self.atraso_segundos = 0.0
+        self.estado_erro = 0
+        self.eventos_criados: List[Dict[Text, Any]] = []
+        # Ligação de partilha → ficheiro devolvido por /shares/{id}/driveItem
+        self.itens_partilhados: Dict[Text, Dict[Text, Any]] = {}
+        self.pedidos_em_curso = 0
+        self.max_pedidos_em_curso = 0
+        self.pedidos: List[Text] = []
+        self.autorizacoes: List[Text] = []
+
+
+@asynccontextmanager
+async def servidor_graph_stub() -> AsyncIterator[EstadoStub]:
+    """Arranca o stub numa porta livre de localhost e devolve o seu estado."""
+    estado = EstadoStub()
+
+    async def get_schedule(pedido: web.Request) -> web.Response:
+        estado.pedidos.append("getSchedule")
+        estado.autorizacoes.append(pedido.headers.get("Authorization", ""))
+        await asyncio.sleep(estado.atraso_segundos)
+        if estado.estado_erro:
+            return web.json_response({"error": {"code": "Erro"}}, status=estado.estado_erro)
+
+        corpo = await pedido.json()
+        valores = [
+            {"scheduleId": email, "availabilityView": estado.disponibilidade.get(email, "")}
+            for email in corpo["schedules"]
+        ]
+        return web.json_response({"value": valores})
+
+    async def criar_evento(pedido: web.Request) -> web.Response:
+        estado.pedidos.append("events")
+        corpo = await pedido.json()
+        corpo["organizador"] = pedido.match_info["utilizador"]
+        estado.eventos_criados.append(corpo)
+        return web.json_response(
+            {
+                "id": f"evento-{len(estado.eventos_criados)}",
+                "onlineMeeting": {"joinUrl": "https://teams.microsoft.com/l/meetup-join/stub"},
+            },
+            status=201,
+        )
+
+    async def item_partilhado(pedido: web.Request) -> web.Response:
+        estado.pedidos.append("driveItem")
+        estado.pedidos_em_curso += 1
+        estado.max_pedidos_em_curso = max(estado.max_pedidos_em_curso, estado.pedidos_em_curso)
+        try:
+            await asyncio.sleep(estado.atraso_segundos)
+        finally:
+            estado.pedidos_em_curso -= 1
+        if estado.estado_erro:
+            return web.json_response({"error": {"code": "Erro"}}, status=estado.estado_erro)
+
+        codificado = pedido.match_info["partilha"][2:]
+        url = base64.urlsafe_b64decode(codificado + "=" * (-len(codificado) % 4)).decode("utf-8")
+        item = estado.itens_partilhados.get(url)
+        if item is None:
+            return web.json_response({"error": {"code": "itemNotFound"}}, status=404)
+        return web.json_response(item)
+
+    app = web.Application()
+    app.router.add_post("/v1.0/users/{utilizador}/calendar/getSchedule", get_schedule)
+    app.router.add_post("/v1.0/users/{utilizador}/events", criar_evento)
+    app.router.add_get("/v1.0/shares/{partilha}/driveItem", item_partilhado)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    porta = site._server.sockets[0].getsockname()[1]
+    estado.url = f"http://127.0.0.1:{porta}/v1.0"
+    try:
+        yield estado
+    finally:
+        await runner.cleanup()
@@ -2,6 +2,8 @@
 Testes básicos para as custom actions do Bot de Onboarding da The100s.
 """
 
+import asyncio
+from datetime import date
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -13,9 +15,13 @@ from actions.actions import (
     ActionEnviarDocumentos,
     ActionIniciarQuiz,
     ActionRegistarFeedback,
+    ActionResponderFaq,
+    ActionSessionStart,
     ActionVerificarEtapaOnboarding,
     ActionVerificarRespostaQuiz,
 )
+from actions.perfis import DiretorioColaboradores, PerfilColaborador
+from actions.templates import TEMPLATES
 
 
 # ---------------------------------------------------------------------------
@@ -116,13 +122,14 @@ def test_enviar_documentos_contem_links():
     tracker = _make_tracker()
     domain = {}
 
-    action.run(dispatcher, tracker, domain)
+    asyncio.run(action.run(dispatcher, tracker, domain))
 
     call_kwargs = dispatcher.utter_message.call_args
     message = call_kwargs[1].get("text") or call_kwargs[0][0]
     assert "Manual do Colaborador" in message
     assert "Código de Conduta" in message
     assert "the100s.sharepoint.com" in message
+    assert "Enviado para o seu email pessoal" in message
 
 
 # ---------------------------------------------------------------------------
@@ -209,6 +216,69 @@ def test_verificar_resposta_incorreta():
     )
 
 
+def test_resposta_errada_avanca_para_a_pergunta_seguinte():
+    action = ActionVerificarRespostaQuiz()
+    dispatcher = _make_dispatcher()
+    tracker = _make_tracker(
+        slots={"quiz_pontuacao": 0.0, "quiz_progresso": 0},
+        latest_message={"text": "opção z"},
+    )
+
+    events = action.run(dispatcher, tracker, {})
+
+    call_kwargs = dispatcher.utter_message.call_args
+    message = call_kwargs[1].get("text") or call_kwargs[0][0]
+    assert "Pergunta 2/3" in message
+    assert any(e.get("name") == "quiz_progresso" and e.get("value") == 1 for e in events)
+
+
+def test_verificar_resposta_pelo_texto_da_opcao():
+    action = ActionVerificarRespostaQuiz()
+    dispatcher = _make_dispatcher()
+    # Pergunta 2: "Competição interna" é a opção B, a correta
+    tracker = _make_tracker(
+        slots={"quiz_pontuacao": 0.0, "quiz_progresso": 1},
+        latest_message={"text": "acho que é a competição interna"},
+    )
+
+    action.run(dispatcher, tracker, {})
+
+    message = dispatcher.utter_message.call_args[1]["text"]
+    assert "Correto" in message
+
+
+def test_quiz_termina_em_exatamente_n_respostas():
+    action = ActionVerificarRespostaQuiz()
+    slots = {"quiz_pontuacao": 0.0, "quiz_progresso": 0}
+    respostas = ["b", "z", "c"]
+
+    for resposta in respostas:
+        dispatcher = _make_dispatcher()
+        tracker = _make_tracker(slots=dict(slots), latest_message={"text": resposta})
+        for event in action.run(dispatcher, tracker, {}):
+            slots[event["name"]] = event["value"]
+
+    message = dispatcher.utter_message.call_args[1]["text"]
+    assert "Quiz concluído" in message
+    assert "2/3" in message
+    assert slots["quiz_pontuacao"] == 2.0
+    assert slots["quiz_concluido"] is True
+
+
+def test_iniciar_quiz_retoma_quiz_em_curso():
+    action = ActionIniciarQuiz()
+    dispatcher = _make_dispatcher()
+    tracker = _make_tracker(
+        slots={"quiz_pontuacao": 1.0, "quiz_progresso": 0x10002, "quiz_banco": "geral"}
+    )
+
+    events = action.run(dispatcher, tracker, {})
+
+    message = dispatcher.utter_message.call_args[1]["text"]
+    assert message == QUIZ_PERGUNTAS[2]["pergunta"]
+    assert events == []
+
+
 # ---------------------------------------------------------------------------
 # Testes de ActionAgendarReuniao
 # ---------------------------------------------------------------------------
@@ -220,7 +290,7 @@ def test_agendar_reuniao_sem_gestor():
     tracker = _make_tracker(slots={"gestor": None})
     domain = {}
 
-    action.run(dispatcher, tracker, domain)
+    asyncio.run(action.run(dispatcher, tracker, domain))
 
     call_kwargs = dispatcher.utter_message.call_args
     message = call_kwargs[1].get("text") or call_kwargs[0][0]
@@ -233,7 +303,7 @@ def test_agendar_reuniao_com_gestor():
     tracker = _make_tracker(slots={"gestor": "João Silva"})
     domain = {}
 
-    action.run(dispatcher, tracker, domain)
+    asyncio.run(action.run(dispatcher, tracker, domain))
 
     call_kwargs = dispatcher.utter_message.call_args
     message = call_kwargs[1].get("text") or call_kwargs[0][0]
@@ -245,6 +315,29 @@ def test_agendar_reuniao_com_gestor():
 # ---------------------------------------------------------------------------
 
 
+def test_action_responder_faq_name():
+    assert ActionResponderFaq().name() == "action_responder_faq"
+
+
+def test_responder_faq_com_a_entrada_mais_parecida():
+    dispatcher = _make_dispatcher()
+    tracker = _make_tracker(latest_message={"text": "quando recebo o salário?"})
+
+    ActionResponderFaq().run(dispatcher, tracker, {})
+
+    mensagem = dispatcher.utter_message.call_args[1]["text"]
+    assert "último dia útil" in mensagem
+
+
+def test_responder_faq_sem_entrada_parecida_mostra_a_faq_geral():
+    dispatcher = _make_dispatcher()
+    tracker = _make_tracker(latest_message={"text": "tenho uma pergunta"})
+
+    ActionResponderFaq().run(dispatcher, tracker, {})
+
+    dispatcher.utter_message.assert_called_once_with(text=TEMPLATES.renderizar("faq"))
+
+
 def test_registar_feedback():
     action = ActionRegistarFeedback()
     dispatcher = _make_dispatcher()
@@ -261,6 +354,32 @@ def test_registar_feedback():
     assert "feedback" in message.lower() or "obrigado" in message.lower()
 
 
+def test_registar_feedback_coloca_na_fila():
+    action = ActionRegistarFeedback()
+    tracker = _make_tracker(
+        slots={"nome_colaborador": "Maria"},
+        latest_message={"text": "O processo foi muito bom!"},
+    )
+    tracker.sender_id = "teams-123"
+
+    with patch("actions.actions.FILA_FEEDBACK") as fila:
+        action.run(_make_dispatcher(), tracker, {})
+
+    registo = fila.registar.call_args[0][0]
+    assert registo.sender_id == "teams-123"
+    assert registo.nome == "Maria"
+    assert registo.texto == "O processo foi muito bom!"
+
+
+def test_registar_feedback_sem_texto_grava_texto_vazio():
+    tracker = _make_tracker(latest_message={"text": None})
+
+    with patch("actions.actions.FILA_FEEDBACK") as fila:
+        ActionRegistarFeedback().run(_make_dispatcher(), tracker, {})
+
+    assert fila.registar.call_args[0][0].texto == ""
+
+
 # ---------------------------------------------------------------------------
 # Testes de ActionVerificarEtapaOnboarding
 # ---------------------------------------------------------------------------
@@ -286,3 +405,74 @@ def test_verificar_etapa_onboarding(etapa, palavra_esperada):
     call_kwargs = dispatcher.utter_message.call_args
     message = call_kwargs[1].get("text") or call_kwargs[0][0]
     assert palavra_esperada.lower() in message.lower()
+
+
+@pytest.mark.parametrize(
+    "data_inicio,etapa,palavra_esperada",
+    [
+        ("2999-01-04", "pre_onboarding", "Pré-onboarding"),
+        ("04/01/2021", "onboarding_concluido", "concluiu a primeira semana"),
+    ],
+)
+def test_verificar_etapa_calculada_pela_data_inicio(data_inicio, etapa, palavra_esperada):
+    action = ActionVerificarEtapaOnboarding()
+    dispatcher = _make_dispatcher()
+    tracker = _make_tracker(slots={"data_inicio": data_inicio, "nome_colaborador": "Ana"})
+
+    eventos = action.run(dispatcher, tracker, {})
+
+    message = dispatcher.utter_message.call_args[1]["text"]
+    assert palavra_esperada.lower() in message.lower()
+    assert eventos == [{"event": "slot", "timestamp": None, "name": "etapa_onboarding", "value": etapa}]
+
+
+# ---------------------------------------------------------------------------
+# Testes de ActionSessionStart
+# ---------------------------------------------------------------------------
+
+
+def test_action_session_start_name():
+    assert ActionSessionStart().name() == "action_session_start"
+
+
+def test_session_start_preenche_slots_do_perfil():
+    diretorio = DiretorioColaboradores()
+    diretorio.adicionar(
+        PerfilColaborador(
+            "29:ana",
+            "Ana Silva",
+            cargo="Designer",
+            email="ana@the100s.com",
+            data_inicio=date(2999, 1, 4),
+        )
+    )
+    tracker = _make_tracker(slots={"quiz_banco": "geral"})
+    tracker.sender_id = "29:ana"
+    tracker.current_slot_values.return_value = {"quiz_banco": "geral", "cargo": None}
+    domain = {"session_config": {"carry_over_slots_to_new_session": True}}
+
+    with patch("actions.actions.DIRETORIO_COLABORADORES", diretorio):
+        eventos = asyncio.run(ActionSessionStart().run(_make_dispatcher(), tracker, domain))
+
+    assert eventos[0]["event"] == "session_started"
+    assert (eventos[-1]["event"], eventos[-1]["name"]) == ("action", "action_listen")
+    slots = {e["name"]: e["value"] for e in eventos if e["event"] == "slot"}
+    assert slots == {
+        "quiz_banco": "geral",
+        "nome_colaborador": "Ana Silva",
+        "cargo": "Designer",
+        "email_colaborador": "ana@the100s.com",
+        "data_inicio": "2999-01-04",
+        "etapa_onboarding": "pre_onboarding",
+    }
+
+
+def test_session_start_sem_perfil_apenas_inicia_a_sessao():
+    tracker = _make_tracker()
+    tracker.sender_id = "29:desconhecido"
+    tracker.current_slot_values.return_value = {}
+
+    with patch("actions.actions.DIRETORIO_COLABORADORES", DiretorioColaboradores()):
+        eventos = asyncio.run(ActionSessionStart().run(_make_dispatcher(), tracker, {}))
+
+    assert [e["event"] for e in eventos] == ["session_started", "action"]
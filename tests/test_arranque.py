@@ -0,0 +1,144 @@
+"""
+Testes do arranque rápido do Rasa Server (addons/arranque.py e benchmarks/bench_arranque.py).
+"""
+
+import asyncio
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from addons.arranque import (
+    aquecer,
+    desmarcar_pronto,
+    frases_aquecimento,
+    mapear_vetores,
+    marcar_pronto,
+    ouvinte_aquecimento,
+)
+from benchmarks.bench_arranque import comando_servidor, esperar
+
+NLU = """
+version: "3.1"
+nlu:
+- intent: saudar
+  examples: |
+    - olá
+    - bom dia
+    - boa tarde
+- intent: apresentar
+  examples: |
+    - sou o [Rui](nome_colaborador)
+    - chamo-me [Ana]{"entity": "nome_colaborador"}
+"""
+
+
+class AgenteFalso:
+    def __init__(self, pronto=True):
+        self.analisadas = []
+        self._pronto = pronto
+
+    def is_ready(self):
+        return self._pronto
+
+    async def parse_message(self, texto):
+        self.analisadas.append(texto)
+        return {"text": texto, "intent": {"name": "saudar", "confidence": 1.0}, "entities": []}
+
+
+@pytest.fixture
+def nlu(tmp_path):
+    caminho = tmp_path / "nlu.yml"
+    caminho.write_text(NLU, encoding="utf-8")
+    return caminho
+
+
+def test_frases_por_intent_sem_anotacoes_de_entidades(nlu):
+    assert frases_aquecimento(nlu, por_intent=2) == ["olá", "bom dia", "sou o Rui", "chamo-me Ana"]
+    assert frases_aquecimento(nlu, por_intent=1) == ["olá", "sou o Rui"]
+
+
+def test_frases_dos_dados_de_treino_do_projeto():
+    frases = frases_aquecimento()
+    assert frases
+    assert not any("](" in frase or "]{" in frase for frase in frases)
+
+
+def test_aquecimento_passa_todas_as_frases_pelo_nlu():
+    agente = AgenteFalso()
+    relogio = itertools.count(0.0, 0.5).__next__
+
+    resultado = asyncio.run(aquecer(agente, ["olá", "bom dia"], relogio=relogio))
+
+    assert agente.analisadas == ["olá", "bom dia"]
+    assert resultado.mensagens == 2
+    assert resultado.primeira_ms == resultado.ultima_ms == 500.0
+
+
+def test_servidor_so_fica_pronto_depois_do_aquecimento(tmp_path):
+    pronto = tmp_path / "pronto"
+    agente = AgenteFalso()
+    ouvinte = ouvinte_aquecimento(["olá"], pronto)
+
+    asyncio.run(ouvinte(SimpleNamespace(ctx=SimpleNamespace(agent=agente)), None))
+
+    assert agente.analisadas == ["olá"]
+    assert pronto.exists()
+    desmarcar_pronto(pronto)
+    desmarcar_pronto(pronto)
+    assert not pronto.exists()
+
+
+def test_sem_modelo_o_servidor_nao_fica_pronto(tmp_path):
+    pronto = tmp_path / "pronto"
+    ouvinte = ouvinte_aquecimento(["olá"], pronto)
+
+    asyncio.run(ouvinte(SimpleNamespace(ctx=SimpleNamespace(agent=AgenteFalso(pronto=False))), None))
+    asyncio.run(ouvinte(SimpleNamespace(ctx=SimpleNamespace()), None))
+
+    assert not pronto.exists()
+
+
+def test_vetores_mapeados_em_memoria(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    tabela = numpy.arange(12, dtype="float32").reshape(4, 3)
+    with open(tmp_path / "vectors", "wb") as ficheiro:
+        numpy.save(ficheiro, tabela)
+
+    class VetoresFalsos:
+        data = None
+
+        def from_disk(self, pasta, exclude=()):
+            self.excluidos = tuple(exclude)
+
+    vetores = VetoresFalsos()
+    assert mapear_vetores(vetores, tmp_path)
+    assert "vectors" in vetores.excluidos
+    assert isinstance(vetores.data, numpy.memmap)
+    assert numpy.array_equal(vetores.data, tabela)
+    assert not mapear_vetores(VetoresFalsos(), tmp_path / "sem_vetores")
+
+
+def test_esperar_repete_ate_ao_limite():
+    instantes = itertools.count(0.0, 1.0)
+    tentativas = []
+
+    def recusa():
+        tentativas.append(1)
+        raise ConnectionRefusedError
+
+    assert not esperar(recusa, limite=3, relogio=instantes.__next__, dormir=lambda _: None)
+    assert len(tentativas) == 3
+    respostas = iter([False, False, True])
+    assert esperar(lambda: next(respostas), limite=10, dormir=lambda _: None)
+
+
+def test_comando_do_benchmark_por_modo(tmp_path):
+    assert comando_servidor("rasa", 5006, tmp_path)[:2] == ["rasa", "run"]
+    assert comando_servidor("arranque", 5006, tmp_path)[1:4] == ["-m", "addons.arranque", "run"]
+
+
+def test_marcar_pronto_cria_a_pasta(tmp_path):
+    pronto = tmp_path / "estado" / "pronto"
+    marcar_pronto(pronto)
+    assert pronto.exists()
@@ -0,0 +1,107 @@
+"""
+Testes do atalho de NLU (addons/atalho_nlu.py) e dos canais que o usam.
+"""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from addons.atalho_nlu import CONFIANCA_ATALHO, IndiceAtalhos, normalizar, remover_anotacoes
+
+NLU = Path(__file__).resolve().parent.parent / "data" / "nlu.yml"
+
+
+@pytest.fixture(scope="module")
+def indice():
+    return IndiceAtalhos.de_ficheiro(NLU)
+
+
+@pytest.mark.parametrize(
+    "texto,esperado",
+    [
+        ("Olá, Bom-Dia!", "ola bom dia"),
+        ("  Opção   C ", "opcao c"),
+        ("SIM.", "sim"),
+        ("até já", "ate ja"),
+    ],
+)
+def test_normalizar(texto, esperado):
+    assert normalizar(texto) == esperado
+
+
+def test_remover_anotacoes_das_entidades():
+    assert remover_anotacoes("chamo-me [Ana](nome_colaborador)") == "chamo-me Ana"
+    assert remover_anotacoes('sou de [TI]{"entity": "departamento"} ') == "sou de TI"
+    assert remover_anotacoes("opção [c]") == "opção [c]"
+
+
+@pytest.mark.parametrize(
+    "texto,intent",
+    [
+        ("olá", "saudar"),
+        ("OLA!", "saudar"),
+        ("b", "responder_quiz"),
+        ("Opção D", "responder_quiz"),
+        ("sim", "afirmar"),
+        ("até logo", "despedir"),
+    ],
+)
+def test_mensagens_triviais_usam_o_atalho(indice, texto, intent):
+    resultado = indice.classificar(texto)
+
+    assert resultado["intent"] == {"name": intent, "confidence": CONFIANCA_ATALHO}
+    assert resultado["entities"] == []
+    assert resultado["text"] == texto
+
+
+@pytest.mark.parametrize(
+    "texto",
+    [
+        "quero agendar uma reunião com o meu gestor amanhã às 10h",
+        "obrigado",
+        "/saudar",
+        "",
+        None,
+    ],
+)
+def test_mensagens_incertas_seguem_para_o_pipeline(indice, texto):
+    assert indice.classificar(texto) is None
+
+
+def test_textos_ambiguos_e_com_entidades_ficam_de_fora():
+    indice = IndiceAtalhos(
+        [
+            ("saudar", "boa tarde"),
+            ("despedir", "Boa tarde!"),
+            ("apresentar", "sou o [Rui](nome_colaborador)"),
+            ("afirmar", "sim"),
+            ("afirmar", "Sim!"),
+        ]
+    )
+
+    assert len(indice) == 1
+    assert indice.ambiguos == 1
+    assert indice.intent("boa tarde") is None
+    assert indice.intent("sou o Rui") is None
+    assert indice.intent("sim") == "afirmar"
+    assert (indice.acertos, indice.falhas) == (1, 2)
+
+
+def test_canal_preenche_parse_data_apenas_com_atalho(indice):
+    pytest.importorskip("rasa")
+    from rasa.core.channels.channel import UserMessage
+
+    from addons.canais import com_atalho
+
+    recebidas = []
+
+    async def on_new_message(mensagem):
+        recebidas.append(mensagem)
+
+    ao_receber = com_atalho(on_new_message, indice)
+    asyncio.run(ao_receber(UserMessage("olá")))
+    asyncio.run(ao_receber(UserMessage("qual é o horário de trabalho?")))
+
+    assert recebidas[0].parse_data["intent"]["name"] == "saudar"
+    assert recebidas[1].parse_data is None
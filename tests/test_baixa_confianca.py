@@ -0,0 +1,92 @@
+"""
+Testes do registo das mensagens com baixa confiança (actions/baixa_confianca.py).
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+
+from actions.baixa_confianca import RegistoBaixaConfianca, agrupar_por_intent, main
+
+RANKING = [
+    {"name": "nlu_fallback", "confidence": 0.5},
+    {"name": "pedir_faq", "confidence": 0.41237},
+    {"name": "pedir_documentos", "confidence": 0.2},
+]
+
+
+def _mensagem(texto, intent="nlu_fallback"):
+    return {"text": texto, "intent": {"name": intent, "confidence": 0.5}, "intent_ranking": RANKING}
+
+
+def test_linhas_acrescentadas_ao_ficheiro(tmp_path):
+    caminho = tmp_path / "registos" / "baixa_confianca.jsonl"
+    caminho.parent.mkdir()
+    caminho.write_text('{"texto": "já existente"}\n', encoding="utf-8")
+    registo = RegistoBaixaConfianca(str(caminho))
+    quando = datetime(2024, 3, 4, 9, 30, tzinfo=timezone.utc)
+
+    assert registo.registar(_mensagem("onde vejo as férias?"), departamento="Tecnologia", recebido_em=quando)
+    assert registo.registar(_mensagem("ok", intent="pedir_faq"), fila="rh")
+    registo.fechar()
+
+    linhas = [json.loads(linha) for linha in caminho.read_text(encoding="utf-8").splitlines()]
+    assert linhas[0] == {"texto": "já existente"}
+    assert linhas[1] == {
+        "recebido_em": "2024-03-04T09:30:00+00:00",
+        "texto": "onde vejo as férias?",
+        "origem": "nlu",
+        "intent": "pedir_faq",
+        "confianca": 0.4124,
+        "ranking": [{"intent": "pedir_faq", "confianca": 0.4124}, {"intent": "pedir_documentos", "confianca": 0.2}],
+        "departamento": "Tecnologia",
+        "fila": None,
+    }
+    assert (linhas[2]["origem"], linhas[2]["fila"]) == ("politicas", "rh")
+
+
+def test_registo_desativado_ou_com_falha_nao_interrompe_a_conversa(tmp_path):
+    assert RegistoBaixaConfianca(None).registar(_mensagem("olá")) is False
+    assert RegistoBaixaConfianca(str(tmp_path)).registar(_mensagem("olá")) is False
+
+
+def test_descritor_proprio_depois_do_fork(tmp_path):
+    caminho = tmp_path / "baixa_confianca.jsonl"
+    registo = RegistoBaixaConfianca(str(caminho))
+    registo.registar(_mensagem("antes"))
+
+    pid = os.fork()
+    if pid == 0:
+        registo.reiniciar_apos_fork()
+        os._exit(0 if registo.registar(_mensagem("no worker")) else 1)
+    _, estado = os.waitpid(pid, 0)
+    registo.registar(_mensagem("depois"))
+    registo.fechar()
+
+    assert os.waitstatus_to_exitcode(estado) == 0
+    textos = [json.loads(linha)["texto"] for linha in caminho.read_text(encoding="utf-8").splitlines()]
+    assert textos == ["antes", "no worker", "depois"]
+
+
+def test_revisao_agrupa_os_textos_pela_intent_provavel(tmp_path, capsys):
+    registos = [
+        {"texto": "Onde  vejo as férias?", "intent": "pedir_faq"},
+        {"texto": "onde vejo as férias?", "intent": "pedir_faq"},
+        {"texto": "preciso do contrato", "intent": "pedir_documentos"},
+        {"texto": "quantos dias de férias", "intent": "pedir_faq"},
+        {"texto": "/falar_com_humano", "intent": "falar_com_humano"},
+        {"texto": "asdf", "intent": None},
+    ]
+    assert agrupar_por_intent(registos) == {
+        "pedir_faq": [("Onde vejo as férias?", 2), ("quantos dias de férias", 1)],
+        "pedir_documentos": [("preciso do contrato", 1)],
+        "nlu_fallback": [("asdf", 1)],
+    }
+
+    caminho = tmp_path / "baixa_confianca.jsonl"
+    caminho.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in registos) + "\n{incompleta", encoding="utf-8")
+    main([str(caminho)])
+
+    revisao = capsys.readouterr().out
+    assert "# 3 mensagens, 2 textos distintos\n- intent: pedir_faq\n  examples: |\n    - Onde vejo as férias?\n" in revisao
+    assert revisao.count("- intent:") == 3
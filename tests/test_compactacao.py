@@ -0,0 +1,230 @@
+"""
+Testes da compactação das conversas do tracker store (addons/compactacao.py).
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from addons.compactacao import (
+    PASSO_TIMESTAMP,
+    compactar_conversa,
+    eventos_aplicados,
+    inicio_sessao,
+    instantaneo,
+    linha_evento,
+    planear_compactacao,
+)
+
+
+def _conversa(turnos, inicio=1000.0):
+    """Sessão com ``turnos`` turnos: user, action, slot com o número do turno, action_listen."""
+    relogio = iter(inicio + i for i in range(10_000))
+    eventos = [
+        {"event": "action", "name": "action_session_start", "timestamp": next(relogio)},
+        {"event": "session_started", "timestamp": next(relogio)},
+        {"event": "slot", "name": "nome_colaborador", "value": "Ana", "timestamp": next(relogio)},
+        {"event": "action", "name": "action_listen", "timestamp": next(relogio)},
+    ]
+    for turno in range(turnos):
+        eventos += [
+            {
+                "event": "user",
+                "text": f"mensagem {turno}",
+                "parse_data": {"intent": {"name": "saudar", "confidence": 1.0}},
+                "timestamp": next(relogio),
+            },
+            {"event": "action", "name": "utter_saudar", "timestamp": next(relogio)},
+            {"event": "slot", "name": "turno", "value": turno, "timestamp": next(relogio)},
+            {"event": "action", "name": "action_listen", "timestamp": next(relogio)},
+        ]
+    return eventos
+
+
+def test_conversas_curtas_nao_sao_compactadas():
+    assert planear_compactacao(_conversa(5), turnos=10, limite=100) is None
+    assert planear_compactacao(_conversa(30), turnos=10, limite=1000) is None
+
+
+def test_mantem_os_ultimos_turnos_e_o_estado_dos_slots():
+    eventos = _conversa(30)
+    plano = planear_compactacao(eventos, turnos=10, limite=100)
+
+    compactados = plano.aplicar(eventos)
+
+    assert [e["text"] for e in compactados if e["event"] == "user"] == [f"mensagem {t}" for t in range(20, 30)]
+    assert compactados[: len(plano.instantaneo)] == plano.instantaneo
+    assert [e["event"] for e in plano.instantaneo] == ["session_started", "slot", "slot", "action"]
+    slots = {e["name"]: e["value"] for e in plano.instantaneo if e["event"] == "slot"}
+    assert slots == {"nome_colaborador": "Ana", "turno": 19}
+    # O Rasa ordena por timestamp: o instantâneo fica antes do primeiro evento mantido
+    timestamps = [e["timestamp"] for e in compactados]
+    assert timestamps == sorted(timestamps)
+    assert plano.instantaneo[-1]["timestamp"] < plano.timestamp_corte == eventos[plano.corte]["timestamp"]
+    assert plano.timestamp_inicio == eventos[0]["timestamp"]
+
+
+def test_o_tamanho_fica_limitado_em_conversas_longas():
+    eventos = _conversa(10)
+    for _ in range(190):
+        eventos += _conversa(1, inicio=eventos[-1]["timestamp"] + 1)[4:]
+        plano = planear_compactacao(eventos, turnos=10, limite=100)
+        if plano is not None:
+            eventos = plano.aplicar(eventos)
+        assert len(eventos) <= 104
+
+
+def test_eventos_revertidos_e_reinicios_nao_contam():
+    eventos = [
+        {"event": "slot", "name": "cargo", "value": "Dev"},
+        {"event": "restart"},
+        {"event": "slot", "name": "cargo", "value": "QA"},
+        {"event": "active_loop", "name": "formulario_reuniao"},
+        {"event": "action", "name": "action_listen"},
+        {"event": "user", "text": "engano"},
+        {"event": "slot", "name": "cargo", "value": "PM"},
+        {"event": "rewind"},
+        {"event": "pause"},
+    ]
+
+    assert {"event": "slot", "name": "cargo", "value": "PM"} not in eventos_aplicados(eventos)
+    resultado = instantaneo(eventos, timestamp_corte=10.0)
+    assert [(e["event"], e.get("name"), e.get("value")) for e in resultado] == [
+        ("session_started", None, None),
+        ("slot", "cargo", "QA"),
+        ("active_loop", "formulario_reuniao", None),
+        ("pause", None, None),
+        ("action", "action_listen", None),
+    ]
+    assert resultado[-1]["timestamp"] == pytest.approx(10.0 - PASSO_TIMESTAMP)
+
+
+def test_linha_evento():
+    evento = {"event": "user", "timestamp": 1.0, "parse_data": {"intent": {"name": "saudar"}}}
+
+    assert linha_evento(evento) == ("user", 1.0, "saudar", None, json.dumps(evento))
+    sem_nlu = {"event": "user", "timestamp": 2.0, "parse_data": {"intent": None}}
+    assert linha_evento(sem_nlu)[:4] == ("user", 2.0, None, None)
+
+
+class _Cursor:
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.apagados = None
+        self.inseridos = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, parametros):
+        if sql.lstrip().startswith("DELETE"):
+            self.apagados = parametros[0]
+
+    def fetchall(self):
+        return self.linhas
+
+    def executemany(self, sql, linhas):
+        self.inseridos = linhas
+
+
+class _Ligacao:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_compactar_conversa_apaga_o_prefixo_por_id():
+    eventos = _conversa(30)
+    cursor = _Cursor([(100 + i, json.dumps(e)) for i, e in enumerate(eventos)])
+    ligacao = _Ligacao(cursor)
+
+    removidas = compactar_conversa(ligacao, "ana@the100s.pt", turnos=10, limite=100)
+
+    plano = planear_compactacao(eventos[1:], turnos=10, limite=100)  # a partir do session_started
+    assert removidas == plano.corte - len(plano.instantaneo)
+    assert cursor.apagados == list(range(101, 101 + plano.corte))
+    assert [linha[0] for linha in cursor.inseridos] == ["ana@the100s.pt"] * len(plano.instantaneo)
+    assert ligacao.commits == 1
+
+
+def test_compactar_conversa_mantem_as_sessoes_anteriores():
+    anterior = _conversa(40)
+    atual = _conversa(30, inicio=anterior[-1]["timestamp"] + 1)
+    eventos = anterior + atual
+    cursor = _Cursor([(i, json.dumps(e)) for i, e in enumerate(eventos)])
+
+    compactar_conversa(_Ligacao(cursor), "ana@the100s.pt", turnos=10, limite=100)
+
+    inicio = inicio_sessao(eventos)
+    plano = planear_compactacao(eventos[inicio:], turnos=10, limite=100)
+    assert eventos[inicio] == atual[1]  # o session_started da sessão atual
+    assert cursor.apagados == list(range(inicio, inicio + plano.corte))
+
+
+def test_compactar_conversa_em_simulacao_nao_altera_nada():
+    eventos = _conversa(30)
+    cursor = _Cursor([(i, json.dumps(e)) for i, e in enumerate(eventos)])
+
+    assert compactar_conversa(_Ligacao(cursor), "x", turnos=10, limite=100, simular=True) > 0
+    assert cursor.apagados is None and cursor.inseridos is None
+
+
+def test_tracker_store_compacta_ao_carregar(tmp_path):
+    pytest.importorskip("rasa")
+    from rasa.shared.core.domain import Domain
+    from rasa.shared.core.trackers import DialogueStateTracker
+
+    from addons.tracker_store import SQLTrackerStoreCompacto
+
+    domain = Domain.from_yaml(
+        "slots:\n"
+        "  nome_colaborador: {type: text, mappings: [{type: custom}]}\n"
+        "  turno: {type: any, mappings: [{type: custom}]}\n"
+    )
+    store = SQLTrackerStoreCompacto(
+        domain=domain, dialect="sqlite", db=str(tmp_path / "trackers.db"), limite_eventos=100
+    )
+    asyncio.run(store.save(DialogueStateTracker.from_dict("ana", _conversa(30), domain.slots)))
+
+    tracker = asyncio.run(store.retrieve("ana"))
+    recarregado = asyncio.run(store.retrieve("ana"))
+
+    assert len(tracker.events) < 100
+    assert tracker.get_slot("turno") == 29
+    assert tracker.get_slot("nome_colaborador") == "Ana"
+    assert [e.as_dict() for e in recarregado.events] == [e.as_dict() for e in tracker.events]
+
+
+def test_tracker_store_nao_apaga_as_sessoes_anteriores(tmp_path):
+    pytest.importorskip("rasa")
+    from rasa.shared.core.domain import Domain
+    from rasa.shared.core.trackers import DialogueStateTracker
+
+    from addons.tracker_store import SQLTrackerStoreCompacto
+
+    domain = Domain.from_yaml("slots:\n  turno: {type: any, mappings: [{type: custom}]}\n")
+    store = SQLTrackerStoreCompacto(
+        domain=domain, dialect="sqlite", db=str(tmp_path / "trackers.db"), limite_eventos=100
+    )
+    anterior = _conversa(5)
+    atual = _conversa(30, inicio=anterior[-1]["timestamp"] + 1)
+    asyncio.run(store.save(DialogueStateTracker.from_dict("ana", anterior + atual, domain.slots)))
+
+    tracker = asyncio.run(store.retrieve("ana"))
+    completo = asyncio.run(store.retrieve_full_tracker("ana"))
+
+    assert tracker.get_slot("turno") == 29
+    textos = [e.as_dict().get("text") for e in completo.events if e.as_dict()["event"] == "user"]
+    assert textos[:5] == [f"mensagem {t}" for t in range(5)]
+    # A sessão anterior e o ``action_session_start`` que abre a atual ficam intactos
+    assert len(completo.events) == len(anterior) + 1 + len(tracker.events)
@@ -0,0 +1,127 @@
+"""
+Testes dos ficheiros colunares e do consumidor do event broker (analytics/).
+"""
+
+import json
+import queue
+import threading
+from datetime import date
+
+from analytics.colunar import COLUNAS, EscritorColunar, ler_colunas, ler_segmento, linha_evento, segmentos
+from analytics.consumidor import FIM, consumir, fonte_fila, fonte_ficheiro
+
+# 2026-10-17 e 2026-10-18, 12:00 UTC
+DIA_1, DIA_2 = 1792238400.0, 1792324800.0
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def _utilizador(sender_id, intent, timestamp, confianca=0.9, ranking=None):
+    return {
+        "sender_id": sender_id,
+        "event": "user",
+        "timestamp": timestamp,
+        "text": "olá",
+        "input_channel": "botframework",
+        "parse_data": {"intent": {"name": intent, "confidence": confianca}, "intent_ranking": ranking or []},
+    }
+
+
+def test_linha_evento_guarda_a_intent_real_com_nlu_fallback():
+    evento = _utilizador(
+        "ana", "nlu_fallback", DIA_1, confianca=0.5, ranking=[{"name": "nlu_fallback"}, {"name": "pedir_faq", "confidence": 0.3}]
+    )
+    linha = dict(zip(COLUNAS, linha_evento(evento)))
+
+    assert (linha["intent"], linha["confianca"], linha["fallback_nlu"]) == ("pedir_faq", 0.3, True)
+    assert linha["canal"] == "botframework"
+    assert "text" not in linha
+
+
+def test_escritor_particiona_por_dia_e_le_so_as_colunas_pedidas(tmp_path):
+    escritor = EscritorColunar(tmp_path)
+    escritor.adicionar(_utilizador("ana", "saudar", DIA_1))
+    escritor.adicionar({"sender_id": "ana", "event": "slot", "name": "cargo", "value": "Dev", "timestamp": DIA_2})
+    escritor.adicionar({"sender_id": "rui", "event": "action", "name": "utter_saudar", "timestamp": DIA_2})
+
+    gravados = escritor.descarregar()
+
+    assert [caminho.parent.name for caminho in gravados] == ["dia=2026-10-17", "dia=2026-10-18"]
+    assert ler_segmento(gravados[1], ("nome", "valor")) == {"nome": ["cargo", "utter_saudar"], "valor": ['"Dev"', None]}
+    assert list(segmentos(tmp_path, desde=date(2026, 10, 18))) == gravados[1:]
+    assert list(ler_colunas(tmp_path, ("sender_id", "evento"))) == [("ana", "user"), ("ana", "slot"), ("rui", "action")]
+    assert escritor.pendentes == 0 and escritor.descarregar() == []
+
+
+def test_segmentos_publicados_nao_sao_alterados(tmp_path):
+    escritor = EscritorColunar(tmp_path)
+    escritor.adicionar(_utilizador("ana", "saudar", DIA_1))
+    primeiro = escritor.descarregar()[0]
+    conteudo = primeiro.read_bytes()
+
+    escritor.adicionar(_utilizador("rui", "saudar", DIA_1))
+    segundo = escritor.descarregar()[0]
+
+    assert segundo != primeiro and primeiro.read_bytes() == conteudo
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_descarrega_por_tamanho_e_por_tempo(tmp_path):
+    relogio = _Relogio()
+    escritor = EscritorColunar(tmp_path, tamanho_lote=2, intervalo=60, relogio=relogio)
+
+    escritor.adicionar(_utilizador("ana", "saudar", DIA_1))
+    assert not escritor.deve_descarregar()
+    relogio.agora = 61
+    assert escritor.deve_descarregar()
+
+    escritor.adicionar(_utilizador("ana", "saudar", DIA_1))
+    relogio.agora = 0
+    assert escritor.deve_descarregar()
+
+
+def test_consumir_confirma_apenas_depois_de_gravar(tmp_path):
+    fila = queue.Queue()
+    confirmadas = []
+    escritor = EscritorColunar(tmp_path, tamanho_lote=2)
+
+    def confirmar(etiqueta):
+        # Tudo o que foi confirmado já está num segmento
+        assert len(list(ler_colunas(tmp_path, ("sender_id",)))) >= etiqueta
+        confirmadas.append(etiqueta)
+
+    for etiqueta in range(1, 6):
+        fila.put((etiqueta, _utilizador("ana", "saudar", DIA_1 + etiqueta)))
+    fila.put(FIM)
+
+    total = consumir(fonte_fila(fila, espera=0.01), escritor, confirmar)
+
+    assert total == 5
+    assert confirmadas == [2, 4, 5]
+    assert len(list(segmentos(tmp_path))) == 3
+
+
+def test_consumir_para_quando_pedido(tmp_path):
+    fila = queue.Queue()
+    parar = threading.Event()
+    parar.set()
+    fila.put((1, _utilizador("ana", "saudar", DIA_1)))
+
+    assert consumir(fonte_fila(fila, espera=0.01), EscritorColunar(tmp_path), parar=parar) == 1
+
+
+def test_fonte_ficheiro(tmp_path):
+    caminho = tmp_path / "eventos.jsonl"
+    caminho.write_text(
+        "\n".join(json.dumps(_utilizador("ana", "saudar", DIA_1 + i)) for i in range(3)) + "\n\n",
+        encoding="utf-8",
+    )
+
+    assert consumir(fonte_ficheiro(caminho), EscritorColunar(tmp_path / "eventos")) == 3
+    assert len(list(ler_colunas(tmp_path / "eventos", ("timestamp",)))) == 3
@@ -0,0 +1,129 @@
+"""
+Testes do acesso partilhado à base de dados (actions/db.py) e das consultas do benchmark do tracker store.
+"""
+
+import asyncio
+import json
+
+from actions import db
+from benchmarks.bench_tracker_store import CARREGAR_SESSAO, INSERIR, carregar_eventos, gravar_eventos
+
+
+def _configurar(monkeypatch, **variaveis):
+    for nome in ("DB_HOST", "DB_REPLICA_HOST", "DB_REPLICA_PORT", "DB_POOL_MAX", "DB_STATEMENT_CACHE"):
+        monkeypatch.delenv(nome, raising=False)
+    for nome, valor in variaveis.items():
+        monkeypatch.setenv(nome, valor)
+
+
+class _Pool:
+    def __init__(self, config):
+        self.config = config
+        self.fechado = False
+
+    async def close(self):
+        self.fechado = True
+
+
+class _Ligacao:
+    """Ligação asyncpg falsa, com os eventos já gravados de uma conversa."""
+
+    def __init__(self, gravados):
+        self.gravados = gravados
+        self.consultas = []
+
+    async def fetch(self, consulta, *parametros):
+        self.consultas.append((consulta, parametros))
+        return [{"data": json.dumps(evento)} for evento in self.gravados]
+
+    async def fetchval(self, consulta, *parametros):
+        return len(self.gravados)
+
+    async def executemany(self, consulta, linhas):
+        self.consultas.append((consulta, linhas))
+        self.gravados += [json.loads(linha[-1]) for linha in linhas]
+
+
+# ---------------------------------------------------------------------------
+# Configuração e pools
+# ---------------------------------------------------------------------------
+
+
+def test_replica_herda_a_configuracao_da_instancia_principal(monkeypatch):
+    _configurar(monkeypatch)
+    assert db.configuracao_db() is None and db.configuracao_db(replica=True) is None
+
+    _configurar(monkeypatch, DB_HOST="postgres")
+    assert db.configuracao_db(replica=True) == db.configuracao_db()
+
+    _configurar(monkeypatch, DB_HOST="postgres", DB_REPLICA_HOST="replica", DB_REPLICA_PORT="6432")
+    principal, replica = db.configuracao_db(), db.configuracao_db(replica=True)
+    assert (principal["host"], principal["port"]) == ("postgres", 5432)
+    assert (replica["host"], replica["port"], replica["dbname"]) == ("replica", 6432, principal["dbname"])
+
+
+def test_dimensao_dos_pools_pelas_variaveis_de_ambiente(monkeypatch):
+    _configurar(monkeypatch, DB_POOL_MAX="4", DB_STATEMENT_CACHE="0")
+
+    assert db.configuracao_pool() == db.ConfiguracaoPool(maximo=4, cache_consultas=0)
+
+
+def test_um_pool_por_instancia_e_por_event_loop(monkeypatch):
+    criados = []
+
+    async def criar_pool(config):
+        criados.append(_Pool(config))
+        return criados[-1]
+
+    monkeypatch.setattr(db, "criar_pool", criar_pool)
+    db.reiniciar_pools()
+
+    async def cenario():
+        principal = await db.obter_pool()
+        return principal, [await db.obter_pool(), await db.obter_pool(replica=True)]
+
+    _configurar(monkeypatch, DB_HOST="postgres")
+    principal, outros = asyncio.run(cenario())
+    # Sem DB_REPLICA_HOST, as leituras da réplica usam o pool da instância principal
+    assert outros == [principal, principal] and len(criados) == 1
+
+    # Noutro event loop (um worker novo, por exemplo), o pool é outro
+    _configurar(monkeypatch, DB_HOST="postgres", DB_REPLICA_HOST="replica")
+    principal, (outro, replica) = asyncio.run(cenario())
+    assert principal is outro is not criados[0]
+    assert replica.config["host"] == "replica"
+
+    asyncio.run(db.fechar_pools())  # só fecha os pools do event loop atual
+    assert len(db._pools) == 2 and not any(pool.fechado for pool in criados)
+    db.reiniciar_pools()
+    assert db._pools == {}
+
+
+# ---------------------------------------------------------------------------
+# Consultas do benchmark do tracker store
+# ---------------------------------------------------------------------------
+
+
+def test_carrega_a_sessao_atual():
+    ligacao = _Ligacao([{"event": "session_started", "timestamp": 1.0}])
+
+    assert asyncio.run(carregar_eventos(ligacao, "29:ana")) == [{"event": "session_started", "timestamp": 1.0}]
+    assert ligacao.consultas == [(CARREGAR_SESSAO, ("29:ana",))]
+
+
+def test_grava_so_os_eventos_novos_da_sessao():
+    gravados = [{"event": "session_started", "timestamp": 1.0}]
+    ligacao = _Ligacao(list(gravados))
+    utilizador = {"event": "user", "timestamp": 2.0, "parse_data": {"intent": {"name": "saudar"}}}
+    resposta = {"event": "action", "timestamp": 3.0, "name": "action_listen"}
+
+    assert asyncio.run(gravar_eventos(ligacao, "29:ana", gravados + [utilizador, resposta])) == 2
+    assert asyncio.run(gravar_eventos(ligacao, "29:ana", ligacao.gravados)) == 0
+
+    ((consulta, linhas),) = ligacao.consultas
+    assert consulta == INSERIR
+    assert [linha[:5] for linha in linhas] == [
+        ("29:ana", "user", 2.0, "saudar", None),
+        ("29:ana", "action", 3.0, None, "action_listen"),
+    ]
+
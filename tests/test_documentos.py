@@ -0,0 +1,241 @@
+"""
+Testes do catálogo de documentos e da resolução das ligações na Graph API (actions/documentos.py).
+"""
+
+import asyncio
+import time
+
+from actions import actions
+from actions.actions import ActionEnviarDocumentos
+from actions.documentos import CatalogoDocumentos, Documento, ResolvedorLigacoes, formatar_documentos
+from actions.graph import CacheTokens, ClienteGraph, codificar_partilha
+from tests.graph_stub import CredencialFalsa, servidor_graph_stub
+from tests.test_actions import _make_dispatcher, _make_tracker
+
+MANUAL = Documento(1, "Manual", "https://the100s.sharepoint.com/manual", ordem=1)
+CONTRATO = Documento(2, "Contrato", nota="📧 Enviado por email", ordem=2)
+GUIA_DEV = Documento(
+    3, "Guia de desenvolvimento", "https://the100s.sharepoint.com/guia-dev", departamento="Tecnologia", ordem=3
+)
+ACESSOS = Documento(
+    4,
+    "Acessos de produção",
+    "https://the100s.sharepoint.com/acessos",
+    departamento="Tecnologia",
+    cargo="Engenheiro de Dados",
+    ordem=4,
+)
+GESTAO = Documento(5, "Guia do gestor", "https://the100s.sharepoint.com/gestor", cargo="Gestor", ordem=0)
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+# ---------------------------------------------------------------------------
+# Catálogo
+# ---------------------------------------------------------------------------
+
+
+def test_documentos_por_departamento_e_cargo():
+    catalogo = CatalogoDocumentos([CONTRATO, GUIA_DEV, MANUAL, ACESSOS, GESTAO])
+
+    assert catalogo.documentos() == (MANUAL, CONTRATO)
+    assert catalogo.documentos("Tecnologia") == (MANUAL, CONTRATO, GUIA_DEV)
+    assert catalogo.documentos("tecnologia", "engenheiro de  dados") == (MANUAL, CONTRATO, GUIA_DEV, ACESSOS)
+    # O cargo sem o departamento certo não recebe os documentos do departamento
+    assert catalogo.documentos("Marketing", "Engenheiro de Dados") == (MANUAL, CONTRATO)
+    assert catalogo.documentos("Marketing", "Gestor") == (GESTAO, MANUAL, CONTRATO)
+
+
+def test_catalogo_recarregado_quando_o_ttl_expira():
+    relogio = _Relogio()
+    versoes = iter([[MANUAL], [MANUAL, GUIA_DEV]])
+    catalogo = CatalogoDocumentos([CONTRATO], carregador=lambda: next(versoes), ttl=60, relogio=relogio)
+
+    assert catalogo.documentos("Tecnologia") == (CONTRATO,)
+    assert catalogo.aquecer()
+    assert catalogo.documentos("Tecnologia") == (MANUAL,)
+
+    relogio.agora = 61
+    catalogo.documentos()
+    catalogo.aguardar_atualizacao(5)
+    assert catalogo.documentos("Tecnologia") == (MANUAL, GUIA_DEV)
+
+
+def test_catalogo_mantem_se_quando_a_base_de_dados_falha():
+    def falha():
+        raise ConnectionError("sem base de dados")
+
+    catalogo = CatalogoDocumentos([MANUAL], carregador=falha)
+
+    assert not catalogo.aquecer()
+    assert catalogo.documentos() == (MANUAL,)
+
+
+# ---------------------------------------------------------------------------
+# Resolução das ligações
+# ---------------------------------------------------------------------------
+
+
+def _resolver_com_stub(documentos, rondas=1, atraso=0.0, estado_erro=0, **opcoes):
+    async def cenario():
+        async with servidor_graph_stub() as stub:
+            stub.atraso_segundos = atraso
+            stub.estado_erro = estado_erro
+            for documento in documentos:
+                if documento.url:
+                    stub.itens_partilhados[documento.url] = {
+                        "name": f"{documento.titulo} (v2).pdf",
+                        "webUrl": documento.url + "?v=2",
+                    }
+            cliente = ClienteGraph(CacheTokens(CredencialFalsa()), url_base=stub.url)
+            resolvedor = ResolvedorLigacoes(lambda: cliente, **opcoes)
+            try:
+                inicio = time.perf_counter()
+                resultados = [await resolvedor.resolver(documentos) for _ in range(rondas)]
+                duracao = time.perf_counter() - inicio
+            finally:
+                await cliente.fechar()
+            return stub, resolvedor, resultados, duracao
+
+    return asyncio.run(cenario())
+
+
+def test_ligacoes_resolvidas_e_guardadas_em_cache():
+    stub, resolvedor, (primeira, segunda), _ = _resolver_com_stub([MANUAL, CONTRATO], rondas=2)
+
+    assert [(ligacao.titulo, ligacao.url) for ligacao in primeira] == [
+        ("Manual (v2)", "https://the100s.sharepoint.com/manual?v=2"),
+        ("Contrato", None),
+    ]
+    assert segunda == primeira
+    assert stub.pedidos == ["driveItem"]
+    assert resolvedor.pedidos == 1 and resolvedor.acertos == 1
+
+
+def test_ligacoes_resolvidas_em_paralelo_com_limite():
+    documentos = [Documento(i, f"Doc {i}", f"https://the100s.sharepoint.com/doc-{i}") for i in range(20)]
+
+    stub, _, (ligacoes,), duracao = _resolver_com_stub(documentos, atraso=0.1, concorrencia=5)
+
+    assert [ligacao.titulo for ligacao in ligacoes] == [f"Doc {i} (v2)" for i in range(20)]
+    assert stub.max_pedidos_em_curso == 5
+    # 4 vagas de 0,1 s em vez de 20 pedidos em série
+    assert duracao < 1.0
+
+
+def test_falha_da_graph_usa_o_catalogo_e_fica_em_cache():
+    stub, resolvedor, (primeira, segunda), _ = _resolver_com_stub([MANUAL], rondas=2, estado_erro=503)
+
+    assert primeira[0].titulo == "Manual"
+    assert primeira[0].url == MANUAL.url
+    assert segunda == primeira
+    assert stub.pedidos == ["driveItem"]
+
+
+def test_pedidos_concorrentes_da_mesma_ligacao_partilham_a_chamada():
+    async def cenario():
+        async with servidor_graph_stub() as stub:
+            stub.atraso_segundos = 0.05
+            stub.itens_partilhados[MANUAL.url] = {"name": "Manual.docx", "webUrl": MANUAL.url}
+            cliente = ClienteGraph(CacheTokens(CredencialFalsa()), url_base=stub.url)
+            resolvedor = ResolvedorLigacoes(lambda: cliente)
+            try:
+                resultados = await asyncio.gather(*(resolvedor.resolver([MANUAL]) for _ in range(10)))
+            finally:
+                await cliente.fechar()
+            return stub, resultados
+
+    stub, resultados = asyncio.run(cenario())
+
+    assert stub.pedidos == ["driveItem"]
+    assert {ligacoes[0].titulo for ligacoes in resultados} == {"Manual"}
+
+
+def test_ligacao_expira_com_o_ttl():
+    relogio = _Relogio()
+    pedidos = []
+
+    class ClienteFalso:
+        async def obter_item_partilhado(self, url):
+            pedidos.append(url)
+            return {"name": "Manual.pdf", "webUrl": url}
+
+    cliente = ClienteFalso()
+    resolvedor = ResolvedorLigacoes(lambda: cliente, ttl=60, relogio=relogio)
+
+    asyncio.run(resolvedor.resolver([MANUAL]))
+    relogio.agora = 59
+    asyncio.run(resolvedor.resolver([MANUAL]))
+    relogio.agora = 61
+    asyncio.run(resolvedor.resolver([MANUAL]))
+
+    assert len(pedidos) == 2
+
+
+def test_falha_da_credencial_usa_o_catalogo_em_todas_as_conversas():
+    from azure.core.exceptions import ClientAuthenticationError
+
+    pedidos = []
+
+    class ClienteSemCredencial:
+        async def obter_item_partilhado(self, url):
+            pedidos.append(url)
+            await asyncio.sleep(0.01)
+            raise ClientAuthenticationError("segredo expirado")
+
+    cliente = ClienteSemCredencial()
+    resolvedor = ResolvedorLigacoes(lambda: cliente)
+
+    async def cenario():
+        return await asyncio.gather(*(resolvedor.resolver([MANUAL]) for _ in range(5)))
+
+    resultados = asyncio.run(cenario())
+    asyncio.run(resolvedor.resolver([MANUAL]))
+
+    assert {(ligacoes[0].titulo, ligacoes[0].url) for ligacoes in resultados} == {("Manual", MANUAL.url)}
+    assert pedidos == [MANUAL.url]
+
+def test_sem_graph_usa_o_catalogo():
+    resolvedor = ResolvedorLigacoes(lambda: None)
+
+    ligacoes = asyncio.run(resolvedor.resolver([MANUAL, CONTRATO]))
+
+    assert formatar_documentos(ligacoes) == (
+        "1. 📄 **Manual**\n   👉 [Abrir documento](https://the100s.sharepoint.com/manual)\n\n"
+        "2. 📄 **Contrato**\n   📧 Enviado por email\n\n"
+    )
+    assert len(resolvedor) == 0
+
+
+def test_codificar_partilha():
+    assert codificar_partilha("https://onedrive.live.com/redir?resid=1231244193912!12&authKey=1201919!12921!1") == (
+        "u!aHR0cHM6Ly9vbmVkcml2ZS5saXZlLmNvbS9yZWRpcj9yZXNpZD0xMjMxMjQ0MTkzOTEyITEyJmF1dGhLZXk9MTIwMTkxOSExMjkyMSEx"
+    )
+
+
+# ---------------------------------------------------------------------------
+# ActionEnviarDocumentos
+# ---------------------------------------------------------------------------
+
+
+def test_action_envia_os_documentos_do_departamento(monkeypatch):
+    monkeypatch.setattr(actions.PACOTES.padrao, "documentos", CatalogoDocumentos([MANUAL, GUIA_DEV]))
+    monkeypatch.setattr(actions, "RESOLVEDOR_LIGACOES", ResolvedorLigacoes(lambda: None))
+    dispatcher = _make_dispatcher()
+
+    asyncio.run(
+        ActionEnviarDocumentos().run(
+            dispatcher, _make_tracker(slots={"nome_colaborador": "Rui", "departamento": "Tecnologia"}), {}
+        )
+    )
+    mensagem = dispatcher.utter_message.call_args[1]["text"]
+
+    assert "Claro, Rui!" in mensagem
+    assert "**Guia de desenvolvimento**" in mensagem
+    assert "https://the100s.sharepoint.com/guia-dev" in mensagem
@@ -0,0 +1,220 @@
+"""
+Testes dos pacotes de conteúdos por empresa (actions/empresas.py).
+"""
+
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from actions.actions import (
+    PACOTES,
+    ActionEncaminharHumano,
+    ActionIniciarQuiz,
+    ActionResponderFaq,
+    ActionVerificarEtapaOnboarding,
+)
+from actions.conteudo_base import CONTEUDO_BASE, DOCUMENTOS_BASE, QUIZ_PERGUNTAS
+from actions.empresas import CachePacotes, carregador_yaml, substituir_lista
+from actions.quiz import BANCO_GERAL
+from actions.templates import TEMPLATES
+
+CONTEUDOS = Path(__file__).resolve().parent.parent / "actions" / "conteudos"
+BASE = CONTEUDO_BASE
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def _tracker(slots):
+    tracker = MagicMock()
+    tracker.get_slot.side_effect = lambda chave: slots.get(chave)
+    return tracker
+
+
+def _cache(tmp_path, **opcoes):
+    return CachePacotes(PACOTES.padrao, carregador=carregador_yaml(BASE, tmp_path), **opcoes)
+
+
+def _escrever(tmp_path, empresa, conteudo="nome: Empresa\n"):
+    (tmp_path / f"{empresa}.yml").write_text(conteudo, encoding="utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Pacotes
+# ---------------------------------------------------------------------------
+
+
+def test_pacote_de_exemplo_substitui_e_sobrepoe_o_conteudo_base():
+    pacote = carregador_yaml(BASE, CONTEUDOS)("exemplo")
+
+    assert pacote.nome == "Exemplo Lda."
+    desconhecida = pacote.templates.renderizar("etapa_desconhecida", ", Ana")
+    assert "Exemplo Lda." in desconhecida and "pessoas@exemplo.pt" in desconhecida
+    assert "The100s" not in desconhecida and "the100s.com" not in desconhecida
+    assert pacote.templates.renderizar("feedback", ", Ana").startswith("🙏 Obrigado pelo seu feedback, Ana!")
+    # A lista do primeiro dia é a do pacote; o resto do texto é o base
+    primeiro_dia = pacote.templates.renderizar("etapa_primeiro_dia", "")
+    assert primeiro_dia.splitlines()[:3] == [
+        "🏢 Olá! É o seu **Primeiro Dia** na Exemplo Lda.!",
+        "",
+        "**Agenda de hoje:**",
+    ]
+    assert primeiro_dia.count("• ") == 3
+    assert [p["id"] for p in pacote.quiz.perguntas(BANCO_GERAL)] == [1]
+    assert [d.titulo for d in pacote.documentos.documentos("Tecnologia")] == [
+        "Guia de Acolhimento",
+        "Política de Teletrabalho",
+    ]
+    assert [d.titulo for d in pacote.documentos.documentos("Vendas")] == ["Guia de Acolhimento"]
+
+
+def test_pacote_sem_quiz_nem_documentos_usa_os_base_com_as_substituicoes(tmp_path):
+    _escrever(tmp_path, "acme", "nome: Acme\nsubstituir:\n  The100s: Acme\n  the100s.sharepoint: acme.sharepoint\n")
+
+    pacote = carregador_yaml(BASE, tmp_path)("acme")
+
+    perguntas = pacote.quiz.perguntas(BANCO_GERAL)
+    assert len(perguntas) == len(QUIZ_PERGUNTAS)
+    assert "Qual é a missão da Acme?" in perguntas[0]["pergunta"]
+    assert pacote.documentos.documentos()[0].url == "https://acme.sharepoint.com/manual-colaborador"
+    # O conteúdo base não é alterado
+    assert "The100s" in QUIZ_PERGUNTAS[0]["pergunta"]
+    assert DOCUMENTOS_BASE[0].url.startswith("https://the100s.sharepoint.com/")
+
+
+def test_lista_substituida_ou_acrescentada():
+    assert substituir_lista("Título:\n• a\n• b\n\nFim", ["x"]) == "Título:\n• x\n\nFim"
+    assert substituir_lista("Sem lista", ["x", "y"]) == "Sem lista\n\n• x\n• y"
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+
+def test_pacotes_lidos_so_no_primeiro_pedido(tmp_path):
+    _escrever(tmp_path, "acme")
+    cache = _cache(tmp_path)
+
+    # Criar a cache não lê nenhum pacote
+    assert len(cache) == 0 and cache.memoria == 0
+    primeiro = cache.obter("acme")
+    assert cache.obter(" ACME ") is primeiro
+    assert (cache.falhas, cache.acertos) == (1, 1)
+    assert cache.memoria == primeiro.tamanho > 0
+    assert cache.obter(None) is cache.obter("the100s") is PACOTES.padrao
+
+
+def test_empresas_sem_pacote_usam_o_por_omissao_durante_o_ttl(tmp_path):
+    relogio = _Relogio()
+    cache = _cache(tmp_path, ttl_desconhecida=60, relogio=relogio)
+
+    assert cache.obter("nova") is PACOTES.padrao
+    assert cache.obter("../segredos") is PACOTES.padrao
+    _escrever(tmp_path, "nova")
+    assert cache.obter("nova") is PACOTES.padrao
+    relogio.agora = 61
+    assert cache.obter("nova").nome == "Empresa"
+    # Um pacote inválido também não interrompe a conversa
+    _escrever(tmp_path, "errada", "etapas:\n  inexistente: [a]\n")
+    assert cache.obter("errada") is PACOTES.padrao
+
+
+def test_descarta_os_pacotes_menos_usados_acima_dos_limites(tmp_path):
+    for empresa in ("a", "b", "c", "d"):
+        _escrever(tmp_path, empresa)
+    cache = _cache(tmp_path, tamanho_maximo=2)
+
+    cache.obter("a")
+    cache.obter("b")
+    cache.obter("a")  # "b" passa a ser o menos usado
+    cache.obter("c")
+    assert cache.empresas() == ["a", "c"]
+    assert cache.descartados == 1
+
+    tamanho = cache.obter("a").tamanho
+    limitada = _cache(tmp_path, memoria_maxima=int(tamanho * 2.5))
+    for empresa in ("a", "b", "c", "d"):
+        limitada.obter(empresa)
+    assert limitada.empresas() == ["c", "d"]
+    assert limitada.memoria <= tamanho * 2.5
+
+
+# ---------------------------------------------------------------------------
+# Actions
+# ---------------------------------------------------------------------------
+
+
+def test_actions_usam_o_pacote_da_empresa_do_colaborador():
+    cache = CachePacotes(PACOTES.padrao, carregador=carregador_yaml(BASE, CONTEUDOS))
+    dispatcher = MagicMock()
+
+    with patch("actions.actions.PACOTES", cache):
+        eventos = ActionIniciarQuiz().run(dispatcher, _tracker({"empresa": "exemplo"}), {})
+        ActionVerificarEtapaOnboarding().run(
+            dispatcher, _tracker({"empresa": "exemplo", "etapa_onboarding": "primeiro_dia"}), {}
+        )
+        ActionVerificarEtapaOnboarding().run(dispatcher, _tracker({"etapa_onboarding": "primeiro_dia"}), {})
+
+    quiz, etapa, etapa_base = (c.kwargs["text"] for c in dispatcher.utter_message.call_args_list)
+    assert "Quiz de Conhecimento da Exemplo Lda." in quiz and "sede da Exemplo Lda." in quiz
+    assert {"event": "slot", "name": "quiz_banco", "value": BANCO_GERAL} in [
+        {k: e[k] for k in ("event", "name", "value")} for e in eventos
+    ]
+    assert "Almoço de boas-vindas" in etapa
+    assert etapa_base == TEMPLATES.renderizar("etapa_primeiro_dia", "")
+
+
+def test_encaminhamento_usa_as_filas_da_empresa_do_colaborador(tmp_path):
+    _escrever(
+        tmp_path,
+        "acme",
+        "nome: Acme\n"
+        "filas:\n"
+        "  - {id: pessoas, nome: Equipa de Pessoas, contacto: pessoas@acme.pt, prazo: 2 horas úteis}\n"
+        "  - {id: ti, nome: Informática, contacto: ti@acme.pt, prazo: 1 dia útil}\n"
+        "encaminhamento:\n"
+        "  - {fila: ti, intent: pedir_ajuda_ti}\n"
+        "fila_padrao: pessoas\n",
+    )
+    _escrever(tmp_path, "exemplo", (CONTEUDOS / "exemplo.yml").read_text(encoding="utf-8"))
+    dispatcher = MagicMock()
+
+    with patch("actions.actions.PACOTES", _cache(tmp_path)):
+        for empresa in ("exemplo", "acme", None):
+            ActionEncaminharHumano().run(dispatcher, _tracker({"empresa": empresa}), {})
+
+    exemplo, acme, base = (c.kwargs["text"] for c in dispatcher.utter_message.call_args_list)
+    # Sem ``filas``, as filas base com as substituições do pacote
+    assert "pessoas@exemplo.pt" in exemplo and "the100s" not in exemplo
+    assert "Equipa de Pessoas" in acme and "pessoas@acme.pt" in acme and "2 horas úteis" in acme
+    assert "rh@the100s.com" in base
+
+
+def test_faq_usa_as_entradas_da_empresa_do_colaborador(tmp_path):
+    _escrever(tmp_path, "acme", "nome: Acme\nsubstituir:\n  rh@the100s.com: pessoas@acme.pt\n")
+    _escrever(tmp_path, "exemplo", (CONTEUDOS / "exemplo.yml").read_text(encoding="utf-8"))
+    dispatcher = MagicMock()
+
+    perguntas = [
+        ("exemplo", "a que horas começo a trabalhar?"),
+        ("acme", "quem trata dos benefícios?"),
+        ("acme", "tenho uma pergunta"),
+        (None, "quem trata dos benefícios?"),
+    ]
+    with patch("actions.actions.PACOTES", _cache(tmp_path)):
+        for empresa, texto in perguntas:
+            tracker = _tracker({"empresa": empresa})
+            tracker.latest_message = {"text": texto}
+            ActionResponderFaq().run(dispatcher, tracker, {})
+
+    exemplo, acme, acme_geral, base = (c.kwargs["text"] for c in dispatcher.utter_message.call_args_list)
+    assert "8h30 às 17h30" in exemplo
+    # Sem ``faq``, as entradas base com as substituições do pacote, também na FAQ geral
+    assert "pessoas@acme.pt" in acme and "the100s" not in acme
+    assert "Perguntas Frequentes" in acme_geral and "pessoas@acme.pt" in acme_geral
+    assert "rh@the100s.com" in base
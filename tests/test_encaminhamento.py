@@ -0,0 +1,148 @@
+"""
+Testes do encaminhamento para as equipas humanas e do fallback adaptativo.
+"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+from actions.actions import (
+    FILA_PADRAO,
+    FILAS_BASE,
+    REGRAS_BASE,
+    ActionEncaminharHumano,
+    ActionFallbackAdaptativo,
+)
+from actions.baixa_confianca import RegistoBaixaConfianca
+from actions.encaminhamento import Fila, RegraEncaminhamento, TabelaEncaminhamento
+
+FILAS = FILAS_BASE + [Fila("rh_tecnologia", "Parceira de RH de Tecnologia", "rh.tec@the100s.com", "1 hora útil")]
+REGRAS = REGRAS_BASE + [
+    RegraEncaminhamento("rh_tecnologia", departamento="Tecnologia"),
+    RegraEncaminhamento("rh", intent="pedir_info_beneficios"),
+]
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def _utilizador(intent, texto="..."):
+    return {"event": "user", "text": texto, "parse_data": {"intent": {"name": intent}}}
+
+
+def _action(nome):
+    return {"event": "action", "name": nome}
+
+
+def _tracker(eventos, slots=None, mensagem=None):
+    tracker = MagicMock()
+    slots = slots or {}
+    tracker.get_slot.side_effect = lambda chave: slots.get(chave)
+    tracker.events = eventos
+    tracker.latest_message = mensagem or eventos[-1].get("parse_data", {})
+    return tracker
+
+
+# ---------------------------------------------------------------------------
+# Tabela
+# ---------------------------------------------------------------------------
+
+
+def test_fila_pela_intent_mais_recente_depois_pelo_departamento():
+    tabela = TabelaEncaminhamento(FILAS, REGRAS, FILA_PADRAO)
+
+    assert tabela.fila().id == "rh"
+    assert tabela.fila("tecnologia ").id == "rh_tecnologia"
+    # Pedir ajuda de TI vale mais do que o departamento, e a intent mais recente decide
+    assert tabela.fila("Tecnologia", ["saudar", "pedir_ajuda_ti"]).id == "ti"
+    assert tabela.fila("Tecnologia", ["pedir_info_beneficios", "pedir_ajuda_ti"]).id == "rh"
+    assert tabela.fila("Marketing", ["pedir_documentos"]).id == "rh"
+
+
+def test_tabela_recarregada_da_base_de_dados_no_fim_do_ttl():
+    relogio = _Relogio()
+    filas = [Fila("rh", "RH", "rh@x", "1 dia"), Fila("ti", "TI", "ti@x", "2 dias")]
+    carregador = MagicMock(return_value=(filas, [RegraEncaminhamento("ti", departamento="Tecnologia")]))
+    tabela = TabelaEncaminhamento(FILAS_BASE, REGRAS_BASE, "rh", carregador=carregador, ttl=60, relogio=relogio)
+
+    assert tabela.fila("Tecnologia").id == "rh"
+    relogio.agora = 61
+    tabela.fila("Tecnologia")  # devolve a tabela antiga e recarrega numa thread
+    tabela.aguardar_atualizacao(5)
+
+    assert tabela.fila("Tecnologia") == Fila("ti", "TI", "ti@x", "2 dias")
+    assert tabela.fila(intents=["pedir_ajuda_ti"]).id == "rh"
+    # Uma tabela sem a fila por omissão não substitui a atual
+    carregador.return_value = ([Fila("ti", "TI", "ti@x", "2 dias")], [])
+    assert tabela.aquecer() is False
+    assert tabela.fila().nome == "RH"
+
+
+# ---------------------------------------------------------------------------
+# Actions
+# ---------------------------------------------------------------------------
+
+
+def test_encaminhar_humano_para_a_fila_de_ti_depois_de_um_pedido_de_ti():
+    dispatcher = MagicMock()
+    eventos = [_utilizador("pedir_ajuda_ti"), _action("utter_ajuda_ti"), _utilizador("falar_com_humano")]
+
+    ActionEncaminharHumano().run(dispatcher, _tracker(eventos, {"nome_colaborador": "Ana"}), {})
+
+    mensagem = dispatcher.utter_message.call_args.kwargs["text"]
+    assert mensagem.startswith("👤 Claro, Ana! Vou pô-lo/a em contacto com a **Equipa de Suporte TI**.")
+    assert "helpdesk@the100s.com" in mensagem
+
+
+def test_fallback_sugere_temas_e_depois_encaminha_sem_repetir(tmp_path):
+    registo = RegistoBaixaConfianca(str(tmp_path / "baixa_confianca.jsonl"))
+    dispatcher = MagicMock()
+    ranking = [
+        {"name": "nlu_fallback", "confidence": 0.5},
+        {"name": "pedir_documentos", "confidence": 0.42},
+        {"name": "saudar", "confidence": 0.3},
+        {"name": "pedir_faq", "confidence": 0.2},
+    ]
+    mensagem = {"text": "onde está o papel", "intent": ranking[0], "intent_ranking": ranking}
+    fallback = ActionFallbackAdaptativo.NOME
+    eventos = [{"event": "session_started"}, _utilizador("pedir_info_beneficios"), _action("utter_info_beneficios")]
+
+    with patch("actions.actions.REGISTO_BAIXA_CONFIANCA", registo):
+        for _ in range(3):
+            eventos += [_utilizador("nlu_fallback")]
+            ActionFallbackAdaptativo().run(dispatcher, _tracker(eventos, {}, mensagem), {})
+            eventos += [_action(fallback), _action("action_listen")]
+    registo.fechar()
+
+    primeira, segunda, terceira = dispatcher.utter_message.call_args_list
+    assert primeira.kwargs["text"].startswith("🤔 Desculpe, não percebi bem")
+    assert [b["payload"] for b in primeira.kwargs["buttons"]] == ["/pedir_documentos", "/pedir_faq", "/falar_com_humano"]
+    assert segunda.kwargs["text"].startswith("👤 Lamento, não estou a conseguir ajudar")
+    assert "**Equipa de RH**" in segunda.kwargs["text"]
+    assert terceira.kwargs["text"].startswith("👤 A sua questão já foi encaminhada para a **Equipa de RH**")
+    linhas = [json.loads(linha) for linha in (tmp_path / "baixa_confianca.jsonl").read_text().splitlines()]
+    assert [(linha["intent"], linha["origem"], linha["fila"]) for linha in linhas] == [
+        ("pedir_documentos", "nlu", None),
+        ("pedir_documentos", "nlu", "rh"),
+        ("pedir_documentos", "nlu", "rh"),
+    ]
+
+
+def test_contagem_dos_fallbacks_recomeca_depois_de_uma_resposta():
+    dispatcher = MagicMock()
+    fallback = ActionFallbackAdaptativo.NOME
+    eventos = [
+        _utilizador("nlu_fallback"),
+        _action(fallback),
+        _utilizador("pedir_faq"),
+        _action("action_responder_faq"),
+        _utilizador("nlu_fallback"),
+    ]
+
+    ActionFallbackAdaptativo().run(dispatcher, _tracker(eventos, {}, {"text": "?"}), {})
+
+    assert dispatcher.utter_message.call_args.kwargs["text"].startswith("🤔 Desculpe")
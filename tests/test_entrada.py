@@ -0,0 +1,123 @@
+"""
+Testes do filtro de entrada dos canais (addons/entrada.py).
+"""
+
+import asyncio
+
+import pytest
+
+from addons.entrada import (
+    DUPLICADA,
+    ID_ATIVIDADE,
+    LIMITE,
+    ConjuntoRecente,
+    FiltroEntrada,
+    LimitadorPorUtilizador,
+)
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_conjunto_recente_rejeita_chaves_dentro_do_prazo():
+    relogio = _Relogio()
+    recentes = ConjuntoRecente(ttl=60, relogio=relogio)
+
+    assert recentes.adicionar("a1") is True
+    assert recentes.adicionar("a1") is False
+    relogio.agora = 59
+    assert "a1" in recentes
+    relogio.agora = 61
+    assert "a1" not in recentes
+    assert recentes.adicionar("a1") is True
+
+
+def test_conjunto_recente_descarta_expirados_e_respeita_a_capacidade():
+    relogio = _Relogio()
+    recentes = ConjuntoRecente(ttl=10, capacidade=3, relogio=relogio)
+    for indice in range(3):
+        relogio.agora = indice
+        recentes.adicionar(f"a{indice}")
+
+    relogio.agora = 10.5  # a0 expirou
+    recentes.adicionar("a3")
+    assert len(recentes) == 3
+    assert "a0" not in recentes
+
+    recentes.adicionar("a4")  # acima da capacidade: sai o mais antigo
+    assert len(recentes) == 3
+    assert "a1" not in recentes
+    assert "a4" in recentes
+
+
+def test_balde_permite_rajada_e_repoe_fichas_com_o_tempo():
+    relogio = _Relogio()
+    limitador = LimitadorPorUtilizador(rajada=3, por_minuto=6, relogio=relogio)
+
+    assert [limitador.permitir("ana") for _ in range(4)] == [True, True, True, False]
+    assert limitador.permitir("rui") is True
+    relogio.agora = 10  # 6 por minuto: uma ficha a cada 10 s
+    assert limitador.permitir("ana") is True
+    assert limitador.permitir("ana") is False
+    relogio.agora = 1000
+    assert [limitador.permitir("ana") for _ in range(4)] == [True, True, True, False]
+
+
+def test_limitador_descarta_os_baldes_parados_ha_mais_tempo():
+    limitador = LimitadorPorUtilizador(rajada=1, max_utilizadores=2, relogio=_Relogio())
+    limitador.permitir("ana")
+    limitador.permitir("rui")
+    limitador.permitir("ana")
+    limitador.permitir("eva")
+
+    assert len(limitador) == 2
+    # O balde da ana continua vazio; o do rui foi descartado e volta cheio
+    assert limitador.permitir("ana") is False
+    assert limitador.permitir("rui") is True
+
+
+def test_filtro_rejeita_repeticoes_sem_gastar_fichas():
+    relogio = _Relogio()
+    filtro = FiltroEntrada(
+        ConjuntoRecente(relogio=relogio), LimitadorPorUtilizador(rajada=2, relogio=relogio)
+    )
+
+    assert filtro.rejeitar("ana", "m1") is None
+    assert filtro.rejeitar("ana", "m1") == DUPLICADA
+    assert filtro.rejeitar("rui", "m1") is None  # o id é por remetente
+    assert filtro.rejeitar("ana", "m2") is None
+    assert filtro.rejeitar("ana", "m3") == LIMITE
+    assert filtro.rejeitar("ana", None) == LIMITE
+    assert filtro.rejeitadas == {DUPLICADA: 1, LIMITE: 2}
+
+
+def test_filtro_com_a_configuracao_do_canal():
+    filtro = FiltroEntrada.de_configuracao({"app_id": "x", "rajada": 2, "mensagens_por_minuto": 30})
+
+    assert filtro.limitador.rajada == 2
+    assert filtro.limitador.por_segundo == 0.5
+    assert FiltroEntrada.de_configuracao(None).limitador.rajada == 5
+
+
+def test_canal_descarta_mensagens_antes_do_rasa():
+    pytest.importorskip("rasa")
+    from rasa.core.channels.channel import UserMessage
+
+    from addons.canais import com_filtro
+
+    recebidas = []
+
+    async def on_new_message(mensagem):
+        recebidas.append(mensagem.text)
+        assert ID_ATIVIDADE not in mensagem.metadata
+
+    ao_receber = com_filtro(on_new_message, FiltroEntrada(limitador=LimitadorPorUtilizador(rajada=2)))
+    for texto, id_atividade in (("olá", "a1"), ("olá", "a1"), ("sim", "a2"), ("ok", "a3")):
+        asyncio.run(ao_receber(UserMessage(texto, sender_id="ana", metadata={ID_ATIVIDADE: id_atividade})))
+
+    assert recebidas == ["olá", "sim"]
@@ -0,0 +1,154 @@
+"""
+Testes do calendário das etapas de onboarding.
+"""
+
+from datetime import date, datetime, timezone
+
+import pytest
+
+from actions.etapas import (
+    ONBOARDING_CONCLUIDO,
+    PRE_ONBOARDING,
+    PRIMEIRA_SEMANA,
+    PRIMEIRO_DIA,
+    CalendarioColaborador,
+    CalendarioOnboarding,
+    RegistoColaborador,
+    interpretar_data_inicio,
+)
+
+INICIO = date(2024, 3, 4)
+
+
+def _dia(deslocamento):
+    return INICIO.toordinal() + deslocamento
+
+
+def _registo(email, data_inicio=INICIO, ativo=True, minuto=0):
+    return RegistoColaborador(
+        email, data_inicio, ativo, datetime(2024, 3, 1, 9, minuto, tzinfo=timezone.utc)
+    )
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+class _Carregador:
+    def __init__(self, registos):
+        self.registos = registos
+        self.pedidos = []
+
+    def __call__(self, desde):
+        self.pedidos.append(desde)
+        if isinstance(self.registos, Exception):
+            raise self.registos
+        return [r for r in self.registos if desde is None or r.atualizado_em >= desde]
+
+
+@pytest.mark.parametrize(
+    "deslocamento,etapa",
+    [
+        (-10, PRE_ONBOARDING),
+        (-1, PRE_ONBOARDING),
+        (0, PRIMEIRO_DIA),
+        (1, PRIMEIRA_SEMANA),
+        (6, PRIMEIRA_SEMANA),
+        (7, ONBOARDING_CONCLUIDO),
+        (90, ONBOARDING_CONCLUIDO),
+    ],
+)
+def test_etapa_pelo_calendario(deslocamento, etapa):
+    assert CalendarioColaborador(INICIO).etapa(_dia(deslocamento)) == etapa
+
+
+@pytest.mark.parametrize("valor", ["2024-03-04", "04/03/2024", " 04-03-2024 ", "04.03.2024"])
+def test_interpretar_data_inicio(valor):
+    assert interpretar_data_inicio(valor) == INICIO
+
+
+def test_interpretar_data_inicio_invalida():
+    assert interpretar_data_inicio("segunda-feira") is None
+
+
+def test_etapa_pelo_slot_data_inicio_sem_base_de_dados():
+    calendario = CalendarioOnboarding(hoje=lambda: _dia(0))
+
+    assert calendario.aquecer() is False
+    assert calendario.etapa(data_inicio="04/03/2024") == PRIMEIRO_DIA
+    assert calendario.etapa(data_inicio="2024-03-04", hoje=_dia(3)) == PRIMEIRA_SEMANA
+    assert calendario.etapa() is None
+    assert calendario.etapa(data_inicio="amanhã") is None
+
+
+def test_data_dos_rh_tem_prioridade_sobre_o_slot():
+    calendario = CalendarioOnboarding(
+        _Carregador([_registo("Ana@The100s.com", data_inicio=date(2024, 3, 11))]),
+        hoje=lambda: _dia(0),
+    )
+    calendario.aquecer()
+
+    assert len(calendario) == 1
+    assert calendario.etapa("ana@the100s.com", "2024-03-04") == PRE_ONBOARDING
+    assert calendario.etapa("rui@the100s.com", "2024-03-04") == PRIMEIRO_DIA
+
+
+def test_atualizacao_incremental_apos_ttl():
+    relogio = _Relogio()
+    carregador = _Carregador([_registo("ana@the100s.com"), _registo("rui@the100s.com")])
+    calendario = CalendarioOnboarding(
+        carregador, ttl=60, intervalo_recarga_completa=3600, relogio=relogio, hoje=lambda: _dia(0)
+    )
+    calendario.aquecer()
+
+    # Os RH adiam a entrada da Ana e desativam o Rui
+    carregador.registos = carregador.registos + [
+        _registo("ana@the100s.com", data_inicio=date(2024, 4, 1), minuto=5),
+        _registo("rui@the100s.com", ativo=False, minuto=5),
+    ]
+    relogio.agora = 61
+    calendario.etapa("ana@the100s.com")
+    calendario.aguardar_atualizacao(timeout=5)
+
+    assert carregador.pedidos == [None, datetime(2024, 3, 1, 9, 0, tzinfo=timezone.utc)]
+    assert calendario.etapa("ana@the100s.com") == PRE_ONBOARDING
+    assert calendario.etapa("rui@the100s.com") is None
+
+
+def test_recarga_completa_periodica_remove_linhas_apagadas():
+    relogio = _Relogio()
+    carregador = _Carregador([_registo("ana@the100s.com"), _registo("rui@the100s.com")])
+    calendario = CalendarioOnboarding(
+        carregador, ttl=60, intervalo_recarga_completa=600, relogio=relogio, hoje=lambda: _dia(0)
+    )
+    calendario.aquecer()
+
+    carregador.registos = [_registo("ana@the100s.com")]
+    relogio.agora = 601
+    calendario.etapa("ana@the100s.com")
+    calendario.aguardar_atualizacao(timeout=5)
+
+    assert carregador.pedidos[-1] is None
+    assert len(calendario) == 1
+
+
+def test_falha_na_base_de_dados_mantem_o_calendario():
+    relogio = _Relogio()
+    carregador = _Carregador([_registo("ana@the100s.com")])
+    calendario = CalendarioOnboarding(carregador, ttl=60, relogio=relogio, hoje=lambda: _dia(0))
+    calendario.aquecer()
+
+    carregador.registos = RuntimeError("base de dados indisponível")
+    relogio.agora = 61
+    calendario.etapa("ana@the100s.com")
+    calendario.aguardar_atualizacao(timeout=5)
+
+    assert calendario.etapa("ana@the100s.com") == PRIMEIRO_DIA
+    # A tentativa falhada não é repetida antes do próximo TTL
+    pedidos = len(carregador.pedidos)
+    calendario.etapa("ana@the100s.com")
+    assert len(carregador.pedidos) == pedidos
@@ -0,0 +1,138 @@
+"""
+Testes do índice das perguntas frequentes (actions/faq.py).
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from actions.faq import DIMENSAO, IndiceFaq, RegistoFaq, vetorizar
+
+INICIO = datetime(2026, 10, 1, 9, 0, tzinfo=timezone.utc)
+
+BASE = [
+    RegistoFaq(1, "Qual é o horário de trabalho?", "Das 9h às 18h.", ("a que horas começo a trabalhar?",)),
+    RegistoFaq(2, "Quando recebo o primeiro salário?", "No último dia útil.", ("quando é o pagamento?",)),
+    RegistoFaq(3, "Como funciona o registo de ponto?", "Pelo SIRH.", ("como marco o ponto?",)),
+]
+
+
+def _registo(id_entrada, pergunta, ativa=True, minuto=0, variantes=()):
+    return RegistoFaq(id_entrada, pergunta, f"Resposta {id_entrada}", variantes, ativa, INICIO + timedelta(minutes=minuto))
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+class _Carregador:
+    def __init__(self, registos):
+        self.registos = registos
+        self.pedidos = []
+
+    def __call__(self, desde):
+        self.pedidos.append(desde)
+        if isinstance(self.registos, Exception):
+            raise self.registos
+        return [r for r in self.registos if desde is None or r.atualizada_em >= desde]
+
+
+def test_vetores_normalizados_e_estaveis():
+    matriz = vetorizar(["Horário de trabalho", "horario de TRABALHO!", ""])
+
+    assert matriz.shape == (3, DIMENSAO)
+    assert matriz.dtype == np.float32
+    assert np.isclose(np.linalg.norm(matriz[0]), 1.0)
+    assert np.allclose(matriz[0], matriz[1])
+    assert not matriz[2].any()
+
+
+def test_procura_a_entrada_mais_parecida():
+    indice = IndiceFaq(BASE)
+
+    resultados = indice.procurar("quando é que recebo o salario?")
+
+    assert resultados[0].entrada.id == 2
+    assert resultados[0].semelhanca > resultados[1].semelhanca
+    assert [r.entrada.id for r in indice.procurar("como marcar o ponto", k=1)] == [3]
+    assert indice.procurar("a que horas começo?")[0].entrada.id == 1
+
+
+def test_cada_entrada_aparece_uma_vez_mesmo_com_varias_variantes():
+    indice = IndiceFaq([RegistoFaq(1, "horário", "R", ("horário de trabalho", "horário flexível")), *BASE[1:]])
+
+    ids = [r.entrada.id for r in indice.procurar("horário", k=3)]
+
+    assert sorted(ids) == [1, 2, 3]
+
+
+def test_mensagem_sem_palavras_uteis_nao_devolve_nada():
+    assert IndiceFaq(BASE).procurar("tenho uma dúvida?") == []
+    assert IndiceFaq().procurar("horário") == []
+
+
+def test_atualizacao_so_vetoriza_as_entradas_alteradas():
+    indice = IndiceFaq(BASE)
+
+    assert indice.atualizar([_registo(4, "Onde fica o meu posto de trabalho?", variantes=("onde me sento?",))]) == 2
+    assert indice.atualizar([_registo(2, "Quando recebo o primeiro salário?")]) == 1
+    assert len(indice) == 4
+    assert indice.entrada(2).resposta == "Resposta 2"
+    assert indice.procurar("onde me sento", k=1)[0].entrada.id == 4
+
+
+def test_entrada_inativa_e_retirada():
+    indice = IndiceFaq(BASE)
+
+    indice.atualizar([_registo(1, "Qual é o horário de trabalho?", ativa=False)])
+
+    assert indice.entrada(1) is None
+    assert 1 not in [r.entrada.id for r in indice.procurar("horário de trabalho")]
+
+
+def test_aquecer_le_a_base_de_dados_e_mantem_as_entradas_base():
+    carregador = _Carregador([_registo(4, "Onde fica o meu posto?"), _registo(1, "Horário?", minuto=1)])
+    indice = IndiceFaq(BASE, carregador=carregador)
+
+    assert indice.aquecer() is True
+    assert len(indice) == 4
+    assert indice.entrada(1).pergunta == "Horário?"
+    assert indice.entrada(3) is BASE[2]
+
+
+def test_ttl_le_apenas_as_linhas_alteradas():
+    relogio = _Relogio()
+    carregador = _Carregador([_registo(4, "Onde fica o meu posto?")])
+    indice = IndiceFaq(BASE, carregador=carregador, ttl=60, relogio=relogio)
+    indice.aquecer()
+
+    carregador.registos = carregador.registos + [_registo(5, "Quem trata dos benefícios?", minuto=5)]
+    relogio.agora = 61
+    indice.procurar("benefícios")
+    indice.aguardar_atualizacao(timeout=5)
+
+    assert carregador.pedidos == [None, INICIO]
+    assert indice.procurar("benefícios", k=1)[0].entrada.id == 5
+
+
+def test_recarga_completa_retira_entradas_apagadas():
+    carregador = _Carregador([_registo(4, "Onde fica o meu posto?")])
+    indice = IndiceFaq(BASE, carregador=carregador)
+    indice.aquecer()
+
+    carregador.registos = []
+    indice.aquecer()
+
+    assert indice.entrada(4) is None
+    assert len(indice) == len(BASE)
+
+
+def test_falha_da_base_de_dados_mantem_o_indice():
+    indice = IndiceFaq(BASE, carregador=_Carregador(RuntimeError("sem ligação")))
+
+    assert indice.aquecer() is False
+    assert indice.procurar("salário", k=1)[0].entrada.id == 2
@@ -0,0 +1,169 @@
+"""
+Testes da fila de feedback gravada em lotes (write-behind).
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+from actions.feedback import FilaFeedback, RegistoFeedback, RegistoRejeitado
+
+
+def _registo(i):
+    return RegistoFeedback(f"user-{i}", "Ana", f"feedback {i}", datetime.now(timezone.utc))
+
+
+class _Escritor:
+    def __init__(self, falhas=0):
+        self.lotes = []
+        self.falhas = falhas
+        self.evento = threading.Event()
+
+    def __call__(self, lote):
+        if self.falhas:
+            self.falhas -= 1
+            raise ConnectionError("base de dados indisponível")
+        self.lotes.append(list(lote))
+        self.evento.set()
+
+    @property
+    def registos(self):
+        return [registo for lote in self.lotes for registo in lote]
+
+
+def test_grava_lote_quando_enche():
+    escritor = _Escritor()
+    fila = FilaFeedback(escritor, tamanho_lote=5, intervalo_maximo=60)
+
+    for i in range(5):
+        fila.registar(_registo(i))
+
+    assert escritor.evento.wait(timeout=5)
+    assert [len(lote) for lote in escritor.lotes] == [5]
+    fila.fechar()
+
+
+def test_grava_lote_incompleto_apos_intervalo():
+    escritor = _Escritor()
+    fila = FilaFeedback(escritor, tamanho_lote=100, intervalo_maximo=0.05)
+
+    fila.registar(_registo(1))
+
+    assert escritor.evento.wait(timeout=5)
+    assert len(escritor.registos) == 1
+    fila.fechar()
+
+
+def test_fechar_grava_pendentes():
+    escritor = _Escritor()
+    fila = FilaFeedback(escritor, tamanho_lote=1000, intervalo_maximo=60)
+
+    for i in range(250):
+        fila.registar(_registo(i))
+    fila.fechar()
+
+    assert [r.sender_id for r in escritor.registos] == [f"user-{i}" for i in range(250)]
+    assert max(len(lote) for lote in escritor.lotes) <= 1000
+    assert fila.registar(_registo(999)) is False
+
+
+def test_falha_na_escrita_e_repetida():
+    escritor = _Escritor(falhas=1)
+    fila = FilaFeedback(escritor, tamanho_lote=2, intervalo_maximo=0.05)
+
+    fila.registar(_registo(1))
+    fila.registar(_registo(2))
+
+    assert escritor.evento.wait(timeout=5)
+    fila.fechar()
+    assert [r.sender_id for r in escritor.registos] == ["user-1", "user-2"]
+
+
+def test_base_de_dados_indisponivel_nao_repete_sem_pausa():
+    tentativas = []
+
+    def escritor_em_falha(lote):
+        tentativas.append(len(lote))
+        raise ConnectionError("base de dados indisponível")
+
+    fila = FilaFeedback(escritor_em_falha, tamanho_lote=2, intervalo_maximo=0.05)
+    for i in range(3):
+        fila.registar(_registo(i))
+    time.sleep(0.5)
+    # A fila continua a ser lida durante as pausas
+    assert fila.registar(_registo(3)) is True
+    fila.fechar()
+
+    # Pausas de 0.05, 0.1, 0.2, 0.4 s: poucas tentativas, mais a final do fecho;
+    # em cada uma, o lote e o seu primeiro registo sozinho
+    assert 2 <= len(tentativas) // 2 <= 8
+    assert tentativas == [2, 1] * (len(tentativas) // 2)
+    assert len(fila._pendentes) == 4
+
+
+def test_registo_que_falha_sempre_nao_bloqueia_os_seguintes():
+    gravados = []
+
+    def escritor(lote):
+        if any(registo.texto is None for registo in lote):
+            raise ValueError("texto em falta")
+        gravados.extend(lote)
+
+    fila = FilaFeedback(escritor, tamanho_lote=3, intervalo_maximo=0.05)
+    fila.registar(_registo(1))
+    fila.registar(_registo(2)._replace(texto=None))
+    fila.registar(_registo(3))
+    fila.fechar()
+
+    assert [r.sender_id for r in gravados] == ["user-1", "user-3"]
+    assert fila._pendentes == []
+
+
+def test_registo_recusado_pela_base_de_dados_e_descartado():
+    gravados = []
+
+    def escritor(lote):
+        if lote[0].sender_id == "user-1":
+            raise RegistoRejeitado("null value in column \"texto\"")
+        gravados.extend(lote)
+
+    fila = FilaFeedback(escritor, tamanho_lote=1, intervalo_maximo=0.05)
+    fila.registar(_registo(1))
+    fila.registar(_registo(2))
+    fila.fechar()
+
+    assert [r.sender_id for r in gravados] == ["user-2"]
+    assert fila._pendentes == []
+
+def test_fila_cheia_descarta_sem_bloquear():
+    bloqueio = threading.Event()
+
+    def escritor_lento(lote):
+        bloqueio.wait(timeout=5)
+
+    fila = FilaFeedback(escritor_lento, tamanho_lote=1, intervalo_maximo=60, capacidade=2)
+    inicio = time.monotonic()
+    aceites = [fila.registar(_registo(i)) for i in range(10)]
+
+    assert time.monotonic() - inicio < 1
+    assert aceites.count(False) > 0
+    bloqueio.set()
+    fila.fechar()
+
+
+def test_reiniciar_apos_fork_usa_fila_e_thread_novas():
+    escritor = _Escritor()
+    fila = FilaFeedback(escritor, tamanho_lote=100, intervalo_maximo=0.05)
+    fila.registar(_registo(1))
+    assert escritor.evento.wait(timeout=5)
+    thread_pai = fila._thread
+
+    # Simula o estado herdado por um worker: a thread do pai não existe no filho
+    fila.reiniciar_apos_fork()
+    escritor.evento.clear()
+    fila.registar(_registo(2))
+
+    assert escritor.evento.wait(timeout=5)
+    assert fila._thread is not thread_pai
+    assert [r.sender_id for r in escritor.registos] == ["user-1", "user-2"]
+    fila.fechar()
@@ -0,0 +1,84 @@
+"""
+Testes dos relatórios sobre os eventos gravados (analytics/funil.py).
+"""
+
+import pytest
+
+from analytics.colunar import EscritorColunar
+from analytics.funil import funil_onboarding, taxa_fallback_por_intent
+
+INICIO = 1792238400.0  # 2026-10-17, 12:00 UTC
+
+
+class _Conversa:
+    def __init__(self, escritor, sender_id):
+        self.escritor = escritor
+        self.sender_id = sender_id
+        self.timestamp = INICIO
+
+    def _evento(self, **evento):
+        self.timestamp += 1
+        self.escritor.adicionar(dict(evento, sender_id=self.sender_id, timestamp=self.timestamp))
+        return self
+
+    def utilizador(self, intent, ranking=()):
+        parse_data = {"intent": {"name": intent, "confidence": 0.9}, "intent_ranking": list(ranking)}
+        return self._evento(event="user", parse_data=parse_data)
+
+    def action(self, nome):
+        return self._evento(event="action", name=nome)._evento(event="action", name="action_listen")
+
+    def slot(self, nome, valor):
+        return self._evento(event="slot", name=nome, value=valor)
+
+
+@pytest.fixture
+def destino(tmp_path):
+    escritor = EscritorColunar(tmp_path)
+    # Percurso completo
+    (
+        _Conversa(escritor, "ana")
+        .utilizador("saudar").action("utter_saudar")
+        .utilizador("pedir_documentos").action("action_enviar_documentos")
+        .utilizador("iniciar_quiz").slot("quiz_concluido", False).action("action_iniciar_quiz")
+        .utilizador("responder_quiz").slot("quiz_concluido", True).action("action_verificar_resposta_quiz")
+    )
+    # Pediu documentos mas não fez o quiz
+    (
+        _Conversa(escritor, "rui")
+        .utilizador("saudar").action("utter_saudar")
+        .utilizador("pedir_documentos").action("action_enviar_documentos")
+        .utilizador("pedir_faq").action("action_default_fallback")
+    )
+    # Quiz sem saudação nem documentos: não conta para os passos seguintes
+    (
+        _Conversa(escritor, "eva")
+        .utilizador("iniciar_quiz").action("action_iniciar_quiz")
+        .utilizador("responder_quiz").slot("quiz_concluido", True).action("action_verificar_resposta_quiz")
+        .utilizador("nlu_fallback", ranking=[{"name": "nlu_fallback"}, {"name": "pedir_faq"}])
+        .action("action_default_fallback")
+    )
+    escritor.descarregar()
+    return tmp_path
+
+
+def test_funil_onboarding(destino):
+    passos = funil_onboarding(destino)
+
+    assert [(p.nome, p.conversas) for p in passos] == [("saudacao", 2), ("documentos", 2), ("quiz_concluido", 1)]
+    assert passos[2].taxa_passo == 0.5
+    assert passos[2].taxa_total == 0.5
+
+
+def test_taxa_fallback_por_intent(destino):
+    taxas = taxa_fallback_por_intent(destino)
+
+    assert taxas["pedir_faq"] == (2, 2)
+    assert taxas["pedir_faq"].taxa == 1.0
+    assert taxas["saudar"] == (2, 0)
+    assert taxas["responder_quiz"].taxa == 0.0
+
+
+def test_relatorios_sem_dados(tmp_path):
+    assert [p.conversas for p in funil_onboarding(tmp_path / "vazio")] == [0, 0, 0]
+    assert taxa_fallback_por_intent(tmp_path / "vazio") == {}
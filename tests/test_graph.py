@@ -0,0 +1,238 @@
+"""
+Testes do cliente assíncrono da Microsoft Graph API, contra um stub local.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from actions import graph
+from actions.actions import ActionAgendarReuniao
+from actions.graph import (
+    CacheTokens,
+    ClienteGraph,
+    ErroGraph,
+    agendar_no_primeiro_horario_livre,
+    inicio_janela,
+    primeiro_horario_livre,
+    somar_dias_uteis,
+)
+from tests.graph_stub import CredencialFalsa, servidor_graph_stub
+from tests.test_actions import _make_dispatcher, _make_tracker
+
+# Segunda-feira, 8h00
+SEGUNDA_8H = datetime(2026, 10, 19, 8, 0)
+
+
+# ---------------------------------------------------------------------------
+# Procura de horário
+# ---------------------------------------------------------------------------
+
+
+def test_inicio_janela_arredonda_para_o_proximo_bloco():
+    assert inicio_janela(datetime(2026, 10, 19, 9, 10, 30)) == datetime(2026, 10, 19, 9, 30)
+    assert inicio_janela(datetime(2026, 10, 19, 9, 30)) == datetime(2026, 10, 19, 9, 30)
+
+
+def test_janela_conta_dias_uteis():
+    sexta = datetime(2026, 10, 23, 14, 0)
+
+    assert somar_dias_uteis(SEGUNDA_8H, 3) == datetime(2026, 10, 22, 8, 0)
+    assert somar_dias_uteis(sexta, 3) == datetime(2026, 10, 28, 14, 0)
+
+
+def test_primeiro_horario_livre_respeita_horario_de_trabalho():
+    # 8h00 e 8h30 livres, mas fora do horário; 9h00 ocupado; 9h30 livre
+    vistas = ["0020000", "0000000"]
+
+    assert primeiro_horario_livre(vistas, SEGUNDA_8H) == datetime(2026, 10, 19, 9, 30)
+
+
+def test_primeiro_horario_livre_exige_todos_livres_e_blocos_consecutivos():
+    vistas = ["22000200", "22200000"]
+
+    assert primeiro_horario_livre(vistas, SEGUNDA_8H, blocos_necessarios=2) == datetime(
+        2026, 10, 19, 9, 30
+    )
+    assert primeiro_horario_livre(vistas, SEGUNDA_8H, blocos_necessarios=4) is None
+
+
+def test_primeiro_horario_livre_ignora_fim_de_semana():
+    sabado = datetime(2026, 10, 24, 10, 0)
+
+    assert primeiro_horario_livre(["0" * 8], sabado) is None
+
+
+# ---------------------------------------------------------------------------
+# Cliente e cache de tokens
+# ---------------------------------------------------------------------------
+
+
+def test_cache_tokens_reutiliza_token_valido():
+    async def cenario():
+        credencial = CredencialFalsa()
+        tokens = CacheTokens(credencial)
+        resultados = await asyncio.gather(*(tokens.obter() for _ in range(10)))
+        return credencial, resultados
+
+    credencial, resultados = asyncio.run(cenario())
+
+    assert credencial.tokens_emitidos == 1
+    assert set(resultados) == {"token-1"}
+
+
+def test_cache_tokens_renova_token_perto_de_expirar():
+    async def cenario():
+        credencial = CredencialFalsa(validade=60)
+        tokens = CacheTokens(credencial, margem=300)
+        await tokens.obter()
+        await tokens.obter()
+        return credencial
+
+    assert asyncio.run(cenario()).tokens_emitidos == 2
+
+
+def test_agendar_no_primeiro_horario_livre():
+    async def cenario():
+        async with servidor_graph_stub() as stub:
+            stub.disponibilidade = {
+                "gestor@the100s.com": "0022000",
+                "ana@the100s.com": "0000200",
+            }
+            cliente = ClienteGraph(CacheTokens(CredencialFalsa()), url_base=stub.url)
+            try:
+                resultado = await agendar_no_primeiro_horario_livre(
+                    cliente,
+                    "gestor@the100s.com",
+                    "ana@the100s.com",
+                    "Reunião",
+                    agora=SEGUNDA_8H,
+                )
+            finally:
+                await cliente.fechar()
+            return stub, resultado
+
+    stub, (inicio, evento) = asyncio.run(cenario())
+
+    assert inicio == datetime(2026, 10, 19, 10, 30)
+    assert stub.pedidos == ["getSchedule", "events"]
+    assert stub.autorizacoes == ["Bearer token-1"]
+    criado = stub.eventos_criados[0]
+    assert criado["organizador"] == "gestor@the100s.com"
+    assert criado["start"]["dateTime"] == "2026-10-19T10:30:00"
+    assert criado["attendees"][0]["emailAddress"]["address"] == "ana@the100s.com"
+    assert evento["onlineMeeting"]["joinUrl"].startswith("https://teams.microsoft.com")
+
+
+def test_erro_da_graph_api():
+    async def cenario():
+        async with servidor_graph_stub() as stub:
+            stub.estado_erro = 403
+            cliente = ClienteGraph(CacheTokens(CredencialFalsa()), url_base=stub.url)
+            try:
+                await cliente.obter_disponibilidade(
+                    "gestor@the100s.com", ["gestor@the100s.com"], SEGUNDA_8H, SEGUNDA_8H
+                )
+            finally:
+                await cliente.fechar()
+
+    with pytest.raises(ErroGraph):
+        asyncio.run(cenario())
+
+
+def test_chamada_lenta_nao_bloqueia_o_event_loop():
+    async def cenario():
+        async with servidor_graph_stub() as stub:
+            stub.atraso_segundos = 0.3
+            cliente = ClienteGraph(CacheTokens(CredencialFalsa()), url_base=stub.url)
+            ticks = 0
+
+            async def outro_colaborador():
+                nonlocal ticks
+                while not lenta.done():
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            lenta = asyncio.ensure_future(
+                cliente.obter_disponibilidade(
+                    "gestor@the100s.com", ["gestor@the100s.com"], SEGUNDA_8H, SEGUNDA_8H
+                )
+            )
+            await asyncio.gather(lenta, outro_colaborador())
+            await cliente.fechar()
+            return ticks
+
+    assert asyncio.run(cenario()) >= 10
+
+
+# ---------------------------------------------------------------------------
+# ActionAgendarReuniao com a Graph API
+# ---------------------------------------------------------------------------
+
+
+def _correr_action_com_stub(monkeypatch, disponibilidade, estado_erro=0, credencial=None):
+    async def cenario():
+        async with servidor_graph_stub() as stub:
+            stub.disponibilidade = disponibilidade
+            stub.estado_erro = estado_erro
+            cliente = ClienteGraph(CacheTokens(credencial or CredencialFalsa()), url_base=stub.url)
+            monkeypatch.setattr("actions.actions.obter_cliente_graph", lambda: cliente)
+            monkeypatch.setattr(graph, "agora_local", lambda: SEGUNDA_8H)
+
+            dispatcher = _make_dispatcher()
+            tracker = _make_tracker(
+                slots={
+                    "nome_colaborador": "Ana",
+                    "gestor": "João Silva",
+                    "email_gestor": "gestor@the100s.com",
+                    "email_colaborador": "ana@the100s.com",
+                }
+            )
+            try:
+                await ActionAgendarReuniao().run(dispatcher, tracker, {})
+            finally:
+                await cliente.fechar()
+            return dispatcher.utter_message.call_args[1]["text"]
+
+    return asyncio.run(cenario())
+
+
+def test_action_agendar_reuniao_cria_convite(monkeypatch):
+    message = _correr_action_com_stub(
+        monkeypatch, {"gestor@the100s.com": "0000", "ana@the100s.com": "0000"}
+    )
+
+    assert "segunda-feira, 19/10" in message
+    assert "09:00" in message
+    assert "João Silva" in message
+    assert "teams.microsoft.com" in message
+
+
+def test_action_agendar_reuniao_sem_horario_livre(monkeypatch):
+    message = _correr_action_com_stub(
+        monkeypatch, {"gestor@the100s.com": "2222", "ana@the100s.com": "0000"}
+    )
+
+    assert "não encontrei um horário livre" in message
+
+
+def test_action_agendar_reuniao_com_falha_da_graph_api(monkeypatch):
+    message = _correr_action_com_stub(monkeypatch, {}, estado_erro=500)
+
+    assert "não foi possível agendar automaticamente" in message and "Outlook" in message
+    assert "convite" not in message
+
+
+def test_action_agendar_reuniao_com_falha_da_credencial(monkeypatch):
+    from azure.core.exceptions import ClientAuthenticationError
+
+    class CredencialInvalida(CredencialFalsa):
+        async def get_token(self, *escopos):
+            raise ClientAuthenticationError("segredo expirado")
+
+    message = _correr_action_com_stub(
+        monkeypatch, {"gestor@the100s.com": "0000"}, credencial=CredencialInvalida()
+    )
+
+    assert "não foi possível agendar automaticamente" in message
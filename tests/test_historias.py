@@ -0,0 +1,245 @@
+"""
+Testes do executor das histórias de conversa (addons/historias.py).
+"""
+
+import asyncio
+
+import pytest
+
+from addons.historias import (
+    ACTION_LISTEN,
+    ActionsEmProcesso,
+    Historia,
+    RespostaTurno,
+    Turno,
+    carregar_historias,
+    comparar_turno,
+    executar,
+    fragmento,
+    reproduzir,
+)
+
+NLU = """
+version: "3.1"
+nlu:
+- intent: saudar
+  examples: |
+    - olá
+    - bom dia
+- intent: apresentar
+  examples: |
+    - sou o [Rui](nome_colaborador)
+"""
+
+HISTORIAS = """
+version: "3.1"
+stories:
+- story: saudação e apresentação
+  steps:
+  - intent: saudar
+  - action: utter_saudar
+  - intent: apresentar
+  - action: action_guardar_nome
+  - slot_was_set:
+    - nome_colaborador: Rui
+  - intent: despedir
+  - action: utter_despedir
+- story: com checkpoint
+  steps:
+  - checkpoint: inicio
+  - intent: saudar
+  - action: utter_saudar
+rules:
+- rule: fallback sem esperar
+  wait_for_user_input: false
+  steps:
+  - intent: nlu_fallback
+  - action: utter_default
+- rule: só com slot
+  condition:
+  - slot_was_set:
+    - nome_colaborador: Rui
+  steps:
+  - intent: saudar
+  - action: utter_saudar
+"""
+
+
+@pytest.fixture
+def ficheiros(tmp_path):
+    nlu = tmp_path / "nlu.yml"
+    nlu.write_text(NLU, encoding="utf-8")
+    historias = tmp_path / "stories.yml"
+    historias.write_text(HISTORIAS, encoding="utf-8")
+    return nlu, historias
+
+
+class MotorFalso:
+    """Bot com respostas fixas por mensagem; as conversas ficam no processo que as atende."""
+
+    def __init__(self, respostas, atraso=0.0):
+        self.respostas = respostas
+        self.atraso = atraso
+        self.slots = {}
+
+    async def responder(self, remetente, texto):
+        await asyncio.sleep(self.atraso)
+        intent, actions, slots = self.respostas[texto]
+        self.slots.setdefault(remetente, {}).update(slots)
+        return RespostaTurno(intent, tuple(actions) + (ACTION_LISTEN,), dict(self.slots[remetente]))
+
+
+RESPOSTAS = {
+    "olá": ("saudar", ["utter_saudar"], {}),
+    "sou o Rui": ("apresentar", ["action_guardar_nome"], {"nome_colaborador": "Rui"}),
+    "/despedir": ("despedir", ["utter_despedir"], {}),
+    "/nlu_fallback": ("nlu_fallback", ["utter_default"], {}),
+}
+
+
+# ---------------------------------------------------------------------------
+# Histórias
+# ---------------------------------------------------------------------------
+
+
+def test_historias_com_exemplos_do_nlu_e_intents_sem_exemplos(ficheiros):
+    nlu, caminho = ficheiros
+
+    saudacao, checkpoint, fallback, condicao = carregar_historias([caminho], nlu)
+
+    assert saudacao.turnos == (
+        Turno("olá", "saudar", ("utter_saudar",)),
+        Turno("sou o Rui", "apresentar", ("action_guardar_nome",), (("nome_colaborador", "Rui"),)),
+        Turno("/despedir", "despedir", ("utter_despedir",)),
+    )
+    assert fallback.turnos == (
+        Turno("/nlu_fallback", "nlu_fallback", ("utter_default",), espera_utilizador=False),
+    )
+    assert checkpoint.ignorada == "passo 'checkpoint' não suportado"
+    assert condicao.ignorada == "regra com condições"
+
+
+def test_historias_e_regras_do_projeto():
+    historias = carregar_historias()
+
+    assert len(historias) == 25
+    assert not [historia.nome for historia in historias if historia.ignorada]
+    # Só a intent sem exemplos no NLU segue como /intent
+    textos = {turno.intent: turno.texto for historia in historias for turno in historia.turnos}
+    assert [intent for intent, texto in textos.items() if texto.startswith("/")] == ["nlu_fallback"]
+
+
+def test_fragmentos_dividem_as_historias_sem_repetir():
+    historias = carregar_historias()
+
+    fragmentos = [fragmento(historias, indice, 3) for indice in (1, 2, 3)]
+
+    assert sorted(h.nome for parte in fragmentos for h in parte) == sorted(h.nome for h in historias)
+    assert all(fragmentos)
+    # Uma história nova não muda o fragmento das existentes
+    nova = Historia("nova", "data/stories.yml", ())
+    assert fragmento(historias + [nova], 2, 3)[: len(fragmentos[1])] == fragmentos[1]
+    with pytest.raises(ValueError):
+        fragmento(historias, 4, 3)
+
+
+# ---------------------------------------------------------------------------
+# Reprodução
+# ---------------------------------------------------------------------------
+
+
+def test_historia_reproduzida_sem_diferencas(ficheiros):
+    nlu, caminho = ficheiros
+    historia = carregar_historias([caminho], nlu)[0]
+
+    assert asyncio.run(reproduzir(MotorFalso(RESPOSTAS), historia, "ana")) is None
+
+
+def test_primeira_diferenca_descrita(ficheiros):
+    nlu, caminho = ficheiros
+    historia, _, fallback, _ = carregar_historias([caminho], nlu)
+
+    def falha(**alteracoes):
+        respostas = {**RESPOSTAS, **alteracoes}
+        return asyncio.run(reproduzir(MotorFalso(respostas), historia, "ana"))
+
+    assert falha(**{"olá": ("despedir", ["utter_saudar"], {})}) == (
+        "turno 1 ('olá'): intent prevista 'despedir', esperada 'saudar'"
+    )
+    assert falha(**{"sou o Rui": ("apresentar", ["utter_default"], {})}) == (
+        "turno 2 ('sou o Rui'): action prevista 'utter_default', esperada 'action_guardar_nome'"
+    )
+    nome_errado = ("apresentar", ["action_guardar_nome"], {"nome_colaborador": "Ana"})
+    assert falha(**{"sou o Rui": nome_errado}) == (
+        "turno 2 ('sou o Rui'): slot 'nome_colaborador' = 'Ana', esperado 'Rui'"
+    )
+    assert falha(**{"/despedir": ("despedir", ["utter_despedir", "utter_saudar"], {})}) == (
+        "turno 3 ('/despedir'): action prevista 'utter_saudar', esperada 'action_listen'"
+    )
+    # Sem ``wait_for_user_input`` a regra não exige o action_listen
+    respostas = {"/nlu_fallback": ("nlu_fallback", ["utter_default", "action_iniciar_quiz"], {})}
+    assert asyncio.run(reproduzir(MotorFalso(respostas), fallback, "rui")) is None
+
+
+def test_erro_numa_action_faz_falhar_a_historia():
+    class Executor:
+        async def run(self, pedido):
+            raise KeyError("nome")
+
+    actions = ActionsEmProcesso(Executor())
+
+    with pytest.raises(KeyError):
+        asyncio.run(actions.request(json={"next_action": "action_guardar_nome", "sender_id": "ana"}))
+    assert actions.erros == {"ana": ["action_guardar_nome: KeyError('nome')"]}
+    resposta = RespostaTurno("apresentar", (ACTION_LISTEN,), {}, tuple(actions.erros.pop("ana")))
+    assert comparar_turno(2, Turno("sou o Rui", "apresentar", ("action_guardar_nome",)), resposta) == (
+        "turno 2 ('sou o Rui'): erro na action action_guardar_nome: KeyError('nome')"
+    )
+
+
+def test_resposta_de_uma_action_registada_e_um_dicionario():
+    from rasa_sdk.executor import ActionExecutor
+
+    executor = ActionExecutor()
+    executor.register_package("actions")
+    tracker = {
+        "sender_id": "ana",
+        "slots": {"etapa_onboarding": "primeiro_dia"},
+        "latest_message": {},
+        "events": [],
+        "paused": False,
+        "followup_action": None,
+        "active_loop": {},
+        "latest_action_name": None,
+    }
+    pedido = {
+        "next_action": "action_verificar_etapa_onboarding",
+        "sender_id": "ana",
+        "tracker": tracker,
+        "domain": {},
+    }
+
+    resposta = asyncio.run(ActionsEmProcesso(executor).request(json=pedido))
+
+    assert isinstance(resposta, dict) and resposta["events"] == []
+    assert "Primeiro Dia" in resposta["responses"][0]["text"]
+
+
+def test_historias_distribuidas_pelos_processos_com_resultados_por_ordem(ficheiros):
+    nlu, caminho = ficheiros
+    historia, checkpoint, fallback, _ = carregar_historias([caminho], nlu)
+    falhada = historia._replace(nome="falhada", turnos=(Turno("olá", "saudar", ("utter_default",)),))
+    historias = [historia, checkpoint, falhada, fallback] * 3
+    # O motor é criado no processo principal e herdado pelos processos do fork
+    motor = MotorFalso(RESPOSTAS, atraso=0.05)
+
+    resultados = executar(motor, historias, processos=4)
+
+    assert [resultado.nome for resultado in resultados] == [h.nome for h in historias]
+    assert [resultado.sucesso for resultado in resultados[:4]] == [True, True, False, True]
+    assert resultados[1].ignorada and resultados[1].segundos == 0.0
+    assert resultados[0].segundos >= 0.15
+    # As conversas correram nos processos filhos, não no principal
+    assert motor.slots == {}
+    sequenciais = executar(motor, historias, processos=1)
+    assert [(r.sucesso, r.falha) for r in resultados] == [(r.sucesso, r.falha) for r in sequenciais]
@@ -0,0 +1,405 @@
+"""
+Testes do serviço de lembretes proativos (actions/lembretes.py) e do registo das conversas (addons/conversas.py).
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+
+from aiohttp import web
+
+from actions.etapas import PRE_ONBOARDING, PRIMEIRA_SEMANA, PRIMEIRO_DIA
+from actions.graph import CacheTokens
+from actions.lembretes import (
+    ENVIADO,
+    FALHOU,
+    REJEITADO,
+    SEM_CONVERSA,
+    AgendaLembretes,
+    ColaboradorLembretes,
+    ConversaTeams,
+    EnviadorBotFramework,
+    EnviadorSimulado,
+    LimitadorEnvio,
+    ServicoLembretes,
+    hora_envio,
+)
+from addons.conversas import RegistoConversas, referencia_da_atividade
+from tests.graph_stub import CredencialFalsa
+
+INICIO = date(2026, 10, 19)  # segunda-feira
+ALTERADO = datetime(2026, 10, 1, 12, 0)
+
+# 9h00 de Lisboa (UTC+1 em outubro, até dia 25)
+SABADO_9H = hora_envio(INICIO, -2)
+SEGUNDA_9H = hora_envio(INICIO, 0)
+QUINTA_9H = hora_envio(INICIO, 3)
+
+
+def _colaborador(
+    email="ana@the100s.com", data_inicio=INICIO, ativo=True, id_teams="29:ana", nome="Ana Lima", empresa=None
+):
+    return ColaboradorLembretes(email, nome, id_teams, data_inicio, ativo, ALTERADO, empresa)
+
+
+# ---------------------------------------------------------------------------
+# Agenda
+# ---------------------------------------------------------------------------
+
+
+def test_hora_de_envio_local():
+    assert SEGUNDA_9H == int(datetime.fromisoformat("2026-10-19T09:00:00+01:00").timestamp())
+    assert SEGUNDA_9H - SABADO_9H == 2 * 86400
+
+
+def test_agenda_devolve_os_lembretes_por_ordem_de_envio():
+    agenda = AgendaLembretes()
+    agenda.atualizar([_colaborador(), _colaborador("rui@the100s.com", date(2026, 10, 20))])
+
+    assert len(agenda) == 6
+    assert agenda.vencidos(SABADO_9H - 1) == []
+    assert [(lembrete.email, lembrete.etapa) for lembrete in agenda.vencidos(SABADO_9H)] == [("ana@the100s.com", PRE_ONBOARDING)]
+    assert [(lembrete.email, lembrete.etapa) for lembrete in agenda.vencidos(SEGUNDA_9H + 10)] == [
+        ("rui@the100s.com", PRE_ONBOARDING),
+        ("ana@the100s.com", PRIMEIRO_DIA),
+    ]
+    assert agenda.proximo() == hora_envio(date(2026, 10, 20), 0)
+
+
+def test_agenda_respeita_o_limite_do_lote():
+    agenda = AgendaLembretes()
+    agenda.atualizar([_colaborador(f"c{i}@the100s.com") for i in range(10)])
+
+    assert len(agenda.vencidos(SABADO_9H, limite=4)) == 4
+    assert len(agenda.vencidos(SABADO_9H, limite=100)) == 6
+
+
+def test_lembrete_de_etapa_ja_passada_e_descartado():
+    agenda = AgendaLembretes()
+    agenda.atualizar([_colaborador()])
+
+    # O serviço esteve parado até segunda-feira: o lembrete de sábado já não é enviado
+    assert [lembrete.etapa for lembrete in agenda.vencidos(SEGUNDA_9H)] == [PRIMEIRO_DIA]
+    assert agenda.descartados == 1
+
+
+def test_nova_data_de_inicio_torna_os_lembretes_antigos_obsoletos():
+    agenda = AgendaLembretes()
+    agenda.atualizar([_colaborador()])
+    agenda.atualizar([_colaborador(data_inicio=date(2026, 11, 2))])
+
+    assert len(agenda) == 3
+    assert agenda.vencidos(QUINTA_9H) == []
+    novos = agenda.vencidos(hora_envio(date(2026, 11, 2), 0))
+    assert [lembrete.etapa for lembrete in novos] == [PRIMEIRO_DIA]
+
+
+def test_colaborador_inativo_ou_removido_deixa_de_ter_lembretes():
+    agenda = AgendaLembretes()
+    agenda.atualizar([_colaborador(), _colaborador("rui@the100s.com")])
+    agenda.atualizar([_colaborador(ativo=False)])
+    assert len(agenda) == 3
+
+    agenda.atualizar([], completa=True)
+    assert len(agenda) == 0
+    assert agenda.vencidos(QUINTA_9H) == []
+
+
+def test_lembretes_enviados_nao_voltam_a_ser_agendados():
+    agenda = AgendaLembretes(enviados=[("Ana@the100s.com", PRE_ONBOARDING), ("ana@the100s.com", PRIMEIRO_DIA)])
+    agenda.atualizar([_colaborador()])
+
+    assert [lembrete.etapa for lembrete in agenda.vencidos(QUINTA_9H)] == [PRIMEIRA_SEMANA]
+
+
+def test_heap_compactado_quando_a_maioria_das_entradas_e_obsoleta():
+    agenda = AgendaLembretes()
+    colaboradores = [_colaborador(f"c{i}@the100s.com") for i in range(500)]
+    agenda.atualizar(colaboradores)
+    for dias in range(1, 4):
+        agenda.atualizar([c._replace(data_inicio=date(2026, 11, dias)) for c in colaboradores])
+
+    assert len(agenda) == 1500
+    assert len(agenda._heap) < 2 * 1500 + 1024
+
+
+# ---------------------------------------------------------------------------
+# Limite de ritmo
+# ---------------------------------------------------------------------------
+
+
+def test_limitador_espaca_os_envios_e_aplica_pausas():
+    relogio = [0.0]
+    esperas = []
+
+    async def dormir(segundos):
+        esperas.append(round(segundos, 3))
+
+    limitador = LimitadorEnvio(por_segundo=10, relogio=lambda: relogio[0], dormir=dormir)
+
+    async def cenario():
+        for _ in range(3):
+            await limitador.aguardar()
+        limitador.pausar(5)
+        await limitador.aguardar()
+
+    asyncio.run(cenario())
+    assert esperas == [0.1, 0.2, 5.0]
+
+
+# ---------------------------------------------------------------------------
+# Envio pelo Bot Connector (contra um stub local)
+# ---------------------------------------------------------------------------
+
+
+@asynccontextmanager
+async def _bot_connector_stub(respostas):
+    """Stub de ``POST /v3/conversations/{id}/activities``; ``respostas`` são (estado, cabeçalhos)."""
+    recebidas = []
+
+    async def atividades(pedido):
+        recebidas.append((pedido.match_info["conversa"], pedido.headers["Authorization"], await pedido.json()))
+        estado, cabecalhos = respostas.pop(0) if respostas else (201, {})
+        return web.json_response({"id": "1"}, status=estado, headers=cabecalhos)
+
+    app = web.Application()
+    app.router.add_post("/v3/conversations/{conversa}/activities", atividades)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    porta = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{porta}/", recebidas
+    finally:
+        await runner.cleanup()
+
+
+def _enviar_com_stub(respostas, texto="Olá"):
+    async def cenario():
+        async with _bot_connector_stub(respostas) as (url, recebidas):
+            enviador = EnviadorBotFramework(CacheTokens(CredencialFalsa()), LimitadorEnvio(por_segundo=1000))
+            try:
+                resultado = await enviador.enviar(ConversaTeams(url, "a:1x/2"), texto)
+            finally:
+                await enviador.fechar()
+            return resultado, recebidas
+
+    return asyncio.run(cenario())
+
+
+def test_envio_publica_a_atividade_na_conversa():
+    resultado, recebidas = _enviar_com_stub([], texto="**Bom dia**")
+
+    assert resultado == ENVIADO
+    conversa, autorizacao, atividade = recebidas[0]
+    assert conversa == "a:1x/2"
+    assert autorizacao == "Bearer token-1"
+    assert atividade == {"type": "message", "text": "**Bom dia**", "textFormat": "markdown"}
+
+
+def test_envio_respeita_retry_after_e_volta_a_tentar():
+    resultado, recebidas = _enviar_com_stub([(429, {"Retry-After": "0.05"}), (503, {"Retry-After": "0"})])
+
+    assert resultado == ENVIADO
+    assert len(recebidas) == 3
+
+
+def test_envio_recusado_nao_e_repetido():
+    assert _enviar_com_stub([(403, {})])[0] == REJEITADO
+    resultado, recebidas = _enviar_com_stub([(429, {"Retry-After": "0"})] * 3)
+    assert resultado == FALHOU
+    assert len(recebidas) == 3
+
+
+# ---------------------------------------------------------------------------
+# Serviço
+# ---------------------------------------------------------------------------
+
+
+class _Base:
+    """Tabelas ``colaboradores``, ``conversas_teams`` e ``lembretes_enviados`` em memória."""
+
+    def __init__(self, colaboradores, conversas):
+        self.colaboradores = colaboradores
+        self.conversas = conversas
+        self.enviados = []
+
+    def carregar_colaboradores(self, desde):
+        return [c for c in self.colaboradores if desde is None or c.atualizado_em >= desde]
+
+    def carregar_conversas(self, ids_teams):
+        return {i: self.conversas[i] for i in ids_teams if i in self.conversas}
+
+    def registar_enviados(self, registos):
+        self.enviados.extend(registos)
+
+
+def _servico(base, relogio, enviador=None, enviados=()):
+    return ServicoLembretes(
+        AgendaLembretes(enviados),
+        enviador or EnviadorSimulado(),
+        carregar_colaboradores=base.carregar_colaboradores,
+        carregar_conversas=base.carregar_conversas,
+        registar_enviados=base.registar_enviados,
+        tamanho_lote=2,
+        relogio=lambda: relogio[0],
+    )
+
+
+def test_servico_envia_em_lotes_e_regista_os_enviados():
+    base = _Base(
+        [_colaborador(f"c{i}@the100s.com", id_teams=f"29:c{i}", nome=f"Nome{i} Apelido") for i in range(3)],
+        {f"29:c{i}": ConversaTeams("https://smba.trafficmanager.net/emea/", f"a:{i}") for i in range(3)},
+    )
+    relogio = [float(SABADO_9H)]
+    servico = _servico(base, relogio)
+
+    async def cenario():
+        await servico.recarregar()
+        return [await servico.enviar_vencidos() for _ in range(3)]
+
+    assert asyncio.run(cenario()) == [2, 1, 0]
+    assert sorted(base.enviados) == [(f"c{i}@the100s.com", PRE_ONBOARDING, ENVIADO) for i in range(3)]
+    conversa, texto = servico._enviador.enviados[0]
+    assert conversa.id_conversa == "a:0"
+    assert texto.startswith("👋 Olá, Nome0!")
+
+
+def test_reinicio_nao_repete_lembretes_enviados():
+    base = _Base([_colaborador()], {"29:ana": ConversaTeams("https://smba/", "a:ana")})
+    relogio = [float(SABADO_9H)]
+
+    primeiro = _servico(base, relogio)
+    asyncio.run(primeiro.recarregar())
+    asyncio.run(primeiro.enviar_vencidos())
+
+    # Novo processo, com o estado lido de ``lembretes_enviados``
+    segundo = _servico(base, relogio, enviados=[(email, etapa) for email, etapa, _ in base.enviados])
+    asyncio.run(segundo.recarregar())
+    assert asyncio.run(segundo.enviar_vencidos()) == 0
+    assert segundo._enviador.enviados == []
+
+
+def test_sem_conversa_o_lembrete_e_adiado():
+    base = _Base([_colaborador()], {})
+    relogio = [float(SABADO_9H)]
+    servico = _servico(base, relogio)
+    asyncio.run(servico.recarregar())
+
+    assert asyncio.run(servico.enviar_vencidos()) == 1
+    assert servico.contagens[SEM_CONVERSA] == 1
+    assert base.enviados == []
+
+    # O colaborador falou com o bot entretanto
+    base.conversas["29:ana"] = ConversaTeams("https://smba/", "a:ana")
+    relogio[0] += 3600
+    asyncio.run(servico.enviar_vencidos())
+    assert base.enviados == [("ana@the100s.com", PRE_ONBOARDING, ENVIADO)]
+
+
+def test_falha_do_token_adia_o_lembrete():
+    class CredencialInvalida(CredencialFalsa):
+        async def get_token(self, *escopos):
+            raise RuntimeError("segredo expirado")
+
+    base = _Base([_colaborador()], {"29:ana": ConversaTeams("https://smba/", "a:ana")})
+    relogio = [float(SABADO_9H)]
+    enviador = EnviadorBotFramework(CacheTokens(CredencialInvalida()), LimitadorEnvio(por_segundo=1000))
+    servico = _servico(base, relogio, enviador=enviador)
+    asyncio.run(servico.recarregar())
+
+    assert asyncio.run(servico.enviar_vencidos()) == 1
+    assert servico.contagens[FALHOU] == 1
+    assert base.enviados == []
+    assert servico.agenda.vencidos(relogio[0], 10) == []
+
+def test_lembrete_com_o_conteudo_da_empresa_do_colaborador():
+    base = _Base(
+        [_colaborador(), _colaborador("rui@exemplo.pt", id_teams="29:rui", nome="Rui Sousa", empresa="exemplo")],
+        {i: ConversaTeams("https://smba/", f"a:{i}") for i in ("29:ana", "29:rui")},
+    )
+    servico = _servico(base, [float(SEGUNDA_9H)])
+    asyncio.run(servico.recarregar())
+    asyncio.run(servico.enviar_vencidos())
+
+    textos = {conversa.id_conversa: texto for conversa, texto in servico._enviador.enviados}
+    assert "**Primeiro Dia** na The100s" in textos["a:29:ana"]
+    assert "**Primeiro Dia** na Exemplo Lda." in textos["a:29:rui"] and "The100s" not in textos["a:29:rui"]
+
+
+def test_executar_termina_quando_pedido():
+    base = _Base([_colaborador()], {"29:ana": ConversaTeams("https://smba/", "a:ana")})
+    servico = _servico(base, [float(SEGUNDA_9H)])
+
+    async def cenario():
+        parar = asyncio.Event()
+        tarefa = asyncio.ensure_future(servico.executar(parar))
+        await asyncio.sleep(0.05)
+        parar.set()
+        await asyncio.wait_for(tarefa, 1)
+
+    asyncio.run(cenario())
+    assert base.enviados == [("ana@the100s.com", PRIMEIRO_DIA, ENVIADO)]
+
+
+# ---------------------------------------------------------------------------
+# Referências das conversas (canal Bot Framework)
+# ---------------------------------------------------------------------------
+
+ATIVIDADE = {
+    "type": "message",
+    "id": "f:1",
+    "serviceUrl": "https://smba.trafficmanager.net/emea/",
+    "from": {"id": "29:ana", "name": "Ana"},
+    "recipient": {"id": "28:bot"},
+    "conversation": {"id": "a:ana", "conversationType": "personal", "tenantId": "t1"},
+    "channelData": {"tenant": {"id": "t1"}},
+}
+
+
+def test_referencia_apenas_das_conversas_pessoais():
+    referencia = referencia_da_atividade(ATIVIDADE)
+    assert referencia == ("29:ana", "https://smba.trafficmanager.net/emea/", "a:ana", "28:bot", "t1")
+
+    grupo = dict(ATIVIDADE, conversation={"id": "19:x", "conversationType": "groupChat", "isGroup": True})
+    assert referencia_da_atividade(grupo) is None
+    assert referencia_da_atividade({"type": "message"}) is None
+
+
+def test_registo_grava_cada_conversa_uma_vez():
+    gravadas = []
+    registo = RegistoConversas(gravadas.append)
+    referencia = referencia_da_atividade(ATIVIDADE)
+
+    async def cenario():
+        for _ in range(3):
+            await registo.registar(referencia)
+        await registo.registar(referencia._replace(service_url="https://smba.trafficmanager.net/amer/"))
+
+    asyncio.run(cenario())
+    assert [r.service_url for r in gravadas] == [
+        "https://smba.trafficmanager.net/emea/",
+        "https://smba.trafficmanager.net/amer/",
+    ]
+
+
+def test_registo_volta_a_tentar_depois_de_uma_falha():
+    tentativas = []
+
+    def gravar(referencia):
+        tentativas.append(referencia)
+        if len(tentativas) == 1:
+            raise ConnectionError("sem base de dados")
+
+    registo = RegistoConversas(gravar)
+    referencia = referencia_da_atividade(ATIVIDADE)
+
+    async def cenario():
+        await registo.registar(referencia)
+        await registo.registar(referencia)
+        await registo.registar(referencia)
+
+    asyncio.run(cenario())
+    assert len(tentativas) == 2
+    assert registo.gravadas == 1
@@ -0,0 +1,97 @@
+"""
+Testes do gerador de carga do webhook (benchmarks/load_test.py).
+"""
+
+import asyncio
+import random
+
+from aiohttp import web
+from rasa_sdk.executor import ActionExecutor
+
+from benchmarks.load_test import (
+    MISTURA_ACOES,
+    carregar_dominio,
+    executar_carga,
+    gerar_payload,
+    gerar_pedidos,
+    percentil,
+)
+
+
+def _executor():
+    executor = ActionExecutor()
+    executor.register_package("actions")
+    return executor
+
+
+def _respostas(resultado):
+    # rasa_sdk < 3.11 devolve um dict; as versões recentes um modelo pydantic
+    if isinstance(resultado, dict):
+        return resultado["responses"]
+    return resultado.responses
+
+
+def test_percentil_posto_mais_proximo():
+    valores = list(range(1, 101))
+    assert percentil(valores, 50) == 50
+    assert percentil(valores, 95) == 95
+    assert percentil(valores, 99) == 99
+    assert percentil([7], 99) == 7
+
+
+def test_gerar_pedidos_e_deterministico():
+    primeiro = gerar_pedidos(random.Random(1))
+    segundo = gerar_pedidos(random.Random(1))
+    for _ in range(5):
+        acao_a, payload_a = next(primeiro)
+        acao_b, payload_b = next(segundo)
+        assert acao_a == acao_b
+        assert payload_a["tracker"]["slots"] == payload_b["tracker"]["slots"]
+
+
+def test_payloads_executam_todas_as_actions():
+    executor = _executor()
+    dominio = carregar_dominio()
+    rng = random.Random(0)
+
+    for acao, _ in MISTURA_ACOES:
+        payload = gerar_payload(rng, acao, dominio)
+        assert payload["tracker"]["slots"]["nome_colaborador"]
+        resultado = asyncio.run(executor.run(payload))
+        assert _respostas(resultado), acao
+
+
+def test_executar_carga_contra_webhook_local():
+    executor = _executor()
+
+    async def webhook(pedido):
+        resultado = await executor.run(await pedido.json())
+        return web.json_response({"responses": _respostas(resultado)})
+
+    async def cenario():
+        app = web.Application()
+        app.router.add_post("/webhook", webhook)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        porta = site._server.sockets[0].getsockname()[1]
+        try:
+            return await executar_carga(
+                f"http://127.0.0.1:{porta}/webhook",
+                gerar_pedidos(random.Random(3), turnos=2),
+                rps=200,
+                duracao=0.25,
+            )
+        finally:
+            await runner.cleanup()
+
+    resultados = asyncio.run(cenario())
+
+    assert resultados.total() == 50
+    assert not resultados.erros
+    resumo = resultados.resumo()
+    assert set(resumo) <= {acao for acao, _ in MISTURA_ACOES}
+    for valores in resumo.values():
+        assert valores["p50"] <= valores["p95"] <= valores["p99"] <= valores["max"]
+    assert "Total: 50 pedidos" in resultados.relatorio()
@@ -0,0 +1,106 @@
+"""
+Testes da instrumentação das custom actions e do endpoint Prometheus.
+"""
+
+import asyncio
+import inspect
+import urllib.request
+
+import pytest
+from rasa_sdk import Action
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions.actions import ActionAgendarReuniao, ActionBoasVindasPersonalizada
+from actions.metricas import (
+    METRICAS,
+    Histograma,
+    RegistoMetricas,
+    iniciar_servidor_metricas,
+    instrumentar,
+)
+from tests.test_actions import _make_tracker
+
+
+@pytest.fixture(autouse=True)
+def _limpar_metricas():
+    METRICAS.limpar()
+    yield
+    METRICAS.limpar()
+
+
+class _ActionFalha(Action):
+    def name(self):
+        return "action_falha"
+
+    @instrumentar
+    def run(self, dispatcher, tracker, domain):
+        raise ValueError("erro")
+
+
+def test_histograma_cumulativo():
+    histograma = Histograma((1, 5, 10))
+    for valor in (0.5, 1, 3, 7, 20):
+        histograma.observar(valor)
+
+    assert histograma.cumulativas() == [("1", 2), ("5", 3), ("10", 4), ("+Inf", 5)]
+    assert histograma.total == 5
+    assert histograma.soma == 31.5
+
+
+def test_instrumentar_action_sincrona():
+    dispatcher = CollectingDispatcher()
+    tracker = _make_tracker(slots={"nome_colaborador": "Ana"})
+
+    ActionBoasVindasPersonalizada().run(dispatcher, tracker, {})
+
+    metricas = METRICAS.action("action_boas_vindas_personalizada")
+    assert metricas.latencia.total == 1
+    # nome_colaborador e empresa
+    assert metricas.leituras_slots.soma == 2
+    assert metricas.bytes_mensagens.soma == len(dispatcher.messages[0]["text"].encode())
+
+
+def test_instrumentar_mantem_action_assincrona():
+    assert inspect.iscoroutinefunction(ActionAgendarReuniao.run)
+
+    asyncio.run(ActionAgendarReuniao().run(CollectingDispatcher(), _make_tracker(), {}))
+
+    assert METRICAS.action("action_agendar_reuniao").latencia.total == 1
+
+
+def test_instrumentar_conta_erros():
+    with pytest.raises(ValueError):
+        _ActionFalha().run(CollectingDispatcher(), _make_tracker(), {})
+
+    metricas = METRICAS.action("action_falha")
+    assert metricas.erros == 1
+    assert metricas.latencia.total == 1
+
+
+def test_formato_prometheus():
+    registo = RegistoMetricas()
+    registo.action("action_x").latencia.observar(0.003)
+
+    texto = registo.formato_prometheus()
+
+    assert "# TYPE onboarding_action_duracao_segundos histogram" in texto
+    assert 'onboarding_action_duracao_segundos_bucket{action="action_x",le="0.0025"} 0' in texto
+    assert 'onboarding_action_duracao_segundos_bucket{action="action_x",le="0.005"} 1' in texto
+    assert 'onboarding_action_duracao_segundos_count{action="action_x"} 1' in texto
+    assert 'onboarding_action_erros_total{action="action_x"} 0' in texto
+
+
+def test_endpoint_metrics():
+    ActionBoasVindasPersonalizada().run(CollectingDispatcher(), _make_tracker(), {})
+    servidor = iniciar_servidor_metricas(0, endereco="127.0.0.1")
+    porta = servidor.server_address[1]
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{porta}/metrics") as resposta:
+            corpo = resposta.read().decode()
+            tipo = resposta.headers["Content-Type"]
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    assert tipo.startswith("text/plain")
+    assert 'action="action_boas_vindas_personalizada"' in corpo
@@ -0,0 +1,140 @@
+"""
+Testes do diretório de colaboradores (cache LRU de perfis).
+"""
+
+import asyncio
+from datetime import date
+
+from actions.perfis import DiretorioColaboradores, PerfilColaborador
+
+
+def _perfil(id_teams, nome="Ana Silva"):
+    return PerfilColaborador(
+        id_teams,
+        nome,
+        cargo="Analista de Dados",
+        departamento="Tecnologia",
+        gestor="Rui Costa",
+        email_gestor="rui@the100s.com",
+        email="ana@the100s.com",
+        data_inicio=date(2024, 3, 4),
+    )
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+class _Carregador:
+    def __init__(self, perfis):
+        self.perfis = perfis
+        self.pedidos = []
+
+    def __call__(self, id_teams):
+        self.pedidos.append(id_teams)
+        if isinstance(self.perfis, Exception):
+            raise self.perfis
+        return self.perfis.get(id_teams)
+
+
+def test_perfil_preenche_os_slots_do_dominio():
+    assert _perfil("29:ana").slots() == {
+        "nome_colaborador": "Ana Silva",
+        "cargo": "Analista de Dados",
+        "departamento": "Tecnologia",
+        "gestor": "Rui Costa",
+        "email_gestor": "rui@the100s.com",
+        "email_colaborador": "ana@the100s.com",
+        "data_inicio": "2024-03-04",
+    }
+    assert PerfilColaborador("29:rui", "Rui").slots() == {"nome_colaborador": "Rui"}
+
+
+def test_perfil_usa_slots_e_partilha_valores_repetidos():
+    a, b = _perfil("29:a"), _perfil("29:b")
+
+    assert not hasattr(a, "__dict__")
+    assert a.departamento is b.departamento
+
+
+def test_acerto_nao_consulta_a_base_de_dados():
+    carregador = _Carregador({"29:ana": _perfil("29:ana")})
+    diretorio = DiretorioColaboradores(carregador)
+
+    primeiro = asyncio.run(diretorio.obter("29:ana"))
+    segundo = asyncio.run(diretorio.obter("29:ana"))
+
+    assert primeiro is segundo
+    assert carregador.pedidos == ["29:ana"]
+    assert (diretorio.acertos, diretorio.falhas) == (1, 1)
+
+
+def test_desconhecidos_ficam_em_cache_ate_ao_ttl_curto():
+    relogio = _Relogio()
+    carregador = _Carregador({})
+    diretorio = DiretorioColaboradores(carregador, ttl_desconhecido=60, relogio=relogio)
+
+    assert asyncio.run(diretorio.obter("29:novo")) is None
+    assert asyncio.run(diretorio.obter("29:novo")) is None
+    assert carregador.pedidos == ["29:novo"]
+
+    relogio.agora = 61
+    asyncio.run(diretorio.obter("29:novo"))
+    assert carregador.pedidos == ["29:novo", "29:novo"]
+
+
+def test_remove_a_entrada_menos_usada():
+    carregador = _Carregador({i: _perfil(i) for i in ("a", "b", "c")})
+    diretorio = DiretorioColaboradores(carregador, tamanho_maximo=2)
+
+    async def cenario():
+        await diretorio.obter("a")
+        await diretorio.obter("b")
+        await diretorio.obter("a")  # "b" passa a ser a menos usada
+        await diretorio.obter("c")
+        await diretorio.obter("a")
+        await diretorio.obter("b")
+
+    asyncio.run(cenario())
+
+    assert len(diretorio) == 2
+    assert carregador.pedidos == ["a", "b", "c", "b"]
+
+
+def test_falha_na_base_de_dados_nao_fica_em_cache():
+    carregador = _Carregador(RuntimeError("base de dados indisponível"))
+    diretorio = DiretorioColaboradores(carregador)
+
+    assert asyncio.run(diretorio.obter("29:ana")) is None
+    carregador.perfis = {"29:ana": _perfil("29:ana")}
+    assert asyncio.run(diretorio.obter("29:ana")).nome == "Ana Silva"
+
+
+def test_sem_base_de_dados_usa_apenas_os_perfis_adicionados():
+    diretorio = DiretorioColaboradores()
+    diretorio.adicionar(_perfil("29:ana"))
+
+    assert asyncio.run(diretorio.obter("29:ana")).nome == "Ana Silva"
+    assert asyncio.run(diretorio.obter("29:rui")) is None
+    assert asyncio.run(diretorio.obter(None)) is None
+
+
+def test_carregador_assincrono_corre_no_event_loop():
+    pedidos = []
+
+    async def carregador(id_teams):
+        pedidos.append(id_teams)
+        return _perfil(id_teams)
+
+    diretorio = DiretorioColaboradores(carregador)
+
+    async def cenario():
+        return await diretorio.obter("29:ana"), await diretorio.obter("29:ana")
+
+    primeiro, segundo = asyncio.run(cenario())
+    assert primeiro is segundo and primeiro.nome == "Ana Silva"
+    assert pedidos == ["29:ana"]
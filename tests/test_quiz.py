@@ -0,0 +1,182 @@
+"""
+Testes do índice em memória dos bancos de perguntas do quiz.
+"""
+
+from actions.quiz import BANCO_GERAL, IndiceQuiz, normalizar_banco
+
+
+BANCO_BASE = {
+    BANCO_GERAL: [
+        {"id": 1, "pergunta": "P1", "resposta_correta": "a", "explicacao": "E1"},
+        {"id": 2, "pergunta": "P2", "resposta_correta": "b", "explicacao": "E2"},
+    ]
+}
+
+
+def _pergunta(banco, id_pergunta):
+    return {
+        "banco": banco,
+        "id": id_pergunta,
+        "pergunta": f"{banco}-{id_pergunta}",
+        "opcoes": {},
+        "resposta_correta": "c",
+        "explicacao": "",
+    }
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+class _Carregador:
+    def __init__(self, perguntas):
+        self.perguntas = perguntas
+        self.chamadas = 0
+
+    def __call__(self):
+        self.chamadas += 1
+        if isinstance(self.perguntas, Exception):
+            raise self.perguntas
+        return list(self.perguntas)
+
+
+def test_normalizar_banco():
+    assert normalizar_banco("Recursos  Humanos") == "recursos_humanos"
+    assert normalizar_banco(None) is None
+
+
+def test_indice_sem_carregador_usa_banco_base():
+    indice = IndiceQuiz(BANCO_BASE)
+
+    assert indice.aquecer() is False
+    assert [p["id"] for p in indice.perguntas(BANCO_GERAL)] == [1, 2]
+    assert indice.pergunta(BANCO_GERAL, 2)["pergunta"] == "P2"
+
+
+def test_aquecer_indexa_por_banco_e_id():
+    carregador = _Carregador([_pergunta("ti", 7), _pergunta("ti", 3), _pergunta("vendas", 1)])
+    indice = IndiceQuiz(BANCO_BASE, carregador=carregador)
+
+    assert indice.aquecer() is True
+    assert [p["id"] for p in indice.perguntas("ti")] == [7, 3]
+    assert indice.pergunta("vendas", 1)["pergunta"] == "vendas-1"
+    assert indice.bancos() == [BANCO_GERAL, "ti", "vendas"]
+
+
+def test_banco_da_base_de_dados_substitui_banco_base():
+    indice = IndiceQuiz(BANCO_BASE, carregador=_Carregador([_pergunta(BANCO_GERAL, 9)]))
+    indice.aquecer()
+
+    assert [p["id"] for p in indice.perguntas(BANCO_GERAL)] == [9]
+    assert indice.pergunta(BANCO_GERAL, 1) is None
+
+
+def test_resolver_banco_por_cargo_departamento_ou_geral():
+    indice = IndiceQuiz(BANCO_BASE, carregador=_Carregador([_pergunta("ti", 1)]))
+    indice.aquecer()
+
+    assert indice.resolver_banco("Programador", "TI") == "ti"
+    assert indice.resolver_banco(None, "Marketing") == BANCO_GERAL
+    assert indice.perguntas("inexistente") == indice.perguntas(BANCO_GERAL)
+
+
+def test_leituras_nao_consultam_a_base_de_dados_dentro_do_ttl():
+    relogio = _Relogio()
+    carregador = _Carregador([_pergunta("ti", 1)])
+    indice = IndiceQuiz(BANCO_BASE, carregador=carregador, ttl=60, relogio=relogio)
+    indice.aquecer()
+
+    relogio.agora = 59
+    for _ in range(1000):
+        indice.perguntas("ti")
+
+    assert carregador.chamadas == 1
+
+
+def test_ttl_expirado_recarrega_em_segundo_plano():
+    relogio = _Relogio()
+    carregador = _Carregador([_pergunta("ti", 1)])
+    indice = IndiceQuiz(BANCO_BASE, carregador=carregador, ttl=60, relogio=relogio)
+    indice.aquecer()
+
+    carregador.perguntas = [_pergunta("ti", 1), _pergunta("ti", 2)]
+    relogio.agora = 61
+    # A leitura que deteta o TTL expirado ainda devolve o índice antigo
+    assert len(indice.perguntas("ti")) == 1
+    indice.aguardar_atualizacao(timeout=5)
+
+    assert carregador.chamadas == 2
+    assert len(indice.perguntas("ti")) == 2
+
+
+def test_falha_no_recarregamento_mantem_indice_atual():
+    relogio = _Relogio()
+    carregador = _Carregador([_pergunta("ti", 1)])
+    indice = IndiceQuiz(BANCO_BASE, carregador=carregador, ttl=60, relogio=relogio)
+    indice.aquecer()
+
+    carregador.perguntas = ConnectionError("base de dados indisponível")
+    relogio.agora = 61
+    indice.perguntas("ti")
+    indice.aguardar_atualizacao(timeout=5)
+    indice.perguntas("ti")
+    indice.aguardar_atualizacao(timeout=5)
+
+    assert [p["id"] for p in indice.perguntas("ti")] == [1]
+    # Só uma nova tentativa até ao próximo TTL
+    assert carregador.chamadas == 2
+
+
+# ---------------------------------------------------------------------------
+# Progresso do quiz
+# ---------------------------------------------------------------------------
+
+from actions.quiz import (  # noqa: E402
+    PROGRESSO_INICIAL,
+    codificar_progresso,
+    cursor_progresso,
+    mascara_acertos,
+    pontuacao_progresso,
+    quiz_concluido,
+    registar_resposta,
+)
+
+
+def test_progresso_inicial():
+    assert cursor_progresso(PROGRESSO_INICIAL) == 0
+    assert pontuacao_progresso(PROGRESSO_INICIAL) == 0
+    assert not quiz_concluido(PROGRESSO_INICIAL, 3)
+
+
+def test_registar_resposta_avanca_sempre_o_cursor():
+    progresso = registar_resposta(PROGRESSO_INICIAL, acertou=False)
+    progresso = registar_resposta(progresso, acertou=True)
+    progresso = registar_resposta(progresso, acertou=False)
+
+    assert cursor_progresso(progresso) == 3
+    assert mascara_acertos(progresso) == 0b010
+    assert pontuacao_progresso(progresso) == 1
+    assert quiz_concluido(progresso, 3)
+
+
+def test_codificar_progresso():
+    progresso = codificar_progresso(cursor=5, acertos=0b10101)
+
+    assert cursor_progresso(progresso) == 5
+    assert pontuacao_progresso(progresso) == 3
+
+
+def test_quiz_longo_termina_em_n_respostas():
+    total = 200
+    progresso = PROGRESSO_INICIAL
+    respostas = 0
+    while not quiz_concluido(progresso, total):
+        progresso = registar_resposta(progresso, acertou=respostas % 2 == 0)
+        respostas += 1
+
+    assert respostas == total
+    assert pontuacao_progresso(progresso) == total // 2
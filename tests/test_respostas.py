@@ -0,0 +1,81 @@
+"""
+Testes da extração da opção escolhida nas respostas ao quiz (actions/respostas.py).
+"""
+
+import pytest
+
+from actions.actions import QUIZ_PERGUNTAS
+from actions.respostas import (
+    METODO_APROXIMADO,
+    METODO_LETRA,
+    METODO_LETRA_MARCADA,
+    METODO_NENHUM,
+    METODO_PALAVRA,
+    METODO_TEXTO,
+    TabelaRespostas,
+    corrigir,
+    corrigir_lote,
+    extrair_resposta,
+    opcoes_da_pergunta,
+)
+
+MISSAO, VALORES, FERIAS = QUIZ_PERGUNTAS
+
+
+@pytest.mark.parametrize(
+    "pergunta,texto,letra,metodo",
+    [
+        (MISSAO, "b", "b", METODO_LETRA),
+        (MISSAO, "B)", "b", METODO_LETRA),
+        (MISSAO, "Opção C", "c", METODO_LETRA_MARCADA),
+        (MISSAO, "acho que é a C", "c", METODO_LETRA),
+        (MISSAO, "A resposta é B", "b", METODO_LETRA),
+        (MISSAO, "a", "a", METODO_LETRA),
+        (VALORES, "Competição interna", "b", METODO_TEXTO),
+        (VALORES, "acho que é inovação", "c", METODO_TEXTO),
+        (VALORES, "Trabalho em Equipa", "d", METODO_TEXTO),
+        (FERIAS, "22", "c", METODO_PALAVRA),
+        (FERIAS, "são 25 dias", "b", METODO_TEXTO),
+        (VALORES, "integridde", "a", METODO_APROXIMADO),
+    ],
+)
+def test_extrai_a_opcao(pergunta, texto, letra, metodo):
+    assert extrair_resposta(pergunta, texto) == (letra, metodo)
+
+
+@pytest.mark.parametrize(
+    "texto",
+    ["não sei", "sei lá", "opção z", "não é a b, é a c", "", None, "boa pergunta"],
+)
+def test_respostas_sem_opcao_nao_sao_reconhecidas(texto):
+    assert extrair_resposta(MISSAO, texto) == (None, METODO_NENHUM)
+
+
+def test_mensagens_com_a_letra_no_meio_nao_contam():
+    # Com a verificação por substring, qualquer "b" contava como a opção B
+    assert not corrigir(MISSAO, "não sei, é bastante difícil").correta
+    assert not corrigir(VALORES, "nao sei").correta
+
+
+def test_opcoes_lidas_do_enunciado_quando_faltam():
+    pergunta = {key: valor for key, valor in FERIAS.items() if key != "opcoes"}
+
+    assert opcoes_da_pergunta(pergunta) == {"a": "20 dias", "b": "25 dias", "c": "22 dias", "d": "30 dias"}
+    assert corrigir(pergunta, "22 dias").correta
+
+
+def test_palavras_comuns_a_varias_opcoes_nao_decidem():
+    tabela = TabelaRespostas([("a", "20 dias"), ("b", "25 dias")])
+
+    assert tabela.extrair("dias") == (None, METODO_NENHUM)
+    assert tabela.extrair("20") == ("a", METODO_PALAVRA)
+
+
+def test_corrigir_lote():
+    correcoes = corrigir_lote(
+        [(MISSAO, "b"), (VALORES, "opção a"), (FERIAS, "22 dias"), (FERIAS, "não sei")]
+    )
+
+    assert [c.correta for c in correcoes] == [True, False, True, False]
+    assert [c.id_pergunta for c in correcoes] == [1, 2, 3, 3]
+    assert correcoes[1].letra == "a"
@@ -0,0 +1,216 @@
+"""
+Testes das respostas no Teams: partes, indicador de escrita e Bot Connector (addons/saida_teams.py).
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from aiohttp import web
+
+from actions.templates import TEMPLATES
+from addons.saida_teams import TAMANHO_PARTE, ClienteBotConnector, TurnoTeams, dividir_em_partes
+
+# ---------------------------------------------------------------------------
+# Partes
+# ---------------------------------------------------------------------------
+
+
+def test_boas_vindas_dividida_sem_separar_titulos_das_listas():
+    partes = dividir_em_partes(TEMPLATES.renderizar("boas_vindas", ", Ana"), tamanho=200)
+
+    assert partes[0].startswith("👋 Olá, Ana!")
+    assert len(partes) == 4
+    assert partes[1].startswith("**As etapas do seu onboarding são:**\n\n1. 📋")
+    assert partes[2].startswith("Posso ajudá-lo/a com:\n• 🏢")
+    assert partes[-1] == "Como posso ajudá-lo/a hoje?"
+
+
+def test_mensagens_das_actions_publicadas_numa_so_parte():
+    for chave in ("boas_vindas", "etapa_primeiro_dia", "etapa_primeira_semana"):
+        mensagem = TEMPLATES.renderizar(chave, ", Ana")
+        assert dividir_em_partes(mensagem, TAMANHO_PARTE) == [mensagem.strip()]
+
+
+def test_partes_juntam_paragrafos_curtos_e_nao_cortam_os_longos():
+    longo = "x" * 500
+
+    assert dividir_em_partes("Olá!\n\nTudo bem?\n\n\n\n", tamanho=200) == ["Olá!\n\nTudo bem?"]
+    assert dividir_em_partes(f"Olá!\n\n{longo}\n\nAté já.", tamanho=200) == ["Olá!", longo, "Até já."]
+    assert dividir_em_partes("", tamanho=200) == []
+
+
+# ---------------------------------------------------------------------------
+# Bot Connector
+# ---------------------------------------------------------------------------
+
+
+@asynccontextmanager
+async def _bot_connector_stub(estado_atividades=201):
+    """Stub do endpoint de tokens e de ``POST /v3/conversations/{id}/activities``."""
+    tokens = []
+    recebidas = []
+
+    async def token(pedido):
+        tokens.append(dict(await pedido.post()))
+        return web.json_response({"access_token": f"token-{len(tokens)}", "expires_in": 3600})
+
+    async def atividades(pedido):
+        recebidas.append((pedido.match_info["conversa"], pedido.headers.get("Authorization"), await pedido.json()))
+        return web.json_response({"id": str(len(recebidas))}, status=estado_atividades)
+
+    app = web.Application()
+    app.router.add_post("/token", token)
+    app.router.add_post("/v3/conversations/{conversa}/activities", atividades)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    porta = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{porta}", tokens, recebidas
+    finally:
+        await runner.cleanup()
+
+
+def test_cliente_publica_com_o_token_em_cache():
+    async def cenario():
+        async with _bot_connector_stub() as (url, tokens, recebidas):
+            cliente = ClienteBotConnector("app", "segredo", url_token=f"{url}/token")
+            try:
+                resultados = [
+                    await cliente.publicar(f"{url}/v3/", "a:1x;messageid=2", {"type": "typing"}),
+                    await cliente.publicar(f"{url}/v3/", "a:1x;messageid=2", {"type": "message", "text": "Olá"}),
+                ]
+            finally:
+                await cliente.fechar()
+            return resultados, tokens, recebidas
+
+    resultados, tokens, recebidas = asyncio.run(cenario())
+
+    assert resultados == [True, True]
+    assert len(tokens) == 1
+    assert tokens[0]["client_id"] == "app" and tokens[0]["scope"] == "https://api.botframework.com/.default"
+    assert [(conversa, autorizacao) for conversa, autorizacao, _ in recebidas] == [
+        ("a:1x;messageid=2", "Bearer token-1")
+    ] * 2
+    assert recebidas[1][2] == {"type": "message", "text": "Olá"}
+
+
+def test_cliente_sem_credenciais_nao_autentica_e_falha_sem_excecao():
+    async def cenario():
+        async with _bot_connector_stub(estado_atividades=403) as (url, tokens, recebidas):
+            cliente = ClienteBotConnector(None, None, url_token=f"{url}/token")
+            try:
+                resultado = await cliente.publicar(f"{url}/v3/", "a:1", {"type": "message"})
+            finally:
+                await cliente.fechar()
+            return resultado, tokens, recebidas
+
+    resultado, tokens, recebidas = asyncio.run(cenario())
+
+    assert resultado is False
+    assert tokens == []
+    assert recebidas[0][1] is None
+
+
+# ---------------------------------------------------------------------------
+# Turno
+# ---------------------------------------------------------------------------
+
+
+class _ClienteFalso:
+    def __init__(self, atraso=0.0):
+        self.atraso = atraso
+        self.publicadas = []
+
+    async def publicar(self, url_base, id_conversa, atividade):
+        await asyncio.sleep(self.atraso)
+        self.publicadas.append(atividade.get("text", atividade["type"]))
+        return True
+
+
+def _turno(cliente, **opcoes):
+    return TurnoTeams(cliente, "https://smba/v3/", "a:1", {"id": "28:bot"}, "29:ana", **opcoes)
+
+
+def test_indicador_de_escrita_publicado_logo_e_repetido_num_turno_lento():
+    cliente = _ClienteFalso()
+
+    async def cenario():
+        turno = _turno(cliente, intervalo=0.05)
+        turno.iniciar()
+        await asyncio.sleep(0.01)
+        primeiro = list(cliente.publicadas)
+        # NLU, políticas e action server lentos
+        await asyncio.sleep(0.17)
+        await turno.enviar({"type": "message", "text": "Olá!"})
+        await turno.terminar()
+        return primeiro, turno
+
+    primeiro, turno = asyncio.run(cenario())
+
+    assert primeiro == ["typing"]
+    assert cliente.publicadas[-1] == "Olá!"
+    assert 3 <= turno.indicadores_enviados <= 5
+    assert turno.respostas_enviadas == 1
+
+
+def test_respostas_seguem_por_ordem_depois_do_indicador():
+    # Cada pedido demora 20 ms: as partes esperam pelo typing em curso
+    cliente = _ClienteFalso(atraso=0.02)
+
+    async def cenario():
+        turno = _turno(cliente, intervalo=10)
+        turno.iniciar()
+        await asyncio.sleep(0)
+        await asyncio.gather(*(turno.enviar({"type": "message", "text": f"parte {i}"}) for i in range(3)))
+        await turno.terminar()
+
+    asyncio.run(cenario())
+
+    assert cliente.publicadas == ["typing", "parte 0", "parte 1", "parte 2"]
+
+
+def test_indicador_para_no_fim_do_turno_e_na_duracao_maxima():
+    cliente = _ClienteFalso()
+
+    async def cenario():
+        turno = _turno(cliente, intervalo=0.02, duracao_maxima=0.05)
+        turno.iniciar()
+        await asyncio.sleep(0.2)
+        enviados = turno.indicadores_enviados
+        await turno.terminar()
+
+        outro = _turno(cliente, intervalo=0.02)
+        outro.iniciar()
+        await asyncio.sleep(0.01)
+        await outro.terminar()
+        await asyncio.sleep(0.1)
+        return enviados, outro.indicadores_enviados
+
+    enviados, depois_do_fim = asyncio.run(cenario())
+
+    assert enviados <= 3
+    assert depois_do_fim == 1
+
+
+def test_canal_publica_o_indicador_e_as_partes_pelo_turno():
+    pytest.importorskip("rasa")
+    from rasa.core.channels.botframework import BotFramework
+    from rasa.core.channels.channel import UserMessage
+
+    from addons.canais import com_escrita
+
+    cliente = _ClienteFalso()
+    original = BotFramework("app", "segredo", {"id": "a:1"}, {"id": "28:bot"}, "https://smba.trafficmanager.net/emea")
+
+    async def on_new_message(mensagem):
+        await mensagem.output_channel.send_response(
+            mensagem.sender_id, {"text": TEMPLATES.renderizar("boas_vindas", ", Ana")}
+        )
+
+    asyncio.run(com_escrita(on_new_message, cliente)(UserMessage("olá", original, sender_id="29:ana")))
+
+    assert cliente.publicadas[0] == "typing"
+    assert cliente.publicadas[1:] == dividir_em_partes(TEMPLATES.renderizar("boas_vindas", ", Ana"))
@@ -0,0 +1,82 @@
+"""
+Testes do arranque do action server com vários processos.
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork") or not Path("/proc/self/task").exists(),
+    reason="requer fork e /proc (Linux)",
+)
+
+
+def _porta_livre():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _filhos(pid):
+    caminho = Path(f"/proc/{pid}/task/{pid}/children")
+    return caminho.read_text().split() if caminho.exists() else []
+
+
+def _esperar(condicao, timeout=20.0):
+    prazo = time.monotonic() + timeout
+    while time.monotonic() < prazo:
+        if condicao():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def _saudavel(porta):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{porta}/health", timeout=1) as resposta:
+            return resposta.status == 200
+    except OSError:
+        return False
+
+
+def test_workers_partilham_a_porta_e_escalam_por_sinais():
+    porta = _porta_livre()
+    ambiente = {k: v for k, v in os.environ.items() if k not in ("METRICS_PORT", "DB_HOST")}
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "actions.servidor", "--host", "127.0.0.1", "--port", str(porta), "--workers", "2"],
+        cwd=RAIZ,
+        env=ambiente,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        assert _esperar(lambda: _saudavel(porta))
+        assert _esperar(lambda: len(_filhos(processo.pid)) == 2)
+
+        processo.send_signal(signal.SIGTTIN)
+        assert _esperar(lambda: len(_filhos(processo.pid)) == 3)
+
+        processo.send_signal(signal.SIGTTOU)
+        assert _esperar(lambda: len(_filhos(processo.pid)) == 2)
+
+        # Um worker que morra é substituído
+        os.kill(int(_filhos(processo.pid)[0]), signal.SIGKILL)
+        assert _esperar(lambda: len(_filhos(processo.pid)) == 2)
+        assert _saudavel(porta)
+
+        processo.send_signal(signal.SIGTERM)
+        assert processo.wait(timeout=30) == 0
+    finally:
+        if processo.poll() is None:
+            processo.kill()
+            processo.wait()
@@ -0,0 +1,65 @@
+"""
+Testes do registo de templates pré-compilados das custom actions.
+"""
+
+import pytest
+
+from actions.templates import TEMPLATES, TEMPLATES_PADRAO, RegistoTemplates, Template
+
+
+def test_template_com_um_campo_fica_prefixo_e_sufixo():
+    template = Template("t", "Olá{nome}! Bem-vindo(a).")
+
+    assert template.campos == ("nome",)
+    assert template.literais == ("Olá", "! Bem-vindo(a).")
+
+
+def test_template_sem_campos():
+    template = Template("t", "Texto estático")
+
+    assert template.campos == ()
+    assert template.renderizar({}) == "Texto estático"
+
+
+def test_template_com_varios_campos_termina_num_campo():
+    template = Template("t", "Olá{nome}, reunião{gestor_info}")
+
+    assert template.campos == ("nome", "gestor_info")
+    assert template.renderizar({"nome": ", Ana", "gestor_info": " com Rui"}) == (
+        "Olá, Ana, reunião com Rui"
+    )
+
+
+@pytest.mark.parametrize("chave", sorted(TEMPLATES_PADRAO))
+def test_renderizacao_igual_a_format(chave):
+    campos = TEMPLATES.obter(chave).campos
+    valores = {campo: f"<{campo}>" for campo in campos if campo != "nome"}
+
+    esperado = TEMPLATES_PADRAO[chave].format(nome=", Ana", **valores)
+
+    assert TEMPLATES.renderizar(chave, ", Ana", **valores) == esperado
+
+
+def test_cache_reutiliza_mensagens_renderizadas():
+    registo = RegistoTemplates(TEMPLATES_PADRAO, tamanho_cache=2)
+
+    primeira = registo.renderizar("boas_vindas", ", Ana")
+    segunda = registo.renderizar("boas_vindas", ", Ana")
+
+    assert primeira is segunda
+    assert registo.estatisticas_cache()["acertos"] == 1
+    assert registo.estatisticas_cache()["falhas"] == 1
+
+
+def test_cache_limitada():
+    registo = RegistoTemplates(TEMPLATES_PADRAO, tamanho_cache=2)
+
+    for nome in (", Ana", ", Rui", ", Eva", ""):
+        registo.renderizar("feedback", nome)
+
+    assert registo.estatisticas_cache()["tamanho"] == 2
+
+
+def test_template_inexistente():
+    with pytest.raises(KeyError):
+        TEMPLATES.renderizar("nao_existe", "")
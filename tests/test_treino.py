@@ -0,0 +1,180 @@
+"""
+Testes do treino incremental (addons/treino.py) e da cache de featurização.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from addons.cache_featurizacao import ArmazemConteudo, LinguagemComCache
+from addons.treino import (
+    AFINACAO,
+    TREINO_COMPLETO,
+    ambiente_treino,
+    comando_treino,
+    decidir,
+    impressao_config,
+    impressao_rotulos,
+    novo_estado,
+)
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+class _Nlp:
+    """Modelo falso: o "Doc" é o texto em maiúsculas."""
+
+    vocab = "vocabulario"
+
+    def __init__(self):
+        self.analisados = []
+
+    def pipe(self, textos, **kwargs):
+        for texto in textos:
+            self.analisados.append(texto)
+            yield texto.upper()
+
+    def __call__(self, texto):
+        return texto.upper()
+
+
+def _com_cache(nlp, diretorio, identificacao="modelo-1"):
+    return LinguagemComCache(
+        nlp,
+        ArmazemConteudo(diretorio),
+        identificacao=identificacao,
+        serializar=lambda doc: doc.encode("utf-8"),
+        desserializar=lambda conteudo: conteudo.decode("utf-8"),
+    )
+
+
+def test_so_os_textos_novos_passam_pelo_modelo(tmp_path):
+    nlp = _Nlp()
+    assert list(_com_cache(nlp, tmp_path).pipe(["olá", "bom dia"], batch_size=50)) == ["OLÁ", "BOM DIA"]
+
+    # Novo processo de treino, com um exemplo novo no meio
+    nlp = _Nlp()
+    docs = list(_com_cache(nlp, tmp_path).pipe(["olá", "boa tarde", "bom dia"]))
+
+    assert docs == ["OLÁ", "BOA TARDE", "BOM DIA"]
+    assert nlp.analisados == ["boa tarde"]
+
+
+def test_outro_modelo_nao_reutiliza_a_cache(tmp_path):
+    list(_com_cache(_Nlp(), tmp_path, "modelo-1").pipe(["olá"]))
+    nlp = _Nlp()
+
+    list(_com_cache(nlp, tmp_path, "modelo-2").pipe(["olá"]))
+
+    assert nlp.analisados == ["olá"]
+
+
+def test_restantes_atributos_sao_os_do_modelo(tmp_path):
+    linguagem = _com_cache(_Nlp(), tmp_path)
+
+    assert linguagem.vocab == "vocabulario"
+    assert linguagem("oi") == "OI"
+    assert not list(tmp_path.rglob("*"))
+
+
+def test_cache_com_spacy(tmp_path):
+    spacy = pytest.importorskip("spacy")
+    nlp = spacy.blank("pt")
+
+    list(LinguagemComCache(nlp, ArmazemConteudo(tmp_path)).pipe(["olá, bom dia"]))
+    docs = list(LinguagemComCache(nlp, ArmazemConteudo(tmp_path)).pipe(["olá, bom dia"]))
+
+    assert [token.text for token in docs[0]] == ["olá", ",", "bom", "dia"]
+
+
+# ---------------------------------------------------------------------------
+# Decisão entre treino completo e afinação
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def projeto(tmp_path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "config.yml").write_text((RAIZ / "config.yml").read_text(encoding="utf-8"), encoding="utf-8")
+    (tmp_path / "domain.yml").write_text((RAIZ / "domain.yml").read_text(encoding="utf-8"), encoding="utf-8")
+    (tmp_path / "data" / "nlu.yml").write_text((RAIZ / "data" / "nlu.yml").read_text(encoding="utf-8"), encoding="utf-8")
+    modelo = tmp_path / "models" / "20261018-120000.tar.gz"
+    modelo.parent.mkdir()
+    modelo.write_bytes(b"")
+    return tmp_path
+
+
+def _impressoes(projeto):
+    return (
+        impressao_config(projeto / "config.yml"),
+        impressao_rotulos(projeto / "domain.yml", [projeto / "data" / "nlu.yml"]),
+    )
+
+
+def _estado(projeto, afinacoes=0):
+    config, rotulos = _impressoes(projeto)
+    return {
+        "modelo": str(projeto / "models" / "20261018-120000.tar.gz"),
+        "config": config,
+        "rotulos": rotulos,
+        "afinacoes": afinacoes,
+    }
+
+
+def test_novos_exemplos_de_intents_existentes_afinam_o_modelo(projeto):
+    estado = _estado(projeto)
+    nlu = projeto / "data" / "nlu.yml"
+    nlu.write_text(nlu.read_text(encoding="utf-8").replace("      - olá\n", "      - olá\n      - olá olá\n", 1), encoding="utf-8")
+    # Mudar só as épocas também permite a afinação
+    config = projeto / "config.yml"
+    config.write_text(config.read_text(encoding="utf-8").replace("epochs: 100", "epochs: 50"), encoding="utf-8")
+
+    decisao = decidir(estado, *_impressoes(projeto))
+
+    assert decisao.modo == AFINACAO
+    comando = comando_treino(
+        decisao, estado, projeto / "config.yml", projeto / "domain.yml", projeto / "data", projeto / "models", 0.2
+    )
+    assert comando[-4:] == ["--finetune", estado["modelo"], "--epoch-fraction", "0.2"]
+
+
+def test_nova_intent_obriga_a_treino_completo(projeto):
+    estado = _estado(projeto)
+    with open(projeto / "data" / "nlu.yml", "a", encoding="utf-8") as ficheiro:
+        ficheiro.write("\n  - intent: pedir_ferias\n    examples: |\n      - quero marcar férias\n")
+
+    assert decidir(estado, *_impressoes(projeto)).modo == TREINO_COMPLETO
+
+
+def test_alteracao_ao_pipeline_obriga_a_treino_completo(projeto):
+    estado = _estado(projeto)
+    config = projeto / "config.yml"
+    config.write_text(config.read_text(encoding="utf-8").replace("max_ngram: 4", "max_ngram: 5"), encoding="utf-8")
+
+    assert decidir(estado, *_impressoes(projeto)).modo == TREINO_COMPLETO
+
+
+def test_treino_completo_periodico_e_sem_modelo(projeto):
+    impressoes = _impressoes(projeto)
+
+    assert decidir(_estado(projeto, afinacoes=5), *impressoes, max_afinacoes=5).modo == TREINO_COMPLETO
+    assert decidir({}, *impressoes).modo == TREINO_COMPLETO
+    assert decidir(_estado(projeto), *impressoes, forcar_completo=True).modo == TREINO_COMPLETO
+    assert "--finetune" not in comando_treino(decidir({}, *impressoes), {}, *map(Path, "abcd"))
+
+
+def test_novo_estado_conta_as_afinacoes_seguidas(projeto):
+    estado = _estado(projeto, afinacoes=2)
+    config, rotulos = _impressoes(projeto)
+    modelo = projeto / "models" / "novo.tar.gz"
+
+    assert novo_estado(estado, decidir(estado, config, rotulos), modelo, config, rotulos)["afinacoes"] == 3
+    assert novo_estado(estado, decidir({}, config, rotulos), modelo, config, rotulos)["afinacoes"] == 0
+
+
+def test_ambiente_treino_define_as_caches_sem_sobrepor():
+    ambiente = ambiente_treino({"PYTHONPATH": "/outro", "RASA_CACHE_DIRECTORY": "/ci/rasa"})
+
+    assert ambiente["RASA_CACHE_DIRECTORY"] == "/ci/rasa"
+    assert ambiente["CACHE_FEATURIZACAO"].endswith(".cache/featurizacao")
+    assert ambiente["PYTHONPATH"].split(":") == [str(RAIZ), "/outro"]